@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+
+@lru_cache(maxsize=None)
+def get_zone(tz_name: str) -> ZoneInfo:
+    """The ZoneInfo for an IANA timezone name, built once per name."""
+    return ZoneInfo(tz_name)
+
+
+class Clock:
+    """The bot's source of wall-clock time.
+
+    Anything that depends on the date or time of day (reminders, streaks,
+    briefings, restock dates, debt records) reads it from the bot's clock
+    rather than calling datetime.now(), so a VirtualClock can stand in for
+    it. Times are timezone-aware; without a timezone name, the configured
+    timezone is used.
+    """
+
+    def __init__(self, default_tz: str = 'UTC'):
+        self.default_tz = default_tz
+
+    def utcnow(self) -> datetime:
+        return datetime.now(timezone.utc)
+
+    def zone(self, tz_name: str = None) -> ZoneInfo:
+        return get_zone(tz_name or self.default_tz)
+
+    def now(self, tz_name: str = None) -> datetime:
+        """Current time in a timezone (defaults to the configured timezone)."""
+        return self.utcnow().astimezone(self.zone(tz_name))
+
+    def to_local(self, dt: datetime, tz_name: str = None) -> datetime:
+        """Convert a datetime to a timezone. Naive datetimes are taken to be UTC."""
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt.astimezone(self.zone(tz_name))
+
+    def to_utc(self, dt: datetime) -> datetime:
+        """Convert a datetime to UTC. Naive datetimes are taken to be in the configured timezone."""
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=self.zone())
+        return dt.astimezone(timezone.utc)
+
+
+class VirtualClock(Clock):
+    """A clock that stands still until it is moved, for simulations and soak tests.
+
+    Give one to the bot in place of its Clock and call advance() between
+    scheduler ticks to play through days of reminders, expiries, briefings
+    and restock reminders in seconds.
+    """
+
+    def __init__(self, start: datetime, default_tz: str = 'UTC'):
+        super().__init__(default_tz)
+        self.set(start)
+
+    def utcnow(self) -> datetime:
+        return self._now
+
+    def set(self, when: datetime):
+        """Jump to a point in time. Naive datetimes are taken to be in the configured timezone."""
+        self._now = self.to_utc(when)
+
+    def advance(self, delta: timedelta) -> datetime:
+        """Move the clock forward and return the new time in UTC."""
+        self._now += delta
+        return self._now
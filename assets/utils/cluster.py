@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+from functools import wraps
+
+from assets.utils.metrics import registry
+
+# Just get the logger without adding handlers
+logger = logging.getLogger('gentle_habits')
+
+# Name of the lease whose holder runs the channel-wide scheduled jobs
+SCHEDULER_LEASE = 'scheduler'
+
+leader_changes = registry.counter(
+    'gentle_habits_cluster_leader_changes_total',
+    'Times this process gained or lost the scheduler lease',
+    ('change',)
+)
+
+
+def cluster_shard_ids(cluster_id: int, cluster_count: int, shard_count: int) -> list:
+    """The shards a cluster process connects, every cluster_count-th one starting at its id."""
+    return [shard_id for shard_id in range(shard_count) if shard_id % cluster_count == cluster_id]
+
+
+class Cluster:
+    """This process's place in a multi-process deployment.
+
+    Each of `count` processes runs a subset of the Discord shards. Global
+    jobs (habit reminders, the streak board, the debt dashboard) run only
+    on the process holding a lease row in SQLite, which it renews every
+    `lease_ttl / 3` seconds; if it stops renewing, another process takes the
+    lease once it expires. Per-user work is split by user id, so every user
+    belongs to exactly one process. With a single process there is no
+    election and that process is always the leader.
+    """
+
+    def __init__(self, bot, cluster_id: int = 0, count: int = 1, lease_ttl: float = 30.0):
+        if not 0 <= cluster_id < count:
+            raise ValueError(f"CLUSTER_ID must be between 0 and {count - 1}, got {cluster_id}")
+        self.bot = bot
+        self.id = cluster_id
+        self.count = count
+        self.lease_ttl = lease_ttl
+        self.renew_interval = lease_ttl / 3
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:cluster-{cluster_id}"
+        self._leader_until = 0.0  # monotonic time our hold on the lease is trusted until
+        self._task = None
+        registry.callback(
+            'gentle_habits_cluster_leader', 'Whether this process runs the global scheduled jobs', 'gauge',
+            lambda: int(self.is_leader)
+        )
+
+    @property
+    def clustered(self) -> bool:
+        return self.count > 1
+
+    @property
+    def is_leader(self) -> bool:
+        return not self.clustered or time.monotonic() < self._leader_until
+
+    def owns_user(self, user_id: int) -> bool:
+        """Whether per-user work for this user runs in this process."""
+        return user_id % self.count == self.id
+
+    def user_filter(self, column: str = 'user_id') -> tuple:
+        """SQL condition and parameters selecting the users this process owns."""
+        return f"{column} % ? = ?", (self.count, self.id)
+
+    def leader_only(self, job):
+        """Wrap a scheduled coroutine so it only runs on the leader."""
+        @wraps(job)
+        async def wrapper(*args, **kwargs):
+            if not self.is_leader:
+                logger.debug(f"Skipping {job.__name__}: not the cluster leader")
+                return None
+            return await job(*args, **kwargs)
+        return wrapper
+
+    async def start(self):
+        """Try to take the lease straight away, then keep renewing it in the background."""
+        if not self.clustered:
+            return
+        await self._renew()
+        self._task = asyncio.create_task(self._renew_loop(), name="cluster-lease")
+        logger.info(
+            f"Cluster process {self.id + 1}/{self.count} started as "
+            f"{'leader' if self.is_leader else 'follower'} ({self.holder})"
+        )
+
+    async def stop(self):
+        """Stop renewing and hand the lease back so another process can take over at once."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        if self._leader_until:
+            try:
+                async with self.bot.db_pool.acquire() as db:
+                    await db.execute(
+                        'UPDATE cluster_leases SET expires_at = 0 WHERE name = ? AND holder = ?',
+                        (SCHEDULER_LEASE, self.holder)
+                    )
+                    await db.commit()
+            except Exception as e:
+                logger.error(f"Error releasing cluster lease: {e}")
+            self._leader_until = 0.0
+
+    async def _renew_loop(self):
+        while True:
+            await asyncio.sleep(self.renew_interval)
+            try:
+                await self._renew()
+            except Exception as e:
+                logger.error(f"Error renewing cluster lease: {e}")
+
+    async def _renew(self):
+        """Take or extend the lease if it is free, expired or already ours."""
+        started = time.monotonic()
+        now = time.time()
+        async with self.bot.db_pool.acquire() as db:
+            await db.execute(
+                '''INSERT INTO cluster_leases (name, holder, expires_at) VALUES (?, ?, ?)
+                   ON CONFLICT(name) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at
+                   WHERE cluster_leases.holder = excluded.holder OR cluster_leases.expires_at < ?''',
+                (SCHEDULER_LEASE, self.holder, now + self.lease_ttl, now)
+            )
+            await db.commit()
+            cursor = await db.execute('SELECT holder FROM cluster_leases WHERE name = ?', (SCHEDULER_LEASE,))
+            row = await cursor.fetchone()
+
+        was_leader = self.is_leader
+        if row and row[0] == self.holder:
+            # Stop trusting the lease a renewal early, so two leaders never overlap
+            self._leader_until = started + self.lease_ttl - self.renew_interval
+        else:
+            self._leader_until = 0.0
+
+        if self.is_leader and not was_leader:
+            leader_changes.labels('gained').inc()
+            logger.info(f"Cluster process {self.id} is now the leader")
+        elif was_leader and not self.is_leader:
+            leader_changes.labels('lost').inc()
+            logger.warning(f"Cluster process {self.id} lost the leader lease to {row[0] if row else 'nobody'}")
@@ -0,0 +1,19 @@
+import hashlib
+import json
+
+from discord import app_commands
+
+
+def command_tree_hash(tree: app_commands.CommandTree) -> str:
+    """A hash of the global commands' payloads, as they would be sent to Discord by tree.sync().
+
+    Names, descriptions, options, choices, permissions and context menus
+    all feed into it, so it changes exactly when a sync would change
+    what Discord shows.
+    """
+    payload = sorted(
+        (command.to_dict(tree) for command in tree.get_commands()),
+        key=lambda command: (command.get('type', 1), command['name'])
+    )
+    encoded = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
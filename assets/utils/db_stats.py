@@ -0,0 +1,221 @@
+import logging
+import re
+import time
+from collections import deque
+from datetime import datetime
+
+from assets.utils.metrics import registry
+
+# Just get the logger without adding handlers
+logger = logging.getLogger('gentle_habits')
+
+db_acquire_wait = registry.histogram(
+    'gentle_habits_db_acquire_wait_seconds',
+    'Time spent waiting for a pooled database connection',
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+)
+db_hold_time = registry.histogram(
+    'gentle_habits_db_hold_seconds',
+    'Time a pooled database connection was held by one caller',
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+statement_latency = registry.histogram(
+    'gentle_habits_db_statement_seconds',
+    'Time spent executing and fetching SQL statements on pooled connections, by statement kind',
+    ('kind',),
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+)
+slow_statements = registry.counter(
+    'gentle_habits_db_slow_statements_total',
+    'SQL statements slower than DB_SLOW_QUERY_MS'
+)
+
+# Statements worth asking the query planner about
+_EXPLAINABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH', 'REPLACE')
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace so the same statement written differently groups together."""
+    return re.sub(r'\s+', ' ', sql).strip()
+
+
+def statement_kind(sql: str) -> str:
+    match = re.match(r'\s*(\w+)', sql)
+    return match.group(1).upper() if match else 'UNKNOWN'
+
+
+class QueryStats:
+    """Per-statement timings and a log of slow statements with their query plans.
+
+    Statements are grouped by their whitespace-normalized SQL (values are
+    bound parameters, so this groups by query shape). The number of tracked
+    statements and remembered slow entries is capped.
+    """
+
+    def __init__(self, slow_ms: float = 100, max_statements: int = 500, max_slow: int = 50):
+        self.slow_seconds = slow_ms / 1000
+        self.max_statements = max_statements
+        self.statements = {}  # sql -> [calls, total_seconds, max_seconds]
+        self.slow_log = deque(maxlen=max_slow)  # dicts with sql, ms, plan, at
+        self._plans = {}  # sql -> EXPLAIN QUERY PLAN output, captured once per statement
+
+    def record(self, sql: str, seconds: float, new_call: bool = True) -> bool:
+        """Record time spent on a statement. Returns True if this part of it was slow."""
+        statement_latency.labels(statement_kind(sql)).observe(seconds)
+
+        entry = self.statements.get(sql)
+        if entry is None:
+            if len(self.statements) >= self.max_statements:
+                # Forget the statement with the least total time to make room
+                cheapest = min(self.statements, key=lambda key: self.statements[key][1])
+                del self.statements[cheapest]
+            entry = self.statements[sql] = [0, 0.0, 0.0]
+        if new_call:
+            entry[0] += 1
+        entry[1] += seconds
+        entry[2] = max(entry[2], seconds)
+
+        return seconds >= self.slow_seconds
+
+    def needs_plan(self, sql: str) -> bool:
+        return sql not in self._plans and statement_kind(sql) in _EXPLAINABLE
+
+    def log_slow(self, sql: str, seconds: float, plan: str = None):
+        slow_statements.inc()
+        if plan is not None:
+            self._plans[sql] = plan
+        plan = self._plans.get(sql)
+        self.slow_log.append({
+            'sql': sql,
+            'ms': seconds * 1000,
+            'plan': plan,
+            'at': datetime.now(),
+        })
+        logger.warning(f"Slow SQL ({seconds * 1000:.0f}ms): {sql[:200]}" + (f" | plan: {plan}" if plan else ""))
+
+    def top(self, count: int = 5) -> list:
+        """The statements with the most total time: (sql, calls, total_ms, avg_ms, max_ms)."""
+        ranked = sorted(self.statements.items(), key=lambda item: item[1][1], reverse=True)
+        return [
+            (sql, calls, total * 1000, total * 1000 / calls if calls else 0.0, longest * 1000)
+            for sql, (calls, total, longest) in ranked[:count]
+        ]
+
+
+class InstrumentedConnection:
+    """Wraps an aiosqlite connection so every statement it runs is timed.
+
+    Anything other than execute/executemany/execute_fetchall is passed
+    through to the underlying connection unchanged.
+    """
+
+    def __init__(self, connection, stats: QueryStats):
+        self._connection = connection
+        self._stats = stats
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def execute(self, sql: str, parameters=None):
+        return _TimedResult(self._execute(sql, parameters))
+
+    def executemany(self, sql: str, parameters):
+        return _TimedResult(self._timed(sql, None, self._connection.executemany(sql, parameters), explain=False))
+
+    async def execute_fetchall(self, sql: str, parameters=None):
+        cursor = await self._execute(sql, parameters)
+        try:
+            return await cursor.fetchall()
+        finally:
+            await cursor.close()
+
+    async def _execute(self, sql: str, parameters):
+        cursor = await self._timed(sql, parameters, self._connection.execute(sql, parameters))
+        return _TimedCursor(cursor, self, normalize_sql(sql), parameters)
+
+    async def _timed(self, sql: str, parameters, awaitable, explain: bool = True):
+        started = time.monotonic()
+        result = await awaitable
+        await self._record(normalize_sql(sql), parameters, time.monotonic() - started, explain=explain)
+        return result
+
+    async def _record(self, sql: str, parameters, seconds: float, new_call: bool = True, explain: bool = True):
+        if not self._stats.record(sql, seconds, new_call):
+            return
+        plan = None
+        if explain and self._stats.needs_plan(sql):
+            plan = await self._explain(sql, parameters)
+        self._stats.log_slow(sql, seconds, plan)
+
+    async def _explain(self, sql: str, parameters):
+        try:
+            cursor = await self._connection.execute(f'EXPLAIN QUERY PLAN {sql}', parameters)
+            rows = await cursor.fetchall()
+            await cursor.close()
+            return '; '.join(row[-1] for row in rows)
+        except Exception as e:
+            return f"(plan unavailable: {e})"
+
+
+class _TimedCursor:
+    """Cursor proxy that adds fetch time to the statement that produced it."""
+
+    def __init__(self, cursor, connection: InstrumentedConnection, sql: str, parameters):
+        self._cursor = cursor
+        self._connection = connection
+        self._sql = sql
+        self._parameters = parameters
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    async def _fetch(self, awaitable):
+        started = time.monotonic()
+        result = await awaitable
+        await self._connection._record(self._sql, self._parameters, time.monotonic() - started, new_call=False)
+        return result
+
+    async def fetchone(self):
+        return await self._fetch(self._cursor.fetchone())
+
+    async def fetchmany(self, size: int = None):
+        return await self._fetch(self._cursor.fetchmany(size))
+
+    async def fetchall(self):
+        return await self._fetch(self._cursor.fetchall())
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        while True:
+            rows = await self.fetchmany(self._cursor.arraysize)
+            if not rows:
+                break
+            for row in rows:
+                yield row
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self._cursor.close()
+
+
+class _TimedResult:
+    """Awaitable / async context manager, matching what aiosqlite's execute returns."""
+
+    def __init__(self, coro):
+        self._coro = coro
+        self._cursor = None
+
+    def __await__(self):
+        return self._coro.__await__()
+
+    async def __aenter__(self):
+        self._cursor = await self._coro
+        return self._cursor
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self._cursor is not None and hasattr(self._cursor, 'close'):
+            await self._cursor.close()
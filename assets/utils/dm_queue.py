@@ -0,0 +1,223 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+
+import aiohttp
+import discord
+
+# Just get the logger without adding handlers
+logger = logging.getLogger('gentle_habits')
+
+# Discord JSON error code for "Cannot send messages to this user" (DMs closed or bot blocked)
+CANNOT_SEND_TO_USER = 50007
+
+
+class DMDeliveryQueue:
+    """Central delivery service for outbound direct messages.
+
+    Senders enqueue a message and get back a future; a fixed pool of workers
+    drains the queue concurrently while discord.py's HTTP client keeps every
+    request inside its per-route bucket. That client already waits out 429s
+    and retries 5xx responses, so an HTTPException reaching the queue is
+    final; only connection errors and timeouts are retried here, with
+    backoff. Users whose DMs are closed are remembered so later sends are
+    skipped without touching the API.
+    """
+
+    def __init__(self, bot, workers: int = 4, max_retries: int = 3, closed_ttl_days: int = 7):
+        self.bot = bot
+        self.workers = max(1, workers)
+        self.max_retries = max_retries
+        self.closed_ttl = timedelta(days=closed_ttl_days)
+        self._queue = asyncio.Queue()
+        self._tasks = []
+        self._closed_dms = {}  # user_id -> datetime (UTC) when DMs were found closed
+        self._latencies = deque(maxlen=1000)  # seconds from enqueue to delivery
+        self.in_flight = 0
+        self.delivered = 0
+        self.failed = 0
+        self.skipped = 0
+
+    async def start(self):
+        """Load known closed DMs and start the worker pool."""
+        await self._load_closed_dms()
+        for index in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._worker(), name=f"dm-worker-{index}"))
+        logger.info(f"📬 DM delivery queue started with {self.workers} workers")
+
+    async def stop(self, timeout: float = 10.0):
+        """Give queued messages a chance to go out, then stop the workers."""
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"DM queue stopped with {self._queue.qsize()} undelivered messages")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    def enqueue(self, user, **send_kwargs) -> asyncio.Future:
+        """Queue a DM for a user object or user ID.
+
+        Returns a future resolving to the sent message, or None if the message
+        was skipped or could not be delivered. Callers that don't care about the
+        outcome can ignore it.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((user, send_kwargs, future, time.monotonic()))
+        return future
+
+    @property
+    def depth(self) -> int:
+        """Number of messages waiting for a worker."""
+        return self._queue.qsize()
+
+    def is_closed(self, user_id: int) -> bool:
+        """Check whether a user's DMs were recently found to be closed."""
+        marked_at = self._closed_dms.get(user_id)
+        if marked_at is None:
+            return False
+        if datetime.now(timezone.utc) - marked_at > self.closed_ttl:
+            # Give them another chance - they may have opened their DMs since
+            del self._closed_dms[user_id]
+            return False
+        return True
+
+    def stats(self) -> dict:
+        """Snapshot of queue depth, outcomes and delivery latency."""
+        latencies = sorted(self._latencies)
+
+        def percentile(p):
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+        return {
+            'queue_depth': self.depth,
+            'in_flight': self.in_flight,
+            'delivered': self.delivered,
+            'failed': self.failed,
+            'skipped': self.skipped,
+            'closed_dms': len(self._closed_dms),
+            'latency_p50': percentile(0.50),
+            'latency_p95': percentile(0.95),
+        }
+
+    async def _worker(self):
+        while True:
+            user, send_kwargs, future, enqueued_at = await self._queue.get()
+            self.in_flight += 1
+            try:
+                message = await self._deliver(user, send_kwargs)
+                if message is not None:
+                    self._latencies.append(time.monotonic() - enqueued_at)
+                if not future.done():
+                    future.set_result(message)
+            except asyncio.CancelledError:
+                if not future.done():
+                    future.cancel()
+                raise
+            except Exception as e:
+                logger.error(f"Unexpected error in DM worker: {e}", exc_info=True)
+                self.failed += 1
+                if not future.done():
+                    future.set_result(None)
+            finally:
+                self.in_flight -= 1
+                self._queue.task_done()
+
+    async def _deliver(self, user, send_kwargs):
+        """Send one DM, retrying connection errors and timeouts."""
+        user_id = user if isinstance(user, int) else user.id
+
+        if self.is_closed(user_id):
+            self.skipped += 1
+            return None
+
+        if isinstance(user, int):
+            user = self.bot.get_user(user_id)
+            if not user:
+                try:
+                    user = await self.bot.fetch_user(user_id)
+                except discord.NotFound:
+                    logger.warning(f"Could not find user with ID {user_id} for DM delivery")
+                    self.failed += 1
+                    return None
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                message = await user.send(**send_kwargs)
+                self.delivered += 1
+                return message
+            except discord.Forbidden as e:
+                if e.code == CANNOT_SEND_TO_USER:
+                    logger.info(f"DMs are closed for user {user_id}, skipping future messages for now")
+                    await self._mark_closed(user_id)
+                    self.skipped += 1
+                else:
+                    logger.error(f"Forbidden from sending DM to user {user_id}: {e}")
+                    self.failed += 1
+                return None
+            except discord.HTTPException as e:
+                # discord.py has already retried rate limits and server errors
+                logger.error(f"Failed to send DM to user {user_id}: {e.status} - {e.text}")
+                self.failed += 1
+                return None
+            except discord.RateLimited as e:
+                # Longer than the client's max_ratelimit_timeout, so not worth waiting for
+                logger.error(f"Failed to send DM to user {user_id}: rate limited for {e.retry_after:.0f}s")
+                self.failed += 1
+                return None
+            except (OSError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == self.max_retries:
+                    logger.error(f"Failed to send DM to user {user_id}: {e!r}")
+                    self.failed += 1
+                    return None
+                delay = self._backoff(attempt)
+                logger.warning(f"DM to user {user_id} failed ({e!r}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+        return None
+
+    def _backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter."""
+        return random.uniform(0, min(30.0, 1.0 * (2 ** attempt)))
+
+    async def _load_closed_dms(self):
+        try:
+            async with self.bot.db_pool.acquire() as db:
+                cursor = await db.execute('SELECT user_id, marked_at FROM dm_closed_users')
+                for user_id, marked_at in await cursor.fetchall():
+                    self._closed_dms[user_id] = datetime.fromisoformat(marked_at)
+        except Exception as e:
+            logger.error(f"Failed to load closed DM list: {e}")
+
+    async def _mark_closed(self, user_id: int):
+        marked_at = datetime.now(timezone.utc)
+        self._closed_dms[user_id] = marked_at
+        try:
+            async with self.bot.db_pool.acquire() as db:
+                await db.execute(
+                    '''INSERT INTO dm_closed_users (user_id, marked_at) VALUES (?, ?)
+                       ON CONFLICT(user_id) DO UPDATE SET marked_at = excluded.marked_at''',
+                    (user_id, marked_at.isoformat())
+                )
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Failed to persist closed DMs for user {user_id}: {e}")
+
+    async def clear_closed(self, user_id: int):
+        """Forget that a user's DMs were closed (e.g. after they interact with the bot again)."""
+        if self._closed_dms.pop(user_id, None) is None:
+            return
+        try:
+            async with self.bot.db_pool.acquire() as db:
+                await db.execute('DELETE FROM dm_closed_users WHERE user_id = ?', (user_id,))
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Failed to clear closed DMs for user {user_id}: {e}")
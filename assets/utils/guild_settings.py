@@ -0,0 +1,86 @@
+import logging
+from typing import Optional
+
+# Just get the logger without adding handlers
+logger = logging.getLogger('gentle_habits')
+
+# Settings a server can hold, besides its id
+FIELDS = ('reminder_channel_id', 'debt_tracker_channel_id', 'streak_message_id')
+
+# guild_id given to habits and debt accounts that existed before rows were
+# scoped to a server, until a server adopts them
+LEGACY_GUILD_ID = 0
+
+
+class GuildSettings:
+    """One server's channels, and the streak board message kept up to date there."""
+    __slots__ = ('guild_id',) + FIELDS
+
+    def __init__(
+        self,
+        guild_id: int,
+        reminder_channel_id: int = None,
+        debt_tracker_channel_id: int = None,
+        streak_message_id: int = None
+    ):
+        self.guild_id = guild_id
+        self.reminder_channel_id = reminder_channel_id
+        self.debt_tracker_channel_id = debt_tracker_channel_id
+        self.streak_message_id = streak_message_id
+
+
+class GuildSettingsCache:
+    """Per-server settings from the guild_settings table, held in memory.
+
+    The table is read once by load() and written through by update(), so
+    reminders and board renders look channels up without touching the
+    database. In a cluster, settings changed by another process are picked
+    up the next time load() runs.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self._settings = {}  # guild_id -> GuildSettings
+
+    async def load(self):
+        """Replace the cache with the contents of the guild_settings table."""
+        async with self.bot.db_pool.acquire() as db:
+            cursor = await db.execute(
+                f"SELECT guild_id, {', '.join(FIELDS)} FROM guild_settings"
+            )
+            rows = await cursor.fetchall()
+        self._settings = {row[0]: GuildSettings(*row) for row in rows}
+
+    def get(self, guild_id: int) -> Optional[GuildSettings]:
+        return self._settings.get(guild_id)
+
+    def all(self) -> list:
+        return list(self._settings.values())
+
+    def with_channel(self, field: str) -> list:
+        """Servers that have the given channel set, e.g. 'reminder_channel_id'."""
+        return [settings for settings in self._settings.values() if getattr(settings, field)]
+
+    async def update(self, guild_id: int, **fields) -> GuildSettings:
+        """Save some of a server's settings, creating its row if needed."""
+        unknown = set(fields) - set(FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown guild settings: {', '.join(sorted(unknown))}")
+
+        columns = list(fields)
+        async with self.bot.db_pool.acquire() as db:
+            await db.execute(
+                f'''INSERT INTO guild_settings (guild_id, {', '.join(columns)})
+                    VALUES (?, {', '.join('?' for _ in columns)})
+                    ON CONFLICT(guild_id) DO UPDATE SET
+                        {', '.join(f'{column} = excluded.{column}' for column in columns)}''',
+                (guild_id, *fields.values())
+            )
+            await db.commit()
+
+        settings = self._settings.get(guild_id)
+        if settings is None:
+            settings = self._settings[guild_id] = GuildSettings(guild_id)
+        for field, value in fields.items():
+            setattr(settings, field, value)
+        return settings
@@ -0,0 +1,148 @@
+from datetime import date, timedelta
+from typing import Optional
+
+# A year's calendar is one bit per day of the year (bit 0 is 1 January),
+# stored little-endian in 46 bytes so leap years fit
+DAYS_PER_YEAR = 366
+BLOB_SIZE = (DAYS_PER_YEAR + 7) // 8
+
+
+def day_bit(day: date) -> int:
+    """The bit for a day within its year's calendar."""
+    return day.timetuple().tm_yday - 1
+
+
+def to_blob(bits: int) -> bytes:
+    return bits.to_bytes(BLOB_SIZE, 'little')
+
+
+def from_blob(blob: Optional[bytes]) -> int:
+    return int.from_bytes(blob or b'', 'little')
+
+
+def mark(blob: Optional[bytes], day: date) -> bytes:
+    """A year's calendar with a day checked in."""
+    return to_blob(from_blob(blob) | (1 << day_bit(day)))
+
+
+def popcount(bits: int) -> int:
+    return bin(bits).count('1')
+
+
+async def record_check_in(db, user_id: int, habit_id: int, day: date, checked_in_at: str):
+    """Append a check-in to the log and mark its day on the habit calendar.
+
+    Runs on the caller's connection, inside its transaction, so the log,
+    the calendar and the streak are written together or not at all.
+    """
+    await db.execute(
+        'INSERT INTO habit_checkins (user_id, habit_id, local_date, checked_in_at) VALUES (?, ?, ?, ?)',
+        (user_id, habit_id, day.isoformat(), checked_in_at)
+    )
+    cursor = await db.execute(
+        'SELECT days FROM habit_calendars WHERE user_id = ? AND habit_id = ? AND year = ?',
+        (user_id, habit_id, day.year)
+    )
+    row = await cursor.fetchone()
+    await db.execute(
+        '''INSERT INTO habit_calendars (user_id, habit_id, year, days) VALUES (?, ?, ?, ?)
+           ON CONFLICT(user_id, habit_id, year) DO UPDATE SET days = excluded.days''',
+        (user_id, habit_id, day.year, mark(row[0] if row else None, day))
+    )
+
+
+class HabitCalendar:
+    """Every day one user checked in to one habit, as a single integer bitset.
+
+    The yearly blobs from habit_calendars are laid end to end from 1 January
+    of the first year, so bit i is the day `origin + i`. Counting check-ins
+    in a window is a mask and a popcount, the streak ending on a day is
+    found from the highest unset bit below it, and the longest streak is
+    found by doubling run lengths, in a few dozen shifts and ANDs.
+    """
+
+    def __init__(self, years: dict = None):
+        """years maps each year to its calendar blob."""
+        years = years or {}
+        self.origin = date(min(years), 1, 1) if years else None
+        self.bits = 0
+        for year, blob in years.items():
+            self.bits |= from_blob(blob) << (date(year, 1, 1) - self.origin).days
+
+    def _index(self, day: date) -> int:
+        return (day - self.origin).days
+
+    def _window(self, start: date, end: date) -> int:
+        """The bits from start to end inclusive, shifted down so start is bit 0."""
+        if not self.bits or end < start:
+            return 0
+        first, last = max(self._index(start), 0), self._index(end)
+        if last < 0:
+            return 0
+        return (self.bits >> first) & ((1 << (last - first + 1)) - 1)
+
+    def checked_in(self, day: date) -> bool:
+        return bool(self._window(day, day))
+
+    @property
+    def total(self) -> int:
+        return popcount(self.bits)
+
+    @property
+    def first_day(self) -> Optional[date]:
+        if not self.bits:
+            return None
+        return self.origin + timedelta(days=(self.bits & -self.bits).bit_length() - 1)
+
+    @property
+    def last_day(self) -> Optional[date]:
+        if not self.bits:
+            return None
+        return self.origin + timedelta(days=self.bits.bit_length() - 1)
+
+    def count(self, start: date, end: date) -> int:
+        """Days checked in from start to end inclusive."""
+        return popcount(self._window(start, end))
+
+    def streak_ending(self, day: date) -> int:
+        """Consecutive days checked in, ending on `day`."""
+        if not self.checked_in(day):
+            return 0
+        index = self._index(day)
+        mask = (1 << (index + 1)) - 1
+        gaps = ~self.bits & mask
+        return index + 1 if not gaps else index - (gaps.bit_length() - 1)
+
+    def current_streak(self, today: date) -> int:
+        """The streak still alive today: ending today, or yesterday if today has no check-in yet."""
+        return self.streak_ending(today) or self.streak_ending(today - timedelta(days=1))
+
+    def longest_streak(self) -> int:
+        if not self.bits:
+            return 0
+        # runs[k] has bit i set when days i to i+2**k-1 are all checked in;
+        # double the run length while some run is that long...
+        runs = [self.bits]
+        while True:
+            length = 1 << (len(runs) - 1)
+            longer = runs[-1] & (runs[-1] >> length)
+            if not longer:
+                break
+            runs.append(longer)
+        # ...then extend the longest found by smaller powers of two, largest first
+        found, length = runs[-1], 1 << (len(runs) - 1)
+        for k in range(len(runs) - 2, -1, -1):
+            longer = found & (runs[k] >> length)
+            if longer:
+                found, length = longer, length + (1 << k)
+        return length
+
+    def completion_rate(self, today: date, days: int) -> float:
+        """Share of the last `days` days (up to today) checked in, counting from the first check-in at the earliest."""
+        first = self.first_day
+        if first is None:
+            return 0.0
+        start = max(today - timedelta(days=days - 1), first)
+        if start > today:
+            return 0.0
+        return self.count(start, today) / ((today - start).days + 1)
@@ -0,0 +1,144 @@
+import heapq
+import itertools
+from bisect import bisect_left, insort
+from datetime import datetime
+from typing import Optional
+
+
+class StreakLeaderboard:
+    """Every habit participant's current streak, kept in rank order per server and per habit.
+
+    Each server keeps a sorted list of (-streak, habit name, user_id,
+    habit_id) and each habit a sorted list of (-streak, user_id), so the
+    top N is a slice and moving one streak is two binary searches. Streaks
+    lapse once a whole day passes without a check-in: each live streak's
+    lapse instant sits in a heap, so pop_lapsed() finds the ones that ran
+    out without looking at the rest. As in the schedule index, moved
+    entries leave their old heap item behind to be skipped.
+
+    The index holds no database state of its own. The bot loads it, feeds
+    it new check-ins and reloads the habits that change.
+    """
+
+    def __init__(self):
+        self._habits = {}  # habit_id -> (guild_id, name)
+        self._entries = {}  # (user_id, habit_id) -> (streak, lapse seq or None)
+        self._by_guild = {}  # guild_id -> sorted [(-streak, habit name, user_id, habit_id)]
+        self._by_habit = {}  # habit_id -> sorted [(-streak, user_id)]
+        self._by_user = {}  # user_id -> {habit_id}
+        self._lapses = []  # heap of (lapse_at, seq, (user_id, habit_id))
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def load(self, habits, participants):
+        """Replace the index with (habit_id, guild_id, name) habits and (habit_id, user_id, streak, lapse_at) participants."""
+        self._habits = {habit_id: (guild_id, name) for habit_id, guild_id, name in habits}
+        self._entries, self._by_guild, self._by_habit, self._by_user, self._lapses = {}, {}, {}, {}, []
+        for habit_id, user_id, streak, lapse_at in participants:
+            if habit_id not in self._habits:
+                continue
+            guild_id, name = self._habits[habit_id]
+            streak = max(streak or 0, 0)
+            self._entries[(user_id, habit_id)] = (streak, self._push_lapse(user_id, habit_id, streak, lapse_at))
+            self._by_guild.setdefault(guild_id, []).append((-streak, name, user_id, habit_id))
+            self._by_habit.setdefault(habit_id, []).append((-streak, user_id))
+            self._by_user.setdefault(user_id, set()).add(habit_id)
+        for ranking in itertools.chain(self._by_guild.values(), self._by_habit.values()):
+            ranking.sort()
+
+    def set_habit(self, habit_id: int, guild_id: int, name: str, participants):
+        """Add or replace one habit with its (user_id, streak, lapse_at) participants."""
+        self.remove_habit(habit_id)
+        self._habits[habit_id] = (guild_id, name)
+        for user_id, streak, lapse_at in participants:
+            self._add(user_id, habit_id, max(streak or 0, 0), lapse_at)
+
+    def remove_habit(self, habit_id: int):
+        for _, user_id in list(self._by_habit.get(habit_id, ())):
+            self._remove(user_id, habit_id)
+        self._by_habit.pop(habit_id, None)
+        self._habits.pop(habit_id, None)
+
+    def remove_user(self, user_id: int):
+        for habit_id in list(self._by_user.get(user_id, ())):
+            self._remove(user_id, habit_id)
+
+    def update(self, user_id: int, habit_id: int, streak: int, lapse_at: Optional[datetime]) -> bool:
+        """Move a participant's streak. Returns False if they aren't a participant of the habit."""
+        if (user_id, habit_id) not in self._entries:
+            return False
+        self._remove(user_id, habit_id)
+        self._add(user_id, habit_id, max(streak or 0, 0), lapse_at)
+        return True
+
+    def pop_lapsed(self, now: datetime) -> list:
+        """Zero every streak that lapsed at or before `now`, returning their (user_id, habit_id, lapse_at)."""
+        lapsed = []
+        while self._lapses and self._lapses[0][0] <= now:
+            lapse_at, seq, key = heapq.heappop(self._lapses)
+            entry = self._entries.get(key)
+            if entry is None or entry[1] != seq:
+                continue  # moved or removed since it was pushed
+            self.update(*key, 0, None)
+            lapsed.append((*key, lapse_at))
+        return lapsed
+
+    def streak(self, user_id: int, habit_id: int) -> Optional[int]:
+        entry = self._entries.get((user_id, habit_id))
+        return entry[0] if entry else None
+
+    def top(self, guild_id: int, limit: int) -> list:
+        """The server's (user_id, habit_id, habit name, streak) with the longest streaks, ties by habit name."""
+        return [
+            (user_id, habit_id, name, -negative_streak)
+            for negative_streak, name, user_id, habit_id in self._by_guild.get(guild_id, [])[:limit]
+        ]
+
+    def habit_top(self, habit_id: int, limit: int) -> list:
+        """The habit's (user_id, streak) with the longest streaks."""
+        return [(user_id, -negative_streak) for negative_streak, user_id in self._by_habit.get(habit_id, [])[:limit]]
+
+    def _add(self, user_id: int, habit_id: int, streak: int, lapse_at: Optional[datetime]):
+        guild_id, name = self._habits[habit_id]
+        self._entries[(user_id, habit_id)] = (streak, self._push_lapse(user_id, habit_id, streak, lapse_at))
+        insort(self._by_guild.setdefault(guild_id, []), (-streak, name, user_id, habit_id))
+        insort(self._by_habit.setdefault(habit_id, []), (-streak, user_id))
+        self._by_user.setdefault(user_id, set()).add(habit_id)
+
+    def _remove(self, user_id: int, habit_id: int):
+        entry = self._entries.pop((user_id, habit_id), None)
+        if entry is None:
+            return
+        streak = entry[0]
+        guild_id, name = self._habits[habit_id]
+        self._discard(self._by_guild.get(guild_id), (-streak, name, user_id, habit_id))
+        self._discard(self._by_habit.get(habit_id), (-streak, user_id))
+        habits = self._by_user.get(user_id)
+        if habits is not None:
+            habits.discard(habit_id)
+            if not habits:
+                del self._by_user[user_id]
+        self._maybe_compact()
+
+    @staticmethod
+    def _discard(ranking: Optional[list], item: tuple):
+        if not ranking:
+            return
+        index = bisect_left(ranking, item)
+        if index < len(ranking) and ranking[index] == item:
+            del ranking[index]
+
+    def _push_lapse(self, user_id: int, habit_id: int, streak: int, lapse_at: Optional[datetime]) -> Optional[int]:
+        if not streak or lapse_at is None:
+            return None
+        seq = next(self._seq)
+        heapq.heappush(self._lapses, (lapse_at, seq, (user_id, habit_id)))
+        return seq
+
+    def _maybe_compact(self):
+        if len(self._lapses) > 2 * len(self._entries) + 64:
+            live = {(key, seq) for key, (_, seq) in self._entries.items() if seq is not None}
+            self._lapses = [item for item in self._lapses if (item[2], item[1]) in live]
+            heapq.heapify(self._lapses)
@@ -0,0 +1,110 @@
+import hashlib
+import json
+import logging
+import re
+import time
+
+from assets.utils.quota import DEEPSEEK
+
+# Just get the logger without adding handlers
+logger = logging.getLogger('gentle_habits')
+
+# Entries are kept this many TTLs, so older answers can still be served while
+# the DeepSeek budget is running low
+STALE_TTL_FACTOR = 4
+
+
+def normalize_prompt(text: str) -> str:
+    """Case-fold and collapse whitespace so trivially different prompts share a cache entry."""
+    return re.sub(r'\s+', ' ', text).strip().casefold()
+
+
+class LLMCache:
+    """SQLite-backed cache of LLM responses.
+
+    Entries are keyed by a SHA-256 of the model, the normalized messages and
+    any request options, expire after `ttl` seconds, and are evicted least
+    recently used first once there are more than `max_entries` of them.
+    While the bot's QuotaGovernor is conserving DeepSeek, entries up to
+    STALE_TTL_FACTOR times older are still served.
+    """
+
+    def __init__(self, bot, max_entries: int = 5000, ttl: float = 86400):
+        self.bot = bot
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(model: str, messages: list, **options) -> str:
+        """Build a cache key from the model, prompt messages and option choices."""
+        payload = {
+            'model': model,
+            'messages': [
+                {'role': message['role'], 'content': normalize_prompt(message['content'])}
+                for message in messages
+            ],
+            'options': options,
+        }
+        encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False).encode('utf-8')
+        return hashlib.sha256(encoded).hexdigest()
+
+    async def get(self, key: str):
+        """Return the cached response for a key, or None if missing or expired."""
+        now = time.time()
+        max_age = self.ttl * STALE_TTL_FACTOR if self.bot.quota.conserving(DEEPSEEK) else self.ttl
+        try:
+            async with self.bot.db_pool.acquire() as db:
+                cursor = await db.execute(
+                    'SELECT response FROM llm_cache WHERE key = ? AND created_at > ?',
+                    (key, now - max_age)
+                )
+                row = await cursor.fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+
+                await db.execute(
+                    'UPDATE llm_cache SET last_used_at = ?, hits = hits + 1 WHERE key = ?',
+                    (now, key)
+                )
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Error reading LLM cache: {e}")
+            return None
+
+        self.hits += 1
+        return row[0]
+
+    async def put(self, key: str, model: str, response: str):
+        """Store a response, then drop expired entries and trim to the size cap."""
+        now = time.time()
+        try:
+            async with self.bot.db_pool.acquire() as db:
+                await db.execute(
+                    '''INSERT INTO llm_cache (key, model, response, created_at, last_used_at, hits)
+                       VALUES (?, ?, ?, ?, ?, 0)
+                       ON CONFLICT(key) DO UPDATE SET
+                           model = excluded.model,
+                           response = excluded.response,
+                           created_at = excluded.created_at,
+                           last_used_at = excluded.last_used_at''',
+                    (key, model, response, now, now)
+                )
+                await db.execute('DELETE FROM llm_cache WHERE created_at <= ?', (now - self.ttl * STALE_TTL_FACTOR,))
+                await db.execute(
+                    '''DELETE FROM llm_cache WHERE key IN (
+                           SELECT key FROM llm_cache
+                           ORDER BY last_used_at DESC
+                           LIMIT -1 OFFSET ?
+                       )''',
+                    (self.max_entries,)
+                )
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Error writing LLM cache: {e}")
+
+    def stats(self) -> dict:
+        """Hit and miss counts since startup."""
+        return {'hits': self.hits, 'misses': self.misses}
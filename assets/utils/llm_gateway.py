@@ -0,0 +1,219 @@
+import asyncio
+import logging
+import time
+
+from openai import AsyncOpenAI
+
+from assets.utils.metrics import registry
+from assets.utils.quota import DEEPSEEK
+from assets.utils.upstream import UpstreamClient
+
+# Just get the logger without adding handlers
+logger = logging.getLogger('gentle_habits')
+
+STATUS_URL = 'https://status.deepseek.com/api/v2/components.json'
+
+llm_latency = registry.histogram(
+    'gentle_habits_llm_request_seconds',
+    'Latency of LLM requests by model and outcome (ok, timeout, error)',
+    ('model', 'outcome'),
+    buckets=(0.5, 1, 2, 5, 10, 20, 30, 60)
+)
+llm_fallbacks = registry.counter('gentle_habits_llm_fallbacks_total', 'LLM requests that fell back to a faster model')
+llm_templates = registry.counter('gentle_habits_llm_templates_total', 'LLM requests answered from a local template')
+
+class LLMUnavailableError(Exception):
+    """Raised when no model (or template) could answer within the latency budget."""
+    pass
+
+
+class LLMGateway:
+    """Single entry point for DeepSeek calls.
+
+    A semaphore caps how many requests are in flight at once, every call has a
+    latency budget (time spent waiting for a slot counts against it), and a
+    call that runs out of budget or fails falls back to the next model in the
+    chain and finally to a caller-supplied template. Latency is recorded per
+    model in the metrics registry so slow upstreams show up.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = 'https://api.deepseek.com/v1',
+        max_in_flight: int = 4,
+        default_budget: float = 20.0,
+        reasoner_budget: float = 45.0,
+        status_ttl: float = 60.0,
+        status_url: str = STATUS_URL,
+        status_client=None,
+        quota=None
+    ):
+        self.client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            timeout=max(default_budget, reasoner_budget) + 5,
+            max_retries=1
+        )
+        self.max_in_flight = max_in_flight
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self.in_flight = 0
+        self.default_budget = default_budget
+        self.reasoner_budget = reasoner_budget
+        self.status_ttl = status_ttl
+        self.status_url = status_url
+        self.status_client = status_client or UpstreamClient('deepseek_status', 2, 3, 5, max_retries=0)
+        self.quota = quota  # QuotaGovernor counting DeepSeek calls and tokens, if any
+        self._status = None  # (checked_at, available, error_message)
+        registry.callback(
+            'gentle_habits_llm_in_flight', 'LLM requests currently running', 'gauge',
+            lambda: self.in_flight
+        )
+
+    def budget_for(self, model: str) -> float:
+        """Default latency budget for a model."""
+        return self.reasoner_budget if model == 'deepseek-reasoner' else self.default_budget
+
+    def fallback_chain(self, model: str) -> list:
+        """Models to try, in order, for a request to `model`."""
+        if model == 'deepseek-reasoner':
+            return ['deepseek-reasoner', 'deepseek-chat']
+        return [model]
+
+    async def check_status(self):
+        """Check if DeepSeek API is experiencing a major outage (cached for status_ttl seconds)."""
+        now = time.monotonic()
+        if self._status and now - self._status[0] < self.status_ttl:
+            return self._status[1], self._status[2]
+
+        try:
+            response = await self.status_client.get(self.status_url)
+            available, error_message = True, None
+            # A stale copy of the status page is no evidence of an outage now
+            if response.status == 200 and not response.stale:
+                data = response.json()
+                api_component = next(
+                    (comp for comp in data['components']
+                     if comp['name'] == 'API 服务 (API Service)'),
+                    None
+                )
+                if api_component and api_component['status'] == 'major_outage':
+                    available, error_message = False, "DeepSeek API is currently experiencing a major outage. Please try again later."
+        except Exception as e:
+            # The status page being slow or down says nothing about the API itself
+            logger.warning(f"Unable to check DeepSeek API status: {e}")
+            available, error_message = True, None
+
+        self._status = (now, available, error_message)
+        return available, error_message
+
+    async def complete(self, messages: list, model: str = 'deepseek-chat', budget: float = None, template: str = None, on_text=None, **params):
+        """Get a chat completion, falling back along the model chain.
+
+        With on_text, the completion is streamed and on_text(text_so_far) is
+        awaited as tokens arrive ('' while a reasoning model is still thinking).
+        Returns (content, model_used); model_used is 'template' when the
+        template was returned. Raises LLMUnavailableError if nothing answered
+        or the DeepSeek budget is used up.
+        """
+        if self.quota is not None and not self.quota.allows(DEEPSEEK):
+            if template is not None:
+                llm_templates.inc()
+                return template, 'template'
+            raise LLMUnavailableError("The AI helper has used up its budget for now. Please try again tomorrow.")
+
+        available, error_message = await self.check_status()
+        if not available:
+            if template is not None:
+                llm_templates.inc()
+                return template, 'template'
+            raise LLMUnavailableError(error_message)
+
+        chain = self.fallback_chain(model)
+        for index, candidate in enumerate(chain):
+            model_budget = budget if budget is not None and index == 0 else self.budget_for(candidate)
+            started = time.monotonic()
+            try:
+                content = await asyncio.wait_for(
+                    self._call(candidate, messages, on_text, params),
+                    timeout=model_budget
+                )
+                self._observe(candidate, time.monotonic() - started, 'ok')
+                return content, candidate
+            except asyncio.TimeoutError:
+                self._observe(candidate, time.monotonic() - started, 'timeout')
+                logger.warning(f"{candidate} ran out of its {model_budget:.1f}s budget")
+            except Exception as e:
+                self._observe(candidate, time.monotonic() - started, 'error')
+                logger.warning(f"{candidate} request failed: {e}")
+
+            if index + 1 < len(chain):
+                llm_fallbacks.inc()
+                logger.info(f"Falling back from {candidate} to {chain[index + 1]}")
+
+        if template is not None:
+            llm_templates.inc()
+            return template, 'template'
+        raise LLMUnavailableError("The AI helper is taking too long right now. Please try again in a little while.")
+
+    async def _call(self, model: str, messages: list, on_text, params: dict) -> str:
+        async with self._semaphore:
+            self.in_flight += 1
+            try:
+                if on_text is None:
+                    response = await self.client.chat.completions.create(model=model, messages=messages, **params)
+                    content = response.choices[0].message.content
+                    self._record_usage(messages, content, response.usage)
+                    return content
+
+                stream = await self.client.chat.completions.create(
+                    model=model, messages=messages, stream=True, stream_options={'include_usage': True}, **params
+                )
+                content, usage = "", None
+                try:
+                    async for chunk in stream:
+                        # The final chunk carries token usage and no choices
+                        usage = getattr(chunk, 'usage', None) or usage
+                        if not chunk.choices:
+                            continue
+                        delta = chunk.choices[0].delta
+                        if delta.content:
+                            content += delta.content
+                        elif not getattr(delta, 'reasoning_content', None):
+                            continue
+                        await on_text(content)
+                finally:
+                    # Release the connection if we were cut off mid-stream
+                    await stream.close()
+                    self._record_usage(messages, content, usage)
+                return content
+            finally:
+                self.in_flight -= 1
+
+    def _record_usage(self, messages: list, content: str, usage):
+        """Count a call's tokens against the DeepSeek budget."""
+        if self.quota is None:
+            return
+        if usage is not None and usage.total_tokens:
+            tokens = usage.total_tokens
+        else:
+            # No usage reported (e.g. a stream cut off early): estimate ~4 characters per token
+            tokens = (sum(len(message['content']) for message in messages) + len(content or '')) // 4
+        self.quota.record(DEEPSEEK, tokens=tokens)
+
+    def _observe(self, model: str, seconds: float, outcome: str):
+        llm_latency.labels(model, outcome).observe(seconds)
+
+    def stats(self) -> dict:
+        """In-flight count, fallback counts and per-model p50/p95 latency (bucket upper bounds)."""
+        latency = {}
+        for (model, outcome), child in llm_latency.children():
+            if outcome == 'ok':
+                latency[model] = {'count': child.count, 'p50': child.percentile(0.5), 'p95': child.percentile(0.95)}
+        return {
+            'in_flight': self.in_flight,
+            'max_in_flight': self.max_in_flight,
+            'fallbacks': llm_fallbacks.value,
+            'templates_used': llm_templates.value,
+            'latency': latency,
+        }
@@ -0,0 +1,387 @@
+import logging
+import re
+import time
+from bisect import bisect_left
+
+import aiohttp
+import discord
+from aiohttp import web
+
+# Just get the logger without adding handlers
+logger = logging.getLogger('gentle_habits')
+
+# Default latency buckets (seconds), tuned around Discord's 3 second interaction deadline
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 3, 5, 10, 30, 60)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labelnames, labelvalues, extra=()) -> str:
+    pairs = list(zip(labelnames, labelvalues)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type_name = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+
+    def labels(self, *labelvalues, **labelkwargs):
+        """Get the child metric for a set of label values."""
+        if labelkwargs:
+            labelvalues = tuple(str(labelkwargs[name]) for name in self.labelnames)
+        else:
+            labelvalues = tuple(str(value) for value in labelvalues)
+        if len(labelvalues) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        child = self._children.get(labelvalues)
+        if child is None:
+            child = self._children[labelvalues] = self._new_child()
+        return child
+
+    def children(self) -> list:
+        """(labelvalues, child) pairs for every label combination seen so far."""
+        return list(self._children.items())
+
+    def _default(self):
+        # Unlabelled metrics act as their own single child
+        return self.labels()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def render(self) -> list:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type_name}']
+        for labelvalues, child in sorted(self._children.items()):
+            lines.extend(self._render_child(labelvalues, child))
+        return lines
+
+
+class _Value:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0.0
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+    type_name = 'counter'
+
+    @property
+    def value(self) -> float:
+        return self._default().value
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1):
+        self._default().inc(amount)
+
+    def _render_child(self, labelvalues, child):
+        return [f'{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(child.value)}']
+
+
+class _CounterChild(_Value):
+    __slots__ = ()
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+    type_name = 'gauge'
+
+    @property
+    def value(self) -> float:
+        return self._default().value
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self._default().set(value)
+
+    def inc(self, amount: float = 1):
+        self._default().inc(amount)
+
+    def dec(self, amount: float = 1):
+        self._default().inc(-amount)
+
+    def _render_child(self, labelvalues, child):
+        return [f'{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(child.value)}']
+
+
+class _GaugeChild(_Value):
+    __slots__ = ()
+
+    def set(self, value: float):
+        self.value = value
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+
+class Histogram(_Metric):
+    """Distribution of observations in fixed buckets."""
+    type_name = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._default().observe(value)
+
+    def time(self):
+        return self._default().time()
+
+    def percentile(self, p: float) -> float:
+        return self._default().percentile(p)
+
+    @property
+    def count(self) -> int:
+        return self._default().count
+
+    def _render_child(self, labelvalues, child):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, child.counts):
+            cumulative += count
+            labels = _format_labels(self.labelnames, labelvalues, [('le', _format_value(bound))])
+            lines.append(f'{self.name}_bucket{labels} {cumulative}')
+        labels = _format_labels(self.labelnames, labelvalues)
+        lines.append(f'{self.name}_sum{labels} {_format_value(child.sum)}')
+        lines.append(f'{self.name}_count{labels} {child.count}')
+        return lines
+
+
+class _HistogramChild:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def time(self):
+        return _Timer(self)
+
+    def percentile(self, p: float) -> float:
+        """Upper bound of the bucket holding the p-th observation (0 when empty)."""
+        if not self.count:
+            return 0.0
+        target = p * self.count
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return bound
+        return self.buckets[-1]
+
+
+class _Timer:
+    """Context manager that observes the elapsed time of its block."""
+    __slots__ = ('child', 'started')
+
+    def __init__(self, child):
+        self.child = child
+
+    def __enter__(self):
+        self.started = time.monotonic()
+        return self
+
+    def __exit__(self, *exc):
+        self.child.observe(time.monotonic() - self.started)
+
+
+class CallbackMetric(_Metric):
+    """Metric whose samples are read from a function at scrape time.
+
+    The function returns a number for unlabelled metrics, or an iterable of
+    (labelvalues, value) pairs. Used to expose state other components already
+    track (queue depths, limiter counts) without duplicating it.
+    """
+
+    def __init__(self, name: str, documentation: str, type_name: str, function, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.type_name = type_name
+        self.function = function
+
+    def render(self) -> list:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type_name}']
+        try:
+            samples = self.function()
+        except Exception as e:
+            logger.error(f"Error collecting metric {self.name}: {e}")
+            return lines
+        if not self.labelnames:
+            samples = [((), samples)]
+        for labelvalues, value in samples:
+            lines.append(f'{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}')
+        return lines
+
+
+class MetricsRegistry:
+    """Holds every metric and renders them in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def _register(self, metric):
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            if type(existing) is not type(metric):
+                raise ValueError(f"Metric {metric.name} is already registered as a {existing.type_name}")
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames=()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name: str, documentation: str, type_name: str, function, labelnames=()) -> CallbackMetric:
+        """Register (or replace) a metric read from a function at scrape time."""
+        metric = CallbackMetric(name, documentation, type_name, function, labelnames)
+        self._metrics[name] = metric
+        return metric
+
+    def get(self, name: str):
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+# Process-wide registry
+registry = MetricsRegistry()
+
+# Upstream HTTP calls made through aiohttp
+upstream_latency = registry.histogram(
+    'gentle_habits_upstream_request_seconds',
+    'Latency of outbound HTTP requests by host and status class',
+    ('host', 'status')
+)
+
+
+def http_trace_config() -> aiohttp.TraceConfig:
+    """aiohttp trace config that records request latency by host into the registry."""
+
+    async def on_request_start(session, context, params):
+        context.started = time.monotonic()
+
+    async def on_request_end(session, context, params):
+        status = f'{params.response.status // 100}xx'
+        upstream_latency.labels(params.url.host, status).observe(time.monotonic() - context.started)
+
+    async def on_request_exception(session, context, params):
+        upstream_latency.labels(params.url.host, 'error').observe(time.monotonic() - context.started)
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_request_exception.append(on_request_exception)
+    return trace_config
+
+
+def interaction_callback_trace_config(on_callback) -> aiohttp.TraceConfig:
+    """aiohttp trace config that calls on_callback(interaction_id) once Discord accepts an interaction response."""
+
+    async def on_request_end(session, context, params):
+        if params.method != 'POST' or params.response.status >= 400:
+            return
+        match = re.fullmatch(r'/api/v\d+/interactions/(\d+)/[^/]+/callback', params.url.path)
+        if match:
+            on_callback(int(match.group(1)))
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_end.append(on_request_end)
+    return trace_config
+
+
+def job_label(job_id: str) -> str:
+    """Collapse per-habit and one-off scheduler job ids so label cardinality stays bounded."""
+    if re.fullmatch(r'[0-9a-f]{32}', job_id):
+        return 'one_off'  # date jobs added without an id (e.g. focus timers)
+    return re.sub(r'_\d+$', '_*', job_id)
+
+
+def interaction_label(interaction) -> tuple:
+    """(kind, name) labels for an interaction, with IDs stripped from custom_ids."""
+    if interaction.type in (discord.InteractionType.application_command, discord.InteractionType.autocomplete):
+        kind = 'command' if interaction.type == discord.InteractionType.application_command else 'autocomplete'
+        command = interaction.command
+        return kind, command.qualified_name if command else interaction.data.get('name', 'unknown')
+    if interaction.type == discord.InteractionType.component:
+        return 'component', re.sub(r'\d+', '#', interaction.data.get('custom_id', 'unknown'))
+    if interaction.type == discord.InteractionType.modal_submit:
+        return 'modal', re.sub(r'\d+', '#', interaction.data.get('custom_id', 'unknown'))
+    return interaction.type.name, 'n/a'
+
+
+class MetricsServer:
+    """Serves the registry at /metrics on a local port."""
+
+    def __init__(self, registry: MetricsRegistry, host: str = '127.0.0.1', port: int = 9108):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._runner = None
+
+    async def _handle_metrics(self, request):
+        return web.Response(text=self.registry.render(), content_type='text/plain', charset='utf-8')
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get('/metrics', self._handle_metrics)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        try:
+            await web.TCPSite(self._runner, self.host, self.port).start()
+        except OSError as e:
+            logger.error(f"Could not start metrics endpoint on {self.host}:{self.port}: {e}")
+            await self._runner.cleanup()
+            self._runner = None
+            return
+        logger.info(f"📈 Metrics available at http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,82 @@
+from bisect import bisect_left, insort
+
+
+class NameIndex:
+    """In-memory name index for slash-command autocomplete.
+
+    Names are grouped by scope (a user ID for per-user names, or None for
+    global ones) and kept in a case-folded sorted list. Prefix matches come
+    from a binary search; if there are fewer than `limit` of them, the scope
+    is scanned for substring matches so typing the middle of a name still
+    works. The index is loaded once at startup and kept current by the paths
+    that create, rename and delete names, so autocomplete never touches the DB.
+    """
+
+    def __init__(self):
+        self._scopes = {}  # scope -> sorted list of (folded_name, name)
+
+    def load(self, rows):
+        """Replace the index contents with (scope, name) rows."""
+        scopes = {}
+        for scope, name in rows:
+            scopes.setdefault(scope, []).append((name.casefold(), name))
+        for entries in scopes.values():
+            entries.sort()
+        self._scopes = scopes
+
+    def add(self, scope, name: str):
+        """Add a name to a scope (no-op if it is already there)."""
+        entries = self._scopes.setdefault(scope, [])
+        entry = (name.casefold(), name)
+        index = bisect_left(entries, entry)
+        if index == len(entries) or entries[index] != entry:
+            insort(entries, entry)
+
+    def remove(self, scope, name: str):
+        """Remove a name from a scope if present."""
+        entries = self._scopes.get(scope)
+        if not entries:
+            return
+        entry = (name.casefold(), name)
+        index = bisect_left(entries, entry)
+        if index < len(entries) and entries[index] == entry:
+            del entries[index]
+        if not entries:
+            del self._scopes[scope]
+
+    def rename(self, scope, old_name: str, new_name: str):
+        """Replace a name in a scope."""
+        self.remove(scope, old_name)
+        self.add(scope, new_name)
+
+    def search(self, scope, query: str, limit: int = 25) -> list:
+        """Return up to `limit` names in a scope matching the query.
+
+        Prefix matches come first, in alphabetical order, followed by
+        names that only contain the query somewhere in the middle.
+        """
+        entries = self._scopes.get(scope)
+        if not entries:
+            return []
+
+        folded = query.casefold()
+        if not folded:
+            return [name for _, name in entries[:limit]]
+
+        results = []
+        index = bisect_left(entries, (folded,))
+        while index < len(entries) and len(results) < limit:
+            key, name = entries[index]
+            if not key.startswith(folded):
+                break
+            results.append(name)
+            index += 1
+
+        if len(results) < limit:
+            for key, name in entries:
+                if folded in key and not key.startswith(folded):
+                    results.append(name)
+                    if len(results) >= limit:
+                        break
+
+        return results
@@ -0,0 +1,194 @@
+import logging
+
+from assets.utils.metrics import registry
+
+# Just get the logger without adding handlers
+logger = logging.getLogger('gentle_habits')
+
+# Paid upstreams with a budget. Google Maps usage is counted in billable calls
+# (Metro TAS requests carry the key, route matrix elements are billed singly);
+# DeepSeek is counted in calls and tokens, and capped on tokens.
+GOOGLE_MAPS = 'google_maps'
+DEEPSEEK = 'deepseek'
+UPSTREAMS = (GOOGLE_MAPS, DEEPSEEK)
+
+# Budget levels, from least to most restricted
+NORMAL, CONSERVE, EXHAUSTED = 'normal', 'conserve', 'exhausted'
+
+quota_rejections = registry.counter(
+    'gentle_habits_quota_rejections_total',
+    'Upstream calls not made because a daily or monthly cap was reached',
+    ('upstream',)
+)
+
+
+class QuotaGovernor:
+    """Counts paid upstream usage per day and enforces daily/monthly caps.
+
+    Usage is kept in memory for the current day and month, and written to
+    the upstream_usage table by flush() (run every minute by the scheduler
+    and on shutdown), so recording a call never waits on the database.
+    Caps map (upstream, unit, period) to a limit, with unit 'calls' or
+    'tokens' and period 'day' or 'month'; a limit of 0 means uncapped.
+    Once any cap is `conserve_at` used, the upstream is conserving: callers
+    drop optional sections and accept older cached answers. At 100% it is
+    exhausted and calls are refused.
+    """
+
+    def __init__(self, bot, caps: dict, conserve_at: float = 0.8):
+        self.bot = bot
+        self.caps = {key: limit for key, limit in caps.items() if limit}
+        self.conserve_at = conserve_at
+        self._day, self._month = self._periods()
+        self._usage = {}    # (upstream, period) -> [calls, tokens]
+        self._pending = {}  # (upstream, day) -> [calls, tokens] not yet written
+        self._levels = dict.fromkeys(UPSTREAMS, NORMAL)
+        registry.callback(
+            'gentle_habits_quota_used_ratio',
+            'Share of each upstream cap used in the current day or month',
+            'gauge',
+            lambda: [
+                ((upstream, unit, period), self._used(upstream, unit, period) / limit)
+                for (upstream, unit, period), limit in self.caps.items()
+            ],
+            ('upstream', 'unit', 'period')
+        )
+
+    def _periods(self) -> tuple:
+        today = self.bot.clock.now().date()
+        return today.isoformat(), today.strftime('%Y-%m')
+
+    def _roll_over(self):
+        day, month = self._periods()
+        if month != self._month:
+            self._usage = {}
+        elif day != self._day:
+            self._usage = {key: value for key, value in self._usage.items() if key[1] == 'month'}
+        self._day, self._month = day, month
+
+    def _used(self, upstream: str, unit: str, period: str) -> int:
+        calls, tokens = self._usage.get((upstream, period), (0, 0))
+        return calls if unit == 'calls' else tokens
+
+    async def load(self):
+        """Read this month's usage back from the database (in a cluster, every process's usage)."""
+        day, month = self._periods()
+        async with self.bot.db_pool.acquire() as db:
+            cursor = await db.execute(
+                '''SELECT upstream, day, calls, tokens FROM upstream_usage WHERE day >= ?''',
+                (f"{month}-01",)
+            )
+            rows = await cursor.fetchall()
+
+        # Usage recorded here but not yet flushed isn't in the table
+        totals = {}
+        for upstream, row_day, calls, tokens in rows + [(*key, *value) for key, value in self._pending.items()]:
+            for period in ('month', 'day') if row_day == day else ('month',):
+                usage = totals.setdefault((upstream, period), [0, 0])
+                usage[0] += calls
+                usage[1] += tokens
+        self._day, self._month, self._usage = day, month, totals
+        for upstream in UPSTREAMS:
+            self._levels[upstream] = self.level(upstream)
+
+    def record(self, upstream: str, calls: int = 1, tokens: int = 0):
+        """Count usage of an upstream."""
+        self._roll_over()
+        for period in ('day', 'month'):
+            usage = self._usage.setdefault((upstream, period), [0, 0])
+            usage[0] += calls
+            usage[1] += tokens
+        pending = self._pending.setdefault((upstream, self._day), [0, 0])
+        pending[0] += calls
+        pending[1] += tokens
+
+        level = self.level(upstream)
+        if level != self._levels.get(upstream):
+            if level != NORMAL:
+                logger.warning(f"{upstream} usage is now at the {level} level: {self.describe(upstream)}")
+            self._levels[upstream] = level
+
+    def level(self, upstream: str) -> str:
+        """NORMAL, CONSERVE or EXHAUSTED, from the most used of the upstream's caps."""
+        self._roll_over()
+        ratio = 0.0
+        for (capped, unit, period), limit in self.caps.items():
+            if capped == upstream:
+                ratio = max(ratio, self._used(upstream, unit, period) / limit)
+        if ratio >= 1:
+            return EXHAUSTED
+        if ratio >= self.conserve_at:
+            return CONSERVE
+        return NORMAL
+
+    def conserving(self, upstream: str) -> bool:
+        """Whether optional use of an upstream should be skipped."""
+        return self.level(upstream) != NORMAL
+
+    def allows(self, upstream: str, calls: int = 1) -> bool:
+        """Whether `calls` more calls fit under every call cap and no token cap is used up.
+
+        Refusals are counted, so callers can simply skip the call.
+        """
+        self._roll_over()
+        for (capped, unit, period), limit in self.caps.items():
+            if capped != upstream:
+                continue
+            used = self._used(upstream, unit, period)
+            if used + (calls if unit == 'calls' else 0) > limit or used >= limit:
+                quota_rejections.labels(upstream).inc()
+                return False
+        return True
+
+    def describe(self, upstream: str) -> str:
+        """One-line summary of an upstream's usage against its caps."""
+        parts = []
+        for period, label in (('day', 'today'), ('month', 'this month')):
+            calls, tokens = self._usage.get((upstream, period), (0, 0))
+            text = f"{calls:,} calls"
+            if tokens:
+                text += f", {tokens:,} tokens"
+            caps = [
+                f"{limit:,} {unit}" for (capped, unit, capped_period), limit in self.caps.items()
+                if capped == upstream and capped_period == period
+            ]
+            parts.append(f"{text} {label}" + (f" (cap {', '.join(caps)})" if caps else ""))
+        return "; ".join(parts)
+
+    def report(self) -> list:
+        """(upstream, level, day usage, month usage, caps) for each paid upstream."""
+        self._roll_over()
+        return [
+            (
+                upstream,
+                self.level(upstream),
+                tuple(self._usage.get((upstream, 'day'), (0, 0))),
+                tuple(self._usage.get((upstream, 'month'), (0, 0))),
+                {(unit, period): limit for (capped, unit, period), limit in self.caps.items() if capped == upstream},
+            )
+            for upstream in UPSTREAMS
+        ]
+
+    async def flush(self):
+        """Write usage recorded since the last flush to the database."""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        try:
+            async with self.bot.db_pool.acquire() as db:
+                await db.executemany(
+                    '''INSERT INTO upstream_usage (upstream, day, calls, tokens)
+                       VALUES (?, ?, ?, ?)
+                       ON CONFLICT(upstream, day) DO UPDATE SET
+                           calls = calls + excluded.calls,
+                           tokens = tokens + excluded.tokens''',
+                    [(upstream, day, calls, tokens) for (upstream, day), (calls, tokens) in pending.items()]
+                )
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Error saving upstream usage: {e}")
+            # Keep the counts for the next flush
+            for key, (calls, tokens) in pending.items():
+                usage = self._pending.setdefault(key, [0, 0])
+                usage[0] += calls
+                usage[1] += tokens
@@ -0,0 +1,108 @@
+import logging
+import math
+import time
+from collections import OrderedDict
+from functools import wraps
+
+import discord
+
+# Just get the logger without adding handlers
+logger = logging.getLogger('gentle_habits')
+
+# Every limiter created by the decorator, so rejections can be reported in one place
+_limiters = []
+
+
+class TokenBucketLimiter:
+    """Per-user token buckets for one command.
+
+    Each user gets `capacity` tokens that refill continuously over `period`
+    seconds, measured with a monotonic clock. Buckets are kept in LRU order;
+    any bucket idle long enough to have refilled completely is dropped (it is
+    indistinguishable from a fresh one), and the total is capped at
+    `max_buckets`, so memory stays bounded no matter how many users show up.
+    """
+
+    def __init__(self, name: str, capacity: int, period: float, max_buckets: int = 10000):
+        self.name = name
+        self.capacity = float(capacity)
+        self.period = float(period)
+        self.refill_rate = self.capacity / self.period  # tokens per second
+        self.max_buckets = max_buckets
+        self._buckets = OrderedDict()  # user_id -> (tokens, last_update)
+        self.allowed = 0
+        self.rejected = 0
+
+    def try_acquire(self, user_id: int) -> tuple:
+        """Take a token for a user.
+
+        Returns (allowed, retry_after) where retry_after is the number of
+        seconds until the next token is available if the call was rejected.
+        """
+        now = time.monotonic()
+        tokens, last_update = self._buckets.pop(user_id, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - last_update) * self.refill_rate)
+
+        if tokens >= 1:
+            tokens -= 1
+            allowed, retry_after = True, 0.0
+            self.allowed += 1
+        else:
+            allowed, retry_after = False, (1 - tokens) / self.refill_rate
+            self.rejected += 1
+
+        self._buckets[user_id] = (tokens, now)
+        self._evict(now)
+        return allowed, retry_after
+
+    def _evict(self, now: float):
+        """Drop idle buckets from the least recently used end."""
+        while self._buckets:
+            user_id, (tokens, last_update) = next(iter(self._buckets.items()))
+            idle_full = tokens + (now - last_update) * self.refill_rate >= self.capacity
+            if not idle_full and len(self._buckets) <= self.max_buckets:
+                break
+            del self._buckets[user_id]
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+def limiter_stats() -> list:
+    """Allowed/rejected counts for every rate-limited command."""
+    return [
+        {
+            'name': limiter.name,
+            'allowed': limiter.allowed,
+            'rejected': limiter.rejected,
+            'buckets': len(limiter),
+        }
+        for limiter in _limiters
+    ]
+
+
+def rate_limit(calls: int, period: int, name: str = None):
+    """Rate limiting decorator for commands, buttons and modals
+    calls: number of allowed calls per user
+    period: time period in seconds
+    """
+    def decorator(func):
+        limiter = TokenBucketLimiter(name or func.__qualname__, calls, period)
+        _limiters.append(limiter)
+
+        @wraps(func)
+        async def wrapper(self, interaction: discord.Interaction, *args, **kwargs):
+            allowed, retry_after = limiter.try_acquire(interaction.user.id)
+            if not allowed:
+                logger.debug(f"Rate limited {interaction.user.id} on {limiter.name} for {retry_after:.1f}s")
+                await interaction.response.send_message(
+                    f"Please wait {math.ceil(retry_after)} seconds before using this command again.",
+                    ephemeral=True
+                )
+                return
+
+            return await func(self, interaction, *args, **kwargs)
+
+        wrapper.limiter = limiter
+        return wrapper
+    return decorator
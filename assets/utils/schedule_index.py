@@ -0,0 +1,114 @@
+import heapq
+import itertools
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+
+def next_fire(local_time: str, tz_name: str, after: datetime) -> datetime:
+    """The first instant after `after` when the wall clock in tz_name reads local_time (HH:MM), in UTC.
+
+    Each day is resolved on its own, so the offset is the one in force on
+    that day. A time skipped by a spring-forward change fires at the
+    pre-change offset (an hour later on the wall clock); a time repeated by
+    a fall-back change fires on its first occurrence.
+    """
+    zone = ZoneInfo(tz_name)
+    hour, minute = map(int, local_time.split(':'))
+    local_day = after.astimezone(zone).date()
+    for offset in range(3):
+        day = local_day + timedelta(days=offset)
+        fire_at = datetime(day.year, day.month, day.day, hour, minute, tzinfo=zone).astimezone(timezone.utc)
+        if fire_at > after:
+            return fire_at
+    raise ValueError(f"No time {local_time} in {tz_name} after {after}")
+
+
+class ScheduleIndex:
+    """Daily wall-clock schedule entries, ordered by their next fire instant in UTC.
+
+    Each entry is a key (e.g. ('briefing', user_id)) with an HH:MM time and
+    a timezone. A heap holds (fire_at, seq, key), so the dispatcher finds
+    what is due by popping in O(log n) instead of converting every user's
+    local time on every tick. Replacing or removing an entry leaves its old
+    heap item behind to be skipped when it surfaces; the heap is compacted
+    once stale items outnumber live ones.
+
+    When an entry fires, its next occurrence is worked out afresh from its
+    wall-clock time, so entries pick up a DST change one by one as they
+    fire, and nothing has to be rebuilt when the clocks change.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._entries = {}  # key -> (local_time, tz_name, fire_at, seq)
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key) -> bool:
+        return key in self._entries
+
+    def keys(self):
+        return self._entries.keys()
+
+    def load(self, entries, now: datetime) -> list:
+        """Replace the index with (key, local_time, tz_name) entries.
+
+        Returns the keys of entries left out because their time or timezone
+        couldn't be read.
+        """
+        self._entries = {}
+        skipped = []
+        for key, local_time, tz_name in entries:
+            try:
+                fire_at = next_fire(local_time, tz_name, now)
+            except (ValueError, KeyError):  # ZoneInfoNotFoundError is a KeyError
+                skipped.append(key)
+                continue
+            self._entries[key] = (local_time, tz_name, fire_at, next(self._seq))
+        self._heap = [(fire_at, seq, key) for key, (_, _, fire_at, seq) in self._entries.items()]
+        heapq.heapify(self._heap)
+        return skipped
+
+    def set(self, key, local_time: str, tz_name: str, now: datetime) -> datetime:
+        """Add or move an entry. Returns its next fire instant."""
+        current = self._entries.get(key)
+        if current and current[:2] == (local_time, tz_name):
+            return current[2]
+        fire_at = next_fire(local_time, tz_name, now)
+        self._push(key, local_time, tz_name, fire_at)
+        return fire_at
+
+    def remove(self, key):
+        if self._entries.pop(key, None) is not None:
+            self._maybe_compact()
+
+    def next_fire(self, key) -> Optional[datetime]:
+        entry = self._entries.get(key)
+        return entry[2] if entry else None
+
+    def pop_due(self, now: datetime) -> list:
+        """(key, fire_at) for every entry due at or before `now`, each rescheduled for its next occurrence."""
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            fire_at, seq, key = heapq.heappop(self._heap)
+            entry = self._entries.get(key)
+            if entry is None or entry[3] != seq:
+                continue  # replaced or removed since it was pushed
+            local_time, tz_name = entry[:2]
+            due.append((key, fire_at))
+            self._push(key, local_time, tz_name, next_fire(local_time, tz_name, max(now, fire_at)))
+        return due
+
+    def _push(self, key, local_time: str, tz_name: str, fire_at: datetime):
+        seq = next(self._seq)
+        self._entries[key] = (local_time, tz_name, fire_at, seq)
+        heapq.heappush(self._heap, (fire_at, seq, key))
+        self._maybe_compact()
+
+    def _maybe_compact(self):
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [(fire_at, seq, key) for key, (_, _, fire_at, seq) in self._entries.items()]
+            heapq.heapify(self._heap)
@@ -0,0 +1,268 @@
+import asyncio
+import heapq
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from assets.utils.metrics import registry
+from assets.utils.quota import GOOGLE_MAPS
+from assets.utils.upstream import UpstreamUnavailableError
+
+# Just get the logger without adding handlers
+logger = logging.getLogger('gentle_habits')
+
+# computeRouteMatrix accepts at most this many origin x destination elements per request
+MAX_MATRIX_ELEMENTS = 625
+
+# Least share of a matrix request's elements that must be wanted pairs before
+# two groups of pairs share a request (every element is billed)
+MIN_MATRIX_DENSITY = 0.8
+
+# Matrix requests in flight at once for one call of fetch_driving_estimates
+MATRIX_REQUEST_CONCURRENCY = 8
+
+# Driving time relative to the no-traffic time at which traffic counts as moderate / heavy
+MODERATE_TRAFFIC_RATIO = 1.2
+HEAVY_TRAFFIC_RATIO = 1.5
+
+route_matrix_requests = registry.counter(
+    'gentle_habits_route_matrix_requests_total',
+    'computeRouteMatrix calls made for driving times'
+)
+route_matrix_elements = registry.counter(
+    'gentle_habits_route_matrix_elements_total',
+    'Origin x destination elements requested from computeRouteMatrix (the unit the Routes API bills by)'
+)
+
+
+@dataclass(frozen=True)
+class DrivingEstimate:
+    """Traffic-aware driving time for one origin/destination pair."""
+    __slots__ = ('duration_seconds', 'static_duration_seconds', 'distance_meters')
+    duration_seconds: int         # with current traffic
+    static_duration_seconds: int  # without traffic, 0 if unknown
+    distance_meters: int
+
+    @property
+    def severity(self) -> str:
+        """'heavy', 'moderate' or 'normal', from how much traffic stretches the trip."""
+        if not self.static_duration_seconds:
+            return 'normal'
+        ratio = self.duration_seconds / self.static_duration_seconds
+        if ratio >= HEAVY_TRAFFIC_RATIO:
+            return 'heavy'
+        if ratio >= MODERATE_TRAFFIC_RATIO:
+            return 'moderate'
+        return 'normal'
+
+
+def parse_duration(value) -> int:
+    """Routes API durations are strings like '545s'."""
+    if isinstance(value, str) and value.endswith('s'):
+        return int(float(value[:-1]))
+    return 0
+
+
+def format_duration(seconds: int) -> str:
+    """Human-readable duration, e.g. '9 min 5 sec', '25 min', '1 hr 5 min'."""
+    minutes, seconds_remainder = divmod(seconds, 60)
+    if minutes >= 60:
+        hours, minutes_remainder = divmod(minutes, 60)
+        return f"{hours} hr {minutes_remainder} min" if minutes_remainder else f"{hours} hr"
+    if minutes > 0:
+        # Only show seconds for short durations
+        if seconds_remainder and minutes < 10:
+            return f"{minutes} min {seconds_remainder} sec"
+        return f"{minutes} min"
+    return f"{seconds} sec"
+
+
+def departure_time(minutes_ahead: int = 5) -> str:
+    """RFC 3339 departure time a little in the future, as the Routes API requires."""
+    return (datetime.now(timezone.utc) + timedelta(minutes=minutes_ahead)).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _star_groups(pairs) -> list:
+    """Split pairs into stars: one origin to many destinations, or many origins to one destination.
+
+    The largest star left is taken first, so pairs that share an end are
+    kept together; what remains once no two pairs share an end comes back
+    as single-pair groups. Returns a list of (origins, destinations) where
+    one side has a single entry.
+    """
+    by_origin, by_destination = {}, {}
+    for origin, destination in pairs:
+        by_origin.setdefault(origin, set()).add(destination)
+        by_destination.setdefault(destination, set()).add(origin)
+
+    # Sizes in the heap go stale as other stars take pairs; they are
+    # checked when popped and pushed back with the current size
+    heap = [(-len(ends), 0, origin) for origin, ends in by_origin.items()]
+    heap += [(-len(ends), 1, destination) for destination, ends in by_destination.items()]
+    heapq.heapify(heap)
+    stars = []
+    while heap:
+        negative_size, side, key = heapq.heappop(heap)
+        ends = (by_origin if side == 0 else by_destination).get(key)
+        if not ends:
+            continue
+        if len(ends) != -negative_size:
+            heapq.heappush(heap, (-len(ends), side, key))
+            continue
+        ends = sorted(ends)
+        if side == 0:
+            del by_origin[key]
+            for destination in ends:
+                by_destination[destination].discard(key)
+            stars.append(([key], ends))
+        else:
+            del by_destination[key]
+            for origin in ends:
+                by_origin[origin].discard(key)
+            stars.append((ends, [key]))
+    return stars
+
+
+def plan_matrix_batches(pairs, max_elements: int = MAX_MATRIX_ELEMENTS,
+                        min_density: float = MIN_MATRIX_DENSITY) -> list:
+    """Group (origin, destination) coordinate pairs into matrix requests billed for little more than they need.
+
+    computeRouteMatrix bills every origin x destination element, so asking
+    for the grid of everyone's origins and destinations pays for cells
+    nobody wants. Pairs sharing an origin or a destination are grouped into
+    stars, whose grids are exactly the pairs in them. A star joins an
+    earlier request that shares one of its ends only while at least
+    min_density of the merged grid is wanted, and pairs that share nothing
+    are sent one per request. Returns a list of (origins, destinations) lists.
+    """
+    batches = []  # [origins, destinations, pairs wanted]
+    by_end = {}   # origin or destination -> indexes into batches that include it
+    for star_origins, star_destinations in _star_groups(dict.fromkeys(pairs)):
+        # A star bigger than one request is split along its long side
+        for start in range(0, len(star_origins) * len(star_destinations), max_elements):
+            origins = star_origins[start:start + max_elements] if len(star_origins) > 1 else star_origins
+            destinations = star_destinations[start:start + max_elements] if len(star_destinations) > 1 else star_destinations
+            wanted = len(origins) * len(destinations)
+            candidates = sorted({index for end in origins + destinations for index in by_end.get(end, ())})
+            for index in candidates:
+                batch = batches[index]
+                merged_origins = list(dict.fromkeys(batch[0] + origins))
+                merged_destinations = list(dict.fromkeys(batch[1] + destinations))
+                elements = len(merged_origins) * len(merged_destinations)
+                if elements <= max_elements and batch[2] + wanted >= min_density * elements:
+                    batch[:] = [merged_origins, merged_destinations, batch[2] + wanted]
+                    break
+            else:
+                index = len(batches)
+                batches.append([origins, destinations, wanted])
+            for end in origins + destinations:
+                by_end.setdefault(end, set()).add(index)
+    return [(origins, destinations) for origins, destinations, _ in batches]
+
+
+def _waypoint(coordinates: str) -> dict:
+    latitude, longitude = coordinates.split(',')
+    return {'waypoint': {'location': {'latLng': {'latitude': float(latitude), 'longitude': float(longitude)}}}}
+
+
+def parse_route_matrix(elements: list, origins: list, destinations: list) -> dict:
+    """Map each (origin, destination) in a computeRouteMatrix response to a DrivingEstimate (or None)."""
+    estimates = {}
+    for element in elements:
+        pair = (origins[element.get('originIndex', 0)], destinations[element.get('destinationIndex', 0)])
+        if element.get('status', {}).get('code') or element.get('condition') == 'ROUTE_NOT_FOUND':
+            estimates[pair] = None
+            continue
+        estimates[pair] = DrivingEstimate(
+            duration_seconds=parse_duration(element.get('duration')),
+            static_duration_seconds=parse_duration(element.get('staticDuration')),
+            distance_meters=int(element.get('distanceMeters', 0)),
+        )
+    return estimates
+
+
+async def fetch_driving_estimates(client, pairs, api_key: str, base_url: str, max_elements: int = MAX_MATRIX_ELEMENTS, quota=None) -> dict:
+    """Traffic-aware driving estimates for (origin, destination) coordinate pairs.
+
+    Coordinates are 'lat,lng' strings and client is the Routes UpstreamClient.
+    Every requested pair is in the result; pairs whose batch failed, that have
+    no route, or that would go over the QuotaGovernor's Google Maps cap map
+    to None. The quota is charged for the elements Google bills: those of
+    each request that succeeds.
+    """
+    pairs = list(dict.fromkeys(pairs))
+    estimates = dict.fromkeys(pairs)
+    url = f"{base_url}/distanceMatrix/v2:computeRouteMatrix"
+    headers = {
+        "Content-Type": "application/json",
+        "X-Goog-Api-Key": api_key,
+        "X-Goog-FieldMask": "originIndex,destinationIndex,status,condition,duration,staticDuration,distanceMeters"
+    }
+
+    # Requests run side by side, so each is checked against the cap along
+    # with the ones already let through
+    batches, reserved = [], 0
+    for origins, destinations in plan_matrix_batches(pairs, max_elements):
+        elements_requested = len(origins) * len(destinations)
+        if quota is not None and not quota.allows(GOOGLE_MAPS, reserved + elements_requested):
+            logger.warning(f"Skipping driving times for {elements_requested} routes: Google Maps quota reached")
+            continue
+        reserved += elements_requested
+        batches.append((origins, destinations))
+
+    semaphore = asyncio.Semaphore(MATRIX_REQUEST_CONCURRENCY)
+
+    async def fetch(origins, destinations):
+        payload = {
+            "origins": [_waypoint(origin) for origin in origins],
+            "destinations": [_waypoint(destination) for destination in destinations],
+            "travelMode": "DRIVE",
+            "routingPreference": "TRAFFIC_AWARE",
+            "departureTime": departure_time(),
+            "languageCode": "en-US",
+            "units": "METRIC"
+        }
+        elements_requested = len(origins) * len(destinations)
+        route_matrix_requests.inc()
+        route_matrix_elements.inc(elements_requested)
+        try:
+            async with semaphore:
+                # The matrix only computes, so retrying the POST is safe
+                response = await client.post(url, json=payload, headers=headers, retry=True)
+            if response.status != 200:
+                logger.error(f"Google Routes API (route matrix) returned status code {response.status}: {response.text()[:200]}")
+                return
+            elements = response.json()
+        except UpstreamUnavailableError as e:
+            logger.warning(f"Skipping driving times for {elements_requested} routes: {e}")
+            return
+        except Exception as e:
+            logger.error(f"Exception with Google Routes API (route matrix): {e}")
+            return
+        if quota is not None:
+            quota.record(GOOGLE_MAPS, calls=len(elements))
+        for pair, estimate in parse_route_matrix(elements, origins, destinations).items():
+            if pair in estimates:
+                estimates[pair] = estimate
+
+    await asyncio.gather(*(fetch(origins, destinations) for origins, destinations in batches))
+    return estimates
+
+
+def format_driving_conditions(estimate: DrivingEstimate, origin: str, destination: str) -> str:
+    """Briefing text for a driving estimate, with a Google Maps link for the route."""
+    if estimate.severity == 'heavy':
+        traffic_desc = "🔴 Heavy traffic! Leave extra time for your journey."
+    elif estimate.severity == 'moderate':
+        traffic_desc = "🟠 Moderate traffic conditions."
+    else:
+        traffic_desc = "🟢 Traffic is flowing smoothly."
+
+    maps_deep_link = f"https://www.google.com/maps/dir/?api=1&origin={origin}&destination={destination}&travelmode=driving"
+    return (
+        f"🚗 **Driving Conditions:**\n"
+        f"{traffic_desc}\n"
+        f"🛣️ Distance: {estimate.distance_meters / 1000:.1f} km\n"
+        f"⏱️ Estimated driving time: {format_duration(estimate.duration_seconds)}\n"
+        f"📱 [Open in Google Maps]({maps_deep_link})"
+    )
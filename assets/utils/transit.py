@@ -0,0 +1,98 @@
+import json
+from dataclasses import dataclass
+
+NO_BUS_ROUTES = "No bus routes found between these locations"
+
+
+@dataclass(frozen=True)
+class TransitOption:
+    """One way to make the trip by bus: the first transit step of an OTP route.
+
+    Only the fields the briefing shows are kept; polylines, bounds and
+    instructions from the response are dropped when it is parsed.
+    """
+    __slots__ = (
+        'route', 'departure_text', 'departure_time', 'duration_text', 'duration_seconds',
+        'departure_stop', 'arrival_stop', 'num_stops', 'walking_distance'
+    )
+    route: str             # line short name, e.g. "676"
+    departure_text: str    # when the trip leaves, as OTP formats it ("7:27am")
+    departure_time: int    # the same as epoch seconds, 0 if missing
+    duration_text: str
+    duration_seconds: int
+    departure_stop: str
+    arrival_stop: str
+    num_stops: int
+    walking_distance: str  # walk to the departure stop, '' if none
+
+
+def _first_transit_step(steps: list):
+    """The first transit step with details, and the text distance of the walk just before it."""
+    walking_distance = ''
+    for index, step in enumerate(steps):
+        if step.get('travel_mode') != 'TRANSIT':
+            continue
+        details = step.get('transit_details')
+        if not details:
+            continue
+        if index > 0 and steps[index - 1].get('travel_mode') == 'WALKING':
+            walking_distance = steps[index - 1].get('distance', {}).get('text', '')
+        return details, walking_distance
+    return None, ''
+
+
+def parse_transit_options(data: dict) -> list:
+    """Bus options from a parsed OTP /directions response, one per route that includes a bus."""
+    options = []
+    for index, route in enumerate(data.get('routes') or []):
+        legs = route.get('legs')
+        if not legs:
+            continue
+        leg = legs[0]
+        details, walking_distance = _first_transit_step(leg.get('steps') or [])
+        if details is None:
+            continue
+
+        departure = leg.get('departure_time') or {}
+        duration = leg.get('duration') or {}
+        line = details.get('line') or {}
+        options.append(TransitOption(
+            route=line.get('short_name') or line.get('name') or f"Route {index + 1}",
+            departure_text=departure.get('text', 'Unknown time'),
+            departure_time=int(departure.get('value') or 0),
+            duration_text=duration.get('text', 'Unknown duration'),
+            duration_seconds=int(duration.get('value') or 0),
+            departure_stop=(details.get('departure_stop') or {}).get('name', 'Unknown stop'),
+            arrival_stop=(details.get('arrival_stop') or {}).get('name', 'Unknown stop'),
+            num_stops=int(details.get('num_stops') or 0),
+            walking_distance=walking_distance,
+        ))
+    return options
+
+
+def parse_transit_response(body) -> list:
+    """Parse a raw OTP /directions body (bytes or str). Raises ValueError if it isn't JSON."""
+    return parse_transit_options(json.loads(body))
+
+
+def format_transit_options(options: list, limit: int = 3) -> str:
+    """Briefing text for the next few bus options: the first in detail, the rest on one line each."""
+    if not options:
+        return NO_BUS_ROUTES
+
+    lines = []
+    for index, option in enumerate(options[:limit]):
+        if index == 0:
+            lines.append(
+                f"**Next Bus: {option.route}**\n"
+                f"🚏 Stop {index + 1}, {option.departure_stop} "
+                f"(Walking distance: {option.walking_distance or '0.1 km'})\n"
+                f"🕒 Departs at {option.departure_text}\n"
+                f"⏱️ Duration: {option.duration_text}"
+            )
+        else:
+            lines.append(
+                f"{option.route} from {option.departure_stop}: "
+                f"Departs {option.departure_text}, Duration: {option.duration_text}"
+            )
+    return "\n\n".join(lines)
@@ -0,0 +1,313 @@
+import asyncio
+import json
+import logging
+import random
+import time
+from collections import OrderedDict
+
+import aiohttp
+
+from assets.utils.metrics import registry, http_trace_config
+
+# Just get the logger without adding handlers
+logger = logging.getLogger('gentle_habits')
+
+CLOSED, HALF_OPEN, OPEN = 'closed', 'half_open', 'open'
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+# Statuses worth another attempt: rate limiting and server-side failures
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# The current client for each upstream, so breaker state can be reported in one place
+_clients = {}
+
+upstream_retries = registry.counter(
+    'gentle_habits_upstream_retries_total',
+    'Outbound requests retried after a timeout, connection error, 429 or 5xx',
+    ('upstream',)
+)
+upstream_short_circuits = registry.counter(
+    'gentle_habits_upstream_short_circuits_total',
+    'Outbound requests refused without being sent because the upstream circuit was open',
+    ('upstream',)
+)
+upstream_stale_responses = registry.counter(
+    'gentle_habits_upstream_stale_responses_total',
+    'Requests answered from the last good response because the upstream was unavailable',
+    ('upstream',)
+)
+registry.callback(
+    'gentle_habits_upstream_circuit_state',
+    'Circuit breaker state per upstream (0 closed, 1 half-open, 2 open)',
+    'gauge',
+    lambda: [((client.name,), STATE_VALUES[client.breaker.state]) for client in _clients.values()],
+    ('upstream',)
+)
+
+
+class UpstreamUnavailableError(Exception):
+    """Raised when an upstream could not answer and there was no earlier response to fall back on."""
+    pass
+
+
+class UpstreamResponse:
+    """A fully read upstream response, so it can be retried, cached and served again."""
+    __slots__ = ('status', 'headers', 'body', 'stale')
+
+    def __init__(self, status: int, headers, body: bytes, stale: bool = False):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.stale = stale  # served from the fallback cache rather than fetched now
+
+    def json(self):
+        return json.loads(self.body)
+
+    def text(self) -> str:
+        return self.body.decode('utf-8', errors='replace')
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker.
+
+    After `failure_threshold` failed requests in a row the circuit opens and
+    requests are refused without touching the network. Once `reset_timeout`
+    seconds have passed it goes half-open and lets a single trial request
+    through: success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._trial_started = 0.0
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            return HALF_OPEN
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now (claims the trial slot when half-open)."""
+        state = self.state
+        if state == CLOSED:
+            return True
+        # A trial that never reported back (e.g. its task was cancelled) doesn't block forever
+        now = time.monotonic()
+        if state == HALF_OPEN and (not self._trial_in_flight or now - self._trial_started >= self.reset_timeout):
+            self._state = HALF_OPEN
+            self._trial_in_flight = True
+            self._trial_started = now
+            return True
+        return False
+
+    def record_success(self):
+        if self._state != CLOSED:
+            logger.info(f"Upstream {self.name} recovered, closing circuit")
+        self._state = CLOSED
+        self.failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_flight = False
+        if self._state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self._state != OPEN:
+                logger.warning(
+                    f"Upstream {self.name} failed {self.failures} times in a row, "
+                    f"opening circuit for {self.reset_timeout:.0f}s"
+                )
+            self._state = OPEN
+            self.opened_at = time.monotonic()
+
+    def retry_after(self) -> float:
+        """Seconds until an open circuit lets a trial request through."""
+        if self._state != OPEN:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+
+class UpstreamClient:
+    """Resilient HTTP access to one upstream host.
+
+    Each client keeps its own pooled session with connect/read timeouts suited
+    to that host, retries idempotent requests (GETs, or any request made with
+    retry=True) with exponential backoff and full jitter, and runs a circuit
+    breaker so a dead host fails fast instead of stalling every briefing.
+    The last good response to each GET is kept so it can be served, marked
+    stale, while the host is unhealthy. It is keyed on the URL and params,
+    leaving out `stale_ignore_params` (values that change on every call,
+    such as a departure time, or that don't change the answer, such as a key).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        connect_timeout: float = 3.0,
+        read_timeout: float = 10.0,
+        total_timeout: float = 15.0,
+        max_retries: int = 2,
+        backoff_base: float = 0.25,
+        backoff_max: float = 4.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        stale_ttl: float = 6 * 3600,
+        stale_max_entries: int = 256,
+        stale_ignore_params: tuple = ()
+    ):
+        self.name = name
+        self.timeout = aiohttp.ClientTimeout(total=total_timeout, sock_connect=connect_timeout, sock_read=read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = CircuitBreaker(name, failure_threshold, reset_timeout)
+        self.stale_ttl = stale_ttl
+        self.stale_max_entries = stale_max_entries
+        self.stale_ignore_params = frozenset(stale_ignore_params)
+        self._stale = OrderedDict()  # request key -> (fetched_at, UpstreamResponse)
+        self._session = None
+        _clients[name] = self
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # Created lazily so it belongs to the running event loop
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=self.timeout, trace_configs=[http_trace_config()])
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff before retry number `attempt` (1-based)."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+
+    async def get(self, url: str, **kwargs) -> UpstreamResponse:
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> UpstreamResponse:
+        return await self.request('POST', url, **kwargs)
+
+    async def request(self, method: str, url: str, retry: bool = None, **kwargs) -> UpstreamResponse:
+        """Send a request through the breaker, retrying if it is idempotent.
+
+        Returns the response (any status) once one is final. If the circuit
+        is open, or every attempt timed out, failed to connect or returned a
+        5xx, the last good response for the same GET is returned with
+        stale=True; without one, UpstreamUnavailableError is raised.
+        """
+        if retry is None:
+            retry = method == 'GET'
+        key = self._stale_key(method, url, kwargs.get('params'))
+
+        if not self.breaker.allow():
+            upstream_short_circuits.labels(self.name).inc()
+            return self._fallback(key, f"circuit open, retrying in {self.breaker.retry_after():.0f}s")
+
+        attempts = 1 + (self.max_retries if retry else 0)
+        response, error = None, None
+        for attempt in range(attempts):
+            if attempt:
+                delay = self.backoff(attempt)
+                if response is not None and response.status == 429:
+                    delay = max(delay, self._retry_after(response))
+                    if delay > self.backoff_max:
+                        break  # the host asked for longer than it's worth waiting
+                upstream_retries.labels(self.name).inc()
+                await asyncio.sleep(delay)
+            try:
+                async with self._get_session().request(method, url, **kwargs) as raw:
+                    response = UpstreamResponse(raw.status, raw.headers, await raw.read())
+                error = None
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                response, error = None, e
+                logger.debug(f"{self.name} {method} attempt {attempt + 1}/{attempts} failed: {e!r}")
+                continue
+            if response.status not in RETRYABLE_STATUSES:
+                break
+
+        if response is not None and response.status < 500:
+            # Rate limiting is the host protecting itself, not the host being down
+            self.breaker.record_success()
+            if method == 'GET' and response.status == 200:
+                self._remember(key, response)
+            return response
+
+        self.breaker.record_failure()
+        reason = f"status {response.status}" if response is not None else repr(error)
+        try:
+            return self._fallback(key, reason)
+        except UpstreamUnavailableError:
+            if response is not None:
+                return response  # let the caller report the status as it always has
+            raise
+
+    def _stale_key(self, method: str, url: str, params):
+        if method != 'GET':
+            return None
+        if not params:
+            return url
+        return (url, tuple(sorted(
+            (str(k), str(v)) for k, v in dict(params).items() if k not in self.stale_ignore_params
+        )))
+
+    @staticmethod
+    def _retry_after(response: UpstreamResponse) -> float:
+        try:
+            return float(response.headers.get('Retry-After', 0))
+        except ValueError:
+            return 0.0
+
+    def _remember(self, key, response: UpstreamResponse):
+        self._stale[key] = (time.monotonic(), response)
+        self._stale.move_to_end(key)
+        while len(self._stale) > self.stale_max_entries:
+            self._stale.popitem(last=False)
+
+    def _fallback(self, key, reason: str) -> UpstreamResponse:
+        entry = self._stale.get(key) if key is not None else None
+        if entry and time.monotonic() - entry[0] < self.stale_ttl:
+            upstream_stale_responses.labels(self.name).inc()
+            logger.warning(f"Upstream {self.name} unavailable ({reason}), serving last good response")
+            cached = entry[1]
+            return UpstreamResponse(cached.status, cached.headers, cached.body, stale=True)
+        raise UpstreamUnavailableError(f"{self.name} unavailable ({reason})")
+
+
+def create_upstreams(max_retries: int = 2, failure_threshold: int = 5, reset_timeout: float = 30.0) -> dict:
+    """One client per upstream host the bot calls, with timeouts sized to each.
+
+    The Routes matrix is a POST but only computes, so it is safe to retry.
+    Nominatim asks for at most one request a second, so it gets a single
+    retry, and the DeepSeek status page is only advisory, so it gets none.
+    Departure times go out of date quickly, so old transit answers aren't
+    served for long, and the departure time asked for (always a few minutes
+    from now) isn't part of the key they are kept under.
+    """
+    def client(name, connect, read, total, retries, stale_ttl=6 * 3600, stale_ignore_params=()):
+        return UpstreamClient(
+            name, connect_timeout=connect, read_timeout=read, total_timeout=total, max_retries=retries,
+            failure_threshold=failure_threshold, reset_timeout=reset_timeout, stale_ttl=stale_ttl,
+            stale_ignore_params=stale_ignore_params
+        )
+
+    return {
+        'openweathermap': client('openweathermap', 3, 5, 8, max_retries),
+        'metro_tas': client(
+            'metro_tas', 3, 10, 15, max_retries, stale_ttl=300, stale_ignore_params=('departure_time', 'key')
+        ),
+        'google_routes': client('google_routes', 3, 8, 10, max_retries),
+        'nominatim': client('nominatim', 3, 5, 8, min(max_retries, 1)),
+        'deepseek_status': client('deepseek_status', 2, 3, 5, 0),
+    }
+
+
+async def close_upstreams(upstreams: dict):
+    for client in upstreams.values():
+        await client.close()
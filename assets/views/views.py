@@ -4,7 +4,8 @@ import aiosqlite
 import random
 import json
 import logging
-from assets.utils.utils import get_current_time, convert_to_local, convert_to_utc
+from assets.utils.rate_limit import rate_limit
+from assets.utils.habit_calendar import record_check_in
 
 # Just get the logger without adding handlers
 logger = logging.getLogger('gentle_habits')
@@ -15,53 +16,70 @@ class HabitButton(discord.ui.View):
         self.habit_id = habit_id
         self.add_item(CheckInButton(habit_id))
 
-class CheckInButton(discord.ui.Button):
+class CheckInButton(discord.ui.DynamicItem[discord.ui.Button], template=r'checkin_(?P<habit_id>\d+)'):
+    """A habit reminder's check-in button.
+
+    The habit id lives in the custom_id, so the bot registers this class
+    once with add_dynamic_items and every reminder's button, including
+    those sent before a restart, is rebuilt from its custom_id on click.
+    """
+
     def __init__(self, habit_id: int):
         super().__init__(
-            label="✨ Check In",
-            style=discord.ButtonStyle.green,
-            custom_id=f"checkin_{habit_id}"
+            discord.ui.Button(
+                label="✨ Check In",
+                style=discord.ButtonStyle.green,
+                custom_id=f"checkin_{habit_id}"
+            )
         )
         self.habit_id = habit_id
 
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(int(match['habit_id']))
+
     async def callback(self, interaction: discord.Interaction):
         try:
             async with aiosqlite.connect(interaction.client.db_path) as db:
                 try:
-                    await db.execute('BEGIN TRANSACTION')
-                    
-                    # Use configured timezone for all datetime operations
-                    now = get_current_time()
-                    today = now.date()
+                    # Take the write lock up front: a deferred transaction that reads and
+                    # then writes fails outright if another check-in committed in between
+                    await db.execute('BEGIN IMMEDIATE')
                     
                     # Get habit info
                     cursor = await db.execute(
-                        'SELECT name, expiry_time FROM habits WHERE id = ?',
+                        'SELECT name, expiry_time, timezone FROM habits WHERE id = ?',
                         (self.habit_id,)
                     )
                     habit = await cursor.fetchone()
                     if not habit:
+                        await db.rollback()
                         await interaction.response.send_message(
                             "This habit no longer exists!",
                             ephemeral=True
                         )
-                        await db.rollback()
                         return
                     
-                    habit_name, expiry_time = habit
+                    habit_name, expiry_time, habit_timezone = habit
+                    
+                    # Days and the check-in window follow the habit's timezone
+                    now = interaction.client.clock.now(habit_timezone)
+                    today = now.date()
                     
                     # Check if we're past the expiry time for today
                     if expiry_time:
                         current_time = now.time()
                         expiry_time_obj = datetime.strptime(expiry_time, "%H:%M").time()
                         if current_time > expiry_time_obj:
+                            await db.rollback()
                             await interaction.response.send_message(
                                 f"Today's check-in window for {habit_name} has expired. Try again tomorrow!",
                                 ephemeral=True
                             )
-                            await db.rollback()
                             return
                     
+                    checked_in_at = interaction.client.clock.to_utc(now).isoformat()
+                    
                     # Update user's streak with proper timezone handling
                     cursor = await db.execute(
                         '''SELECT current_streak, last_check_in 
@@ -75,16 +93,16 @@ class CheckInButton(discord.ui.Button):
                         current_streak, last_check_in = row
                         if last_check_in:
                             # Convert stored UTC time to local timezone
-                            last_check = convert_to_local(datetime.fromisoformat(last_check_in))
+                            last_check = interaction.client.clock.to_local(datetime.fromisoformat(last_check_in), habit_timezone)
                             last_check_date = last_check.date()
                             
                             # Prevent multiple check-ins on the same day
                             if last_check_date == today:
+                                await db.rollback()
                                 await interaction.response.send_message(
                                     f"You've already checked in for {habit_name} today! Keep up the great work! ✨",
                                     ephemeral=True
                                 )
-                                await db.rollback()
                                 return
                             
                             # Calculate days between check-ins
@@ -108,7 +126,7 @@ class CheckInButton(discord.ui.Button):
                             '''UPDATE user_habits 
                                SET current_streak = ?, last_check_in = ? 
                                WHERE user_id = ? AND habit_id = ?''',
-                            (current_streak, convert_to_utc(now).isoformat(), interaction.user.id, self.habit_id)
+                            (current_streak, checked_in_at, interaction.user.id, self.habit_id)
                         )
                     else:
                         current_streak = 1
@@ -116,9 +134,12 @@ class CheckInButton(discord.ui.Button):
                             '''INSERT INTO user_habits 
                                (user_id, habit_id, current_streak, last_check_in) 
                                VALUES (?, ?, ?, ?)''',
-                            (interaction.user.id, self.habit_id, current_streak, convert_to_utc(now).isoformat())
+                            (interaction.user.id, self.habit_id, current_streak, checked_in_at)
                         )
                     
+                    # Log the check-in and mark the day on the user's calendar for this habit
+                    await record_check_in(db, interaction.user.id, self.habit_id, today, checked_in_at)
+                    
                     await db.commit()
                     
                     # Get random affirmation based on configured tone
@@ -172,6 +193,26 @@ class CheckInButton(discord.ui.Button):
                 )
             return
 
+class SearchResultsView(discord.ui.View):
+    """Pages through /habit search results."""
+    def __init__(self, fetch_page, next_cursor):
+        super().__init__(timeout=300)
+        self.fetch_page = fetch_page
+        self.next_cursor = next_cursor
+        
+    @discord.ui.button(label="More results", style=discord.ButtonStyle.grey, emoji="🔎")
+    async def more_results(self, interaction: discord.Interaction, button: discord.ui.Button):
+        try:
+            embed, self.next_cursor = await self.fetch_page(self.next_cursor)
+            await interaction.response.edit_message(embed=embed, view=self if self.next_cursor else None)
+        except Exception as e:
+            logger.error(f"Error loading more search results: {e}")
+            if not interaction.response.is_done():
+                await interaction.response.send_message(
+                    "I couldn't load more results. Please try searching again!",
+                    ephemeral=True
+                )
+
 class StreakButton(discord.ui.Button):
     def __init__(self):
         super().__init__(
@@ -277,7 +318,7 @@ class RefreshDashboardButton(discord.ui.Button):
         
     async def callback(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True)
-        await interaction.client.update_debt_dashboard()
+        await interaction.client.update_debt_dashboard(interaction.guild_id)
         await interaction.followup.send("Debt tracker dashboard refreshed!", ephemeral=True)
 
 class AddDebtModal(discord.ui.Modal, title="Add New Debt Account"):
@@ -314,6 +355,7 @@ class AddDebtModal(discord.ui.Modal, title="Add New Debt Account"):
         required=True
     )
     
+    @rate_limit(5, 60)
     async def on_submit(self, interaction: discord.Interaction):
         try:
             # Validate current balance as a number
@@ -358,15 +400,15 @@ class AddDebtModal(discord.ui.Modal, title="Add New Debt Account"):
             is_public = self.is_public.value.lower() in ["yes", "y", "true"]
             
             # Insert into database
-            now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            now = interaction.client.clock.now().strftime("%Y-%m-%d %H:%M:%S")
             async with aiosqlite.connect(interaction.client.db_path) as db:
                 try:
                     await db.execute(
                         '''
                         INSERT INTO debt_accounts (
                             user_id, name, current_balance, initial_balance, 
-                            interest_rate, due_date, created_at, updated_at, is_public
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                            interest_rate, due_date, created_at, updated_at, is_public, guild_id
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                         ''',
                         (
                             interaction.user.id,
@@ -377,7 +419,8 @@ class AddDebtModal(discord.ui.Modal, title="Add New Debt Account"):
                             due_date,
                             now,
                             now,
-                            is_public
+                            is_public,
+                            interaction.guild_id
                         )
                     )
                     await db.commit()
@@ -388,13 +431,15 @@ class AddDebtModal(discord.ui.Modal, title="Add New Debt Account"):
                     )
                     return
             
+            interaction.client.debt_account_names.add(interaction.user.id, self.name.value)
+            
             await interaction.response.send_message(
                 f"Debt account '{self.name.value}' added successfully with a balance of ${current_balance:,.2f}!",
                 ephemeral=True
             )
             
             # Refresh the dashboard
-            await interaction.client.update_debt_dashboard()
+            await interaction.client.update_debt_dashboard(interaction.guild_id)
             
         except Exception as e:
             logger.error(f"Error adding debt account: {e}")
@@ -448,6 +493,7 @@ class MakePaymentModal(discord.ui.Modal, title="Record a Payment"):
         self.add_item(self.payment_date)  
         self.add_item(self.notes)
     
+    @rate_limit(5, 60)
     async def on_submit(self, interaction: discord.Interaction):
         try:
             # Get values from inputs
@@ -473,7 +519,7 @@ class MakePaymentModal(discord.ui.Modal, title="Record a Payment"):
                 
             # Validate and set payment date
             if not payment_date:
-                payment_date = datetime.now().strftime("%Y-%m-%d")
+                payment_date = interaction.client.clock.now().strftime("%Y-%m-%d")
             else:
                 try:
                     payment_date = datetime.strptime(payment_date, "%Y-%m-%d").strftime("%Y-%m-%d")
@@ -515,7 +561,7 @@ class MakePaymentModal(discord.ui.Modal, title="Record a Payment"):
                     )
                     
                     # Update the account balance
-                    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    now = interaction.client.clock.now().strftime("%Y-%m-%d %H:%M:%S")
                     await db.execute(
                         'UPDATE debt_accounts SET current_balance = ?, updated_at = ? WHERE id = ?',
                         (new_balance, now, selected_account_id)
@@ -530,7 +576,7 @@ class MakePaymentModal(discord.ui.Modal, title="Record a Payment"):
                     )
                     
                     # Refresh the dashboard
-                    await interaction.client.update_debt_dashboard()
+                    await interaction.client.update_debt_dashboard(interaction.guild_id)
                     
                 except Exception as e:
                     await db.rollback()
@@ -583,6 +629,7 @@ class UpdateBalanceModal(discord.ui.Modal, title="Update Debt Balance"):
         self.add_item(self.new_balance)
         self.add_item(self.reason)
     
+    @rate_limit(5, 60)
     async def on_submit(self, interaction: discord.Interaction):
         try:
             # Get values from inputs
@@ -624,7 +671,7 @@ class UpdateBalanceModal(discord.ui.Modal, title="Update Debt Balance"):
                 
                 # Record note about the update if there's a reason
                 if reason:
-                    now = datetime.now().strftime("%Y-%m-%d")
+                    now = interaction.client.clock.now().strftime("%Y-%m-%d")
                     balance_diff = new_balance - current_balance
                     sign = "+" if balance_diff >= 0 else ""
                     
@@ -636,7 +683,7 @@ class UpdateBalanceModal(discord.ui.Modal, title="Update Debt Balance"):
                     )
                 
                 # Update the account balance
-                now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                now = interaction.client.clock.now().strftime("%Y-%m-%d %H:%M:%S")
                 await db.execute(
                     'UPDATE debt_accounts SET current_balance = ?, updated_at = ? WHERE id = ?',
                     (new_balance, now, selected_account_id)
@@ -650,7 +697,7 @@ class UpdateBalanceModal(discord.ui.Modal, title="Update Debt Balance"):
                 )
                 
                 # Refresh the dashboard
-                await interaction.client.update_debt_dashboard()
+                await interaction.client.update_debt_dashboard(interaction.guild_id)
                 
         except Exception as e:
             logger.error(f"Error updating balance: {e}")
@@ -0,0 +1,178 @@
+"""Benchmark the morning briefing's upstream fan-out against the local stand-in.
+
+Starts benchmarks/upstream_stub.py in-process, points the bot at it, and
+times the real _get_weather_info (including the DeepSeek clothing advice),
+_get_bus_info (with and without geocoding), a single user's briefing, and a
+full send_morning_briefing run for a batch of users.
+
+    python -m benchmarks.briefing_bench --profile typical --concurrency 8
+    python -m benchmarks.briefing_bench --profile degraded --output degraded.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import shutil
+import tempfile
+
+from benchmarks import seed
+from benchmarks.common import (
+    BenchmarkBot, Stopwatch, bot_module, compare_results, pin_clock, run_metadata, summarize, write_results
+)
+from benchmarks.upstream_stub import UpstreamStub, add_profile_arguments, parse_overrides
+
+ORIGIN = "85 Bastick Street, Rosny, TAS::-42.872160,147.359686"
+DESTINATION = "Hobart City Interchange, Hobart, TAS::-42.882473,147.329588"
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Register a benchmark: an async function (bot, rng) that performs one iteration."""
+    def decorator(func):
+        BENCHMARKS[name] = func
+        return func
+    return decorator
+
+
+@benchmark('weather')
+async def bench_weather(bot, rng):
+    await bot._get_weather_info('Hobart, AU')
+
+
+@benchmark('bus')
+async def bench_bus(bot, rng):
+    await bot._get_bus_info(ORIGIN, DESTINATION)
+
+
+@benchmark('bus_geocoded')
+async def bench_bus_geocoded(bot, rng):
+    # Addresses without coordinates are geocoded through Nominatim first
+    await bot._get_bus_info('85 Bastick Street, Rosny, TAS', 'Hobart City Interchange')
+
+
+@benchmark('user_briefing')
+async def bench_user_briefing(bot, rng):
+    user_id, location = rng.choice(bot.bench_briefing_users)
+    await bot._send_user_briefing(bot.get_user(user_id), location)
+
+
+@benchmark('briefing_run')
+async def bench_briefing_run(bot, rng):
+    await bot.send_morning_briefing(bot.bench_briefing_cohort)
+
+
+async def prepare(bot, batch_users: int):
+    """Give a batch of briefing users a 07:30 slot and a bus route, then pin the clock."""
+    async with bot.db_pool.acquire() as db:
+        await db.execute('UPDATE morning_briefing_prefs SET opted_in = 0')
+        await db.execute(
+            '''UPDATE morning_briefing_prefs
+               SET opted_in = 1, greeting_time = '07:30', bus_origin = ?, bus_destination = ?
+               WHERE user_id IN (SELECT user_id FROM morning_briefing_prefs ORDER BY user_id LIMIT ?)''',
+            (ORIGIN, DESTINATION, batch_users)
+        )
+        await db.commit()
+        cursor = await db.execute('SELECT user_id, location FROM morning_briefing_prefs WHERE opted_in = 1')
+        bot.bench_briefing_users = await cursor.fetchall()
+    bot.bench_briefing_cohort = [user_id for user_id, _ in bot.bench_briefing_users]
+    pin_clock(bot)
+
+
+async def timed_batch(func, bot, rng, stopwatch: Stopwatch, count: int, concurrency: int, name: str):
+    """Run `count` iterations, `concurrency` at a time."""
+    logger = logging.getLogger('gentle_habits')
+
+    async def one():
+        try:
+            await stopwatch.time(func(bot, rng))
+        except Exception as e:
+            logger.error(f"{name} failed: {e}")
+
+    for start in range(0, count, concurrency):
+        await asyncio.gather(*(one() for _ in range(min(concurrency, count - start))))
+
+
+async def run(db_path: str, stub: UpstreamStub, names: list, iterations: int, concurrency: int,
+              batch_users: int, seed_value: int, verbose: bool = False) -> dict:
+    await stub.start()
+    stub.configure(bot_module.config)
+    bot = BenchmarkBot(db_path)
+    if not verbose:
+        # The bot sets its own log level on start-up; the bus lookups log at INFO for every call
+        logging.getLogger('gentle_habits').setLevel(logging.WARNING)
+    await bot.start_db()
+    results = {}
+    try:
+        await prepare(bot, batch_users)
+        for name in names:
+            rng = random.Random(seed_value)
+            stopwatch = Stopwatch()
+            dms_before = bot.dms_sent
+            # A briefing run already fans out over the whole batch, so it isn't run concurrently
+            runs = max(1, iterations // 10) if name == 'briefing_run' else iterations
+            await timed_batch(
+                BENCHMARKS[name], bot, rng, stopwatch, runs,
+                1 if name == 'briefing_run' else concurrency, name
+            )
+            results[name] = summarize(stopwatch.samples, stopwatch.errors)
+            results[name]['dms_queued'] = bot.dms_sent - dms_before
+            print(f"{name:<16} p50 {results[name]['p50_ms']:>9.1f}ms   p95 {results[name]['p95_ms']:>9.1f}ms   p99 {results[name]['p99_ms']:>9.1f}ms")
+    finally:
+        await bot.stop_db()
+        await stub.stop()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the morning briefing against local upstream stand-ins")
+    parser.add_argument('--scale', default='small', help="small (1k users), medium (100k), large (1M), or a user count")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db', help="Use an existing seeded database instead of benchmarks/data/")
+    parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), help="Run only these benchmarks")
+    parser.add_argument('--iterations', type=int, default=40)
+    parser.add_argument('--concurrency', type=int, default=4, help="Calls in flight at once")
+    parser.add_argument('--batch-users', type=int, default=25, help="Users due a briefing in each briefing_run")
+    parser.add_argument('--output', help="Where to write JSON results")
+    parser.add_argument('--compare', help="Earlier JSON results to compare against")
+    parser.add_argument('--verbose', action='store_true', help="Keep the bot's INFO logging")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    source = args.db or asyncio.run(seed.ensure(args.scale, args.seed))
+    stub = UpstreamStub(args.profile, parse_overrides(args), args.seed)
+
+    workdir = tempfile.mkdtemp(prefix='gentle-habits-briefing-')
+    db_path = os.path.join(workdir, 'briefing.db')
+    shutil.copy(source, db_path)
+    try:
+        names = args.only or list(BENCHMARKS)
+        results = asyncio.run(run(
+            db_path, stub, names, args.iterations, args.concurrency, args.batch_users, args.seed, args.verbose
+        ))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    results = {
+        'meta': run_metadata(
+            benchmark='briefing', scale=args.scale, seed=args.seed, profile=args.profile,
+            overrides=parse_overrides(args), iterations=args.iterations, concurrency=args.concurrency,
+            batch_users=args.batch_users
+        ),
+        'upstream_requests': stub.stats(),
+        'route_matrix_elements': stub.matrix_elements,
+        'results': results,
+    }
+    print(f"\nUpstream requests: {json.dumps(results['upstream_requests'])}, route matrix elements: {stub.matrix_elements}")
+
+    output = args.output or os.path.join('benchmarks', 'results', f"briefing-{args.profile}-{results['meta']['timestamp'].replace(':', '')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    write_results(output, results)
+    if args.compare:
+        compare_results(args.compare, results, key='p95_ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+"""Shared helpers for the benchmark and load-test scripts.
+
+Importing this module imports bot.py, which needs DISCORD_TOKEN and
+DEEPSEEK_API_KEY to be set; placeholder values are filled in so the scripts
+run offline. Nothing here ever connects to Discord.
+"""
+import asyncio
+import json
+import math
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import time
+from datetime import datetime
+
+os.environ.setdefault('DISCORD_TOKEN', 'benchmark')
+os.environ.setdefault('DEEPSEEK_API_KEY', 'benchmark')
+os.environ.setdefault('METRICS_PORT', '0')
+os.environ.setdefault('REMINDER_CHANNEL_ID', '900000000000000001')
+os.environ.setdefault('DEBT_TRACKER_CHANNEL_ID', '900000000000000002')
+
+# The server both channels belong to, and that seeded habits and debt accounts are in
+BENCHMARK_GUILD_ID = 900_000_000_000_000_100
+
+import bot as bot_module  # noqa: E402
+from benchmarks.fakes import FakeGuild, FakeTextChannel, FakeUser, not_found  # noqa: E402
+from assets.utils.clock import VirtualClock  # noqa: E402
+from assets.utils.upstream import close_upstreams  # noqa: E402
+
+
+class BenchmarkBot(bot_module.GentleHabitsBot):
+    """GentleHabitsBot pointed at a benchmark database, with Discord lookups answered locally."""
+
+    def __init__(self, db_path: str, max_connections: int = None):
+        super().__init__()
+        self.db_path = db_path
+        self.db_pool = bot_module.DatabasePool(
+            db_path,
+            max_connections or bot_module.config.max_db_connections,
+            bot_module.config.slow_query_ms
+        )
+        self._fake_users = {}
+        self._bot_user = FakeUser(900_000_000_000_000_000, 'Gentle Habits')
+        self._bot_user.bot = True
+        self.guild = FakeGuild(BENCHMARK_GUILD_ID)
+        self.channels = {
+            int(channel_id): FakeTextChannel(int(channel_id), name, author=self._bot_user, guild=self.guild)
+            for channel_id, name in (
+                (os.environ['REMINDER_CHANNEL_ID'], 'reminders'),
+                (os.environ['DEBT_TRACKER_CHANNEL_ID'], 'debt-tracker'),
+            )
+        }
+        self.dms_sent = 0
+
+        # Count DMs instead of starting the delivery workers
+        self.dm_queue.enqueue = self._record_dm
+
+    def _record_dm(self, user, **send_kwargs):
+        self.dms_sent += 1
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(None)
+        return future
+
+    def get_user(self, user_id):
+        user = self._fake_users.get(user_id)
+        if user is None:
+            user = self._fake_users[user_id] = FakeUser(user_id)
+        return user
+
+    async def fetch_user(self, user_id):
+        return self.get_user(user_id)
+
+    @property
+    def user(self):
+        return self._bot_user
+
+    def is_ready(self) -> bool:
+        return True
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+    async def fetch_channel(self, channel_id):
+        channel = self.get_channel(channel_id)
+        if channel is None:
+            raise not_found('Unknown Channel')
+        return channel
+
+    async def start_db(self):
+        await self.db_pool.initialize()
+        await self.init_db()
+        await self.setup_guilds()
+        await self.load_schedule()
+        await self.load_leaderboard()
+
+    async def stop_db(self):
+        await close_upstreams(self.upstreams)
+        await self.db_pool.close()
+
+
+def pin_clock(bot, hour: int = 7, minute: int = 0) -> VirtualClock:
+    """Give the bot a clock stopped at a time of today, so runs don't depend on the wall clock.
+
+    07:00 is before every seeded habit's expiry, so check-ins are accepted.
+    """
+    today = bot.clock.now()
+    bot.clock = VirtualClock(today.replace(hour=hour, minute=minute, second=0, microsecond=0), bot.clock.default_tz)
+    return bot.clock
+
+
+async def briefing_cohort(bot, greeting_time: str = '07:30') -> list:
+    """Users briefed at greeting_time, as the schedule dispatcher would hand them to send_morning_briefing."""
+    async with bot.db_pool.acquire() as db:
+        cursor = await db.execute(
+            'SELECT user_id FROM morning_briefing_prefs WHERE opted_in = 1 AND greeting_time = ?', (greeting_time,)
+        )
+        return [user_id for (user_id,) in await cursor.fetchall()]
+
+
+async def restock_cohort(bot) -> list:
+    """Users with restock items, who all come due at the daily restock reminder time."""
+    async with bot.db_pool.acquire() as db:
+        cursor = await db.execute('SELECT DISTINCT user_id FROM restock_items')
+        return [user_id for (user_id,) in await cursor.fetchall()]
+
+
+def stub_briefing_upstreams(bot):
+    """Answer the weather and transit sections of the briefing locally."""
+
+    async def weather(location):
+        return "☀️ Clear sky, 18°C"
+
+    async def bus(origin=None, destination=None, driving_estimates=None):
+        return "🚌 Next bus in 7 minutes"
+
+    bot._get_weather_info = weather
+    bot._get_bus_info = bus
+
+
+def percentile(samples: list, p: float) -> float:
+    """Nearest-rank percentile of a list of samples."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, math.ceil(p * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples: list, errors: int = 0) -> dict:
+    """Latency summary in milliseconds for a list of durations in seconds."""
+    ms = [sample * 1000 for sample in samples]
+    return {
+        'iterations': len(ms),
+        'errors': errors,
+        'min_ms': min(ms) if ms else 0.0,
+        'mean_ms': statistics.fmean(ms) if ms else 0.0,
+        'p50_ms': percentile(ms, 0.50),
+        'p95_ms': percentile(ms, 0.95),
+        'p99_ms': percentile(ms, 0.99),
+        'max_ms': max(ms) if ms else 0.0,
+    }
+
+
+def run_metadata(**extra) -> dict:
+    """Environment details stored alongside results so runs can be compared fairly."""
+    try:
+        revision = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        revision = None
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_revision': revision,
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        **extra,
+    }
+
+
+def write_results(path: str, results: dict):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {path}")
+
+
+def compare_results(baseline_path: str, results: dict, key: str = 'p50_ms'):
+    """Print how each benchmark moved relative to an earlier results file."""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+    print(f"\n{'benchmark':<32}{'before':>12}{'after':>12}{'change':>10}   ({key})")
+    for name, current in results['results'].items():
+        before = baseline.get(name, {}).get(key)
+        after = current.get(key)
+        if before is None or after is None:
+            print(f"{name:<32}{'-':>12}{after or 0:>12.2f}{'new':>10}")
+            continue
+        change = (after - before) / before * 100 if before else 0.0
+        print(f"{name:<32}{before:>12.2f}{after:>12.2f}{change:>+9.1f}%")
+
+
+class Stopwatch:
+    """Collects durations of repeated async calls."""
+
+    def __init__(self):
+        self.samples = []
+        self.errors = 0
+
+    async def time(self, coro):
+        started = time.perf_counter()
+        try:
+            return await coro
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.samples.append(time.perf_counter() - started)
@@ -0,0 +1,176 @@
+"""Time the bot's database hot paths against a seeded database.
+
+Each benchmark runs the bot's real code (the streak board and the scheduled
+update around it, morning briefing and restock scans, the debt dashboard, the
+check-in button and /habit celebration-history) against a copy of a seeded
+database, with Discord and the HTTP upstreams replaced by local stand-ins.
+Results are written as JSON so runs before and after a change can be compared.
+
+    python -m benchmarks.db_bench --scale small
+    python -m benchmarks.db_bench --scale medium --output after.json --compare before.json
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import shutil
+import tempfile
+
+from discord import app_commands
+
+from benchmarks import seed
+from benchmarks.common import (
+    BENCHMARK_GUILD_ID, BenchmarkBot, Stopwatch, briefing_cohort, compare_results, pin_clock, restock_cohort,
+    run_metadata, stub_briefing_upstreams, summarize, write_results
+)
+from benchmarks.fakes import FakeInteraction, FakeMessage, FakeUser
+
+from assets.views.views import CheckInButton
+from cogs.Habits import HabitCommands
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Register a benchmark: an async function (bot, rng) that performs one iteration."""
+    def decorator(func):
+        BENCHMARKS[name] = func
+        return func
+    return decorator
+
+
+async def _sample_rows(bot, sql: str, limit: int = 5000) -> list:
+    async with bot.db_pool.acquire() as db:
+        cursor = await db.execute(f'{sql} LIMIT {limit}')
+        return await cursor.fetchall()
+
+
+@benchmark('streak_board')
+async def bench_streak_board(bot, rng):
+    await bot.create_streak_board_embed(BENCHMARK_GUILD_ID)
+
+
+@benchmark('streak_board_update')
+async def bench_streak_board_update(bot, rng):
+    # The scheduled job: apply new check-ins and lapses, then render and edit the board
+    await bot.update_streak_board(BENCHMARK_GUILD_ID)
+
+
+@benchmark('morning_briefing')
+async def bench_morning_briefing(bot, rng):
+    await bot.send_morning_briefing(bot.bench_briefing_cohort)
+
+
+@benchmark('restock_reminders')
+async def bench_restock_reminders(bot, rng):
+    await bot.check_restock_reminders(bot.bench_restock_cohort)
+
+
+@benchmark('debt_dashboard')
+async def bench_debt_dashboard(bot, rng):
+    await bot.create_debt_dashboard_embed(BENCHMARK_GUILD_ID)
+
+
+@benchmark('checkin_button')
+async def bench_checkin_button(bot, rng):
+    habit_id, user_id = rng.choice(bot.bench_participants)
+    interaction = FakeInteraction(bot, FakeUser(user_id), message=FakeMessage(), guild=bot.guild)
+    await CheckInButton(habit_id).callback(interaction)
+
+
+@benchmark('celebration_history')
+async def bench_celebration_history(bot, rng):
+    user_id = rng.choice(bot.bench_celebrators)
+    interaction = FakeInteraction(bot, FakeUser(user_id), guild=bot.guild)
+    await HabitCommands.celebration_history.callback(
+        bot.bench_habit_commands,
+        interaction,
+        timeframe=app_commands.Choice(name="All Time", value="all"),
+        category=None
+    )
+
+
+async def prepare(bot):
+    """Pin the clock and stub the HTTP-backed briefing sections, then pick sample rows."""
+    pin_clock(bot)
+    stub_briefing_upstreams(bot)
+
+    bot.bench_participants = await _sample_rows(bot, 'SELECT habit_id, user_id FROM habit_participants ORDER BY random()')
+    bot.bench_celebrators = [
+        row[0] for row in await _sample_rows(bot, 'SELECT DISTINCT user_id FROM celebrations ORDER BY random()')
+    ]
+    bot.bench_habit_commands = HabitCommands(bot)
+    bot.bench_briefing_cohort = await briefing_cohort(bot)
+    bot.bench_restock_cohort = await restock_cohort(bot)
+
+
+async def run(db_path: str, names: list, iterations: int, warmup: int, seed_value: int, verbose: bool = False) -> dict:
+    bot = BenchmarkBot(db_path)
+    if not verbose:
+        # The bot sets its own log level on start-up; per-iteration INFO lines would swamp the output
+        logging.getLogger('gentle_habits').setLevel(logging.WARNING)
+    await bot.start_db()
+    results = {}
+    try:
+        await prepare(bot)
+        for name in names:
+            func = BENCHMARKS[name]
+            rng = random.Random(seed_value)
+            for _ in range(warmup):
+                await func(bot, rng)
+            stopwatch = Stopwatch()
+            dms_before = bot.dms_sent
+            for _ in range(iterations):
+                try:
+                    await stopwatch.time(func(bot, rng))
+                except Exception as e:
+                    logging.getLogger('gentle_habits').error(f"{name} failed: {e}")
+            results[name] = summarize(stopwatch.samples, stopwatch.errors)
+            results[name]['dms_queued'] = bot.dms_sent - dms_before
+            print(f"{name:<24} p50 {results[name]['p50_ms']:>9.2f}ms   p95 {results[name]['p95_ms']:>9.2f}ms")
+    finally:
+        await bot.stop_db()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Gentle Habits database hot paths")
+    parser.add_argument('--scale', default='small', help="small (1k users), medium (100k), large (1M), or a user count")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db', help="Use an existing seeded database instead of benchmarks/data/")
+    parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), help="Run only these benchmarks")
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--output', help="Where to write JSON results")
+    parser.add_argument('--compare', help="Earlier JSON results to compare against")
+    parser.add_argument('--verbose', action='store_true', help="Keep the bot's INFO logging")
+    args = parser.parse_args()
+
+    source = args.db or asyncio.run(seed.ensure(args.scale, args.seed))
+
+    # Benchmarks write (check-ins, streak clean-up), so work on a copy
+    workdir = tempfile.mkdtemp(prefix='gentle-habits-bench-')
+    db_path = os.path.join(workdir, 'bench.db')
+    shutil.copy(source, db_path)
+    try:
+        names = args.only or list(BENCHMARKS)
+        results = {
+            'meta': run_metadata(
+                benchmark='db', scale=args.scale, seed=args.seed, database=source,
+                iterations=args.iterations, warmup=args.warmup
+            ),
+            'results': asyncio.run(run(db_path, names, args.iterations, args.warmup, args.seed, args.verbose)),
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    output = args.output or os.path.join('benchmarks', 'results', f"db-{args.scale}-{results['meta']['timestamp'].replace(':', '')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    write_results(output, results)
+    if args.compare:
+        compare_results(args.compare, results)
+
+
+if __name__ == '__main__':
+    main()
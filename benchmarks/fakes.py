@@ -0,0 +1,164 @@
+"""Stand-ins for the discord.py objects the cogs and views touch.
+
+They record what the code under test sends, edits and deletes instead of
+talking to Discord.
+"""
+import itertools
+import time
+
+import discord
+
+_message_ids = itertools.count(1_000_000)
+
+
+class FakeUser:
+    def __init__(self, user_id: int, name: str = None):
+        self.id = user_id
+        self.name = name or f"user{user_id}"
+        self.display_name = self.name
+        self.mention = f"<@{user_id}>"
+        self.bot = False
+
+    async def send(self, content=None, **kwargs):
+        return FakeMessage(content=content, **kwargs)
+
+
+class FakeGuild:
+    def __init__(self, guild_id: int, name: str = 'Benchmark Server'):
+        self.id = guild_id
+        self.name = name
+
+
+class FakeMessage:
+    def __init__(self, content=None, embed=None, view=None, channel=None, author=None, **kwargs):
+        self.id = next(_message_ids)
+        self.content = content
+        self.embed = embed
+        self.view = view
+        self.channel = channel
+        self.author = author
+        self.deleted = False
+        self.edits = 0
+
+    @property
+    def embeds(self) -> list:
+        return [self.embed] if self.embed else []
+
+    async def edit(self, content=None, embed=None, view=None, **kwargs):
+        if content is not None:
+            self.content = content
+        if embed is not None:
+            self.embed = embed
+        if view is not None:
+            self.view = view
+        self.edits += 1
+        return self
+
+    async def delete(self, **kwargs):
+        if self.deleted:
+            raise not_found('Unknown Message')
+        self.deleted = True
+        if self.channel is not None:
+            self.channel.messages.pop(self.id, None)
+
+
+class FakeTextChannel:
+    """A channel that keeps the messages sent to it so they can be fetched, edited and deleted."""
+
+    def __init__(self, channel_id: int, name: str = 'channel', author=None, guild=None):
+        self.id = channel_id
+        self.name = name
+        self.guild = guild
+        self.author = author  # who messages sent through this channel appear to come from
+        self.messages = {}  # id -> FakeMessage, oldest first
+        self.sends = 0
+
+    async def send(self, content=None, **kwargs):
+        message = FakeMessage(content=content, channel=self, author=self.author, **kwargs)
+        self.messages[message.id] = message
+        self.sends += 1
+        return message
+
+    async def fetch_message(self, message_id: int):
+        message = self.messages.get(message_id)
+        if message is None:
+            raise not_found('Unknown Message')
+        return message
+
+    async def history(self, limit: int = 100):
+        for message in list(reversed(self.messages.values()))[:limit]:
+            yield message
+
+
+class _FakeResponse:
+    """Minimal aiohttp-response shape for constructing discord.HTTPException subclasses."""
+
+    def __init__(self, status: int):
+        self.status = status
+        self.reason = 'Fake'
+
+
+def not_found(message: str) -> discord.NotFound:
+    return discord.NotFound(_FakeResponse(404), message)
+
+
+class FakeInteractionResponse:
+    def __init__(self, interaction):
+        self._interaction = interaction
+        self._done = False
+        self.acked_at = None  # time.perf_counter() of the first response
+        self.sent = []  # (kind, content, kwargs)
+
+    def is_done(self) -> bool:
+        return self._done
+
+    def _ack(self, kind, content=None, **kwargs):
+        if self._done:
+            raise discord.InteractionResponded(self._interaction)
+        self._done = True
+        self.acked_at = time.perf_counter()
+        self.sent.append((kind, content, kwargs))
+
+    async def send_message(self, content=None, **kwargs):
+        self._ack('send_message', content, **kwargs)
+
+    async def defer(self, **kwargs):
+        self._ack('defer', **kwargs)
+
+    async def edit_message(self, content=None, **kwargs):
+        self._ack('edit_message', content, **kwargs)
+
+    async def send_modal(self, modal):
+        self._ack('send_modal', modal=modal)
+
+
+class FakeFollowup:
+    def __init__(self):
+        self.sent = []  # FakeMessage objects
+
+    async def send(self, content=None, **kwargs):
+        kwargs.pop('wait', None)
+        kwargs.pop('ephemeral', None)
+        message = FakeMessage(content=content, **kwargs)
+        self.sent.append(message)
+        return message
+
+
+class FakeInteraction:
+    """Enough of discord.Interaction for the bot's command, button and modal handlers."""
+
+    def __init__(self, client, user: FakeUser, message: FakeMessage = None, guild=None):
+        self.client = client
+        self.user = user
+        self.message = message
+        self.guild = guild
+        self.guild_id = getattr(guild, 'id', None)
+        self.channel = getattr(message, 'channel', None)
+        self.response = FakeInteractionResponse(self)
+        self.followup = FakeFollowup()
+
+    async def original_response(self):
+        return self.message or FakeMessage()
+
+    async def edit_original_response(self, **kwargs):
+        return await (await self.original_response()).edit(**kwargs)
@@ -0,0 +1,424 @@
+"""Drive the real cogs, views and scheduler jobs concurrently, without Discord.
+
+Workers pick operations from a weighted mix (check-ins, /habit create, edit
+and delete, /debt payment, /briefing set-time, and the scheduler callbacks)
+and run them against a copy of a seeded database. Each operation's latency,
+time to first response and outcome is recorded. An operation counts as an
+error if it raises, never responds to its interaction, or logs an error
+(the bot catches most failures, such as "database is locked", and logs them).
+
+    python -m benchmarks.load_test --scale small --concurrency 16 --operations 2000
+    python -m benchmarks.load_test --duration 60 --mix checkin=1,debt_payment=1
+"""
+import argparse
+import asyncio
+import contextvars
+import itertools
+import logging
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from benchmarks import seed
+from benchmarks.common import (
+    BenchmarkBot, briefing_cohort, compare_results, percentile, pin_clock, restock_cohort, run_metadata,
+    stub_briefing_upstreams, summarize, write_results
+)
+from benchmarks.fakes import FakeInteraction, FakeMessage, FakeUser
+
+from assets.utils.db_stats import db_acquire_wait
+from assets.views.views import CheckInButton
+from cogs.Briefing import BriefingCommands
+from cogs.Debt import DebtCommands
+from cogs.Habits import HabitCommands
+
+# Discord fails an interaction that isn't answered within this long
+INTERACTION_DEADLINE = 3.0
+
+# Operation name -> default weight in the mix
+DEFAULT_MIX = {
+    'checkin': 40,
+    'habit_create': 4,
+    'habit_edit': 4,
+    'habit_delete': 3,
+    'debt_payment': 12,
+    'briefing_set_time': 12,
+    'job_habit_reminder': 6,
+    'job_habit_expiry': 4,
+    'job_streak_board': 4,
+    'job_morning_briefing': 4,
+    'job_restock_reminders': 2,
+    'job_debt_dashboard': 2,
+    'job_missed_reminders': 1,
+}
+
+OPERATIONS = {}
+
+# (name, logged error records) for the operation running in the current task; child tasks inherit it
+_current_operation = contextvars.ContextVar('current_operation', default=None)
+
+
+def operation(name):
+    """Register an operation: an async function (harness, rng) returning an interaction or None."""
+    def decorator(func):
+        OPERATIONS[name] = func
+        return func
+    return decorator
+
+
+class LoggedErrors(logging.Handler):
+    """Counts ERROR records against the operation whose task (or child task) logged them."""
+
+    def __init__(self):
+        super().__init__(level=logging.ERROR)
+        self.examples = {}
+
+    def emit(self, record):
+        current = _current_operation.get()
+        if current is None:
+            return
+        name, logged = current
+        logged.append(record)
+        self.examples.setdefault(name, record.getMessage()[:200])
+
+
+class Harness:
+    """Shared state for the workers: the bot, the group instances, and rows to pick from."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.habits = HabitCommands(bot)
+        self.debts = DebtCommands(bot)
+        self.briefings = BriefingCommands(bot)
+        self.created_habits = []
+        self.remaining = None  # operations left to hand out, or None for no limit
+        self._habit_names = itertools.count(1)
+
+    def take_ticket(self) -> bool:
+        """Claim one operation from the shared budget."""
+        if self.remaining is None:
+            return True
+        if self.remaining <= 0:
+            return False
+        self.remaining -= 1
+        return True
+
+    async def load_samples(self):
+        async def rows(sql):
+            async with self.bot.db_pool.acquire() as db:
+                cursor = await db.execute(f'{sql} ORDER BY random() LIMIT 5000')
+                return await cursor.fetchall()
+
+        self.participants = await rows('SELECT habit_id, user_id FROM habit_participants')
+        self.habit_rows = await rows('SELECT id, name FROM habits')
+        self.debt_accounts = await rows('SELECT user_id, name FROM debt_accounts')
+        self.users = [row[0] for row in await rows('SELECT DISTINCT user_id FROM habit_participants')]
+        self.restock_users = await restock_cohort(self.bot)
+
+    def interaction(self, user_id: int, message: FakeMessage = None) -> FakeInteraction:
+        return FakeInteraction(self.bot, FakeUser(user_id), message=message, guild=self.bot.guild)
+
+    def new_habit_name(self) -> str:
+        return f"Load Test Habit {next(self._habit_names)}"
+
+
+def _random_time(rng) -> str:
+    return f"{rng.randint(6, 21):02d}:{rng.choice([0, 15, 30, 45]):02d}"
+
+
+@operation('checkin')
+async def op_checkin(harness, rng):
+    habit_id, user_id = rng.choice(harness.participants)
+    interaction = harness.interaction(user_id, message=FakeMessage())
+    await CheckInButton(habit_id).callback(interaction)
+    return interaction
+
+
+@operation('habit_create')
+async def op_habit_create(harness, rng):
+    name = harness.new_habit_name()
+    participants = ' '.join(f'<@{user_id}>' for user_id in rng.sample(harness.users, min(3, len(harness.users))))
+    interaction = harness.interaction(rng.choice(harness.users))
+    await HabitCommands.create_habit.callback(
+        harness.habits, interaction, name, _random_time(rng), '23:59',
+        description="Created by the load test", participants=participants
+    )
+    harness.created_habits.append(name)
+    return interaction
+
+
+@operation('habit_edit')
+async def op_habit_edit(harness, rng):
+    name = rng.choice(harness.created_habits) if harness.created_habits else rng.choice(harness.habit_rows)[1]
+    interaction = harness.interaction(rng.choice(harness.users))
+    await HabitCommands.edit_habit.callback(
+        harness.habits, interaction, name,
+        reminder_time=_random_time(rng), description=f"Edited by the load test ({rng.randint(1, 999)})"
+    )
+    return interaction
+
+
+@operation('habit_delete')
+async def op_habit_delete(harness, rng):
+    # Only delete habits the load test created, so the seeded ones stay available to check in to
+    if not harness.created_habits:
+        return await op_habit_create(harness, rng)
+    name = harness.created_habits.pop(rng.randrange(len(harness.created_habits)))
+    interaction = harness.interaction(rng.choice(harness.users))
+    await HabitCommands.delete_habit.callback(harness.habits, interaction, name)
+    return interaction
+
+
+@operation('debt_payment')
+async def op_debt_payment(harness, rng):
+    user_id, account_name = rng.choice(harness.debt_accounts)
+    interaction = harness.interaction(user_id)
+    await DebtCommands.record_payment.callback(
+        harness.debts, interaction, account_name, round(rng.uniform(5, 300), 2)
+    )
+    return interaction
+
+
+@operation('briefing_set_time')
+async def op_briefing_set_time(harness, rng):
+    interaction = harness.interaction(rng.choice(harness.users))
+    await BriefingCommands.set_time.callback(harness.briefings, interaction, _random_time(rng))
+    return interaction
+
+
+@operation('job_habit_reminder')
+async def op_job_habit_reminder(harness, rng):
+    habit_id, name = rng.choice(harness.habit_rows)
+    await harness.bot.send_habit_reminder(habit_id, name)
+
+
+@operation('job_habit_expiry')
+async def op_job_habit_expiry(harness, rng):
+    habit_id, _ = rng.choice(harness.habit_rows)
+    await harness.bot.check_habit_expiry(habit_id)
+
+
+@operation('job_streak_board')
+async def op_job_streak_board(harness, rng):
+    await harness.bot.update_streak_board()
+
+
+@operation('job_morning_briefing')
+async def op_job_morning_briefing(harness, rng):
+    await harness.bot.send_morning_briefing(await briefing_cohort(harness.bot))
+
+
+@operation('job_restock_reminders')
+async def op_job_restock_reminders(harness, rng):
+    await harness.bot.check_restock_reminders(harness.restock_users)
+
+
+@operation('job_debt_dashboard')
+async def op_job_debt_dashboard(harness, rng):
+    await harness.bot.update_debt_dashboard()
+
+
+@operation('job_missed_reminders')
+async def op_job_missed_reminders(harness, rng):
+    await harness.bot.check_missed_reminders()
+
+
+def parse_mix(text: str) -> dict:
+    """Parse 'checkin=5,debt_payment=1' into a weight mapping."""
+    if not text:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation '{name}'. Choose from: {', '.join(OPERATIONS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+class Recorder:
+    """Per-operation latency, time-to-first-response and outcome counts."""
+
+    def __init__(self):
+        self.latencies = {}
+        self.acks = {}
+        self.outcomes = {}
+
+    def record(self, name: str, seconds: float, outcome: str, ack_seconds: float = None):
+        self.latencies.setdefault(name, []).append(seconds)
+        if ack_seconds is not None:
+            self.acks.setdefault(name, []).append(ack_seconds)
+        counts = self.outcomes.setdefault(name, {})
+        counts[outcome] = counts.get(outcome, 0) + 1
+
+    def report(self, errors: LoggedErrors) -> dict:
+        report = {}
+        for name, samples in sorted(self.latencies.items()):
+            outcomes = self.outcomes[name]
+            failed = sum(count for outcome, count in outcomes.items() if outcome != 'ok')
+            entry = summarize(samples, failed)
+            entry['error_rate'] = failed / len(samples)
+            entry['outcomes'] = outcomes
+            acks = self.acks.get(name)
+            if acks:
+                entry['ack_p50_ms'] = percentile(acks, 0.50) * 1000
+                entry['ack_p95_ms'] = percentile(acks, 0.95) * 1000
+                entry['ack_p99_ms'] = percentile(acks, 0.99) * 1000
+                entry['deadline_misses'] = sum(1 for ack in acks if ack > INTERACTION_DEADLINE)
+            if name in errors.examples:
+                entry['example_error'] = errors.examples[name]
+            report[name] = entry
+        return report
+
+
+async def run_operation(harness, name: str, rng, recorder: Recorder, errors: LoggedErrors):
+    logged = []
+    _current_operation.set((name, logged))
+    started = time.perf_counter()
+    outcome = 'ok'
+    interaction = None
+    try:
+        interaction = await OPERATIONS[name](harness, rng)
+    except Exception as e:
+        outcome = 'exception'
+        errors.examples.setdefault(name, f"{type(e).__name__}: {e}"[:200])
+    elapsed = time.perf_counter() - started
+
+    ack = None
+    if interaction is not None:
+        if interaction.response.acked_at is not None:
+            ack = interaction.response.acked_at - started
+        elif outcome == 'ok' and not interaction.followup.sent:
+            outcome = 'no_response'
+    if logged and outcome == 'ok':
+        outcome = 'logged_error'
+    recorder.record(name, elapsed, outcome, ack)
+
+
+async def worker(worker_id: int, harness, mix: dict, seed_value: int, deadline, recorder, errors):
+    rng = random.Random(seed_value * 1000 + worker_id)
+    names, weights = list(mix), list(mix.values())
+    while harness.take_ticket() and time.perf_counter() < deadline:
+        # Each operation runs in its own task so it gets its own copy of the logging context
+        await asyncio.create_task(run_operation(harness, rng.choices(names, weights)[0], rng, recorder, errors))
+
+
+async def run(db_path: str, mix: dict, concurrency: int, operations: int, duration: float,
+              seed_value: int, verbose: bool = False) -> dict:
+    bot = BenchmarkBot(db_path)
+    logger = logging.getLogger('gentle_habits')
+    if not verbose:
+        # The bot sets its own log level on start-up; per-operation INFO lines would swamp the output
+        logger.setLevel(logging.WARNING)
+    errors = LoggedErrors()
+    logger.addHandler(errors)
+    logging.getLogger().addHandler(errors)  # the debt cog logs through the root logger
+
+    await bot.start_db()
+    pin_clock(bot)
+    stub_briefing_upstreams(bot)
+    harness = Harness(bot)
+    await harness.load_samples()
+
+    harness.remaining = operations or None
+    recorder = Recorder()
+    deadline = time.perf_counter() + duration if duration else float('inf')
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(
+            worker(worker_id, harness, mix, seed_value, deadline, recorder, errors)
+            for worker_id in range(concurrency)
+        ))
+    finally:
+        wall = time.perf_counter() - started
+        if bot.scheduler:
+            bot.scheduler.shutdown(wait=False)
+        await bot.stop_db()
+        logger.removeHandler(errors)
+        logging.getLogger().removeHandler(errors)
+
+    total = sum(len(samples) for samples in recorder.latencies.values())
+    return {
+        'summary': {
+            'operations': total,
+            'wall_seconds': wall,
+            'throughput_per_second': total / wall if wall else 0.0,
+            'db_acquire_wait_p95_ms': db_acquire_wait.percentile(0.95) * 1000,
+            'dms_queued': bot.dms_sent,
+            'channel_messages_sent': sum(channel.sends for channel in bot.channels.values()),
+        },
+        'results': recorder.report(errors),
+    }
+
+
+def print_report(report: dict):
+    print(f"\n{'operation':<24}{'count':>7}{'p50':>10}{'p95':>10}{'p99':>10}{'ack p99':>10}{'errors':>9}")
+    for name, entry in report['results'].items():
+        ack = f"{entry['ack_p99_ms']:.1f}" if 'ack_p99_ms' in entry else '-'
+        print(
+            f"{name:<24}{entry['iterations']:>7}{entry['p50_ms']:>10.1f}{entry['p95_ms']:>10.1f}"
+            f"{entry['p99_ms']:>10.1f}{ack:>10}{entry['error_rate']:>8.1%}"
+        )
+    summary = report['summary']
+    print(
+        f"\n{summary['operations']} operations in {summary['wall_seconds']:.1f}s "
+        f"({summary['throughput_per_second']:.1f}/s), DB acquire wait p95 {summary['db_acquire_wait_p95_ms']:.1f}ms"
+    )
+    for name, entry in report['results'].items():
+        if 'example_error' in entry:
+            print(f"  {name}: {entry['example_error']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test Gentle Habits interactions and jobs without Discord")
+    parser.add_argument('--scale', default='small', help="small (1k users), medium (100k), large (1M), or a user count")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db', help="Use an existing seeded database instead of benchmarks/data/")
+    parser.add_argument('--concurrency', type=int, default=8, help="Operations in flight at once")
+    parser.add_argument('--operations', type=int, default=1000, help="Total operations to run (0 for no limit)")
+    parser.add_argument('--duration', type=float, default=0, help="Stop after this many seconds (0 for no limit)")
+    parser.add_argument('--mix', help="Weighted operations, e.g. 'checkin=5,debt_payment=1' (default: a typical day)")
+    parser.add_argument('--output', help="Where to write JSON results")
+    parser.add_argument('--compare', help="Earlier JSON results to compare against")
+    parser.add_argument('--verbose', action='store_true', help="Keep the bot's INFO logging")
+    args = parser.parse_args()
+
+    if not args.operations and not args.duration:
+        parser.error("Set --operations or --duration")
+    mix = parse_mix(args.mix)
+
+    source = args.db or asyncio.run(seed.ensure(args.scale, args.seed))
+
+    # Operations write, so work on a copy
+    workdir = tempfile.mkdtemp(prefix='gentle-habits-load-')
+    db_path = os.path.join(workdir, 'load.db')
+    shutil.copy(source, db_path)
+    try:
+        report = asyncio.run(run(
+            db_path, mix, args.concurrency, args.operations, args.duration, args.seed, args.verbose
+        ))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    results = {
+        'meta': run_metadata(
+            benchmark='load', scale=args.scale, seed=args.seed, database=source,
+            concurrency=args.concurrency, operations=args.operations, duration=args.duration, mix=mix
+        ),
+        **report,
+    }
+    print_report(results)
+
+    output = args.output or os.path.join('benchmarks', 'results', f"load-{args.scale}-{results['meta']['timestamp'].replace(':', '')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    write_results(output, results)
+    if args.compare:
+        compare_results(args.compare, results, key='p95_ms')
+
+
+if __name__ == '__main__':
+    main()
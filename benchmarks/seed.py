@@ -0,0 +1,235 @@
+"""Build realistic benchmark databases in the bot's real schema.
+
+The schema comes from GentleHabitsBot.init_db, so it always matches the bot.
+Rows are generated from a seeded RNG, so the same scale and seed always give
+the same database.
+
+    python -m benchmarks.seed --scale small
+    python -m benchmarks.seed --scale 250000 --seed 7 --output /tmp/bench.db
+"""
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import BENCHMARK_GUILD_ID, BenchmarkBot
+
+SCALES = {
+    'small': 1_000,
+    'medium': 100_000,
+    'large': 1_000_000,
+}
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+
+# Rows are inserted in batches of this many
+BATCH_SIZE = 50_000
+
+HABIT_WORDS = [
+    'Drink Water', 'Morning Walk', 'Meditate', 'Read', 'Journal', 'Stretch',
+    'Take Meds', 'Tidy Desk', 'Practice Guitar', 'Learn Spanish', 'Floss',
+    'Cook Dinner', 'Call Family', 'Inbox Zero', 'Sleep By 11',
+]
+RESTOCK_ITEMS = ['Medication', 'Coffee', 'Shampoo', 'Toothpaste', 'Dog Food', 'Vitamins', 'Contacts']
+EVENTS = ['Birthday', 'Holiday', 'Exam', 'Dentist', 'Concert', 'Wedding', 'Move Day']
+DEBT_NAMES = ['Credit Card', 'Car Loan', 'Student Loan', 'Personal Loan', 'Afterpay']
+CATEGORIES = ['task', 'self_care', 'social', 'creative', 'routine']
+DIFFICULTIES = ['small', 'medium', 'big']
+ACHIEVEMENTS = [
+    'called the dentist', 'cleaned the kitchen', 'finished the report', 'went for a run',
+    'replied to emails', 'did the laundry', 'drank enough water', 'went to bed on time',
+    'painted for an hour', 'met a friend for coffee', 'paid the bills', 'meal prepped',
+]
+LOCATIONS = ['Hobart, AU', 'London, UK', 'Toronto, CA', 'Berlin, DE', 'Austin, US']
+
+
+def default_path(scale: str, seed: int) -> str:
+    return os.path.join(DATA_DIR, f"{scale}-seed{seed}.db")
+
+
+def user_count(scale: str) -> int:
+    return SCALES[scale] if scale in SCALES else int(scale)
+
+
+def _batched(conn, sql, rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            conn.executemany(sql, batch)
+            batch.clear()
+    if batch:
+        conn.executemany(sql, batch)
+
+
+def generate(conn: sqlite3.Connection, users: int, seed: int, celebrations_per_user: float = 5.0):
+    """Insert synthetic rows for `users` users. Returns row counts per table."""
+    rng = random.Random(seed)
+    now = datetime.now()
+    today = now.date()
+    user_ids = [100_000_000_000_000_000 + index for index in range(users)]
+
+    # Habits are shared, roughly one per 50 users (at least the base list, capped)
+    habit_total = min(max(len(HABIT_WORDS), users // 50), 2_000)
+    habits = []
+    for habit_id in range(1, habit_total + 1):
+        base = HABIT_WORDS[(habit_id - 1) % len(HABIT_WORDS)]
+        name = base if habit_id <= len(HABIT_WORDS) else f"{base} {habit_id}"
+        reminder = f"{rng.randint(6, 21):02d}:{rng.choice([0, 15, 30, 45]):02d}"
+        expiry_hour = min(23, int(reminder[:2]) + rng.randint(1, 3))
+        habits.append((
+            habit_id, name, reminder, f"{expiry_hour:02d}:59",
+            f"A gentle daily habit: {name.lower()}", (now - timedelta(days=rng.randint(1, 400))).isoformat(),
+            BENCHMARK_GUILD_ID
+        ))
+    conn.executemany(
+        '''INSERT INTO habits (id, name, reminder_time, expiry_time, description, created_at, guild_id)
+           VALUES (?, ?, ?, ?, ?, ?, ?)''',
+        habits
+    )
+
+    # Participation is skewed: most users join 0-2 habits, popular habits get more people
+    def participants():
+        for user_id in user_ids:
+            joined = rng.choices([0, 1, 2, 3], weights=[35, 35, 20, 10])[0]
+            for habit_id in set(int(rng.paretovariate(1.2)) % habit_total + 1 for _ in range(joined)):
+                yield habit_id, user_id
+
+    participant_rows = list(participants())
+    _batched(conn, 'INSERT OR IGNORE INTO habit_participants (habit_id, user_id) VALUES (?, ?)', participant_rows)
+
+    def streaks():
+        for habit_id, user_id in participant_rows:
+            if rng.random() < 0.8:
+                last = now - timedelta(days=rng.choice([0, 1, 1, 1, 2, 5, 30]), hours=rng.randint(0, 12))
+                yield user_id, habit_id, rng.randint(0, 120), last.isoformat()
+    _batched(conn, 'INSERT INTO user_habits (user_id, habit_id, current_streak, last_check_in) VALUES (?, ?, ?, ?)', streaks())
+
+    def restocks():
+        for user_id in user_ids:
+            for item in rng.sample(RESTOCK_ITEMS, rng.choices([0, 1, 2, 4], weights=[50, 25, 15, 10])[0]):
+                interval = rng.choice([7, 14, 30, 60, 90])
+                refill = today + timedelta(days=rng.randint(-5, interval))
+                yield user_id, item, refill.isoformat(), interval
+    _batched(conn, 'INSERT INTO restock_items (user_id, item_name, refill_date, days_between_refills) VALUES (?, ?, ?, ?)', restocks())
+
+    # About 30% of users get briefings, at times between 06:00 and 09:00
+    def briefings():
+        for user_id in user_ids:
+            if rng.random() < 0.3:
+                minute = rng.randint(6 * 60, 9 * 60)
+                yield (
+                    user_id, 1 if rng.random() < 0.9 else 0, rng.choice(LOCATIONS),
+                    f"{minute // 60:02d}:{minute % 60:02d}", now.isoformat()
+                )
+    _batched(conn, '''INSERT INTO morning_briefing_prefs (user_id, opted_in, location, greeting_time, created_at)
+                      VALUES (?, ?, ?, ?, ?)''', briefings())
+
+    def countdowns():
+        for user_id in user_ids:
+            for event in rng.sample(EVENTS, rng.choices([0, 1, 2], weights=[70, 20, 10])[0]):
+                yield user_id, event, (today + timedelta(days=rng.randint(1, 300))).isoformat(), now.isoformat()
+    _batched(conn, 'INSERT INTO event_countdowns (user_id, event_name, event_date, created_at) VALUES (?, ?, ?, ?)', countdowns())
+
+    # About 10% of users track debts
+    debt_rows = []
+    for user_id in user_ids:
+        if rng.random() < 0.1:
+            for name in rng.sample(DEBT_NAMES, rng.randint(1, 3)):
+                initial = round(rng.uniform(500, 40_000), 2)
+                debt_rows.append((
+                    user_id, name, round(initial * rng.uniform(0.1, 1.0), 2), initial,
+                    round(rng.choice([0, 0, 4.5, 9.9, 19.99]), 2), None, None,
+                    now.isoformat(), now.isoformat(), 1 if rng.random() < 0.7 else 0, BENCHMARK_GUILD_ID
+                ))
+    _batched(conn, '''INSERT INTO debt_accounts (user_id, name, current_balance, initial_balance, interest_rate,
+                      due_date, description, created_at, updated_at, is_public, guild_id)
+                      VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''', debt_rows)
+
+    def payments():
+        for account_id in range(1, len(debt_rows) + 1):
+            for _ in range(rng.randint(0, 10)):
+                paid_at = now - timedelta(days=rng.randint(0, 365))
+                yield account_id, round(rng.uniform(20, 800), 2), paid_at.isoformat(), None
+    _batched(conn, 'INSERT INTO debt_payments (account_id, amount, payment_date, description) VALUES (?, ?, ?, ?)', payments())
+
+    # Celebrations follow a long tail: most users have a few, some have hundreds
+    def celebrations():
+        for user_id in user_ids:
+            for _ in range(int(rng.expovariate(1 / celebrations_per_user))):
+                yield (
+                    user_id, rng.choice(ACHIEVEMENTS), rng.choice(CATEGORIES), rng.choice(DIFFICULTIES),
+                    rng.choice([None, 'proud', 'relieved', 'tired but happy']),
+                    (now - timedelta(days=rng.randint(0, 365), minutes=rng.randint(0, 1440))).isoformat()
+                )
+    _batched(conn, '''INSERT INTO celebrations (user_id, achievement, category, difficulty, feeling, celebrated_at)
+                      VALUES (?, ?, ?, ?, ?, ?)''', celebrations())
+
+    tables = [
+        'habits', 'habit_participants', 'user_habits', 'restock_items', 'morning_briefing_prefs',
+        'event_countdowns', 'debt_accounts', 'debt_payments', 'celebrations',
+    ]
+    return {table: conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0] for table in tables}
+
+
+async def build(path: str, users: int, seed: int, celebrations_per_user: float = 5.0) -> dict:
+    """Create a fresh database at `path` using the bot's schema, then fill it."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    bot = BenchmarkBot(path, max_connections=1)
+    await bot.start_db()
+    await bot.stop_db()
+
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute('PRAGMA synchronous = OFF')
+        conn.execute('PRAGMA journal_mode = MEMORY')
+        with conn:
+            counts = generate(conn, users, seed, celebrations_per_user)
+        conn.execute('ANALYZE')
+    finally:
+        conn.close()
+
+    # Derived tables are rebuilt through the bot so they match what it would maintain
+    bot = BenchmarkBot(path, max_connections=1)
+    await bot.db_pool.initialize()
+    await bot.rebuild_celebration_stats()
+    await bot.stop_db()
+    return counts
+
+
+async def ensure(scale: str, seed: int, path: str = None, rebuild: bool = False) -> str:
+    """Return the path to a seeded database, building it if it doesn't exist yet."""
+    path = path or default_path(scale, seed)
+    if rebuild or not os.path.exists(path):
+        started = time.perf_counter()
+        print(f"Seeding {user_count(scale):,} users into {path}...")
+        counts = await build(path, user_count(scale), seed)
+        print(f"Seeded in {time.perf_counter() - started:.1f}s: " + ", ".join(f"{k}={v:,}" for k, v in counts.items()))
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a synthetic Gentle Habits database")
+    parser.add_argument('--scale', default='small', help="small (1k users), medium (100k), large (1M), or a user count")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Database path (defaults to benchmarks/data/<scale>-seed<seed>.db)")
+    parser.add_argument('--celebrations-per-user', type=float, default=5.0)
+    args = parser.parse_args()
+
+    path = args.output or default_path(args.scale, args.seed)
+    started = time.perf_counter()
+    counts = asyncio.run(build(path, user_count(args.scale), args.seed, args.celebrations_per_user))
+    print(f"Built {path} in {time.perf_counter() - started:.1f}s")
+    for table, count in counts.items():
+        print(f"  {table:<24}{count:>12,}")
+
+
+if __name__ == '__main__':
+    main()
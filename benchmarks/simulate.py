@@ -0,0 +1,236 @@
+"""Play through days of the bot's scheduled work on a virtual clock.
+
+The bot gets a VirtualClock stopped at midnight and is stepped a minute at
+a time, running what the scheduler would run on each tick: the schedule
+dispatcher (habit reminders and expiries, morning briefings, restock
+reminders), streak board updates and debt dashboard updates. After each
+habit reminder, a share of the habit's participants press the check-in
+button at some point before it expires, so streaks grow, break and roll
+over from day to day. Nothing waits on the wall clock, so a week of
+activity takes seconds.
+
+    python -m benchmarks.simulate --days 7
+    python -m benchmarks.simulate --scale medium --days 30 --checkin-rate 0.6 --start 2026-04-01
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from benchmarks import seed
+from benchmarks.common import (
+    BenchmarkBot, Stopwatch, bot_module, run_metadata, stub_briefing_upstreams, summarize, write_results
+)
+from benchmarks.fakes import FakeInteraction, FakeMessage, FakeUser
+
+from assets.utils.clock import VirtualClock
+from assets.views.views import CheckInButton
+
+TICK = timedelta(minutes=1)
+
+
+class Simulation:
+    """Counts what the bot does on each tick, and plays participants checking in."""
+
+    def __init__(self, bot: BenchmarkBot, checkin_rate: float, rng: random.Random):
+        self.bot = bot
+        self.checkin_rate = checkin_rate
+        self.rng = rng
+        self.counts = dict.fromkeys(
+            ('reminders', 'expiries', 'briefings', 'restock_checks', 'streak_boards', 'debt_dashboards'), 0
+        )
+        self.checkins = dict.fromkeys(('accepted', 'already_checked_in', 'expired', 'other'), 0)
+        self.pending_checkins = {}  # UTC minute -> [(habit_id, user_id)]
+        self.participants = {}  # habit_id -> [user_id]
+        self.dispatch = Stopwatch()
+        self._wrap_dispatch_targets()
+
+    def _wrap_dispatch_targets(self):
+        """Count the work the dispatcher hands out, and plan check-ins for each reminder."""
+        bot = self.bot
+        dispatch_habits = bot._dispatch_habits
+        send_morning_briefing = bot.send_morning_briefing
+        check_restock_reminders = bot.check_restock_reminders
+
+        async def habits(reminder_ids, expiry_ids):
+            self.counts['reminders'] += len(reminder_ids)
+            self.counts['expiries'] += len(expiry_ids)
+            await dispatch_habits(reminder_ids, expiry_ids)
+            for habit_id in reminder_ids:
+                self._plan_checkins(habit_id)
+
+        async def briefings(user_ids):
+            self.counts['briefings'] += len(user_ids)
+            await send_morning_briefing(user_ids)
+
+        async def restock(user_ids):
+            self.counts['restock_checks'] += len(user_ids)
+            await check_restock_reminders(user_ids)
+
+        bot._dispatch_habits = habits
+        bot.send_morning_briefing = briefings
+        bot.check_restock_reminders = restock
+
+    async def load_participants(self):
+        async with self.bot.db_pool.acquire() as db:
+            cursor = await db.execute('SELECT habit_id, user_id FROM habit_participants')
+            for habit_id, user_id in await cursor.fetchall():
+                self.participants.setdefault(habit_id, []).append(user_id)
+
+    def _plan_checkins(self, habit_id: int):
+        """Have some participants check in at random minutes between the reminder and its expiry."""
+        now = self.bot.clock.utcnow()
+        expires_at = self.bot.schedule.next_fire(('expiry', habit_id))
+        window = int((expires_at - now) / TICK) if expires_at else 0
+        if window <= 0:
+            return
+        for user_id in self.participants.get(habit_id, []):
+            if self.rng.random() < self.checkin_rate:
+                at = now + TICK * self.rng.randrange(window)
+                self.pending_checkins.setdefault(at, []).append((habit_id, user_id))
+
+    async def _check_in(self, habit_id: int, user_id: int):
+        interaction = FakeInteraction(self.bot, FakeUser(user_id), message=FakeMessage(), guild=self.bot.guild)
+        await CheckInButton(habit_id).callback(interaction)
+        sent = interaction.response.sent
+        content = (sent[0][1] or '') if sent else ''
+        if 'already checked in' in content:
+            self.checkins['already_checked_in'] += 1
+        elif 'expired' in content:
+            self.checkins['expired'] += 1
+        elif 'streak:' in content:
+            self.checkins['accepted'] += 1
+        else:
+            self.checkins['other'] += 1
+
+    async def tick(self):
+        """Run one minute of scheduled work at the clock's current time."""
+        bot = self.bot
+        await self.dispatch.time(bot.dispatch_schedule())
+
+        for habit_id, user_id in self.pending_checkins.pop(bot.clock.utcnow(), []):
+            await self._check_in(habit_id, user_id)
+
+        local = bot.clock.now()
+        if local.minute % bot_module.config.streak_update_interval == 0:
+            self.counts['streak_boards'] += 1
+            await bot.update_streak_board()
+        if local.hour % 4 == 0 and local.minute == 0:
+            self.counts['debt_dashboards'] += 1
+            await bot.update_debt_dashboard()
+
+
+async def streak_summary(bot) -> dict:
+    async with bot.db_pool.acquire() as db:
+        cursor = await db.execute(
+            '''SELECT COUNT(*), COALESCE(MAX(current_streak), 0), COALESCE(AVG(current_streak), 0),
+                      SUM(current_streak = 0)
+               FROM user_habits'''
+        )
+        rows, longest, mean, broken = await cursor.fetchone()
+    return {'user_habits': rows, 'longest': longest, 'mean': round(mean, 2), 'at_zero': broken or 0}
+
+
+async def run(db_path: str, start: datetime, days: int, checkin_rate: float, seed_value: int,
+              verbose: bool = False) -> dict:
+    bot = BenchmarkBot(db_path)
+    if not verbose:
+        # The bot sets its own log level on start-up; every reminder and briefing logs at INFO
+        logging.getLogger('gentle_habits').setLevel(logging.WARNING)
+    bot.clock = VirtualClock(start, bot_module.config.timezone)
+    await bot.start_db()
+    stub_briefing_upstreams(bot)
+    simulation = Simulation(bot, checkin_rate, random.Random(seed_value))
+    await simulation.load_participants()
+
+    ticks = days * 24 * 60
+    started = time.perf_counter()
+    try:
+        for _ in range(ticks):
+            bot.clock.advance(TICK)
+            await simulation.tick()
+        streaks = await streak_summary(bot)
+    finally:
+        wall = time.perf_counter() - started
+        await bot.stop_db()
+
+    return {
+        'summary': {
+            'virtual_days': days,
+            'ticks': ticks,
+            'wall_seconds': wall,
+            'virtual_seconds_per_wall_second': ticks * 60 / wall if wall else 0.0,
+            'dms_queued': bot.dms_sent,
+            'channel_messages_sent': sum(channel.sends for channel in bot.channels.values()),
+            **simulation.counts,
+        },
+        'checkins': simulation.checkins,
+        'streaks': streaks,
+        'dispatch': summarize(simulation.dispatch.samples, simulation.dispatch.errors),
+    }
+
+
+def print_report(report: dict):
+    summary = report['summary']
+    print(
+        f"{summary['virtual_days']} days ({summary['ticks']:,} ticks) in {summary['wall_seconds']:.1f}s, "
+        f"{summary['virtual_seconds_per_wall_second']:,.0f}x real time"
+    )
+    for key in ('reminders', 'expiries', 'briefings', 'restock_checks', 'streak_boards', 'debt_dashboards',
+                'dms_queued', 'channel_messages_sent'):
+        print(f"  {key:<24}{summary[key]:>10,}")
+    print("Check-ins:")
+    for key, count in report['checkins'].items():
+        print(f"  {key:<24}{count:>10,}")
+    streaks = report['streaks']
+    print(
+        f"Streaks: longest {streaks['longest']}, mean {streaks['mean']}, "
+        f"{streaks['at_zero']:,} of {streaks['user_habits']:,} at zero"
+    )
+    dispatch = report['dispatch']
+    print(f"Dispatch tick: p50 {dispatch['p50_ms']:.2f}ms, p99 {dispatch['p99_ms']:.2f}ms, max {dispatch['max_ms']:.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate days of Gentle Habits scheduler activity on a virtual clock")
+    parser.add_argument('--scale', default='small', help="small (1k users), medium (100k), large (1M), or a user count")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db', help="Use an existing seeded database instead of benchmarks/data/")
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument(
+        '--start', type=lambda value: datetime.strptime(value, '%Y-%m-%d'),
+        help="Day to start at, at midnight in TIMEZONE (defaults to tomorrow)"
+    )
+    parser.add_argument('--checkin-rate', type=float, default=0.7, help="Chance each participant checks in after a reminder")
+    parser.add_argument('--output', help="Where to write JSON results")
+    parser.add_argument('--verbose', action='store_true', help="Keep the bot's INFO logging")
+    args = parser.parse_args()
+
+    start = args.start or datetime.combine(datetime.now().date() + timedelta(days=1), datetime.min.time())
+    source = args.db or asyncio.run(seed.ensure(args.scale, args.seed))
+
+    # The simulation writes check-ins and streaks, so work on a copy
+    workdir = tempfile.mkdtemp(prefix='gentle-habits-sim-')
+    db_path = os.path.join(workdir, 'sim.db')
+    shutil.copy(source, db_path)
+    try:
+        report = asyncio.run(run(db_path, start, args.days, args.checkin_rate, args.seed, args.verbose))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print_report(report)
+    if args.output:
+        report['meta'] = run_metadata(
+            benchmark='simulate', scale=args.scale, seed=args.seed, database=source,
+            start=start.date().isoformat(), days=args.days, checkin_rate=args.checkin_rate
+        )
+        write_results(args.output, report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""Microbenchmark for the transit parser against the recorded Metro TAS response.
+
+Compares keeping the whole decoded OTP response (what _get_bus_info used to
+hold while formatting) with parsing it into TransitOption objects: parse
+time per response, and memory retained per cached route.
+
+    python -m benchmarks.transit_bench
+"""
+import argparse
+import gc
+import json
+import os
+import time
+import tracemalloc
+
+from benchmarks.common import percentile, run_metadata, write_results
+from benchmarks.upstream_stub import METRO_TAS_FIXTURE
+
+from assets.utils.transit import format_transit_options, parse_transit_response
+
+
+def time_calls(func, iterations: int) -> dict:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return {
+        'iterations': iterations,
+        'p50_us': percentile(samples, 0.50) * 1e6,
+        'p95_us': percentile(samples, 0.95) * 1e6,
+        'min_us': min(samples) * 1e6,
+    }
+
+
+def retained_bytes(build, copies: int) -> int:
+    """Bytes still allocated after building `copies` results and keeping them all."""
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.take_snapshot()
+    kept = [build() for _ in range(copies)]
+    gc.collect()
+    total = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(baseline, 'filename'))
+    tracemalloc.stop()
+    del kept
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parsing the Metro TAS response into transit options")
+    parser.add_argument('--fixture', default=METRO_TAS_FIXTURE)
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--copies', type=int, default=200, help="Responses kept alive when measuring memory")
+    parser.add_argument('--output', help="Where to write JSON results")
+    args = parser.parse_args()
+
+    with open(args.fixture, 'rb') as f:
+        body = f.read()
+    route_count = len(json.loads(body)['routes'])
+    options = parse_transit_response(body)
+
+    results = {
+        'decode_only': time_calls(lambda: json.loads(body), args.iterations),
+        'parse': time_calls(lambda: parse_transit_response(body), args.iterations),
+        'parse_and_format': time_calls(lambda: format_transit_options(parse_transit_response(body)), args.iterations),
+    }
+    raw = retained_bytes(lambda: json.loads(body), args.copies)
+    parsed = retained_bytes(lambda: parse_transit_response(body), args.copies)
+    results['memory'] = {
+        'response_bytes': len(body),
+        'routes_per_response': route_count,
+        'options_per_response': len(options),
+        'raw_bytes_per_route': raw / (args.copies * route_count),
+        'parsed_bytes_per_route': parsed / (args.copies * route_count),
+    }
+
+    for name in ('decode_only', 'parse', 'parse_and_format'):
+        print(f"{name:<18} p50 {results[name]['p50_us']:>9.1f}µs   p95 {results[name]['p95_us']:>9.1f}µs")
+    memory = results['memory']
+    print(
+        f"retained per route: {memory['raw_bytes_per_route']:,.0f} bytes as decoded JSON, "
+        f"{memory['parsed_bytes_per_route']:,.0f} bytes as TransitOption "
+        f"({len(body):,} byte response, {route_count} routes)"
+    )
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        write_results(args.output, {'meta': run_metadata(benchmark='transit', fixture=args.fixture), 'results': results})
+
+
+if __name__ == '__main__':
+    main()
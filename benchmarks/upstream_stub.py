@@ -0,0 +1,330 @@
+"""Local stand-in for the HTTP APIs the briefing pipeline calls.
+
+Serves recorded responses for OpenWeatherMap, the Metro TAS OTP server,
+Google Routes (computeRoutes and computeRouteMatrix), Nominatim, and
+DeepSeek (chat completions, streamed or not, and its status page) from one
+aiohttp server. Profiles add latency, errors
+and rate limiting per upstream, so the bot can be benchmarked offline
+against slow or failing services.
+
+    python -m benchmarks.upstream_stub --profile typical --port 8765
+
+then start the bot (or a benchmark) with the printed *_BASE_URL variables.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+
+from aiohttp import web
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The Metro TAS sample was recorded from the live OTP server and lives with the other API notes
+METRO_TAS_FIXTURE = os.path.join(REPO_ROOT, 'Misc', 'metro_tas.md')
+
+UPSTREAMS = ('weather', 'metro_tas', 'routes', 'nominatim', 'deepseek', 'deepseek_status')
+
+# Per-upstream behaviour. 'default' applies to every upstream unless overridden.
+#   latency_ms / jitter_ms: response delay, uniformly within latency ± jitter
+#   error_rate: share of requests answered with a 503
+#   rate_per_second / burst: token bucket; requests over it get a 429 with Retry-After
+#   token_interval_ms: delay between streamed completion chunks
+PROFILES = {
+    'fast': {
+        'default': {'latency_ms': 2, 'jitter_ms': 1, 'token_interval_ms': 0},
+    },
+    'typical': {
+        'default': {'latency_ms': 120, 'jitter_ms': 60},
+        'metro_tas': {'latency_ms': 450, 'jitter_ms': 250},
+        'routes': {'latency_ms': 250, 'jitter_ms': 100},
+        # Nominatim's usage policy allows one request per second
+        'nominatim': {'latency_ms': 300, 'jitter_ms': 150, 'rate_per_second': 1, 'burst': 1},
+        'deepseek': {'latency_ms': 1200, 'jitter_ms': 600, 'token_interval_ms': 30},
+    },
+    'degraded': {
+        'default': {'latency_ms': 900, 'jitter_ms': 700, 'error_rate': 0.1},
+        'metro_tas': {'latency_ms': 4000, 'jitter_ms': 3000, 'error_rate': 0.25},
+        'deepseek': {'latency_ms': 9000, 'jitter_ms': 6000, 'error_rate': 0.2, 'token_interval_ms': 120},
+    },
+    'throttled': {
+        'default': {'latency_ms': 80, 'jitter_ms': 40, 'rate_per_second': 5, 'burst': 5},
+    },
+}
+
+_DEFAULT_SETTINGS = {
+    'latency_ms': 0, 'jitter_ms': 0, 'error_rate': 0.0,
+    'rate_per_second': None, 'burst': None, 'token_interval_ms': 20,
+}
+
+
+class UpstreamStub:
+    """aiohttp server replaying fixtures with a latency/error/throttling profile."""
+
+    def __init__(self, profile: str = 'typical', overrides: dict = None, seed: int = None, fixtures_dir: str = FIXTURES_DIR):
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown profile '{profile}'. Choose from: {', '.join(PROFILES)}")
+        self.profile = profile
+        self.overrides = overrides or {}
+        self.rng = random.Random(seed)
+        self.fixtures = self._load_fixtures(fixtures_dir)
+        self.requests = {}  # (upstream, outcome) -> count
+        self.matrix_elements = 0  # route matrix elements served (what Google bills by)
+        self._buckets = {}  # upstream -> [tokens, updated_at]
+        self._runner = None
+        self.base_url = None
+
+    @staticmethod
+    def _load_fixtures(fixtures_dir: str) -> dict:
+        def load(path):
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+
+        return {
+            'weather': load(os.path.join(fixtures_dir, 'openweathermap_weather.json')),
+            'metro_tas': load(METRO_TAS_FIXTURE),
+            'routes': load(os.path.join(fixtures_dir, 'google_routes_drive.json')),
+            'route_matrix': load(os.path.join(fixtures_dir, 'google_route_matrix.json')),
+            'nominatim': load(os.path.join(fixtures_dir, 'nominatim_search.json')),
+            'deepseek': load(os.path.join(fixtures_dir, 'deepseek_chat.json')),
+            'deepseek_status': load(os.path.join(fixtures_dir, 'deepseek_status.json')),
+        }
+
+    def settings(self, upstream: str) -> dict:
+        profile = PROFILES[self.profile]
+        return {
+            **_DEFAULT_SETTINGS,
+            **profile.get('default', {}),
+            **profile.get(upstream, {}),
+            **self.overrides,
+        }
+
+    def _count(self, upstream: str, outcome: str):
+        key = (upstream, outcome)
+        self.requests[key] = self.requests.get(key, 0) + 1
+
+    def _take_token(self, upstream: str, settings: dict) -> float:
+        """Returns 0 if the request is allowed, otherwise seconds until a token is free."""
+        rate = settings['rate_per_second']
+        if not rate:
+            return 0.0
+        burst = settings['burst'] or rate
+        now = time.monotonic()
+        bucket = self._buckets.setdefault(upstream, [burst, now])
+        bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+        bucket[1] = now
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0.0
+        return (1 - bucket[0]) / rate
+
+    async def _behave(self, upstream: str):
+        """Apply the profile. Returns an error response to send instead of the fixture, or None."""
+        settings = self.settings(upstream)
+
+        retry_after = self._take_token(upstream, settings)
+        if retry_after:
+            self._count(upstream, 'throttled')
+            return web.json_response(
+                {'error': {'code': 429, 'message': 'Rate limit exceeded', 'status': 'RESOURCE_EXHAUSTED'}},
+                status=429,
+                headers={'Retry-After': str(max(1, round(retry_after)))}
+            )
+
+        delay = settings['latency_ms'] + self.rng.uniform(-settings['jitter_ms'], settings['jitter_ms'])
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+
+        if self.rng.random() < settings['error_rate']:
+            self._count(upstream, 'error')
+            return web.json_response(
+                {'error': {'code': 503, 'message': 'Service temporarily unavailable', 'status': 'UNAVAILABLE'}},
+                status=503
+            )
+
+        self._count(upstream, 'ok')
+        return None
+
+    async def _weather(self, request):
+        return await self._behave('weather') or web.json_response(self.fixtures['weather'])
+
+    async def _metro_tas(self, request):
+        return await self._behave('metro_tas') or web.json_response(self.fixtures['metro_tas'])
+
+    async def _routes(self, request):
+        return await self._behave('routes') or web.json_response(self.fixtures['routes'])
+
+    async def _route_matrix(self, request):
+        error = await self._behave('routes')
+        if error:
+            return error
+        body = await request.json()
+        template = self.fixtures['route_matrix'][0]
+        # One element per origin x destination, as the real API returns
+        elements = [
+            dict(template, originIndex=origin, destinationIndex=destination)
+            for origin in range(len(body.get('origins', [])))
+            for destination in range(len(body.get('destinations', [])))
+        ]
+        self.matrix_elements += len(elements)
+        return web.json_response(elements)
+
+    async def _nominatim(self, request):
+        return await self._behave('nominatim') or web.json_response(self.fixtures['nominatim'])
+
+    async def _deepseek_status(self, request):
+        return await self._behave('deepseek_status') or web.json_response(self.fixtures['deepseek_status'])
+
+    async def _chat_completions(self, request):
+        error = await self._behave('deepseek')
+        if error:
+            return error
+        body = await request.json()
+        completion = dict(self.fixtures['deepseek'], model=body.get('model', 'deepseek-chat'), created=int(time.time()))
+        if not body.get('stream'):
+            return web.json_response(completion)
+
+        # Replay the recorded content as server-sent chunks, one word at a time
+        response = web.StreamResponse(headers={'Content-Type': 'text/event-stream', 'Cache-Control': 'no-cache'})
+        await response.prepare(request)
+        interval = self.settings('deepseek')['token_interval_ms'] / 1000
+        words = completion['choices'][0]['message']['content'].split(' ')
+        for index, word in enumerate(words):
+            chunk = {
+                'id': completion['id'],
+                'object': 'chat.completion.chunk',
+                'created': completion['created'],
+                'model': completion['model'],
+                'choices': [{
+                    'index': 0,
+                    'delta': {'content': word if index == 0 else f' {word}'},
+                    'finish_reason': 'stop' if index == len(words) - 1 else None,
+                }],
+            }
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            if interval:
+                await asyncio.sleep(interval)
+        if (body.get('stream_options') or {}).get('include_usage'):
+            usage_chunk = {
+                'id': completion['id'],
+                'object': 'chat.completion.chunk',
+                'created': completion['created'],
+                'model': completion['model'],
+                'choices': [],
+                'usage': completion['usage'],
+            }
+            await response.write(f"data: {json.dumps(usage_chunk)}\n\n".encode())
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get('/data/2.5/weather', self._weather)
+        app.router.add_get('/directions', self._metro_tas)
+        app.router.add_post('/directions/v2:computeRoutes', self._routes)
+        app.router.add_post('/distanceMatrix/v2:computeRouteMatrix', self._route_matrix)
+        app.router.add_get('/search', self._nominatim)
+        app.router.add_post('/v1/chat/completions', self._chat_completions)
+        app.router.add_get('/api/v2/components.json', self._deepseek_status)
+        return app
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        """Start serving; port 0 picks a free port. Returns the base URL."""
+        self._runner = web.AppRunner(self.app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.base_url = f"http://{host}:{port}"
+        return self.base_url
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def environment(self) -> dict:
+        """Environment variables that point the bot at this stand-in."""
+        return {
+            'OPENWEATHERMAP_BASE_URL': self.base_url,
+            'METRO_TAS_BASE_URL': self.base_url,
+            'GOOGLE_ROUTES_BASE_URL': self.base_url,
+            'NOMINATIM_BASE_URL': self.base_url,
+            'DEEPSEEK_BASE_URL': f"{self.base_url}/v1",
+            'DEEPSEEK_STATUS_URL': f"{self.base_url}/api/v2/components.json",
+        }
+
+    def configure(self, config):
+        """Point an already-loaded bot Configuration at this stand-in (before the bot is created)."""
+        config.openweathermap_url = self.base_url
+        config.metro_tas_url = self.base_url
+        config.google_routes_url = self.base_url
+        config.nominatim_url = self.base_url
+        config.deepseek_url = f"{self.base_url}/v1"
+        config.deepseek_status_url = f"{self.base_url}/api/v2/components.json"
+        # The bot only checks that these are set; the stand-in ignores them
+        os.environ.setdefault('OPENWEATHERMAP_API_KEY', 'benchmark')
+        os.environ.setdefault('GOOGLE_MAPS_API_KEY', 'benchmark')
+
+    def stats(self) -> dict:
+        """Request counts as {upstream: {outcome: count}}."""
+        stats = {}
+        for (upstream, outcome), count in sorted(self.requests.items()):
+            stats.setdefault(upstream, {})[outcome] = count
+        return stats
+
+
+def parse_overrides(args) -> dict:
+    overrides = {}
+    if args.latency_ms is not None:
+        overrides['latency_ms'] = args.latency_ms
+    if args.jitter_ms is not None:
+        overrides['jitter_ms'] = args.jitter_ms
+    if args.error_rate is not None:
+        overrides['error_rate'] = args.error_rate
+    if args.rate is not None:
+        overrides['rate_per_second'] = args.rate
+    return overrides
+
+
+def add_profile_arguments(parser):
+    parser.add_argument('--profile', default='typical', choices=sorted(PROFILES), help="Latency/error/throttling profile")
+    parser.add_argument('--latency-ms', type=float, help="Override the profile's latency for every upstream")
+    parser.add_argument('--jitter-ms', type=float, help="Override the profile's jitter for every upstream")
+    parser.add_argument('--error-rate', type=float, help="Override the share of requests answered with a 503")
+    parser.add_argument('--rate', type=float, help="Override the requests per second allowed before 429s")
+
+
+async def serve(stub: UpstreamStub, host: str, port: int):
+    base_url = await stub.start(host, port)
+    print(f"Upstream stand-in ({stub.profile} profile) listening on {base_url}")
+    print("Point the bot at it with:")
+    for key, value in stub.environment().items():
+        print(f"  export {key}={value}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await stub.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve recorded upstream API responses locally")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--seed', type=int, help="Seed latency and error rolls for repeatable runs")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    stub = UpstreamStub(args.profile, parse_overrides(args), args.seed)
+    try:
+        asyncio.run(serve(stub, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -4,26 +4,41 @@ from discord import app_commands
 from discord.ext import commands
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.events import EVENT_JOB_SUBMITTED, EVENT_JOB_EXECUTED, EVENT_JOB_ERROR, EVENT_JOB_MISSED
 import aiosqlite
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta, timezone
 import random
 from dotenv import load_dotenv
 import logging
 import asyncio
-import urllib.parse
+import collections
 import time
 
-from openai import AsyncOpenAI
-from assets.views.views import DailyStreakView, HabitButton, DebtTrackerView
+from assets.views.views import DailyStreakView, HabitButton, CheckInButton, DebtTrackerView
 import colorama
 from colorama import Fore, Style
 from contextlib import asynccontextmanager
-from functools import wraps
 from typing import Optional
 import sys
 import json
-from assets.utils.utils import get_current_time, convert_to_local, convert_to_utc
-import aiohttp
+from assets.utils.clock import Clock
+from assets.utils.command_sync import command_tree_hash
+from assets.utils.dm_queue import DMDeliveryQueue
+from assets.utils.rate_limit import limiter_stats
+from assets.utils.name_index import NameIndex
+from assets.utils.llm_cache import LLMCache
+from assets.utils.llm_gateway import LLMGateway
+from assets.utils.metrics import registry, MetricsServer, job_label, interaction_label, interaction_callback_trace_config
+from assets.utils.db_stats import QueryStats, InstrumentedConnection, db_acquire_wait, db_hold_time
+from assets.utils.transit import NO_BUS_ROUTES, parse_transit_response, format_transit_options
+from assets.utils.traffic import fetch_driving_estimates, format_driving_conditions
+from assets.utils.upstream import UpstreamUnavailableError, create_upstreams, close_upstreams
+from assets.utils.quota import QuotaGovernor, GOOGLE_MAPS, DEEPSEEK
+from assets.utils.cluster import Cluster, cluster_shard_ids
+from assets.utils.guild_settings import GuildSettingsCache, LEGACY_GUILD_ID
+from assets.utils.habit_calendar import HabitCalendar, day_bit, to_blob
+from assets.utils.leaderboard import StreakLeaderboard
+from assets.utils.schedule_index import ScheduleIndex, next_fire
 import traceback
 
 # Initialize colorama for Windows support
@@ -32,30 +47,6 @@ colorama.init()
 load_dotenv()
 DEEPSEEK_API_KEY = os.getenv('DEEPSEEK_API_KEY')
 
-# Configure OpenAI client for DeepSeek
-client = AsyncOpenAI(
-    api_key=DEEPSEEK_API_KEY,
-    base_url="https://api.deepseek.com/v1"  # DeepSeek's OpenAI-compatible endpoint
-)
-
-async def check_deepseek_status():
-    """Check if DeepSeek API is experiencing a major outage."""
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get('https://status.deepseek.com/api/v2/components.json') as response:
-                if response.status == 200:
-                    data = await response.json()
-                    api_component = next(
-                        (comp for comp in data['components'] 
-                         if comp['name'] == 'API 服务 (API Service)'),
-                        None
-                    )
-                    if api_component and api_component['status'] == 'major_outage':
-                        return False, "DeepSeek API is currently experiencing a major outage. Please try again later."
-                return True, None
-    except Exception as e:
-        return False, f"Unable to check DeepSeek API status: {str(e)}"
-    
 class ConfigurationError(Exception):
     """Raised when there's an issue with the bot's configuration."""
     pass
@@ -70,13 +61,47 @@ class Configuration:
         self.token = self._get_required('DISCORD_TOKEN', 'Discord bot token is required')
         
         # Optional settings with defaults
-        self.reminder_channel = self._get_optional('REMINDER_CHANNEL_ID')
+        self.reminder_channel = self._get_optional('REMINDER_CHANNEL_ID')  # adopted as its server's setting on startup
+        self.debt_tracker_channel = self._get_optional('DEBT_TRACKER_CHANNEL_ID')
         self.db_path = self._get_optional('DB_PATH', 'assets/database/gentle_habits/gentle_habits.db')
         self.max_db_connections = int(self._get_optional('MAX_DB_CONNECTIONS', '5'))
+        self.slow_query_ms = float(self._get_optional('DB_SLOW_QUERY_MS', '100'))
         self.streak_update_interval = int(self._get_optional('STREAK_UPDATE_INTERVAL', '5'))  # minutes
+        self.guild_board_concurrency = int(self._get_optional('GUILD_BOARD_CONCURRENCY', '4'))  # servers updated at once
         self.log_level = self._get_optional('LOG_LEVEL', 'INFO')
         self.timezone = self._get_optional('TIMEZONE', 'UTC')  # Default to UTC if not specified
         self.affirmation_tone = self._get_optional('AFFIRMATION_TONE', 'balanced')  # gentle, balanced, or firm
+        self.dm_queue_workers = int(self._get_optional('DM_QUEUE_WORKERS', '4'))
+        self.dm_max_retries = int(self._get_optional('DM_MAX_RETRIES', '3'))
+        self.llm_cache_max_entries = int(self._get_optional('LLM_CACHE_MAX_ENTRIES', '5000'))
+        self.llm_cache_ttl_hours = float(self._get_optional('LLM_CACHE_TTL_HOURS', '168'))
+        self.llm_max_in_flight = int(self._get_optional('LLM_MAX_IN_FLIGHT', '4'))
+        self.llm_timeout = float(self._get_optional('LLM_TIMEOUT_SECONDS', '20'))
+        self.llm_reasoner_timeout = float(self._get_optional('LLM_REASONER_TIMEOUT_SECONDS', '45'))
+        self.metrics_host = self._get_optional('METRICS_HOST', '127.0.0.1')
+        self.metrics_port = int(self._get_optional('METRICS_PORT', '9108'))  # 0 disables the endpoint
+        
+        # Upstream base URLs (overridable so the bot can be pointed at a local stand-in)
+        self.openweathermap_url = self._get_optional('OPENWEATHERMAP_BASE_URL', 'https://api.openweathermap.org').rstrip('/')
+        self.metro_tas_url = self._get_optional('METRO_TAS_BASE_URL', 'https://otp.transitkit.com.au').rstrip('/')
+        self.google_routes_url = self._get_optional('GOOGLE_ROUTES_BASE_URL', 'https://routes.googleapis.com').rstrip('/')
+        self.nominatim_url = self._get_optional('NOMINATIM_BASE_URL', 'https://nominatim.openstreetmap.org').rstrip('/')
+        self.deepseek_url = self._get_optional('DEEPSEEK_BASE_URL', 'https://api.deepseek.com/v1').rstrip('/')
+        self.deepseek_status_url = self._get_optional('DEEPSEEK_STATUS_URL', 'https://status.deepseek.com/api/v2/components.json')
+        self.upstream_max_retries = int(self._get_optional('UPSTREAM_MAX_RETRIES', '2'))
+        self.upstream_breaker_failures = int(self._get_optional('UPSTREAM_BREAKER_FAILURES', '5'))
+        self.upstream_breaker_reset = float(self._get_optional('UPSTREAM_BREAKER_RESET_SECONDS', '30'))
+        self.google_maps_daily_cap = int(self._get_optional('GOOGLE_MAPS_DAILY_CAP', '0'))  # 0 means uncapped
+        self.google_maps_monthly_cap = int(self._get_optional('GOOGLE_MAPS_MONTHLY_CAP', '0'))
+        self.deepseek_daily_token_cap = int(self._get_optional('DEEPSEEK_DAILY_TOKEN_CAP', '0'))
+        self.deepseek_monthly_token_cap = int(self._get_optional('DEEPSEEK_MONTHLY_TOKEN_CAP', '0'))
+        self.quota_conserve_at = float(self._get_optional('QUOTA_CONSERVE_AT', '0.8'))
+        self.cluster_id = int(self._get_optional('CLUSTER_ID', '0'))
+        self.cluster_count = int(self._get_optional('CLUSTER_COUNT', '1'))
+        shard_count = self._get_optional('SHARD_COUNT')  # total shards across the cluster; unset lets Discord decide
+        self.shard_count = int(shard_count) if shard_count else (self.cluster_count if self.cluster_count > 1 else None)
+        self.cluster_lease_seconds = float(self._get_optional('CLUSTER_LEASE_SECONDS', '30'))
+        self.force_command_sync = self._get_optional('FORCE_COMMAND_SYNC', 'false').lower() in ('1', 'true', 'yes')
         
         # Load affirmations from JSON file
         try:
@@ -92,6 +117,12 @@ class Configuration:
             logger.error("Invalid JSON in affirmations.json")
             self.affirmations = {}
         
+        # Validate clustering
+        if not 0 <= self.cluster_id < self.cluster_count:
+            raise ConfigurationError(f"CLUSTER_ID must be between 0 and CLUSTER_COUNT - 1 ({self.cluster_count - 1})")
+        if self.cluster_count > 1 and self.shard_count < self.cluster_count:
+            raise ConfigurationError("SHARD_COUNT must be at least CLUSTER_COUNT so every process has a shard")
+        
         # Validate timezone
         try:
             import zoneinfo
@@ -162,6 +193,46 @@ logger.addHandler(handler)
 # Prevent propagation to the root logger to avoid duplicate logs
 logger.propagate = False
 
+# Discord fails an interaction that isn't acknowledged within this many seconds
+INTERACTION_DEADLINE = 3.0
+
+# Kinds of schedule index entries. Habit entries are keyed by habit id and
+# fire in the habit's timezone; briefing and restock entries are keyed by
+# user id and fire in the user's timezone.
+REMINDER, EXPIRY, BRIEFING, RESTOCK = 'reminder', 'expiry', 'briefing', 'restock'
+
+# Local time restock reminders go out at
+RESTOCK_REMINDER_TIME = '09:00'
+
+# Streaks shown on each server's streak board
+STREAK_BOARD_SIZE = 15
+
+interaction_ack_latency = registry.histogram(
+    'gentle_habits_interaction_ack_seconds',
+    'Time from receiving an interaction to acknowledging it',
+    ('kind', 'name')
+)
+interaction_deadline_misses = registry.counter(
+    'gentle_habits_interaction_deadline_misses_total',
+    'Interactions not acknowledged within the 3 second deadline',
+    ('kind', 'name')
+)
+job_lag = registry.histogram(
+    'gentle_habits_job_lag_seconds',
+    'Delay between when a scheduler job was due and when it was submitted',
+    ('job',)
+)
+job_run_time = registry.histogram(
+    'gentle_habits_job_run_seconds',
+    'Scheduler job run time',
+    ('job',)
+)
+job_outcomes = registry.counter(
+    'gentle_habits_job_runs_total',
+    'Scheduler job runs by outcome (ok, error, missed)',
+    ('job', 'outcome')
+)
+
 # Load environment variables
 TOKEN = os.getenv('DISCORD_TOKEN')
 REMINDER_CHANNEL_ID = os.getenv('REMINDER_CHANNEL_ID')
@@ -179,17 +250,37 @@ class InvalidTimeFormatError(HabitError):
     """Raised when time format is invalid"""
     pass
 
+# Columns of the habits table. Names are unique within a server, and the
+# (guild_id, name) index that enforces it also serves lookups by server.
+HABITS_COLUMNS = '''(
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    reminder_time TEXT NOT NULL,
+    expiry_time TEXT NOT NULL,
+    description TEXT,
+    created_at TEXT NOT NULL,
+    guild_id INTEGER,
+    timezone TEXT,
+    UNIQUE(guild_id, name)
+)'''
+
 class DatabasePool:
-    def __init__(self, db_path: str, max_connections: int = 5):
+    def __init__(self, db_path: str, max_connections: int = 5, slow_query_ms: float = 100):
         self.db_path = db_path
         self.max_connections = max_connections
         self._pool = asyncio.Queue(maxsize=max_connections)
         self._connections = 0
+        self.in_use = 0
+        self.waiting = 0
+        self.query_stats = QueryStats(slow_query_ms)
 
     async def _create_connection(self):
         """Create a new database connection."""
         connection = await aiosqlite.connect(self.db_path)
-        return connection
+        # Write-ahead logging lets readers in other cluster processes carry on while one writes
+        async with connection.execute('PRAGMA journal_mode=WAL') as cursor:
+            await cursor.fetchone()
+        return InstrumentedConnection(connection, self.query_stats)
 
     async def initialize(self):
         """Initialize the connection pool."""
@@ -208,26 +299,84 @@ class DatabasePool:
     @asynccontextmanager
     async def acquire(self):
         """Acquire a connection from the pool."""
-        connection = await self._pool.get()
+        started = time.monotonic()
+        self.waiting += 1
+        try:
+            connection = await self._pool.get()
+        finally:
+            self.waiting -= 1
+        acquired = time.monotonic()
+        db_acquire_wait.observe(acquired - started)
+        self.in_use += 1
         try:
             yield connection
         finally:
+            self.in_use -= 1
+            db_hold_time.observe(time.monotonic() - acquired)
             await self._pool.put(connection)
 
-class GentleHabitsBot(commands.Bot):
+class GentleHabitsBot(commands.AutoShardedBot):
     def __init__(self):
         intents = discord.Intents.default()
         intents.message_content = True
         super().__init__(
             command_prefix='!', 
             intents=intents, 
-            shard_count=None  # Auto sharding - Discord.py will determine the right number of shards
+            # Auto sharding - Discord.py will determine the right number of shards,
+            # unless this is one process of a cluster running its own subset of them
+            shard_count=config.shard_count,
+            shard_ids=(
+                cluster_shard_ids(config.cluster_id, config.cluster_count, config.shard_count)
+                if config.cluster_count > 1 else None
+            ),
+            # Interaction responses are sent on this session, so acks are timed as Discord accepts them
+            http_trace=interaction_callback_trace_config(self._interaction_acked)
         )
         self.scheduler = None
+        self.clock = Clock(config.timezone)  # every date and time of day the bot acts on comes from here
         self.db_path = config.db_path
-        self.db_pool = DatabasePool(self.db_path, config.max_db_connections)
-        self.habit_messages = {}
-        self.streak_message = None
+        self.db_pool = DatabasePool(self.db_path, config.max_db_connections, config.slow_query_ms)
+        self.cluster = Cluster(self, config.cluster_id, config.cluster_count, config.cluster_lease_seconds)
+        self.dm_queue = DMDeliveryQueue(self, config.dm_queue_workers, config.dm_max_retries)
+        self.guild_settings = GuildSettingsCache(self)
+        self.habit_names = NameIndex()  # habit names per server for autocomplete
+        self.debt_account_names = NameIndex()  # debt account names per user for autocomplete
+        self.llm_cache = LLMCache(self, config.llm_cache_max_entries, config.llm_cache_ttl_hours * 3600)
+        self.upstreams = create_upstreams(
+            config.upstream_max_retries, config.upstream_breaker_failures, config.upstream_breaker_reset
+        )
+        self.quota = QuotaGovernor(self, {
+            (GOOGLE_MAPS, 'calls', 'day'): config.google_maps_daily_cap,
+            (GOOGLE_MAPS, 'calls', 'month'): config.google_maps_monthly_cap,
+            (DEEPSEEK, 'tokens', 'day'): config.deepseek_daily_token_cap,
+            (DEEPSEEK, 'tokens', 'month'): config.deepseek_monthly_token_cap,
+        }, config.quota_conserve_at)
+        self.llm = LLMGateway(
+            DEEPSEEK_API_KEY,
+            base_url=config.deepseek_url,
+            status_url=config.deepseek_status_url,
+            status_client=self.upstreams['deepseek_status'],
+            quota=self.quota,
+            max_in_flight=config.llm_max_in_flight,
+            default_budget=config.llm_timeout,
+            reasoner_budget=config.llm_reasoner_timeout
+        )
+        # Cluster processes usually share a host, so each serves on its own port
+        self.metrics_server = (
+            MetricsServer(registry, config.metrics_host, config.metrics_port + config.cluster_id)
+            if config.metrics_port else None
+        )
+        self._job_submitted = {}  # (job_id, scheduled_run_time) -> monotonic submit time
+        self._pending_acks = {}  # interaction id -> (monotonic receive time, kind, name) until it's acknowledged
+        self.habit_messages = {}  # habit_id -> (channel_id, message_id) of today's reminder
+        self.user_timezones = {}  # user_id -> timezone, for users who set one
+        self.schedule = ScheduleIndex()  # next reminder, expiry, briefing and restock times
+        self.leaderboard = StreakLeaderboard()  # participants' streaks in rank order, per server and per habit
+        self._leaderboard_checkin_id = 0  # last habit_checkins row applied to the leaderboard
+        self._schedule_change_id = 0  # last schedule_changes row applied, in a cluster
+        self.startup_timings = {}  # start-up phase -> seconds taken
+        self._warm_up_task = None
+        self.search_enabled = False
         
         # Configure logging
         logger.setLevel(getattr(logging, config.log_level.upper()))
@@ -237,6 +386,15 @@ class GentleHabitsBot(commands.Bot):
         
     def setup_events(self):
         """Register event handlers."""
+        @self.event
+        async def on_interaction(interaction):
+            kind, name = interaction_label(interaction)
+            self._pending_acks[interaction.id] = (time.monotonic(), kind, name)
+            await asyncio.sleep(INTERACTION_DEADLINE)
+            if self._pending_acks.pop(interaction.id, None):
+                interaction_deadline_misses.labels(kind, name).inc()
+                logger.warning(f"Interaction {kind} '{name}' was not acknowledged within {INTERACTION_DEADLINE:.0f}s")
+        
         @self.event
         async def on_ready():
             print(LOGO)
@@ -246,59 +404,12 @@ class GentleHabitsBot(commands.Bot):
             
             # Log shard information
             if self.shard_count:
-                logger.info(f'🔄 This instance is shard #{self.shard_id} of {self.shard_count}')
-                logger.info(f'🌐 Shard is handling {len(self.guilds)} servers')
+                logger.info(f'🔄 This instance runs shards {sorted(self.shards)} of {self.shard_count}')
+                logger.info(f'🌐 Shards are handling {len(self.guilds)} servers')
             else:
                 logger.info(f'🌐 Bot is connected to {len(self.guilds)} servers')
             
-            try:
-                # Add error handling for command registration rate limits
-                try:
-                    synced = await self.tree.sync()
-                    logger.info(f'✨ Successfully synced {len(synced)} command(s)')
-                except discord.HTTPException as e:
-                    if e.status == 429:  # Rate limit error
-                        retry_after = e.retry_after if hasattr(e, 'retry_after') else 60
-                        logger.warning(f'⚠️ Discord API rate limit hit when syncing commands. Retry after {retry_after} seconds.')
-                        logger.info('📌 The bot will continue to function, but new commands may not be available until the rate limit expires.')
-                    else:
-                        logger.error(f'❌ HTTP error when syncing commands: {e.status} - {e.text}')
-                        logger.error(traceback.format_exc())
-                except Exception as e:
-                    logger.error(f'❌ Failed to sync commands: {e}')
-                    logger.error(traceback.format_exc())
-            except Exception as e:
-                logger.error(f'❌ Error during command registration: {e}')
-                logger.error(traceback.format_exc())
-                logger.info('📌 The bot will continue to function, but commands may not be available.')
-            
-            # Send initial streak board
-            try:
-                await self.update_streak_board()
-                logger.info('📊 Initial streak board sent')
-            except Exception as e:
-                logger.error(f'❌ Failed to send initial streak board: {e}')
-                
-            # Check for missed reminders after bot is fully ready
-            try:
-                await self.check_missed_reminders()
-                logger.info('🔍 Checked for missed reminders')
-            except Exception as e:
-                logger.error(f'❌ Failed to check missed reminders: {e}')
-            
-            # Initialize debt tracker dashboard
-            try:
-                # Add a timeout to prevent hanging
-                create_dashboard_task = asyncio.create_task(self.update_debt_dashboard())
-                try:
-                    await asyncio.wait_for(create_dashboard_task, timeout=15.0)  # 15 second timeout
-                    logger.info("💰 Debt tracker dashboard initialized")
-                except asyncio.TimeoutError:
-                    logger.warning("⏳ Debt tracker dashboard initialization taking too long - will be created later by scheduler")
-            except Exception as e:
-                logger.error(f"❌ Failed to initialize debt tracker dashboard: {str(e)}")
-                logger.error(traceback.format_exc())
-            
+            # Start-up work runs once, from setup_hook and _warm_up; this runs again after every reconnect
             logger.info(f'🎉 Bot is now ready to help build gentle habits!')
             
             # Add a summary of the bot status
@@ -309,40 +420,186 @@ class GentleHabitsBot(commands.Bot):
             logger.info(f'   • Servers: {server_count}')
             logger.info(f'   • Users: {user_count}')
             logger.info(f'   • Sharding: {"Enabled" if self.shard_count else "Disabled"}')
+            if self.cluster.clustered:
+                logger.info(f'   • Cluster: process {config.cluster_id} of {config.cluster_count} ({"leader" if self.cluster.is_leader else "follower"})')
             logger.info(f'   • Database: {self.db_path}')
             logger.info(f'   • Timezone: {config.timezone}')
 
     async def setup_hook(self):
-        """Set up extensions and initialize the database."""
+        """Set up extensions and initialize the database.
+        
+        Runs once per process, before the gateway connects. Unlike on_ready,
+        which fires again after every reconnect, this is where all start-up
+        work happens; what needs the guild cache is handed to _warm_up.
+        """
+        started = time.perf_counter()
         logger.info("Setting up the bot...")
         
         # Log sharding information
         if self.shard_count:
             logger.info(f"Bot is using {self.shard_count} shards")
-            logger.info(f"Current shard ID: {self.shard_id}")
+            logger.info(f"This process runs shard IDs: {self.shard_ids or 'all'}")
         else:
             logger.info("Bot is running in a single shard")
         
-        # Initialize database pool
-        await self.db_pool.initialize()
+        # Initialize database pool and tables
+        await self._timed('database', self._open_database())
         
-        # Initialize database tables
-        await self.init_db()
+        # Load the cogs, so their commands are in the tree before it's hashed
+        await self._timed('cogs', self.load_cogs())
+        
+        # Per-server settings come first in their own chain: adopting the
+        # legacy channel env vars moves habits into a server, and the
+        # autocomplete indexes must see them there. This month's paid API
+        # usage, the cluster's leader election (a lone process always leads)
+        # and the schedule index of habit reminders, briefings and restock
+        # reminders don't wait on them or on one another
+        async def guilds_then_names():
+            await self._timed('guild_settings', self.setup_guilds())
+            await self._timed('name_indexes', self.load_name_indexes())
+        
+        await asyncio.gather(
+            guilds_then_names(),
+            self._timed('quota', self.quota.load()),
+            self._timed('cluster', self.cluster.start()),
+            self._timed('schedule', self.load_schedule())
+        )
+        
+        # Rank streaks once servers have adopted their habits
+        await self._timed('leaderboard', self.load_leaderboard())
+        
+        # Start the outbound DM workers
+        await self.dm_queue.start()
+        
+        # Expose metrics locally
+        self.register_metrics()
+        if self.metrics_server:
+            await self.metrics_server.start()
         
-        # Initialize habit scheduler
         await self.setup_scheduler()
         
         # Register persistent views first, before trying to create dashboards
         self.add_view(DailyStreakView())
         self.add_view(DebtTrackerView())
+        # One entry answers every habit's check-in button, whenever it was sent
+        self.add_dynamic_items(CheckInButton)
         logger.info("Registered persistent views")
         
+        self.startup_timings['setup_hook'] = time.perf_counter() - started
+        self._warm_up_task = asyncio.create_task(self._warm_up(started))
         logger.info("Bot setup complete.")
+    
+    async def _open_database(self):
+        await self.db_pool.initialize()
+        await self.init_db()
+    
+    async def _timed(self, phase: str, awaitable):
+        """Await something, recording how long it took as a start-up phase."""
+        started = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self.startup_timings[phase] = time.perf_counter() - started
+    
+    async def load_cogs(self):
+        """Load every cog in the cogs folder."""
+        for file in sorted(os.listdir('./cogs')):
+            if file.endswith('.py'):
+                extension = file[:-3]
+                try:
+                    await self.load_extension(f'cogs.{extension}')
+                    logger.info(f"Loaded cog '{extension}'")
+                except Exception as e:
+                    logger.error(f"Failed to load extension {extension}\n{type(e).__name__}: {e}")
+    
+    async def _warm_up(self, started: float):
+        """Sync commands and, once connected, bring the boards up to date and catch up on reminders.
+        
+        Command sync starts straight away; the rest needs the guild cache, so
+        it waits for the first ready. The independent pieces run at the same
+        time, then the start-up timings are logged.
+        """
+        jobs = {'command_sync': asyncio.create_task(self._timed('command_sync', self.sync_commands()))}
+        await self.wait_until_ready()
+        self.startup_timings['ready'] = time.perf_counter() - started
+        
+        # The channel-wide start-up work belongs to the cluster leader alone
+        if self.cluster.is_leader:
+            jobs['streak_board'] = self._timed('streak_board', self.update_streak_board())
+            jobs['missed_reminders'] = self._timed('missed_reminders', self.check_missed_reminders())
+            jobs['debt_dashboard'] = self._timed('debt_dashboard', self.update_debt_dashboard())
+        else:
+            logger.info('🧭 Following the cluster leader; skipping streak board, catch-up reminders and dashboard setup')
+        
+        results = await asyncio.gather(*jobs.values(), return_exceptions=True)
+        for job, result in zip(jobs, results):
+            if isinstance(result, Exception):
+                logger.error(f'❌ Start-up {job.replace("_", " ")} failed: {result}')
+                logger.error(''.join(traceback.format_exception(type(result), result, result.__traceback__)))
+        
+        self.startup_timings['warm_up'] = time.perf_counter() - started
+        self.log_startup_timings()
+    
+    def log_startup_timings(self):
+        """Log how long each start-up phase took, slowest first."""
+        phases = sorted(self.startup_timings.items(), key=lambda item: item[1], reverse=True)
+        logger.info('⏱️ Start-up phases: ' + ', '.join(f'{phase} {seconds:.2f}s' for phase, seconds in phases))
+    
+    async def sync_commands(self) -> bool:
+        """Sync the command tree with Discord, unless it's unchanged since the last sync.
+        
+        A hash of the tree is kept in bot_state after each successful sync, so
+        restarts without command changes don't spend the sync rate limit.
+        Returns whether a sync was sent.
+        """
+        # Commands are global, so one process of a cluster syncing them is enough
+        if config.cluster_id != 0:
+            logger.info('✨ Leaving command sync to cluster process 0')
+            return False
+        
+        tree_hash = command_tree_hash(self.tree)
+        key = f'command_tree_hash:{self.application_id}'
+        async with self.db_pool.acquire() as db:
+            cursor = await db.execute('SELECT value FROM bot_state WHERE key = ?', (key,))
+            row = await cursor.fetchone()
+        if row and row[0] == tree_hash and not config.force_command_sync:
+            logger.info('✨ Commands unchanged since the last sync; skipping it')
+            return False
+        
+        try:
+            synced = await self.tree.sync()
+        except discord.HTTPException as e:
+            if e.status == 429:  # Rate limit error
+                retry_after = e.retry_after if hasattr(e, 'retry_after') else 60
+                logger.warning(f'⚠️ Discord API rate limit hit when syncing commands. Retry after {retry_after} seconds.')
+                logger.info('📌 The bot will continue to function, but new commands may not be available until the rate limit expires.')
+            else:
+                logger.error(f'❌ HTTP error when syncing commands: {e.status} - {e.text}')
+                logger.error(traceback.format_exc())
+            return False
+        logger.info(f'✨ Successfully synced {len(synced)} command(s)')
+        
+        async with self.db_pool.acquire() as db:
+            await db.execute(
+                '''INSERT INTO bot_state (key, value) VALUES (?, ?)
+                   ON CONFLICT(key) DO UPDATE SET value = excluded.value''',
+                (key, tree_hash)
+            )
+            await db.commit()
+        return True
 
     async def close(self):
         """Override close to properly cleanup resources."""
+        if self._warm_up_task:
+            self._warm_up_task.cancel()
         if self.scheduler:
             self.scheduler.shutdown(wait=True)
+        await self.dm_queue.stop()
+        if self.metrics_server:
+            await self.metrics_server.stop()
+        await close_upstreams(self.upstreams)
+        await self.quota.flush()
+        await self.cluster.stop()
         await self.db_pool.close()
         await super().close()
     
@@ -350,17 +607,13 @@ class GentleHabitsBot(commands.Bot):
         """Initialize the SQLite database with required tables."""
         async with self.db_pool.acquire() as db:
             # Create habits table
-            await db.execute('''
-                CREATE TABLE IF NOT EXISTS habits (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    reminder_time TEXT NOT NULL,
-                    expiry_time TEXT NOT NULL,
-                    description TEXT,
-                    created_at TEXT NOT NULL,
-                    UNIQUE(name)
-                )
-            ''')
+            await db.execute(f'CREATE TABLE IF NOT EXISTS habits {HABITS_COLUMNS}')
+            await self._scope_habits_to_guilds(db)
+            
+            # Habits run in their creator's timezone; NULL means the configured one
+            cursor = await db.execute('PRAGMA table_info(habits)')
+            if 'timezone' not in [column[1] for column in await cursor.fetchall()]:
+                await db.execute('ALTER TABLE habits ADD COLUMN timezone TEXT')
             
             # Create user_habits table for tracking individual progress
             await db.execute('''
@@ -374,6 +627,37 @@ class GentleHabitsBot(commands.Bot):
                 )
             ''')
             
+            # Create append-only log of check-ins. local_date is the day in the
+            # habit's timezone; checked_in_at is NULL for days implied by a
+            # streak from before the log existed
+            cursor = await db.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'habit_checkins'"
+            )
+            backfill_check_ins = await cursor.fetchone() is None
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS habit_checkins (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER NOT NULL,
+                    habit_id INTEGER NOT NULL,
+                    local_date TEXT NOT NULL,
+                    checked_in_at TEXT
+                )
+            ''')
+            await db.execute(
+                'CREATE INDEX IF NOT EXISTS idx_habit_checkins_user_habit ON habit_checkins(user_id, habit_id, local_date)'
+            )
+            
+            # Create per-user, per-habit, per-year bitsets of the days checked in, maintained alongside the log
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS habit_calendars (
+                    user_id INTEGER NOT NULL,
+                    habit_id INTEGER NOT NULL,
+                    year INTEGER NOT NULL,
+                    days BLOB NOT NULL,
+                    PRIMARY KEY (user_id, habit_id, year)
+                )
+            ''')
+            
             # Create habit_participants table for storing who to ping
             await db.execute('''
                 CREATE TABLE IF NOT EXISTS habit_participants (
@@ -436,10 +720,20 @@ class GentleHabitsBot(commands.Bot):
                     created_at TEXT NOT NULL,
                     updated_at TEXT NOT NULL,
                     is_public BOOLEAN DEFAULT 1,
+                    guild_id INTEGER,
                     UNIQUE(user_id, name)
                 )
             ''')
             
+            # Accounts appear on the dashboard of the server they were added in
+            cursor = await db.execute('PRAGMA table_info(debt_accounts)')
+            if 'guild_id' not in [column[1] for column in await cursor.fetchall()]:
+                await db.execute('ALTER TABLE debt_accounts ADD COLUMN guild_id INTEGER')
+                await db.execute('UPDATE debt_accounts SET guild_id = ?', (LEGACY_GUILD_ID,))
+            await db.execute(
+                'CREATE INDEX IF NOT EXISTS idx_debt_accounts_guild ON debt_accounts(guild_id, is_public)'
+            )
+            
             # Create debt payments table
             await db.execute('''
                 CREATE TABLE IF NOT EXISTS debt_payments (
@@ -452,84 +746,787 @@ class GentleHabitsBot(commands.Bot):
                 )
             ''')
             
+            # Create celebrations table
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS celebrations (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER NOT NULL,
+                    achievement TEXT NOT NULL,
+                    category TEXT NOT NULL,
+                    difficulty TEXT NOT NULL,
+                    feeling TEXT,
+                    celebrated_at TEXT NOT NULL
+                )
+            ''')
+            
+            # Create per-user, per-category celebration totals, maintained alongside celebrations
+            cursor = await db.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'celebration_stats'"
+            )
+            backfill_celebration_stats = await cursor.fetchone() is None
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS celebration_stats (
+                    user_id INTEGER NOT NULL,
+                    category TEXT NOT NULL,
+                    count INTEGER NOT NULL DEFAULT 0,
+                    last_celebrated_at TEXT NOT NULL,
+                    PRIMARY KEY (user_id, category)
+                )
+            ''')
+            
+            # Create cache of LLM responses for repeated requests
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used_at REAL NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+            await db.execute('CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used ON llm_cache(last_used_at)')
+            
+            # Create table of per-server channels and board messages
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS guild_settings (
+                    guild_id INTEGER PRIMARY KEY,
+                    reminder_channel_id INTEGER,
+                    debt_tracker_channel_id INTEGER,
+                    streak_message_id INTEGER
+                )
+            ''')
+            
+            # Create table of leases for electing a cluster leader
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS cluster_leases (
+                    name TEXT PRIMARY KEY,
+                    holder TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            ''')
+            
+            # Create table of paid API usage per upstream per day (in the configured timezone)
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS upstream_usage (
+                    upstream TEXT NOT NULL,
+                    day TEXT NOT NULL,
+                    calls INTEGER NOT NULL DEFAULT 0,
+                    tokens INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (upstream, day)
+                )
+            ''')
+            
+            # Create table of users' timezones, for those who set their own
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS user_settings (
+                    user_id INTEGER PRIMARY KEY,
+                    timezone TEXT NOT NULL
+                )
+            ''')
+            
+            # Create log of schedule changes, read by the other processes of a cluster
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS schedule_changes (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    kind TEXT NOT NULL,
+                    ref_id INTEGER NOT NULL,
+                    changed_at REAL NOT NULL
+                )
+            ''')
+            
+            # Create table of small values the bot keeps between restarts
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS bot_state (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                )
+            ''')
+            
+            # Create table of users whose DMs were closed when we last tried
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS dm_closed_users (
+                    user_id INTEGER PRIMARY KEY,
+                    marked_at TEXT NOT NULL
+                )
+            ''')
+            
+            await db.commit()
+        
+        if backfill_celebration_stats:
+            await self.rebuild_celebration_stats()
+        
+        if backfill_check_ins:
+            await self.backfill_check_ins()
+        
+        await self.init_search_index()
+    
+    async def _scope_habits_to_guilds(self, db):
+        """Rebuild a habits table from before habits belonged to a server.
+        
+        Names used to be unique across the whole bot, and SQLite can't change
+        a table's constraints in place, so the rows are copied (keeping their
+        ids) into a table with the guild column and per-server unique names.
+        The old habits are marked LEGACY_GUILD_ID until a server adopts them.
+        """
+        cursor = await db.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'habits'")
+        (sql,) = await cursor.fetchone()
+        if 'guild_id' in sql:
+            return
+        
+        try:
+            await db.execute('BEGIN TRANSACTION')
+            await db.execute(f'CREATE TABLE habits_scoped {HABITS_COLUMNS}')
+            await db.execute(
+                '''INSERT INTO habits_scoped (id, name, reminder_time, expiry_time, description, created_at, guild_id)
+                   SELECT id, name, reminder_time, expiry_time, description, created_at, ? FROM habits''',
+                (LEGACY_GUILD_ID,)
+            )
+            await db.execute('DROP TABLE habits')
+            await db.execute('ALTER TABLE habits_scoped RENAME TO habits')
             await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+        logger.info("Scoped habits to servers; existing habits will be adopted by the reminder channel's server")
+    
+    async def rebuild_celebration_stats(self) -> int:
+        """Recompute celebration_stats from the celebrations table.
+        
+        Returns the number of (user, category) rows written.
+        """
+        async with self.db_pool.acquire() as db:
+            try:
+                await db.execute('DELETE FROM celebration_stats')
+                cursor = await db.execute('''
+                    INSERT INTO celebration_stats (user_id, category, count, last_celebrated_at)
+                    SELECT user_id, category, COUNT(*), MAX(celebrated_at)
+                    FROM celebrations
+                    GROUP BY user_id, category
+                ''')
+                rows = cursor.rowcount
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                raise
+        
+        logger.info(f"Rebuilt celebration stats ({rows} rows)")
+        return rows
+    
+    async def backfill_check_ins(self) -> int:
+        """Seed the check-in log and calendars from the streaks recorded before the log existed.
+        
+        A streak of n whose last check-in fell on day d implies check-ins on
+        the n days up to d. Only the last one has a known time; the rest are
+        logged without one. Returns the number of check-ins logged.
+        """
+        async with self.db_pool.acquire() as db:
+            try:
+                cursor = await db.execute('''
+                    SELECT uh.user_id, uh.habit_id, uh.current_streak, uh.last_check_in, h.timezone
+                    FROM user_habits uh
+                    JOIN habits h ON h.id = uh.habit_id
+                    WHERE uh.last_check_in IS NOT NULL
+                ''')
+                check_ins = []
+                for user_id, habit_id, streak, last_check_in, tz_name in await cursor.fetchall():
+                    last_day = self.clock.to_local(datetime.fromisoformat(last_check_in), tz_name).date()
+                    for offset in range(max(streak or 0, 1)):
+                        day = last_day - timedelta(days=offset)
+                        check_ins.append((user_id, habit_id, day.isoformat(), last_check_in if offset == 0 else None))
+                
+                await db.executemany(
+                    'INSERT INTO habit_checkins (user_id, habit_id, local_date, checked_in_at) VALUES (?, ?, ?, ?)',
+                    check_ins
+                )
+                await self._rebuild_habit_calendars(db)
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                raise
+        
+        logger.info(f"Seeded the check-in log with {len(check_ins)} check-ins from existing streaks")
+        return len(check_ins)
+    
+    async def _rebuild_habit_calendars(self, db) -> dict:
+        """Rewrite habit_calendars from the check-in log, on the caller's connection.
+        
+        Returns {(user_id, habit_id): {year: calendar blob}}.
+        """
+        cursor = await db.execute('SELECT DISTINCT user_id, habit_id, local_date FROM habit_checkins')
+        calendars = {}
+        for user_id, habit_id, local_date in await cursor.fetchall():
+            day = date.fromisoformat(local_date)
+            years = calendars.setdefault((user_id, habit_id), {})
+            years[day.year] = years.get(day.year, 0) | (1 << day_bit(day))
+        for years in calendars.values():
+            for year, bits in years.items():
+                years[year] = to_blob(bits)
+        
+        await db.execute('DELETE FROM habit_calendars')
+        await db.executemany(
+            'INSERT INTO habit_calendars (user_id, habit_id, year, days) VALUES (?, ?, ?, ?)',
+            [
+                (user_id, habit_id, year, blob)
+                for (user_id, habit_id), years in calendars.items()
+                for year, blob in years.items()
+            ]
+        )
+        return calendars
+    
+    async def repair_streaks(self) -> tuple:
+        """Rebuild the habit calendars from the check-in log, then every current streak from them.
+        
+        A streak counts the consecutive days checked in up to today, or up to
+        yesterday if today has no check-in yet, in the habit's timezone. Last
+        check-in times are restored from the log where it has one. Returns
+        (calendars written, streaks changed).
+        """
+        async with self.db_pool.acquire() as db:
+            try:
+                cursor = await db.execute('''
+                    SELECT user_id, habit_id, MAX(checked_in_at) FROM habit_checkins GROUP BY user_id, habit_id
+                ''')
+                last_logged = {(user_id, habit_id): last for user_id, habit_id, last in await cursor.fetchall()}
+                cursor = await db.execute('''
+                    SELECT uh.user_id, uh.habit_id, uh.current_streak, uh.last_check_in, h.timezone
+                    FROM user_habits uh
+                    JOIN habits h ON h.id = uh.habit_id
+                ''')
+                streaks = await cursor.fetchall()
+                
+                calendars = await self._rebuild_habit_calendars(db)
+                
+                changes = []
+                for user_id, habit_id, streak, last_check_in, tz_name in streaks:
+                    key = (user_id, habit_id)
+                    today = self.clock.now(tz_name).date()
+                    repaired = HabitCalendar(calendars.get(key)).current_streak(today)
+                    repaired_last = last_logged.get(key) or last_check_in
+                    if (repaired, repaired_last) != (streak, last_check_in):
+                        changes.append((repaired, repaired_last, user_id, habit_id))
+                
+                await db.executemany(
+                    'UPDATE user_habits SET current_streak = ?, last_check_in = ? WHERE user_id = ? AND habit_id = ?',
+                    changes
+                )
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                raise
+        
+        await self.load_leaderboard()
+        
+        written = sum(len(years) for years in calendars.values())
+        logger.info(f"Repaired streaks from the check-in log ({written} calendars, {len(changes)} streaks changed)")
+        return written, len(changes)
+    
+    async def init_search_index(self):
+        """Create FTS5 indexes over celebrations and habit descriptions, kept in sync by triggers."""
+        indexes = {
+            # index name: (content table, indexed columns)
+            'celebrations_fts': ('celebrations', ('achievement', 'feeling')),
+            'habits_fts': ('habits', ('name', 'description')),
+        }
+        
+        async with self.db_pool.acquire() as db:
+            try:
+                for index, (table, columns) in indexes.items():
+                    cursor = await db.execute(
+                        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                        (index,)
+                    )
+                    exists = await cursor.fetchone()
+                    
+                    column_list = ', '.join(columns)
+                    new_values = ', '.join(f'new.{column}' for column in columns)
+                    old_values = ', '.join(f'old.{column}' for column in columns)
+                    
+                    await db.execute(f'''
+                        CREATE VIRTUAL TABLE IF NOT EXISTS {index} USING fts5(
+                            {column_list},
+                            content='{table}',
+                            content_rowid='id',
+                            tokenize='porter unicode61'
+                        )
+                    ''')
+                    await db.execute(f'''
+                        CREATE TRIGGER IF NOT EXISTS {index}_ai AFTER INSERT ON {table} BEGIN
+                            INSERT INTO {index}(rowid, {column_list}) VALUES (new.id, {new_values});
+                        END
+                    ''')
+                    await db.execute(f'''
+                        CREATE TRIGGER IF NOT EXISTS {index}_ad AFTER DELETE ON {table} BEGIN
+                            INSERT INTO {index}({index}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+                        END
+                    ''')
+                    await db.execute(f'''
+                        CREATE TRIGGER IF NOT EXISTS {index}_au AFTER UPDATE ON {table} BEGIN
+                            INSERT INTO {index}({index}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+                            INSERT INTO {index}(rowid, {column_list}) VALUES (new.id, {new_values});
+                        END
+                    ''')
+                    
+                    if not exists:
+                        # Index rows that were written before the index existed
+                        await db.execute(f"INSERT INTO {index}({index}) VALUES ('rebuild')")
+                        logger.info(f"Built full-text search index {index}")
+                
+                await db.commit()
+                self.search_enabled = True
+            except aiosqlite.OperationalError as e:
+                await db.rollback()
+                self.search_enabled = False
+                logger.warning(f"Full-text search unavailable (SQLite built without FTS5?): {e}")
+    
+    async def setup_guilds(self):
+        """Load per-server settings, adopting the legacy channel env vars.
+        
+        REMINDER_CHANNEL_ID and DEBT_TRACKER_CHANNEL_ID used to configure the
+        whole bot. If set, each becomes its server's setting (unless that
+        server already chose a channel), and that server adopts the habits or
+        debt accounts created before rows belonged to a server.
+        """
+        await self.guild_settings.load()
+        
+        legacy = (
+            (config.reminder_channel, 'reminder_channel_id', 'habits'),
+            (config.debt_tracker_channel, 'debt_tracker_channel_id', 'debt_accounts'),
+        )
+        for channel_id, field, table in legacy:
+            if not channel_id:
+                continue
+            try:
+                channel = await self.fetch_channel(int(channel_id))
+            except (ValueError, discord.HTTPException) as e:
+                logger.error(f"Could not look up the server of {field} {channel_id}: {e}")
+                continue
+            
+            guild_id = channel.guild.id
+            settings = self.guild_settings.get(guild_id)
+            if not settings or not getattr(settings, field):
+                await self.guild_settings.update(guild_id, **{field: channel.id})
+                logger.info(f"Using channel {channel.id} from the environment as {field} of server {guild_id}")
+            await self.adopt_legacy_rows(table, guild_id)
+    
+    async def adopt_legacy_rows(self, table: str, guild_id: int) -> int:
+        """Move habits or debt accounts from before rows belonged to a server into a server.
+        
+        Only setup_guilds() calls this, for the server that owns the legacy
+        channel env var. A habit whose name the server already uses is
+        renamed with a number, so no row is left behind for another server.
+        """
+        async with self.db_pool.acquire() as db:
+            cursor = await db.execute(
+                f'UPDATE OR IGNORE {table} SET guild_id = ? WHERE guild_id = ?', (guild_id, LEGACY_GUILD_ID)
+            )
+            adopted = cursor.rowcount
+            
+            if table == 'habits':
+                cursor = await db.execute('SELECT id, name FROM habits WHERE guild_id = ?', (LEGACY_GUILD_ID,))
+                clashes = await cursor.fetchall()
+                if clashes:
+                    cursor = await db.execute('SELECT name FROM habits WHERE guild_id = ?', (guild_id,))
+                    taken = {name for (name,) in await cursor.fetchall()}
+                    for habit_id, name in clashes:
+                        number = 2
+                        while f"{name} ({number})" in taken:
+                            number += 1
+                        new_name = f"{name} ({number})"
+                        taken.add(new_name)
+                        await db.execute(
+                            'UPDATE habits SET guild_id = ?, name = ? WHERE id = ?', (guild_id, new_name, habit_id)
+                        )
+                        logger.warning(
+                            f"Habit {habit_id} '{name}' clashed with a habit of server {guild_id}, adopted as '{new_name}'"
+                        )
+                    adopted += len(clashes)
+            await db.commit()
+        if adopted:
+            logger.info(f"Server {guild_id} adopted {adopted} {table} rows from before per-server settings")
+        return adopted
+    
+    async def load_name_indexes(self):
+        """Load habit and debt account names into the in-memory autocomplete indexes."""
+        async with self.db_pool.acquire() as db:
+            cursor = await db.execute('SELECT guild_id, name FROM habits')
+            self.habit_names.load(await cursor.fetchall())
+            
+            cursor = await db.execute('SELECT user_id, name FROM debt_accounts')
+            self.debt_account_names.load(await cursor.fetchall())
+        logger.info("Loaded autocomplete name indexes")
+    
+    def register_metrics(self):
+        """Expose state tracked by other components through the metrics registry."""
+        registry.callback(
+            'gentle_habits_dm_queue_depth', 'DMs waiting for a delivery worker', 'gauge',
+            lambda: self.dm_queue.depth
+        )
+        registry.callback(
+            'gentle_habits_dm_in_flight', 'DMs currently being sent', 'gauge',
+            lambda: self.dm_queue.in_flight
+        )
+        registry.callback(
+            'gentle_habits_dm_total', 'DMs by delivery outcome', 'counter',
+            lambda: [
+                (('delivered',), self.dm_queue.delivered),
+                (('failed',), self.dm_queue.failed),
+                (('skipped',), self.dm_queue.skipped),
+            ],
+            ('outcome',)
+        )
+        registry.callback(
+            'gentle_habits_rate_limited_total', 'Calls rejected by per-user rate limits', 'counter',
+            lambda: [((stats['name'],), stats['rejected']) for stats in limiter_stats()],
+            ('limiter',)
+        )
+        registry.callback(
+            'gentle_habits_db_connections', 'Pooled database connections by state', 'gauge',
+            lambda: [
+                (('in_use',), self.db_pool.in_use),
+                (('idle',), self.db_pool.max_connections - self.db_pool.in_use),
+                (('waiting',), self.db_pool.waiting),
+            ],
+            ('state',)
+        )
+        registry.callback(
+            'gentle_habits_scheduler_jobs', 'Jobs currently scheduled', 'gauge',
+            lambda: len(self.scheduler.get_jobs()) if self.scheduler else 0
+        )
+        registry.callback(
+            'gentle_habits_startup_phase_seconds', 'Time each start-up phase took in this process', 'gauge',
+            lambda: [((phase,), seconds) for phase, seconds in self.startup_timings.items()],
+            ('phase',)
+        )
+        registry.callback(
+            'gentle_habits_schedule_entries', 'Reminders, expiries, briefings and restock reminders in the schedule index', 'gauge',
+            lambda: [((kind,), count) for kind, count in collections.Counter(kind for kind, _ in self.schedule.keys()).items()],
+            ('kind',)
+        )
+    
+    def _interaction_acked(self, interaction_id: int):
+        """Record how long an interaction took to be acknowledged, once Discord accepts its response."""
+        pending = self._pending_acks.pop(interaction_id, None)
+        if pending:
+            received, kind, name = pending
+            interaction_ack_latency.labels(kind, name).observe(time.monotonic() - received)
+    
+    def _on_job_event(self, event):
+        """Scheduler listener recording job lag, run time and outcomes."""
+        job = job_label(event.job_id)
+        
+        if event.code == EVENT_JOB_SUBMITTED:
+            now = datetime.now(timezone.utc)
+            for scheduled_run_time in event.scheduled_run_times:
+                job_lag.labels(job).observe(max(0.0, (now - scheduled_run_time).total_seconds()))
+                self._job_submitted[(event.job_id, scheduled_run_time)] = time.monotonic()
+            return
+        
+        if event.code == EVENT_JOB_MISSED:
+            job_outcomes.labels(job, 'missed').inc()
+            return
+        
+        submitted = self._job_submitted.pop((event.job_id, event.scheduled_run_time), None)
+        if submitted is not None:
+            job_run_time.labels(job).observe(time.monotonic() - submitted)
+        job_outcomes.labels(job, 'error' if event.code == EVENT_JOB_ERROR else 'ok').inc()
     
     def create_scheduler(self):
         """Create a new scheduler instance."""
-        if self.scheduler:
+        if self.scheduler and self.scheduler.running:
             self.scheduler.shutdown(wait=False)
         self.scheduler = AsyncIOScheduler(timezone=config.timezone)
-        
+        self.scheduler.add_listener(
+            self._on_job_event,
+            EVENT_JOB_SUBMITTED | EVENT_JOB_EXECUTED | EVENT_JOB_ERROR | EVENT_JOB_MISSED
+        )
+    
     async def setup_scheduler(self):
-        """Set up dynamic schedulers for habits and reminders."""
+        """Set up the scheduled jobs.
+        
+        Habit reminders and expiries, morning briefings and restock reminders
+        are not jobs of their own: they live in the schedule index, which
+        dispatch_schedule checks every minute.
+        """
         self.create_scheduler()
         
-        # Schedule restock reminders - run at 9am in configured timezone
+        # Send whatever in the schedule index has come due
         self.scheduler.add_job(
-            self.check_restock_reminders,
-            CronTrigger(hour=9, minute=0, timezone=config.timezone),
-            id='check_restock'
+            self.dispatch_schedule,
+            CronTrigger(minute='*', timezone=config.timezone),
+            id='dispatch_schedule'
         )
         
         # Schedule streak board updates
         self.scheduler.add_job(
-            self.update_streak_board,
+            self.cluster.leader_only(self.update_streak_board),
             CronTrigger(minute=f'*/{config.streak_update_interval}', timezone=config.timezone),
             id='update_streaks'
         )
         
-        # Schedule morning briefings - check every minute
-        self.scheduler.add_job(
-            self.send_morning_briefing,
-            CronTrigger(minute='*', timezone=config.timezone),
-            id='morning_briefing'
-        )
-        
         # Schedule debt tracker dashboard updates
         self.scheduler.add_job(
-            self.update_debt_dashboard,
+            self.cluster.leader_only(self.update_debt_dashboard),
             CronTrigger(hour="*/4", minute=0, timezone=config.timezone),  # Update every 4 hours
             id='debt_tracker_update'
         )
         
-        # Set up habit schedules
-        async with self.db_pool.acquire() as db:
-            async with db.execute('SELECT id, name, reminder_time, expiry_time FROM habits') as cursor:
-                async for habit in cursor:
-                    await self._schedule_habit(*habit)
+        # Save paid API usage counts
+        self.scheduler.add_job(
+            self.sync_upstream_usage,
+            CronTrigger(minute='*', timezone=config.timezone),
+            id='flush_upstream_usage'
+        )
+        
+        if self.cluster.clustered:
+            # Forget schedule changes every process has long since applied
+            self.scheduler.add_job(
+                self.cluster.leader_only(self.prune_schedule_changes),
+                CronTrigger(minute=30, timezone=config.timezone),
+                id='prune_schedule_changes'
+            )
         
         self.scheduler.start()
-        logger.info(f"Scheduler initialized with all jobs in {config.timezone} timezone")
+        logger.info(f"Scheduler initialized with {len(self.schedule)} schedule entries")
+    
+    async def sync_upstream_usage(self):
+        """Save this process's paid API usage and, in a cluster, pick up everyone else's."""
+        await self.quota.flush()
+        if self.cluster.clustered:
+            await self.quota.load()
+    
+    def user_timezone(self, user_id: int) -> str:
+        """The timezone a user set, or the configured one."""
+        return self.user_timezones.get(user_id, config.timezone)
+    
+    async def set_user_timezone(self, user_id: int, tz_name: str):
+        """Save a user's timezone and move their briefing and restock reminders to it."""
+        async with self.db_pool.acquire() as db:
+            await db.execute(
+                '''INSERT INTO user_settings (user_id, timezone) VALUES (?, ?)
+                   ON CONFLICT(user_id) DO UPDATE SET timezone = excluded.timezone''',
+                (user_id, tz_name)
+            )
+            await db.commit()
+        await self.reschedule_users([user_id])
+    
+    async def load_schedule(self):
+        """Build the schedule index from the database.
         
-    async def _schedule_habit(self, habit_id: int, name: str, reminder_time: str, expiry_time: str):
-        """Schedule reminder and expiry for a single habit."""
-        try:
-            # Schedule reminder
-            reminder_hour, reminder_minute = map(int, reminder_time.split(':'))
-            self.scheduler.add_job(
-                self.send_habit_reminder,
-                CronTrigger(hour=reminder_hour, minute=reminder_minute, timezone=config.timezone),
-                id=f'reminder_{habit_id}',
-                args=[habit_id, name]
+        Every process indexes every habit (only the leader acts on them) and
+        the briefings and restock reminders of the users it owns.
+        """
+        user_filter, user_params = self.cluster.user_filter()
+        async with self.db_pool.acquire() as db:
+            # Changes logged up to now are already in what is read below
+            cursor = await db.execute('SELECT COALESCE(MAX(id), 0) FROM schedule_changes')
+            (self._schedule_change_id,) = await cursor.fetchone()
+            cursor = await db.execute('SELECT user_id, timezone FROM user_settings')
+            self.user_timezones = dict(await cursor.fetchall())
+            cursor = await db.execute('SELECT id, reminder_time, expiry_time, timezone FROM habits')
+            habits = await cursor.fetchall()
+            cursor = await db.execute(
+                f'''SELECT user_id, greeting_time FROM morning_briefing_prefs
+                   WHERE opted_in = 1 AND greeting_time IS NOT NULL AND {user_filter}''',
+                user_params
             )
-            
-            # Schedule expiry check
+            briefings = await cursor.fetchall()
+            cursor = await db.execute(f'SELECT DISTINCT user_id FROM restock_items WHERE {user_filter}', user_params)
+            restocking = await cursor.fetchall()
+        
+        entries = []
+        for habit_id, reminder_time, expiry_time, tz_name in habits:
+            tz_name = tz_name or config.timezone
+            entries.append(((REMINDER, habit_id), reminder_time, tz_name))
             if expiry_time:
-                expiry_hour, expiry_minute = map(int, expiry_time.split(':'))
-                self.scheduler.add_job(
-                    self.check_habit_expiry,
-                    CronTrigger(hour=expiry_hour, minute=expiry_minute, timezone=config.timezone),
-                    id=f'expiry_{habit_id}',
-                    args=[habit_id]
+                entries.append(((EXPIRY, habit_id), expiry_time, tz_name))
+        for user_id, greeting_time in briefings:
+            entries.append(((BRIEFING, user_id), greeting_time, self.user_timezone(user_id)))
+        for (user_id,) in restocking:
+            entries.append(((RESTOCK, user_id), RESTOCK_REMINDER_TIME, self.user_timezone(user_id)))
+        
+        for kind, ref_id in self.schedule.load(entries, self.clock.utcnow()):
+            logger.error(f"Could not schedule {kind} for {ref_id}: unreadable time or timezone")
+        logger.info(f"Loaded {len(self.schedule)} schedule entries")
+    
+    def _set_schedule_entry(self, key: tuple, local_time: Optional[str], tz_name: str, now: datetime):
+        """Add or move one schedule entry, or remove it if there is no time."""
+        if not local_time:
+            self.schedule.remove(key)
+            return
+        try:
+            self.schedule.set(key, local_time, tz_name, now)
+        except (ValueError, KeyError) as e:
+            self.schedule.remove(key)
+            logger.error(f"Could not schedule {key[0]} for {key[1]} at {local_time} {tz_name}: {e}")
+    
+    async def reschedule_habits(self, habit_ids, notify: bool = True):
+        """Bring the reminder and expiry entries and leaderboard standings of some habits in line with the database.
+        
+        Call after creating, editing or deleting habits. With notify, the
+        cluster's other processes are told to do the same.
+        """
+        habit_ids = set(habit_ids)
+        if not habit_ids:
+            return
+        async with self.db_pool.acquire() as db:
+            cursor = await db.execute(
+                '''SELECT id, reminder_time, expiry_time, timezone FROM habits
+                   WHERE id IN (SELECT value FROM json_each(?))''',
+                (json.dumps(list(habit_ids)),)
+            )
+            habits = {row[0]: row[1:] for row in await cursor.fetchall()}
+        
+        now = self.clock.utcnow()
+        for habit_id in habit_ids:
+            reminder_time, expiry_time, tz_name = habits.get(habit_id, (None, None, None))
+            tz_name = tz_name or config.timezone
+            self._set_schedule_entry((REMINDER, habit_id), reminder_time, tz_name, now)
+            self._set_schedule_entry((EXPIRY, habit_id), expiry_time, tz_name, now)
+        
+        # Habits created, edited or deleted also move on the streak leaderboard
+        await self._reload_leaderboard_habits(habit_ids)
+        
+        if notify:
+            await self._record_schedule_changes('habit', habit_ids)
+    
+    async def reschedule_users(self, user_ids, notify: bool = True):
+        """Bring the timezones, briefing and restock entries of some users in line with the database.
+        
+        Call after a user changes their timezone, briefing or restock items.
+        With notify, the cluster's other processes are told to do the same.
+        """
+        user_ids = set(user_ids)
+        if not user_ids:
+            return
+        ids = (json.dumps(list(user_ids)),)
+        async with self.db_pool.acquire() as db:
+            cursor = await db.execute(
+                'SELECT user_id, timezone FROM user_settings WHERE user_id IN (SELECT value FROM json_each(?))', ids
+            )
+            timezones = dict(await cursor.fetchall())
+            cursor = await db.execute(
+                '''SELECT user_id, greeting_time FROM morning_briefing_prefs
+                   WHERE opted_in = 1 AND user_id IN (SELECT value FROM json_each(?))''',
+                ids
+            )
+            briefings = dict(await cursor.fetchall())
+            cursor = await db.execute(
+                'SELECT DISTINCT user_id FROM restock_items WHERE user_id IN (SELECT value FROM json_each(?))', ids
+            )
+            restocking = {row[0] for row in await cursor.fetchall()}
+        
+        now = self.clock.utcnow()
+        for user_id in user_ids:
+            if user_id in timezones:
+                self.user_timezones[user_id] = timezones[user_id]
+            else:
+                self.user_timezones.pop(user_id, None)
+            if not self.cluster.owns_user(user_id):
+                continue
+            tz_name = self.user_timezone(user_id)
+            self._set_schedule_entry((BRIEFING, user_id), briefings.get(user_id), tz_name, now)
+            self._set_schedule_entry(
+                (RESTOCK, user_id), RESTOCK_REMINDER_TIME if user_id in restocking else None, tz_name, now
+            )
+        
+        if notify:
+            await self._record_schedule_changes('user', user_ids)
+    
+    async def _record_schedule_changes(self, kind: str, ref_ids):
+        """Log rescheduled habits or users for the cluster's other processes to pick up."""
+        if not self.cluster.clustered:
+            return
+        changed_at = time.time()
+        try:
+            async with self.db_pool.acquire() as db:
+                await db.executemany(
+                    'INSERT INTO schedule_changes (kind, ref_id, changed_at) VALUES (?, ?, ?)',
+                    [(kind, ref_id, changed_at) for ref_id in ref_ids]
                 )
-            logger.debug(f"Scheduled habit {name} (ID: {habit_id}) for {reminder_time} {config.timezone}")
-        except ValueError as e:
-            logger.error(f"Failed to schedule habit {name} (ID: {habit_id}): {e}")
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Error logging schedule changes: {e}")
+    
+    async def _apply_schedule_changes(self):
+        """Reschedule the habits and users changed since the last check, by any cluster process."""
+        async with self.db_pool.acquire() as db:
+            cursor = await db.execute(
+                'SELECT id, kind, ref_id FROM schedule_changes WHERE id > ? ORDER BY id',
+                (self._schedule_change_id,)
+            )
+            changes = await cursor.fetchall()
+        if not changes:
+            return
+        
+        await self.reschedule_habits({ref_id for _, kind, ref_id in changes if kind == 'habit'}, notify=False)
+        await self.reschedule_users({ref_id for _, kind, ref_id in changes if kind == 'user'}, notify=False)
+        self._schedule_change_id = changes[-1][0]
+    
+    async def prune_schedule_changes(self):
+        """Delete logged schedule changes older than a day."""
+        async with self.db_pool.acquire() as db:
+            await db.execute('DELETE FROM schedule_changes WHERE changed_at < ?', (time.time() - 86400,))
+            await db.commit()
+    
+    async def dispatch_schedule(self):
+        """Run the habit reminders and expiries, briefings and restock reminders that have come due."""
+        if self.cluster.clustered:
+            try:
+                await self._apply_schedule_changes()
+            except Exception as e:
+                logger.error(f"Error applying schedule changes from the cluster: {e}")
+        
+        due = self.schedule.pop_due(self.clock.utcnow())
+        if not due:
+            return
+        
+        due_by_kind = {}
+        for (kind, ref_id), _ in due:
+            due_by_kind.setdefault(kind, []).append(ref_id)
+        
+        runs = []
+        if REMINDER in due_by_kind or EXPIRY in due_by_kind:
+            if self.cluster.is_leader:
+                runs.append(self._dispatch_habits(due_by_kind.get(REMINDER, []), due_by_kind.get(EXPIRY, [])))
+            else:
+                logger.debug("Skipping habit reminders and expiries: not the cluster leader")
+        if BRIEFING in due_by_kind:
+            runs.append(self.send_morning_briefing(due_by_kind[BRIEFING]))
+        if RESTOCK in due_by_kind:
+            runs.append(self.check_restock_reminders(due_by_kind[RESTOCK]))
+        await asyncio.gather(*runs)
+    
+    async def _dispatch_habits(self, reminder_ids: list, expiry_ids: list):
+        """Send due habit reminders and take down expired ones."""
+        names = {}
+        if reminder_ids:
+            async with self.db_pool.acquire() as db:
+                cursor = await db.execute(
+                    'SELECT id, name FROM habits WHERE id IN (SELECT value FROM json_each(?))',
+                    (json.dumps(reminder_ids),)
+                )
+                names = dict(await cursor.fetchall())
+        
+        results = await asyncio.gather(
+            *(self.send_habit_reminder(habit_id, names[habit_id]) for habit_id in reminder_ids if habit_id in names),
+            *(self.check_habit_expiry(habit_id) for habit_id in expiry_ids),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"Error sending a habit reminder or expiry: {result}")
     
     async def send_habit_reminder(self, habit_id: int, habit_name: str, channel: discord.TextChannel = None):
-        """Send a reminder for a habit."""
-        if not channel and config.reminder_channel:
-            channel = self.get_channel(int(config.reminder_channel))
+        """Send a reminder for a habit to its server's reminder channel."""
+        if not channel:
+            async with self.db_pool.acquire() as db:
+                cursor = await db.execute('SELECT guild_id FROM habits WHERE id = ?', (habit_id,))
+                habit = await cursor.fetchone()
+            if not habit:
+                logger.warning(f"Habit {habit_name} (ID: {habit_id}) no longer exists, skipping its reminder")
+                return
+            channel = await self.get_reminder_channel(habit[0])
         
         if not channel:
             logger.error(f"Could not find reminder channel for habit {habit_name}")
@@ -564,7 +1561,7 @@ class GentleHabitsBot(commands.Bot):
             # Send the reminder
             try:
                 message = await channel.send(content=mentions, embed=embed, view=view)
-                self.habit_messages[habit_id] = message.id  # Store message ID instead of message object
+                self.habit_messages[habit_id] = (channel.id, message.id)  # Store IDs instead of the message object
                 logger.info(f"Sent reminder for habit {habit_name} to {len(participants)} participants")
             except Exception as e:
                 logger.error(f"Failed to send reminder for habit {habit_name}: {str(e)}")
@@ -572,59 +1569,202 @@ class GentleHabitsBot(commands.Bot):
     async def check_habit_expiry(self, habit_id: int):
         """Check and handle expired habit check-ins."""
         if habit_id in self.habit_messages:
-            channel = await self.get_reminder_channel()
+            channel_id, message_id = self.habit_messages.pop(habit_id)
+            channel = await self._get_configured_channel(channel_id, "reminder")
             if channel:
                 try:
-                    message = await channel.fetch_message(self.habit_messages[habit_id])
+                    message = await channel.fetch_message(message_id)
                     await message.delete()
                 except discord.NotFound:
                     pass
-            del self.habit_messages[habit_id]
     
-    async def update_streak_board(self):
-        """Update the persistent streak board."""
-        if not config.reminder_channel:
-            logger.warning("No reminder channel ID set - streak board updates disabled")
+    def _streak_lapse(self, last_check_in: Optional[str], tz_name: Optional[str]) -> Optional[datetime]:
+        """When a streak last checked in at last_check_in runs out: the start of the second day after it, in the habit's timezone."""
+        if not last_check_in:
+            return None
+        day = self.clock.to_local(datetime.fromisoformat(last_check_in), tz_name).date() + timedelta(days=2)
+        return datetime(day.year, day.month, day.day, tzinfo=self.clock.zone(tz_name)).astimezone(timezone.utc)
+    
+    async def load_leaderboard(self):
+        """Build the streak leaderboard from the database, after fixing streaks left broken by older versions."""
+        await self._clean_up_streaks()
+        async with self.db_pool.acquire() as db:
+            # Check-ins logged up to now are already in the streaks read below
+            cursor = await db.execute('SELECT COALESCE(MAX(id), 0) FROM habit_checkins')
+            (self._leaderboard_checkin_id,) = await cursor.fetchone()
+            cursor = await db.execute('SELECT id, guild_id, name, timezone FROM habits')
+            habits = await cursor.fetchall()
+            cursor = await db.execute('''
+                SELECT hp.habit_id, hp.user_id, uh.current_streak, uh.last_check_in
+                FROM habit_participants hp
+                LEFT JOIN user_habits uh
+                    ON hp.habit_id = uh.habit_id
+                    AND hp.user_id = uh.user_id
+            ''')
+            participants = await cursor.fetchall()
+        
+        timezones = {habit_id: tz_name for habit_id, _, _, tz_name in habits}
+        self.leaderboard.load(
+            [(habit_id, guild_id, name) for habit_id, guild_id, name, _ in habits],
+            [
+                (habit_id, user_id, streak, self._streak_lapse(last_check_in, timezones.get(habit_id)))
+                for habit_id, user_id, streak, last_check_in in participants
+            ]
+        )
+        logger.info(f"Loaded {len(self.leaderboard)} streaks into the leaderboard")
+    
+    async def _reload_leaderboard_habits(self, habit_ids: set):
+        """Re-read some habits and their participants' streaks into the leaderboard; deleted habits drop out."""
+        ids = (json.dumps(list(habit_ids)),)
+        async with self.db_pool.acquire() as db:
+            cursor = await db.execute(
+                'SELECT id, guild_id, name, timezone FROM habits WHERE id IN (SELECT value FROM json_each(?))', ids
+            )
+            habits = await cursor.fetchall()
+            cursor = await db.execute('''
+                SELECT hp.habit_id, hp.user_id, uh.current_streak, uh.last_check_in
+                FROM habit_participants hp
+                LEFT JOIN user_habits uh
+                    ON hp.habit_id = uh.habit_id
+                    AND hp.user_id = uh.user_id
+                WHERE hp.habit_id IN (SELECT value FROM json_each(?))
+            ''', ids)
+            participants = await cursor.fetchall()
+        
+        by_habit = {}
+        for habit_id, user_id, streak, last_check_in in participants:
+            by_habit.setdefault(habit_id, []).append((user_id, streak, last_check_in))
+        for habit_id in habit_ids - {row[0] for row in habits}:
+            self.leaderboard.remove_habit(habit_id)
+        for habit_id, guild_id, name, tz_name in habits:
+            self.leaderboard.set_habit(habit_id, guild_id, name, [
+                (user_id, streak, self._streak_lapse(last_check_in, tz_name))
+                for user_id, streak, last_check_in in by_habit.get(habit_id, [])
+            ])
+    
+    async def sync_leaderboard(self):
+        """Bring the leaderboard up to date before reading it.
+        
+        Applies the check-ins logged since the last sync, by this or any other
+        process, then zeroes the streaks that lapsed, in the database too
+        unless the user has checked in again since.
+        """
+        async with self.db_pool.acquire() as db:
+            # CROSS JOIN keeps habit_checkins as the outer loop, so only the rows
+            # after the last one applied are read, not every user_habits row
+            cursor = await db.execute('''
+                SELECT hc.id, hc.user_id, hc.habit_id, uh.current_streak, uh.last_check_in, h.timezone
+                FROM habit_checkins hc
+                CROSS JOIN user_habits uh
+                    ON uh.user_id = hc.user_id
+                    AND uh.habit_id = hc.habit_id
+                JOIN habits h ON h.id = hc.habit_id
+                WHERE hc.id > ?
+            ''', (self._leaderboard_checkin_id,))
+            check_ins = await cursor.fetchall()
+        # A pair checked in more than once since the last sync is moved once
+        latest = {}
+        for checkin_id, user_id, habit_id, streak, last_check_in, tz_name in check_ins:
+            latest[(user_id, habit_id)] = (streak, last_check_in, tz_name)
+            self._leaderboard_checkin_id = max(self._leaderboard_checkin_id, checkin_id)
+        for (user_id, habit_id), (streak, last_check_in, tz_name) in latest.items():
+            self.leaderboard.update(user_id, habit_id, streak, self._streak_lapse(last_check_in, tz_name))
+        
+        lapsed = self.leaderboard.pop_lapsed(self.clock.utcnow())
+        if lapsed:
+            async with self.db_pool.acquire() as db:
+                # A check-in after the lapse is newer than it, and keeps its streak
+                await db.executemany(
+                    '''UPDATE user_habits
+                       SET current_streak = 0
+                       WHERE user_id = ? AND habit_id = ? AND last_check_in < ?''',
+                    [(user_id, habit_id, lapse_at.isoformat()) for user_id, habit_id, lapse_at in lapsed]
+                )
+                await db.commit()
+            logger.debug(f"Reset {len(lapsed)} lapsed streaks")
+    
+    async def update_streak_board(self, guild_id: int = None):
+        """Update the persistent streak board in every server with a reminder channel, or just one."""
+        if self.cluster.clustered:
+            # Another process may have changed a server's channels
+            await self.guild_settings.load()
+        
+        guilds = self._guilds_with_channel('reminder_channel_id', guild_id)
+        if not guilds:
+            logger.warning("No server has a reminder channel set - streak board updates disabled")
+            return
+        
+        await self.sync_leaderboard()
+        await self._for_each_guild(guilds, self._update_guild_streak_board, "streak board")
+    
+    def _guilds_with_channel(self, field: str, guild_id: int = None) -> list:
+        """Settings of the servers with the given channel set, optionally only one of them."""
+        if guild_id is None:
+            return self.guild_settings.with_channel(field)
+        settings = self.guild_settings.get(guild_id)
+        return [settings] if settings and getattr(settings, field) else []
+    
+    async def _for_each_guild(self, guilds: list, update, label: str):
+        """Run a per-server board update for each server, a few servers at a time."""
+        semaphore = asyncio.Semaphore(config.guild_board_concurrency)
+        
+        async def run(settings):
+            async with semaphore:
+                try:
+                    await update(settings)
+                except Exception as e:
+                    # One server's failure shouldn't stop the others' boards
+                    logger.error(f"Error updating {label} for server {settings.guild_id}: {e}", exc_info=True)
+        
+        await asyncio.gather(*(run(settings) for settings in guilds))
+    
+    async def _clean_up_streaks(self):
+        """Fix negative streaks and drop streaks of deleted habits before the leaderboard is loaded."""
+        try:
+            async with self.db_pool.acquire() as db:
+                await db.execute('''
+                    UPDATE user_habits 
+                    SET current_streak = 1 
+                    WHERE current_streak < 0
+                ''')
+                await db.execute('''
+                    DELETE FROM user_habits 
+                    WHERE habit_id NOT IN (SELECT id FROM habits)
+                ''')
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Error cleaning up streaks: {e}")
+    
+    async def _update_guild_streak_board(self, settings):
+        """Edit a server's streak board message, or post a new one."""
+        channel = await self.get_reminder_channel(settings.guild_id)
+        if not channel:
+            logger.error(f"Could not access the reminder channel of server {settings.guild_id} for streak board updates")
             return
-            
-        try:
-            # Use the improved get_reminder_channel method instead of direct access
-            channel = await self.get_reminder_channel()
-            if not channel:
-                logger.error("Could not access the reminder channel for streak board updates")
+        
+        embed = await self.create_streak_board_embed(settings.guild_id)
+        
+        if settings.streak_message_id:
+            try:
+                message = await channel.fetch_message(settings.streak_message_id)
+                await message.edit(embed=embed)
+                logger.debug(f"Successfully updated existing streak board in server {settings.guild_id}")
                 return
-
-            embed = await self.create_streak_board_embed()
-            
-            if self.streak_message:
-                try:
-                    message = await channel.fetch_message(self.streak_message)
-                    await message.edit(embed=embed)
-                    logger.debug("Successfully updated existing streak board")
-                except discord.NotFound:
-                    logger.info("Previous streak board message was deleted, creating new one")
-                    message = await channel.send(embed=embed)
-                    self.streak_message = message.id
-                except discord.Forbidden:
-                    logger.error("Bot lacks permissions to edit streak board message", exc_info=True)
-                    # Try to send a new message as fallback
-                    message = await channel.send(embed=embed)
-                    self.streak_message = message.id
-                    logger.info("Created new streak board message as fallback")
-                except discord.HTTPException as e:
-                    logger.error(f"Discord API error while updating streak board: {e}", exc_info=True)
-                    return
-            else:
-                message = await channel.send(embed=embed)
-                self.streak_message = message.id
-                logger.info("Created initial streak board message")
-                
-        except Exception as e:
-            logger.error(f"Critical error in update_streak_board: {e}", exc_info=True)
-            # Don't raise the exception - this is a background task
+            except discord.NotFound:
+                logger.info("Previous streak board message was deleted, creating new one")
+            except discord.Forbidden:
+                logger.error("Bot lacks permissions to edit streak board message", exc_info=True)
+                # Try to send a new message as fallback
+            except discord.HTTPException as e:
+                logger.error(f"Discord API error while updating streak board: {e}", exc_info=True)
+                return
+        
+        message = await channel.send(embed=embed)
+        await self.guild_settings.update(settings.guild_id, streak_message_id=message.id)
+        logger.info(f"Created streak board message in server {settings.guild_id}")
     
-    async def create_streak_board_embed(self):
-        """Create the streak board embed."""
+    async def create_streak_board_embed(self, guild_id: int):
+        """Create the streak board embed for one server."""
         embed = discord.Embed(
             title="<:sparkle_star:1333765410608119818> Current Streaks",
             description="Here's how you're doing!",
@@ -632,286 +1772,234 @@ class GentleHabitsBot(commands.Bot):
         )
         
         try:
-            async with self.db_pool.acquire() as db:
+            # The server's longest streaks, including 0s, from the leaderboard
+            # (update_streak_board syncs it first). A few extra stand in for
+            # anyone who turns out to have left
+            entries = self.leaderboard.top(guild_id, STREAK_BOARD_SIZE * 2)
+            
+            if not entries:
+                embed.description = "No one has joined any habits yet! Start your journey today! ✨"
+                embed.add_field(
+                    name="Get Started",
+                    value="Use `/habit create` to begin tracking a new habit!",
+                    inline=False
+                )
+                return embed
+            
+            # Users who have left are removed afterwards in one go
+            departed_users = set()
+            valid_entries = 0
+            
+            for user_id, _, habit_name, streak in entries:
+                if valid_entries == STREAK_BOARD_SIZE:
+                    break
+                if user_id in departed_users:
+                    continue
                 try:
-                    await db.execute('BEGIN TRANSACTION')
-                    
-                    # Clean up any invalid streaks (negative values)
-                    await db.execute('''
-                        UPDATE user_habits 
-                        SET current_streak = 1 
-                        WHERE current_streak < 0
-                    ''')
-                    
-                    # Clean up orphaned streak records
-                    await db.execute('''
-                        DELETE FROM user_habits 
-                        WHERE habit_id NOT IN (SELECT id FROM habits)
-                    ''')
-                    
-                    # First check if there are any habit participants
-                    cursor = await db.execute('''
-                        SELECT COUNT(*) 
-                        FROM habit_participants
-                    ''')
-                    count = (await cursor.fetchone())[0]
-                    
-                    if count == 0:
-                        embed.description = "No one has joined any habits yet! Start your journey today! ✨"
-                        embed.add_field(
-                            name="Get Started",
-                            value="Use `/habit create` to begin tracking a new habit!",
-                            inline=False
-                        )
-                        await db.commit()
-                        return embed
-                    
-                    # Get all streaks with user validation, including 0s
-                    # Also include the last check-in time for validation
-                    async with db.execute('''
-                        SELECT DISTINCT 
-                            hp.user_id, 
-                            h.name, 
-                            COALESCE(uh.current_streak, 0) as streak,
-                            uh.last_check_in,
-                            h.expiry_time,
-                            h.id as habit_id
-                        FROM habit_participants hp
-                        JOIN habits h ON hp.habit_id = h.id
-                        LEFT JOIN user_habits uh 
-                            ON hp.habit_id = uh.habit_id 
-                            AND hp.user_id = uh.user_id
-                        ORDER BY streak DESC, h.name
-                        LIMIT 15
-                    ''') as cursor:
-                        valid_entries = 0
-                        now = get_current_time()
-                        today = now.date()
+                    user = self.get_user(user_id) or await self.fetch_user(user_id)
+                    if user:
+                        # Customize emoji based on streak and status
+                        if streak > 30:
+                            emoji = "<:fire:1333765377364066384>"  # Fire for month+
+                        elif streak > 7:
+                            emoji = "<:fire:1333765377364066384>"  # Fire for week+
+                        elif streak > 0:
+                            emoji = "<:starstreak:1333765612769509459>"  # Active streak
+                        else:
+                            emoji = "<:streak_empty:1333765397769490514>"  # Fresh start
+                        
+                        # Customize message based on streak
+                        if streak == 0:
+                            streak_text = "Ready to start!"
+                        else:
+                            streak_text = f"{streak} day{'s' if streak != 1 else ''}"
+                            if streak in [7, 30, 100, 365]:
+                                streak_text += " 🎉"
                         
-                        async for user_id, habit_name, streak, last_check_in, expiry_time, habit_id in cursor:
-                            try:
-                                user = await self.fetch_user(user_id)
-                                if user:
-                                    # Validate streak based on last check-in
-                                    if last_check_in:
-                                        last_check = convert_to_local(datetime.fromisoformat(last_check_in))
-                                        days_since_check = (today - last_check.date()).days
-                                        
-                                        # If past expiry time and no check-in today, count as missed
-                                        if expiry_time and days_since_check == 0:
-                                            current_time = now.time()
-                                            expiry_time_obj = datetime.strptime(expiry_time, "%H:%M").time()
-                                            if current_time > expiry_time_obj:
-                                                days_since_check = 1
-                                        
-                                        # Reset streak if more than 1 day has passed
-                                        if days_since_check > 1:
-                                            streak = 0
-                                            await db.execute(
-                                                '''UPDATE user_habits 
-                                                   SET current_streak = 0 
-                                                   WHERE user_id = ? AND habit_id = ?''',
-                                                (user_id, habit_id)
-                                            )
-                                    
-                                    # Customize emoji based on streak and status
-                                    if streak > 30:
-                                        emoji = "<:fire:1333765377364066384>"  # Fire for month+
-                                    elif streak > 7:
-                                        emoji = "<:fire:1333765377364066384>"  # Fire for week+
-                                    elif streak > 0:
-                                        emoji = "<:starstreak:1333765612769509459>"  # Active streak
-                                    else:
-                                        emoji = "<:streak_empty:1333765397769490514>"  # Fresh start
-                                    
-                                    # Customize message based on streak
-                                    if streak == 0:
-                                        streak_text = "Ready to start!"
-                                    else:
-                                        streak_text = f"{streak} day{'s' if streak != 1 else ''}"
-                                        if streak in [7, 30, 100, 365]:
-                                            streak_text += " 🎉"
-                                    
-                                    embed.add_field(
-                                        name=f"{user.display_name} - {habit_name}",
-                                        value=f"{emoji} {streak_text}",
-                                        inline=False
-                                    )
-                                    valid_entries += 1
-                                else:
-                                    # User no longer in server, clean up their entries
-                                    await db.execute(
-                                        'DELETE FROM user_habits WHERE user_id = ?',
-                                        (user_id,)
-                                    )
-                                    await db.execute(
-                                        'DELETE FROM habit_participants WHERE user_id = ?',
-                                        (user_id,)
-                                    )
-                            except discord.NotFound:
-                                # User no longer exists, clean up their entries
-                                await db.execute(
-                                    'DELETE FROM user_habits WHERE user_id = ?',
-                                    (user_id,)
-                                )
-                                await db.execute(
-                                    'DELETE FROM habit_participants WHERE user_id = ?',
-                                    (user_id,)
-                                )
-                            except Exception as e:
-                                logger.error(f"Error processing streak for user {user_id}: {e}")
-                                continue
-                    
-                    if valid_entries == 0:
-                        embed.description = "No active participants found. Start your journey today! ✨"
                         embed.add_field(
-                            name="Get Started",
-                            value="Use `/habit create` to begin tracking a new habit!",
+                            name=f"{user.display_name} - {habit_name}",
+                            value=f"{emoji} {streak_text}",
                             inline=False
                         )
-                    
-                    await db.commit()
-                    
+                        valid_entries += 1
+                    else:
+                        # User no longer in server, clean up their entries
+                        departed_users.add(user_id)
+                except discord.NotFound:
+                    # User no longer exists, clean up their entries
+                    departed_users.add(user_id)
                 except Exception as e:
-                    logger.error(f"Database error in create_streak_board_embed: {e}")
-                    await db.rollback()
-                    raise
+                    logger.error(f"Error processing streak for user {user_id}: {e}")
+                    continue
+            
+            if valid_entries == 0:
+                embed.description = "No active participants found. Start your journey today! ✨"
+                embed.add_field(
+                    name="Get Started",
+                    value="Use `/habit create` to begin tracking a new habit!",
+                    inline=False
+                )
+            
+            if departed_users:
+                for user_id in departed_users:
+                    self.leaderboard.remove_user(user_id)
+                async with self.db_pool.acquire() as db:
+                    try:
+                        departed = [(user_id,) for user_id in departed_users]
+                        await db.executemany('DELETE FROM user_habits WHERE user_id = ?', departed)
+                        await db.executemany('DELETE FROM habit_participants WHERE user_id = ?', departed)
+                        await db.commit()
+                    except Exception as e:
+                        logger.error(f"Database error in create_streak_board_embed: {e}")
+                        await db.rollback()
                     
         except Exception as e:
             logger.error(f"Error creating streak board embed: {e}")
             embed.description = "⚠️ Error loading streak data. Please try again later."
         
         # Add last update time in configured timezone
-        now = get_current_time()
+        now = self.clock.now()
         embed.set_footer(text=f"Updated at {now.strftime('%I:%M %p')} {config.timezone}")
         return embed
 
-    async def check_restock_reminders(self):
-        """Check for restocks that need reminders."""
+    async def check_restock_reminders(self, user_ids):
+        """Remind users of restocks due within three days of their own today."""
         try:
-            logger.info("Checking for restock reminders...")
-            now = get_current_time()
-            three_days_from_now = now + timedelta(days=3)
-            
-            # Format dates for comparison
-            today = now.date().isoformat()
-            three_days = three_days_from_now.date().isoformat()
-            
-            # Find users with restocks due soon
+            logger.info(f"Checking restock reminders for {len(user_ids)} users...")
             async with self.db_pool.acquire() as db:
-                query = '''
-                    SELECT 
-                        ri.user_id, ri.item_name, ri.refill_date, 
-                        julianday(ri.refill_date) - julianday(?) as days_left
-                    FROM 
-                        restock_items ri 
-                    WHERE 
-                        ri.refill_date BETWEEN ? AND ?
-                    ORDER BY 
-                        ri.refill_date
-                '''
-                
-                cursor = await db.execute(query, (today, today, three_days))
+                cursor = await db.execute(
+                    '''SELECT user_id, item_name, refill_date
+                       FROM restock_items
+                       WHERE user_id IN (SELECT value FROM json_each(?))
+                       ORDER BY refill_date''',
+                    (json.dumps(list(user_ids)),)
+                )
                 restock_items = await cursor.fetchall()
+            
+            # Group by user for fewer notifications
+            restock_by_user = {}
+            todays = {}
+            for user_id, item_name, refill_date in restock_items:
+                if user_id not in todays:
+                    todays[user_id] = self.clock.now(self.user_timezone(user_id)).date()
                 
-                # Group by user for fewer notifications
-                restock_by_user = {}
-                for user_id, item_name, refill_date, days_left in restock_items:
-                    if user_id not in restock_by_user:
-                        restock_by_user[user_id] = []
-                    
-                    days_left = int(days_left)
-                    refill_date_dt = datetime.fromisoformat(refill_date)
-                    
-                    restock_by_user[user_id].append({
-                        'item_name': item_name,
-                        'refill_date': refill_date_dt.strftime('%Y-%m-%d'),
-                        'days_left': days_left
-                    })
+                refill_date_dt = datetime.fromisoformat(refill_date)
+                days_left = (refill_date_dt.date() - todays[user_id]).days
+                if not 0 <= days_left <= 3:
+                    continue
+                
+                restock_by_user.setdefault(user_id, []).append({
+                    'item_name': item_name,
+                    'refill_date': refill_date_dt.strftime('%Y-%m-%d'),
+                    'days_left': days_left
+                })
             
-            # Send restock reminders to each user
+            # Queue restock reminders for each user
             for user_id, items in restock_by_user.items():
-                try:
-                    user = self.get_user(user_id)
-                    if not user:
-                        user = await self.fetch_user(user_id)
-                    
-                    if user:
-                        # Create embed for restock reminder
-                        embed = discord.Embed(
-                            title="🔔 Restock Reminder",
-                            description="The following items will need restocking soon:",
-                            color=discord.Color.orange()
-                        )
-                        
-                        # Add items to the embed
-                        for item in items:
-                            days_text = "TODAY" if item['days_left'] == 0 else f"{item['days_left']} days"
-                            embed.add_field(
-                                name=item['item_name'],
-                                value=f"📅 Restock by: {item['refill_date']} ({days_text})",
-                                inline=False
-                            )
-                        
-                        # Add footer with instructions
-                        embed.set_footer(text="Use /habit restock-done when you've restocked an item")
-                        
-                        # Send DM to the user
-                        await user.send(embed=embed)
-                        logger.info(f"Sent restock reminder to {user.name} for {len(items)} items")
-                    else:
-                        logger.warning(f"Could not find user with ID {user_id} for restock reminder")
-                except Exception as e:
-                    logger.error(f"Error sending restock reminder to user {user_id}: {str(e)}")
+                # Create embed for restock reminder
+                embed = discord.Embed(
+                    title="🔔 Restock Reminder",
+                    description="The following items will need restocking soon:",
+                    color=discord.Color.orange()
+                )
+                
+                # Add items to the embed
+                for item in items:
+                    days_text = "TODAY" if item['days_left'] == 0 else f"{item['days_left']} days"
+                    embed.add_field(
+                        name=item['item_name'],
+                        value=f"📅 Restock by: {item['refill_date']} ({days_text})",
+                        inline=False
+                    )
+                
+                # Add footer with instructions
+                embed.set_footer(text="Use /habit restock-done when you've restocked an item")
+                
+                # The DM queue resolves the user and handles delivery errors
+                self.dm_queue.enqueue(user_id, embed=embed)
+            
+            if restock_by_user:
+                logger.info(f"Queued restock reminders for {len(restock_by_user)} users")
         
         except Exception as e:
             logger.error(f"Error in check_restock_reminders: {str(e)}")
             
-    async def send_morning_briefing(self):
-        """Send morning briefings to opted-in users."""
+    async def send_morning_briefing(self, user_ids):
+        """Send morning briefings to users whose greeting time has come, if they are still opted in."""
         try:
-            now = get_current_time()
-            current_time = now.strftime("%H:%M")
-            
-            # Find users who have opted in for morning briefings and whose greeting time matches current time
             async with self.db_pool.acquire() as db:
                 cursor = await db.execute(
-                    '''SELECT user_id, location 
+                    '''SELECT user_id, location, bus_origin, bus_destination 
                        FROM morning_briefing_prefs 
-                       WHERE opted_in = 1 AND greeting_time = ?''',
-                    (current_time,)
+                       WHERE opted_in = 1 AND user_id IN (SELECT value FROM json_each(?))''',
+                    (json.dumps(list(user_ids)),)
                 )
                 users = await cursor.fetchall()
-                
-                if not users:
-                    return  # No users to send briefings to at this time
-                
-                logger.info(f"Sending morning briefings to {len(users)} users at {current_time}")
-                
-                for user_data in users:
-                    user_id, location = user_data
-                    try:
-                        # Find the user's Discord object
-                        user = self.get_user(user_id)
-                        if not user:
-                            user = await self.fetch_user(user_id)
-                        
-                        if user:
-                            # Generate and send the briefing
-                            await self._send_user_briefing(user, location)
-                            logger.info(f"Sent morning briefing to {user.name} (ID: {user_id})")
-                        else:
-                            logger.warning(f"Could not find user with ID {user_id} for morning briefing")
-                    except Exception as e:
-                        logger.error(f"Error sending morning briefing to user {user_id}: {str(e)}")
+            
+            if not users:
+                return  # Everyone opted out since they were scheduled
+            
+            logger.info(f"Sending morning briefings to {len(users)} users")
+            
+            # Resolve everyone's driving times together rather than one Routes API call per user
+            driving_estimates = await self._prefetch_driving_estimates(
+                [(bus_origin, bus_destination) for _, _, bus_origin, bus_destination in users]
+            )
+            
+            for user_data in users:
+                user_id, location = user_data[:2]
+                try:
+                    # Find the user's Discord object
+                    user = self.get_user(user_id)
+                    if not user:
+                        user = await self.fetch_user(user_id)
+                    
+                    if user:
+                        # Generate the briefing and hand it to the DM queue
+                        await self._send_user_briefing(user, location, driving_estimates)
+                        logger.info(f"Queued morning briefing for {user.name} (ID: {user_id})")
+                    else:
+                        logger.warning(f"Could not find user with ID {user_id} for morning briefing")
+                except Exception as e:
+                    logger.error(f"Error sending morning briefing to user {user_id}: {str(e)}")
                 
         except Exception as e:
             logger.error(f"Error in send_morning_briefing: {str(e)}")
             
-    async def _send_user_briefing(self, user, location):
-        """Generate and send a morning briefing to a specific user."""
+    async def _prefetch_driving_estimates(self, routes) -> dict:
+        """Driving estimates for a briefing cohort's (bus_origin, bus_destination) routes, in batched calls.
+        
+        Routes without stored coordinates are skipped; _get_bus_info geocodes
+        and looks those up on its own.
+        """
+        google_maps_api_key = os.getenv('GOOGLE_MAPS_API_KEY')
+        pairs = [
+            (origin.split('::')[1], destination.split('::')[1])
+            for origin, destination in routes
+            if origin and destination and self._has_coordinates(origin) and self._has_coordinates(destination)
+        ]
+        if not pairs or not google_maps_api_key:
+            return {}
+        # Driving conditions are the first thing dropped when the Google Maps budget runs low
+        if self.quota.conserving(GOOGLE_MAPS):
+            logger.info(f"Skipping driving times for {len(pairs)} briefings to save Google Maps quota")
+            return {}
+        
+        estimates = await fetch_driving_estimates(
+            self.upstreams['google_routes'], pairs, google_maps_api_key, config.google_routes_url, quota=self.quota
+        )
+        logger.info(f"Resolved driving times for {len(estimates)} routes ({len(pairs)} briefings)")
+        return estimates
+    
+    async def _send_user_briefing(self, user, location, driving_estimates=None):
+        """Generate a morning briefing for a specific user and queue it for delivery.
+        
+        driving_estimates are batched Routes API results for the briefing run
+        (see _prefetch_driving_estimates). Returns the delivery future from the
+        DM queue, or None if the briefing could not be generated.
+        """
         try:
-            now = get_current_time()
+            now = self.clock.now(self.user_timezone(user.id))
             
             # Get additional user preferences
             async with self.db_pool.acquire() as db:
@@ -944,7 +2032,7 @@ class GentleHabitsBot(commands.Bot):
             
             # Add bus transit information if origin and destination are provided
             if bus_origin and bus_destination:
-                bus_info = await self._get_bus_info(bus_origin, bus_destination)
+                bus_info = await self._get_bus_info(bus_origin, bus_destination, driving_estimates)
                 if bus_info:
                     embed.add_field(
                         name="🚌 Transit & Traffic Info",
@@ -973,11 +2061,12 @@ class GentleHabitsBot(commands.Bot):
             # Add footer
             embed.set_footer(text="Have a wonderful day! Use /briefing commands to customize your briefing.")
             
-            # Send the briefing DM
-            await user.send(embed=embed)
+            # Queue the briefing DM
+            return self.dm_queue.enqueue(user, embed=embed)
             
         except Exception as e:
             logger.error(f"Error generating briefing for {user.name}: {str(e)}")
+            return None
             
     async def _get_weather_info(self, location):
         """Get weather information for the specified location."""
@@ -988,40 +2077,45 @@ class GentleHabitsBot(commands.Bot):
                 return "Weather information unavailable (API key not configured)"
             
             # Make API call to OpenWeatherMap
-            async with aiohttp.ClientSession() as session:
-                url = f"https://api.openweathermap.org/data/2.5/weather?q={location}&appid={api_key}&units=metric"
-                async with session.get(url) as response:
-                    if response.status != 200:
-                        return f"Weather information unavailable (Error: {response.status})"
-                    
-                    data = await response.json()
-                    
-                    # Extract relevant weather data
-                    weather_description = data['weather'][0]['description']
-                    temp_current = data['main']['temp']
-                    temp_feels_like = data['main']['feels_like']
-                    humidity = data['main']['humidity']
-                    wind_speed = data['wind']['speed']
-                    
-                    # Convert wind speed from m/s to km/h for easier understanding
-                    wind_speed_kmh = wind_speed * 3.6  # 1 m/s = 3.6 km/h
-                    
-                    # Get descriptive text for weather conditions
-                    humidity_desc = self._get_humidity_description(humidity)
-                    wind_desc = self._get_wind_description(wind_speed_kmh)
-                    
-                    # Get clothing recommendations from DeepSeek
-                    clothing_advice = await self._get_clothing_advice(data)
-                    
-                    weather_text = (
-                        f"**{location}**: {weather_description.capitalize()}\n"
-                        f"🌡️ Temperature: {temp_current:.1f}°C (feels like {temp_feels_like:.1f}°C)\n"
-                        f"💧 Humidity: {humidity}% - {humidity_desc}\n"
-                        f"💨 Wind: {wind_speed_kmh:.1f} km/h - {wind_desc}\n\n"
-                        f"**Suggestion**: {clothing_advice}"
-                    )
-                    
-                    return weather_text
+            url = f"{config.openweathermap_url}/data/2.5/weather?q={location}&appid={api_key}&units=metric"
+            try:
+                response = await self.upstreams['openweathermap'].get(url)
+            except UpstreamUnavailableError as e:
+                logger.warning(f"Skipping weather for {location}: {e}")
+                return "Weather information unavailable (the weather service isn't responding)"
+            if response.status != 200:
+                return f"Weather information unavailable (Error: {response.status})"
+            
+            data = response.json()
+            
+            # Extract relevant weather data
+            weather_description = data['weather'][0]['description']
+            temp_current = data['main']['temp']
+            temp_feels_like = data['main']['feels_like']
+            humidity = data['main']['humidity']
+            wind_speed = data['wind']['speed']
+            
+            # Convert wind speed from m/s to km/h for easier understanding
+            wind_speed_kmh = wind_speed * 3.6  # 1 m/s = 3.6 km/h
+            
+            # Get descriptive text for weather conditions
+            humidity_desc = self._get_humidity_description(humidity)
+            wind_desc = self._get_wind_description(wind_speed_kmh)
+            
+            # Get clothing recommendations from DeepSeek
+            clothing_advice = await self._get_clothing_advice(data)
+            
+            weather_text = (
+                f"**{location}**: {weather_description.capitalize()}\n"
+                f"🌡️ Temperature: {temp_current:.1f}°C (feels like {temp_feels_like:.1f}°C)\n"
+                f"💧 Humidity: {humidity}% - {humidity_desc}\n"
+                f"💨 Wind: {wind_speed_kmh:.1f} km/h - {wind_desc}\n\n"
+                f"**Suggestion**: {clothing_advice}"
+            )
+            if response.stale:
+                weather_text += "\n\n*Last known conditions: the weather service isn't responding right now.*"
+            
+            return weather_text
                     
         except Exception as e:
             logger.error(f"Error fetching weather: {str(e)}")
@@ -1072,14 +2166,9 @@ class GentleHabitsBot(commands.Bot):
     async def _get_clothing_advice(self, weather_data):
         """Use DeepSeek to generate clothing recommendations based on weather."""
         try:
-            deepseek_api_key = os.getenv('DEEPSEEK_API_KEY')
-            if not deepseek_api_key:
-                return "No specific clothing recommendations available."
-            
-            # Check if DeepSeek API is available
-            api_available, error_msg = await check_deepseek_status()
-            if not api_available:
-                return "Clothing recommendations unavailable."
+            # Skip the AI for this optional touch when the DeepSeek budget is running low
+            if not DEEPSEEK_API_KEY or self.quota.conserving(DEEPSEEK):
+                return self._template_clothing_advice(weather_data)
             
             # Format weather data for DeepSeek
             weather_prompt = (
@@ -1095,21 +2184,47 @@ class GentleHabitsBot(commands.Bot):
                 f"Make your advice practical and specific to the weather conditions. Keep it under 100 characters."
             )
             
-            completion = await client.chat.completions.create(
+            # A briefing shouldn't wait long on this, so use a short budget and fall back to a template
+            recommendation, _ = await self.llm.complete(
+                [{"role": "user", "content": prompt}],
                 model="deepseek-chat",
-                messages=[{"role": "user", "content": prompt}],
+                budget=8,
+                template=self._template_clothing_advice(weather_data),
                 max_tokens=120
             )
-            
-            recommendation = completion.choices[0].message.content.strip()
-            return recommendation
+            return recommendation.strip()
             
         except Exception as e:
             logger.error(f"Error getting clothing advice: {str(e)}")
             return "No specific clothing recommendations available."
+    
+    def _template_clothing_advice(self, weather_data):
+        """Simple rule-based clothing advice for when the AI is unavailable."""
+        feels_like = weather_data['main']['feels_like']
+        description = weather_data['weather'][0]['description'].lower()
+        
+        if feels_like < 5:
+            advice = "Bundle up with a warm coat, scarf and gloves"
+        elif feels_like < 12:
+            advice = "Wear a jacket and warm layers"
+        elif feels_like < 20:
+            advice = "A light jumper or jacket should do"
+        elif feels_like < 27:
+            advice = "Light, comfortable clothes are perfect"
+        else:
+            advice = "Stay cool in breathable clothes and wear sunscreen"
+        
+        if any(word in description for word in ("rain", "drizzle", "shower", "storm")):
+            advice += ", and bring an umbrella"
+        return advice + "."
             
-    async def _get_bus_info(self, origin=None, destination=None):
-        """Get real-time bus transit and traffic information using both Metro TAS API and Google Maps Routes API."""
+    async def _get_bus_info(self, origin=None, destination=None, driving_estimates=None):
+        """Get real-time bus transit and traffic information using both Metro TAS API and Google Maps Routes API.
+        
+        driving_estimates maps (origin coordinates, destination coordinates) to
+        DrivingEstimates fetched ahead of time; routes missing from it are
+        looked up on their own.
+        """
         try:
             # Use default values if not provided
             if not origin:
@@ -1155,272 +2270,64 @@ class GentleHabitsBot(commands.Bot):
             origin_for_api = f"{origin_name}::{origin_coords}"
             destination_for_api = f"{destination_name}::{destination_coords}"
             
-            # URL encode the entire strings
-            origin_encoded = urllib.parse.quote(origin_for_api)
-            destination_encoded = urllib.parse.quote(destination_for_api)
-            
             # Get current timestamp for departure_time
             current_timestamp = int(time.time())
             # Add 5 minutes to ensure it's in the future
             future_timestamp = current_timestamp + (5 * 60)
             
-            # Construct Metro TAS API URL
-            metro_tas_url = f"https://otp.transitkit.com.au/directions?router=metrotas&origin={origin_encoded}&destination={destination_encoded}&departure_time={future_timestamp}&alternatives=true&key={google_maps_api_key}"
-            
-            # Make request to Metro TAS API
-            transit_data = None
-            async with aiohttp.ClientSession() as session:
-                try:
-                    logger.debug(f"Requesting Metro TAS API: {metro_tas_url[:100]}...")
-                    async with session.get(metro_tas_url) as response:
-                        response_text = await response.text()
-                        if response.status == 200:
-                            try:
-                                transit_data = json.loads(response_text)
-                                logger.debug(f"Metro TAS API response status: {response.status}, found {len(transit_data.get('routes', []))} routes")
-                            except json.JSONDecodeError:
-                                logger.error(f"Failed to parse Metro TAS API response: {response_text[:200]}...")
-                        else:
-                            logger.error(f"Metro TAS API returned status code {response.status}: {response_text[:200]}...")
-                except Exception as e:
-                    logger.error(f"Error fetching data from Metro TAS API: {str(e)}")
-                    logger.debug(f"Metro TAS URL attempted: {metro_tas_url[:100]}...")
-            
-            # PART 2: Get traffic information from Google Maps API
-            # Define the Google Maps Routes API URL
-            routes_url = "https://routes.googleapis.com/directions/v2:computeRoutes"
-            
-            # Format RFC 3339 timestamp for Google Maps API
-            now = datetime.now()
-            # Add a small offset to ensure the time is in the future (5 minutes)
-            future_time = now + timedelta(minutes=5)
-            # Format as RFC 3339 with timezone offset
-            formatted_time = future_time.strftime("%Y-%m-%dT%H:%M:%S")
-            
-            # Add timezone offset if missing
-            if "+" not in formatted_time and "-" not in formatted_time[-6:]:
-                try:
-                    # Try to get local timezone offset
-                    offset = future_time.astimezone().strftime('%z')
-                    if offset:
-                        # Insert colon in timezone offset (e.g., +0000 to +00:00)
-                        if len(offset) == 5:
-                            offset = f"{offset[:3]}:{offset[3:]}"
-                        formatted_time += offset
-                    else:
-                        formatted_time += "Z"  # UTC if we can't determine local
-                except:
-                    formatted_time += "Z"  # UTC as fallback
-            
-            logger.debug(f"Using departure time: {formatted_time}")
-            
-            # Create payload for driving info to get traffic analysis
-            driving_payload = {
-                "origin": {
-                    "location": {
-                        "latLng": {
-                            "latitude": float(origin_lat),
-                            "longitude": float(origin_lng)
-                        }
-                    }
-                },
-                "destination": {
-                    "location": {
-                        "latLng": {
-                            "latitude": float(dest_lat),
-                            "longitude": float(dest_lng)
-                        }
-                    }
-                },
-                "travelMode": "DRIVE",
-                "routingPreference": "TRAFFIC_AWARE",
-                "departureTime": formatted_time,
-                "computeAlternativeRoutes": False,
-                "languageCode": "en-US",
-                "units": "METRIC"
-            }
-            
-            # Headers for the request
-            driving_headers = {
-                "Content-Type": "application/json",
-                "X-Goog-Api-Key": google_maps_api_key,
-                "X-Goog-FieldMask": "routes.duration,routes.distanceMeters,routes.legs.duration,routes.legs.distanceMeters,routes.travelAdvisory"
+            # Construct the Metro TAS API request. The query goes in params (encoded
+            # by aiohttp) so the client can leave the departure time and key out of
+            # the key its last good answer is kept under
+            metro_tas_url = f"{config.metro_tas_url}/directions"
+            metro_tas_params = {
+                'router': 'metrotas',
+                'origin': origin_for_api,
+                'destination': destination_for_api,
+                'departure_time': future_timestamp,
+                'alternatives': 'true',
+                'key': google_maps_api_key,
             }
             
-            # Make API call to get driving information
-            driving_data = None
-            async with aiohttp.ClientSession() as session:
-                logger.debug("Trying Google Maps Routes API for driving data")
-                try:
-                    async with session.post(routes_url, json=driving_payload, headers=driving_headers) as driving_response:
-                        driving_status = driving_response.status
-                        driving_text = await driving_response.text()
-                        logger.debug(f"Driving API Response: Status {driving_status}, Body: {driving_text[:200]}...")
-                        
-                        if driving_status == 200:
-                            driving_data = json.loads(driving_text)
-                        else:
-                            logger.error(f"Google Maps Routes API (driving) returned status code {driving_status}: {driving_text}")
-                except Exception as e:
-                    logger.error(f"Exception with Google Maps API (driving): {str(e)}")
-            
-            # Process Metro TAS transit information
-            transit_info = "No bus routes found between these locations"
-            if transit_data and transit_data.get('routes'):
-                transit_routes = transit_data.get('routes', [])
-                # Extract bus information
-                upcoming_buses = []
-                
-                for route_idx, route in enumerate(transit_routes):
-                    legs = route.get('legs', [])
-                    if not legs:
-                        continue
-                    
-                    leg = legs[0]  # Get the first leg
-                    
-                    # Get overall route info
-                    departure_time = leg.get('departure_time', {})
-                    arrival_time = leg.get('arrival_time', {})
-                    duration = leg.get('duration', {})
-                    
-                    departure_text = departure_time.get('text', 'Unknown time')
-                    duration_text = f"{duration.get('text', 'Unknown duration')}"
-                    
-                    # Extract transit steps
-                    steps = leg.get('steps', [])
-                    transit_steps = [step for step in steps if step.get('travel_mode') == 'TRANSIT']
-                    
-                    for step in transit_steps:
-                        # Extract transit details
-                        transit_details = step.get('transit_details', {})
-                        if not transit_details:
-                            continue
-                        
-                        line = transit_details.get('line', {})
-                        route_name = line.get('short_name') or line.get('name', f"Route {route_idx + 1}")
-                        
-                        # Get departure stop
-                        departure_stop = transit_details.get('departure_stop', {})
-                        stop_name = departure_stop.get('name', 'Unknown stop')
-                        
-                        # Get walking distance to stop
-                        walking_distance = ""
-                        for i, step in enumerate(steps):
-                            if step.get('travel_mode') == 'TRANSIT' and i > 0 and steps[i-1].get('travel_mode') == 'WALKING':
-                                walking_step = steps[i-1]
-                                walking_distance = walking_step.get('distance', {}).get('text', '')
-                                break
-                        
-                        # Add to our list of buses
-                        upcoming_buses.append({
-                            'route': route_name,
-                            'departure_time': departure_text,
-                            'departure_text': departure_text,
-                            'duration': duration_text,
-                            'walking_distance': walking_distance,
-                            'nearest_stop': stop_name
-                        })
-                        break  # Just get the first transit step for each route
-                
-                if upcoming_buses:
-                    # Sort by departure time and take the next 3 buses
-                    upcoming_buses = upcoming_buses[:3]  # Get up to 3 buses
-                    
-                    # Format the bus information
-                    bus_info = []
-                    
-                    
-                    for i, bus in enumerate(upcoming_buses):
-                        if i == 0:
-                            # More detailed info for the next bus
-                            bus_info.append(
-                                f"**Next Bus: {bus['route']}**\n"
-                                f"🚏 Stop {i+1}, {bus['nearest_stop']} "
-                                f"(Walking distance: {bus['walking_distance'] if bus['walking_distance'] else '0.1 km'})\n"
-                                f"🕒 Departs at {bus['departure_text']}\n"
-                                f"⏱️ Duration: {bus['duration']}"
-                            )
-                        else:
-                            # Format for subsequent buses - more concise format
-                            bus_info.append(
-                                f"{bus['route']} from {bus['nearest_stop']}: Departs {bus['departure_text']}, Duration: {bus['duration']}"
-                            )
-                    
-                    transit_info = "\n\n".join(bus_info)
-            
-            # Process driving information and provide traffic analysis
-            traffic_info = ""
-            if driving_data and driving_data.get('routes'):
-                driving_route = driving_data['routes'][0]
-                
-                # Get duration including traffic - safely handle the seconds format (e.g., "545s")
-                duration_str = driving_route.get('duration', '')
-                if isinstance(duration_str, str) and duration_str.endswith('s'):
-                    duration_with_traffic = self._format_duration_seconds(duration_str)
-                else:
-                    # Try the old format just in case
-                    duration_obj = driving_route.get('duration', {})
-                    duration_with_traffic = duration_obj.get('text', 'Unknown') if isinstance(duration_obj, dict) else str(duration_obj)
-                
-                # Get distance safely
-                distance = driving_route.get('distanceMeters', 0)
-                distance_km = distance / 1000
-                
-                # Get traffic conditions - default to normal if not specified
-                traffic_advisory = driving_route.get('travelAdvisory', {}) or {}
-                traffic_severity = "normal"
-                
-                # Log actual traffic advisory structure to help debug
-                logger.debug(f"Traffic advisory data: {json.dumps(traffic_advisory, indent=2)}")
-                
-                # Check if we have any traffic data in the advisory
-                if traffic_advisory:
-                    # Try to determine traffic severity from available data
-                    # The exact field might vary based on the API response structure
-                    if 'trafficDensity' in traffic_advisory:
-                        traffic_density_value = traffic_advisory.get('trafficDensity')
-                        logger.debug(f"Found trafficDensity: {traffic_density_value}")
-                        
-                        # Routes API traffic density values
-                        if traffic_density_value == 'TRAFFIC_DENSITY_HEAVY':
-                            traffic_severity = "heavy"
-                        elif traffic_density_value == 'TRAFFIC_DENSITY_MEDIUM':
-                            traffic_severity = "moderate"
-                        elif traffic_density_value == 'TRAFFIC_DENSITY_LOW':
-                            traffic_severity = "light"
-                    else:
-                        # If no specific traffic density field, check for other indicators
-                        # such as speed restrictions, road closures, etc.
-                        if 'speedReadingIntervals' in traffic_advisory:
-                            # If we have speed readings, we might infer traffic from them
-                            logger.debug("Found speedReadingIntervals, could analyze for traffic")
-                        
-                        # For now, default to normal traffic if we can't determine
-                        logger.debug("No specific traffic density information found, defaulting to normal")
-                
-                # Create Google Maps deep link
-                origin_for_link = f"{origin_lat},{origin_lng}"
-                dest_for_link = f"{dest_lat},{dest_lng}"
-                maps_deep_link = f"https://www.google.com/maps/dir/?api=1&origin={origin_for_link}&destination={dest_for_link}&travelmode=driving"
-                
-                # Prepare traffic description
-                if traffic_severity == "heavy":
-                    traffic_desc = "🔴 Heavy traffic! Leave extra time for your journey."
-                elif traffic_severity == "moderate":
-                    traffic_desc = "🟠 Moderate traffic conditions."
+            # Make request to Metro TAS API
+            transit_options = []
+            try:
+                if not self.quota.allows(GOOGLE_MAPS):
+                    raise UpstreamUnavailableError("Google Maps quota used up")
+                logger.debug(f"Requesting Metro TAS API: {origin_name} to {destination_name}")
+                response = await self.upstreams['metro_tas'].get(metro_tas_url, params=metro_tas_params)
+                if not response.stale:
+                    self.quota.record(GOOGLE_MAPS)
+                if response.status == 200:
+                    try:
+                        transit_options = parse_transit_response(response.body)
+                        logger.debug(f"Metro TAS API response status: {response.status}, found {len(transit_options)} bus options")
+                    except ValueError:
+                        logger.error(f"Failed to parse Metro TAS API response: {response.body[:200]!r}...")
                 else:
-                    traffic_desc = "🟢 Traffic is flowing smoothly."
-                
-                traffic_info = (
-                    f"🚗 **Driving Conditions:**\n"
-                    f"{traffic_desc}\n"
-                    f"🛣️ Distance: {distance_km:.1f} km\n"
-                    f"⏱️ Estimated driving time: {duration_with_traffic}\n"
-                    f"📱 [Open in Google Maps]({maps_deep_link})"
+                    logger.error(f"Metro TAS API returned status code {response.status}: {response.body[:200]!r}...")
+            except UpstreamUnavailableError as e:
+                logger.warning(f"Skipping Metro TAS lookup: {e}")
+            except Exception as e:
+                logger.error(f"Error fetching data from Metro TAS API: {str(e)}")
+                logger.debug(f"Metro TAS request attempted: {origin_name} to {destination_name}")
+            
+            # PART 2: Get traffic-aware driving time from the Google Routes API. Briefing runs
+            # resolve the whole cohort in batched matrix calls first and pass the results in.
+            route = (origin_coords, destination_coords)
+            if driving_estimates is None or route not in driving_estimates:
+                # Driving conditions are optional, so they go first when the budget runs low
+                driving_estimates = {} if self.quota.conserving(GOOGLE_MAPS) else await fetch_driving_estimates(
+                    self.upstreams['google_routes'], [route], google_maps_api_key, config.google_routes_url,
+                    quota=self.quota
                 )
+            driving = driving_estimates.get(route)
+            
+            # Format the next few buses and the driving conditions
+            transit_info = format_transit_options(transit_options)
+            traffic_info = format_driving_conditions(driving, origin_coords, destination_coords) if driving else ""
             
             # Fall back to just showing transit routes if transit info is available
-            if transit_info != "No bus routes found between these locations":
+            if transit_info != NO_BUS_ROUTES:
                 # Combine transit and traffic information
                 if traffic_info:
                     return f"{transit_info}\n\n{traffic_info}"
@@ -1518,7 +2425,7 @@ class GentleHabitsBot(commands.Bot):
         try:
             # Use OpenStreetMap Nominatim as it doesn't require an API key
             # Note: For production, consider using a geocoding service with an API key for better reliability
-            geocoding_url = f"https://nominatim.openstreetmap.org/search"
+            geocoding_url = f"{config.nominatim_url}/search"
             
             params = {
                 "q": address,
@@ -1531,32 +2438,35 @@ class GentleHabitsBot(commands.Bot):
                 "User-Agent": "GentleHabitsBot/1.0"  # Required by Nominatim
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(geocoding_url, params=params, headers=headers) as response:
-                    if response.status != 200:
-                        logger.error(f"Geocoding API returned status code {response.status}")
-                        return None
-                    
-                    data = await response.json()
-                    
-                    if not data:
-                        logger.warning(f"No geocoding results for address: {address}")
-                        return None
-                    
-                    # Extract latitude and longitude
-                    lat = data[0].get('lat')
-                    lon = data[0].get('lon')
-                    display_name = data[0].get('display_name')
-                    
-                    if not lat or not lon:
-                        logger.warning(f"Missing coordinates in geocoding result for: {address}")
-                        return None
-                    
-                    # Format as required by the transit API: 'name::lat,lon'
-                    formatted_location = f"{display_name}::{lat},{lon}"
-                    logger.info(f"Geocoded '{address}' to '{formatted_location}'")
-                    
-                    return formatted_location
+            try:
+                response = await self.upstreams['nominatim'].get(geocoding_url, params=params, headers=headers)
+            except UpstreamUnavailableError as e:
+                logger.warning(f"Skipping geocoding for '{address}': {e}")
+                return None
+            if response.status != 200:
+                logger.error(f"Geocoding API returned status code {response.status}")
+                return None
+            
+            data = response.json()
+            
+            if not data:
+                logger.warning(f"No geocoding results for address: {address}")
+                return None
+            
+            # Extract latitude and longitude
+            lat = data[0].get('lat')
+            lon = data[0].get('lon')
+            display_name = data[0].get('display_name')
+            
+            if not lat or not lon:
+                logger.warning(f"Missing coordinates in geocoding result for: {address}")
+                return None
+            
+            # Format as required by the transit API: 'name::lat,lon'
+            formatted_location = f"{display_name}::{lat},{lon}"
+            logger.info(f"Geocoded '{address}' to '{formatted_location}'")
+            
+            return formatted_location
                     
         except Exception as e:
             logger.error(f"Error geocoding address '{address}': {str(e)}", exc_info=True)
@@ -1577,7 +2487,7 @@ class GentleHabitsBot(commands.Bot):
                 if not items:
                     return None
                 
-                now = get_current_time()
+                now = self.clock.now(self.user_timezone(user_id))
                 
                 restock_text = []
                 for item_name, refill_date in items:
@@ -1614,7 +2524,7 @@ class GentleHabitsBot(commands.Bot):
                 if not events:
                     return None
                 
-                now = get_current_time()
+                now = self.clock.now(self.user_timezone(user_id))
                 
                 countdown_text = []
                 for event_name, event_date in events:
@@ -1640,28 +2550,30 @@ class GentleHabitsBot(commands.Bot):
             logger.error(f"Error getting event countdowns: {str(e)}")
             return "Event countdown information unavailable"
         
-    async def get_reminder_channel(self) -> Optional[discord.TextChannel]:
-        """Get the reminder channel, with proper error handling."""
-        if not config.reminder_channel:
-            logger.warning("No reminder channel configured")
+    async def get_reminder_channel(self, guild_id: int) -> Optional[discord.TextChannel]:
+        """Get a server's reminder channel, with proper error handling."""
+        settings = self.guild_settings.get(guild_id)
+        if not settings or not settings.reminder_channel_id:
+            logger.warning(f"No reminder channel configured for server {guild_id}")
             return None
-            
+        return await self._get_configured_channel(settings.reminder_channel_id, "reminder")
+    
+    async def _get_configured_channel(self, channel_id: int, label: str) -> Optional[discord.TextChannel]:
+        """Get a channel from the cache, fetching it if needed."""
         # Wait for cache to be ready
         if not self.is_ready():
-            logger.info("Waiting for bot to be ready before accessing channels...")
+            logger.info(f"Waiting for bot to be ready before accessing the {label} channel...")
             await self.wait_until_ready()
-            logger.info("Bot is now ready, attempting to get reminder channel")
+            logger.info(f"Bot is now ready, attempting to get {label} channel")
             
-        # Try to get the channel by ID
-        channel_id = int(config.reminder_channel)
         channel = self.get_channel(channel_id)
         
         # If channel not found in cache, try to fetch it
         if not channel:
             try:
-                logger.info(f"Channel {channel_id} not in cache, attempting to fetch it")
+                logger.info(f"{label.capitalize()} channel {channel_id} not in cache, attempting to fetch it")
                 channel = await self.fetch_channel(channel_id)
-                logger.info(f"Successfully fetched channel {channel.name} ({channel_id})")
+                logger.info(f"Successfully fetched {label} channel {channel.name} ({channel_id})")
             except discord.NotFound:
                 logger.error(f"Channel with ID {channel_id} not found")
                 return None
@@ -1669,7 +2581,7 @@ class GentleHabitsBot(commands.Bot):
                 logger.error(f"Bot does not have permission to access channel with ID {channel_id}")
                 return None
             except Exception as e:
-                logger.error(f"Could not find reminder channel {channel_id}: {str(e)}")
+                logger.error(f"Could not find {label} channel {channel_id}: {str(e)}")
                 return None
                 
         return channel
@@ -1677,119 +2589,78 @@ class GentleHabitsBot(commands.Bot):
     async def check_missed_reminders(self):
         """Check for reminders that should have been sent while the bot was offline."""
         try:
-            now = get_current_time()
-            one_hour_ago = now - timedelta(hours=1)
-            
-            # Format times for SQL comparison
-            now_time = now.strftime("%H:%M")
-            one_hour_ago_time = one_hour_ago.strftime("%H:%M")
+            now = self.clock.utcnow()
             
-            # Get habits that should have been reminded in the last hour
+            # Reminder times are wall-clock times in each habit's timezone
             async with self.db_pool.acquire() as db:
-                query = '''
-                    SELECT id, name, reminder_time, expiry_time FROM habits 
-                    WHERE reminder_time BETWEEN ? AND ?
-                '''
-                
-                # Handle case where the range crosses midnight
-                if one_hour_ago_time > now_time:
-                    cursor = await db.execute(
-                        'SELECT id, name, reminder_time, expiry_time FROM habits WHERE reminder_time >= ? OR reminder_time <= ?',
-                        (one_hour_ago_time, now_time)
-                    )
-                else:
-                    cursor = await db.execute(query, (one_hour_ago_time, now_time))
-                
+                cursor = await db.execute('SELECT id, name, reminder_time, expiry_time, guild_id, timezone FROM habits')
                 habits = await cursor.fetchall()
+            
+            # Reminder channels, looked up once per server
+            channels = {}
+            
+            for habit_id, name, reminder_time, expiry_time, guild_id, tz_name in habits:
+                tz_name = tz_name or config.timezone
+                try:
+                    # The most recent time the reminder was due, and the expiry after it
+                    reminder_at = next_fire(reminder_time, tz_name, now - timedelta(days=1))
+                    expiry_at = next_fire(expiry_time, tz_name, reminder_at)
+                except (ValueError, KeyError) as e:
+                    logger.error(f"Could not check missed reminder for habit {name}: {e}")
+                    continue
                 
-                # Get a reference to the reminder channel
-                channel = await self.get_reminder_channel()
-                if not channel:
-                    logger.error("Could not find reminder channel for missed reminder check")
-                    return
+                # Only reminders due in the last hour
+                if not now - timedelta(hours=1) <= reminder_at <= now:
+                    continue
                 
-                for habit in habits:
-                    habit_id, name, reminder_time, expiry_time = habit
-                    
-                    # Parse times into datetime objects for comparison
-                    reminder_dt = datetime.strptime(reminder_time, "%H:%M").replace(
-                        year=now.year, month=now.month, day=now.day, 
-                        tzinfo=now.tzinfo
-                    )
-                    
-                    # Adjust if the reminder was yesterday
-                    if reminder_dt > now:
-                        reminder_dt -= timedelta(days=1)
-                    
-                    expiry_dt = datetime.strptime(expiry_time, "%H:%M").replace(
-                        year=now.year, month=now.month, day=now.day,
-                        tzinfo=now.tzinfo
-                    )
-                    
-                    # Adjust if expiry is tomorrow
-                    if expiry_dt < reminder_dt:
-                        expiry_dt += timedelta(days=1)
-                    
-                    # Only send if not expired
-                    if now < expiry_dt:
-                        logger.info(f"Sending catch-up reminder for habit: {name}")
-                        await self.send_habit_reminder(habit_id, name, channel)
-                    else:
-                        logger.info(f"Skipping expired catch-up reminder for habit: {name}")
+                # Only send if not expired
+                if now < expiry_at:
+                    if guild_id not in channels:
+                        channels[guild_id] = await self.get_reminder_channel(guild_id)
+                    if not channels[guild_id]:
+                        logger.error(f"Could not find reminder channel of server {guild_id} for missed reminder check")
+                        continue
+                    logger.info(f"Sending catch-up reminder for habit: {name}")
+                    await self.send_habit_reminder(habit_id, name, channels[guild_id])
+                else:
+                    logger.info(f"Skipping expired catch-up reminder for habit: {name}")
                         
         except Exception as e:
             logger.error(f"Error in check_missed_reminders: {str(e)}")
 
-    async def get_debt_tracker_channel(self) -> Optional[discord.TextChannel]:
-        """Get the debt tracker channel from the configured ID."""
-        channel_id = os.getenv('DEBT_TRACKER_CHANNEL_ID')
-        if not channel_id:
-            logger.warning("DEBT_TRACKER_CHANNEL_ID not set in environment variables")
-            return None
-            
-        # Wait for cache to be ready
-        if not self.is_ready():
-            logger.info("Waiting for bot to be ready before accessing debt tracker channel...")
-            await self.wait_until_ready()
-            logger.info("Bot is now ready, attempting to get debt tracker channel")
-            
-        try:
-            channel_id = int(channel_id)
-            channel = self.get_channel(channel_id)
-            if not channel:
-                try:
-                    logger.info(f"Debt tracker channel {channel_id} not in cache, attempting to fetch it")
-                    channel = await self.fetch_channel(channel_id)
-                    logger.info(f"Successfully fetched debt tracker channel {channel.name} ({channel_id})")
-                except discord.NotFound:
-                    logger.error(f"Channel with ID {channel_id} not found")
-                    return None
-                except discord.Forbidden:
-                    logger.error(f"Bot doesn't have permission to access channel with ID {channel_id}")
-                    return None
-                except Exception as e:
-                    logger.error(f"Error fetching channel with ID {channel_id}: {str(e)}")
-                    return None
-            return channel
-        except ValueError:
-            logger.error(f"Invalid DEBT_TRACKER_CHANNEL_ID: {channel_id} - not a valid integer")
-            return None
-        except Exception as e:
-            logger.error(f"Error getting debt tracker channel: {str(e)}")
+    async def get_debt_tracker_channel(self, guild_id: int) -> Optional[discord.TextChannel]:
+        """Get a server's debt tracker channel."""
+        settings = self.guild_settings.get(guild_id)
+        if not settings or not settings.debt_tracker_channel_id:
+            logger.warning(f"No debt tracker channel configured for server {guild_id}")
             return None
+        return await self._get_configured_channel(settings.debt_tracker_channel_id, "debt tracker")
     
-    async def update_debt_dashboard(self):
-        """Update or create the debt tracker dashboard in the dedicated channel."""
-        logger.info("Updating debt tracker dashboard...")
+    async def update_debt_dashboard(self, guild_id: int = None):
+        """Update or create the debt tracker dashboard in every server with a debt tracker channel, or just one."""
+        if self.cluster.clustered and guild_id is None:
+            # Another process may have changed a server's channels
+            await self.guild_settings.load()
+        
+        guilds = self._guilds_with_channel('debt_tracker_channel_id', guild_id)
+        if not guilds:
+            if guild_id is None:
+                logger.warning("No server has a debt tracker channel set - dashboard updates disabled")
+            return
         
+        logger.info(f"Updating debt tracker dashboard in {len(guilds)} server(s)...")
+        await self._for_each_guild(guilds, self._update_guild_debt_dashboard, "debt tracker dashboard")
+    
+    async def _update_guild_debt_dashboard(self, settings):
+        """Update or create one server's debt tracker dashboard in its dedicated channel."""
         try:
-            channel = await self.get_debt_tracker_channel()
+            channel = await self.get_debt_tracker_channel(settings.guild_id)
             if not channel:
-                logger.warning("Debt tracker channel not configured or not found.")
+                logger.warning(f"Debt tracker channel of server {settings.guild_id} not found.")
                 return
                 
             # Create embed dashboard
-            embed = await self.create_debt_dashboard_embed()
+            embed = await self.create_debt_dashboard_embed(settings.guild_id)
             
             # Look for existing dashboard message to update with timeout protection
             dashboard_found = False
@@ -1839,8 +2710,8 @@ class GentleHabitsBot(commands.Bot):
             logger.error(f"Error in update_debt_dashboard: {str(e)}")
             logger.error(traceback.format_exc())
             
-    async def create_debt_dashboard_embed(self):
-        """Create an embed for the debt tracker dashboard."""
+    async def create_debt_dashboard_embed(self, guild_id: int):
+        """Create an embed for a server's debt tracker dashboard."""
         embed = discord.Embed(
             title="🌟 Debt Tracker Dashboard 🌟",
             description="Track your progress in paying down debts. Use the buttons below to update your accounts.",
@@ -1854,19 +2725,16 @@ class GentleHabitsBot(commands.Bot):
             inline=False
         )
         
-        # Get all public debt accounts
+        # Get the server's public debt accounts
         async with self.db_pool.acquire() as db:
             cursor = await db.execute('''
                 SELECT 
                     da.id, da.user_id, da.name, da.current_balance, da.initial_balance, 
-                    da.interest_rate, da.due_date, da.description, u.user_tag
+                    da.interest_rate, da.due_date, da.description
                 FROM debt_accounts da
-                LEFT JOIN (
-                    SELECT DISTINCT user_id, user_id || '#0000' as user_tag FROM debt_accounts
-                ) u ON da.user_id = u.user_id
-                WHERE da.is_public = 1
+                WHERE da.guild_id = ? AND da.is_public = 1
                 ORDER BY da.current_balance DESC
-            ''')
+            ''', (guild_id,))
             
             public_accounts = await cursor.fetchall()
         
@@ -1964,7 +2832,7 @@ class GentleHabitsBot(commands.Bot):
             inline=False
         )
         
-        embed.set_footer(text=f"Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M')} • Use the buttons below to update your accounts")
+        embed.set_footer(text=f"Last updated: {self.clock.now().strftime('%Y-%m-%d %H:%M')} • Use the buttons below to update your accounts")
         
         return embed
         
@@ -1989,34 +2857,6 @@ class GentleHabitsBot(commands.Bot):
                 break
         return messages
 
-    def _format_duration_seconds(self, duration_seconds_str):
-        """Format a duration string in seconds (e.g., '545s') to a human-readable format."""
-        try:
-            if not isinstance(duration_seconds_str, str) or not duration_seconds_str.endswith('s'):
-                return str(duration_seconds_str)
-                
-            seconds = int(duration_seconds_str.rstrip('s'))
-            minutes = seconds // 60
-            seconds_remainder = seconds % 60
-            
-            if minutes >= 60:
-                hours = minutes // 60
-                minutes_remainder = minutes % 60
-                if minutes_remainder > 0:
-                    return f"{hours} hr {minutes_remainder} min"
-                else:
-                    return f"{hours} hr"
-            elif minutes > 0:
-                if seconds_remainder > 0 and minutes < 10:
-                    # Only show seconds for short durations
-                    return f"{minutes} min {seconds_remainder} sec"
-                else:
-                    return f"{minutes} min"
-            else:
-                return f"{seconds} sec"
-        except (ValueError, TypeError):
-            return str(duration_seconds_str)
-
 def validate_time_format(time_str: str) -> bool:
     """Validate time string format and reasonable values"""
     try:
@@ -2036,58 +2876,12 @@ async def get_db_connection(db_path: str):
             await db.rollback()
             raise HabitError(f"Database error: {str(e)}")
 
-def rate_limit(calls: int, period: int):
-    """Rate limiting decorator for commands
-    calls: number of allowed calls
-    period: time period in seconds
-    """
-    def decorator(func):
-        last_reset = datetime.now()
-        calls_made = 0
-        
-        @wraps(func)
-        async def wrapper(self, interaction: discord.Interaction, *args, **kwargs):
-            nonlocal last_reset, calls_made
-            
-            now = datetime.now()
-            if now - last_reset > timedelta(seconds=period):
-                calls_made = 0
-                last_reset = now
-                
-            if calls_made >= calls:
-                await interaction.response.send_message(
-                    "Please wait a moment before using this command again.",
-                    ephemeral=True
-                )
-                return
-                
-            calls_made += 1
-            return await func(self, interaction, *args, **kwargs)
-        return wrapper
-    return decorator
-
-
-async def load_cogs() -> None:
-    """
-    The code in this function is executed whenever the bot will start.
-    """
-    for file in os.listdir(f"./cogs"):
-        if file.endswith(".py"):
-            extension = file[:-3]
-            try:
-                await bot.load_extension(f"cogs.{extension}")
-                print(f"Loaded cog '{extension}'")
-            except Exception as e:
-                exception = f"{type(e).__name__}: {e}"
-                print(f"Failed to load extension {extension}\n{exception}")
-
 
 if __name__ == '__main__':
     logger.info('🚀 Starting Gentle Habits Bot...')
     try:
         bot = GentleHabitsBot()
         logger.info('✅ Bot instance created, attempting to connect to Discord...')
-        asyncio.run(load_cogs())
         bot.run(config.token, reconnect=True)
     except discord.errors.LoginFailure:
         logger.critical('❌ Invalid Discord token provided. Please check your .env file.')
@@ -0,0 +1,264 @@
+import discord
+from discord import app_commands
+import aiosqlite
+import logging
+from assets.utils.db_stats import db_acquire_wait, db_hold_time
+from assets.utils.quota import GOOGLE_MAPS, DEEPSEEK, NORMAL, CONSERVE, EXHAUSTED
+
+# Just get the logger without adding handlers
+logger = logging.getLogger('gentle_habits')
+
+@app_commands.default_permissions(administrator=True)
+@app_commands.guild_only()
+class AdminCommands(app_commands.Group):
+    """Maintenance commands for server administrators.
+    
+    Only `channels` is about the server it's run in. The rest read or change
+    the whole bot (every server's data, the database, the operator's API
+    spend), so they are also limited to the bot's owner.
+    """
+    def __init__(self, bot):
+        super().__init__(name="admin", description="Bot maintenance commands")
+        self.bot = bot
+    
+    async def _owner_only(self, interaction: discord.Interaction) -> bool:
+        """Whether the user owns the bot; if not, tell them and return False."""
+        if await self.bot.is_owner(interaction.user):
+            return True
+        await interaction.response.send_message(
+            "🔒 This command covers every server the bot is in, so only the bot's owner can run it.",
+            ephemeral=True
+        )
+        return False
+        
+    @app_commands.command(name="rebuild-celebration-stats", description="Recompute celebration totals from the full history")
+    async def rebuild_celebration_stats(self, interaction: discord.Interaction):
+        if not await self._owner_only(interaction):
+            return
+        await interaction.response.defer(ephemeral=True)
+        
+        try:
+            rows = await self.bot.rebuild_celebration_stats()
+            await interaction.followup.send(
+                f"✅ Celebration stats rebuilt ({rows} user/category totals).",
+                ephemeral=True
+            )
+        except Exception as e:
+            logger.error(f"Error rebuilding celebration stats: {e}")
+            await interaction.followup.send(
+                f"❌ Error rebuilding celebration stats: {str(e)}",
+                ephemeral=True
+            )
+
+    @app_commands.command(name="repair-streaks", description="Rebuild check-in calendars and current streaks from the check-in log")
+    async def repair_streaks(self, interaction: discord.Interaction):
+        # Rewrites calendars and streaks in every server
+        if not await self._owner_only(interaction):
+            return
+        await interaction.response.defer(ephemeral=True)
+        
+        try:
+            calendars, changed = await self.bot.repair_streaks()
+            await interaction.followup.send(
+                f"✅ Streaks repaired from the check-in log ({calendars} calendars rebuilt, {changed} streaks corrected).",
+                ephemeral=True
+            )
+        except Exception as e:
+            logger.error(f"Error repairing streaks: {e}")
+            await interaction.followup.send(
+                f"❌ Error repairing streaks: {str(e)}",
+                ephemeral=True
+            )
+
+    @app_commands.command(name="db-stats", description="Show database pool usage, the slowest statements and table sizes")
+    async def db_stats(self, interaction: discord.Interaction):
+        if not await self._owner_only(interaction):
+            return
+        await interaction.response.defer(ephemeral=True)
+        
+        try:
+            pool = self.bot.db_pool
+            stats = pool.query_stats
+            
+            embed = discord.Embed(
+                title="🗄️ Database Stats",
+                color=discord.Color.blue()
+            )
+            
+            # Pool usage
+            embed.add_field(
+                name="Connection Pool",
+                value=(
+                    f"In use: {pool.in_use}/{pool.max_connections} • Waiting: {pool.waiting}\n"
+                    f"Acquire wait p50/p95: ≤{db_acquire_wait.percentile(0.5) * 1000:g}ms / ≤{db_acquire_wait.percentile(0.95) * 1000:g}ms\n"
+                    f"Hold time p50/p95: ≤{db_hold_time.percentile(0.5) * 1000:g}ms / ≤{db_hold_time.percentile(0.95) * 1000:g}ms\n"
+                    f"Acquisitions: {db_acquire_wait.count}"
+                ),
+                inline=False
+            )
+            
+            # Statements with the most total time
+            top = stats.top(5)
+            if top:
+                value = "\n".join(
+                    f"`{sql[:80]}`\n↳ {calls} calls, {total_ms:.0f}ms total, {avg_ms:.1f}ms avg, {max_ms:.1f}ms max"
+                    for sql, calls, total_ms, avg_ms, max_ms in top
+                )
+            else:
+                value = "No statements recorded yet."
+            embed.add_field(name="Top Statements (total time)", value=value[:1024], inline=False)
+            
+            # Recent slow statements with their plans
+            slow = list(stats.slow_log)[-3:]
+            if slow:
+                value = "\n".join(
+                    f"`{entry['sql'][:80]}` ({entry['ms']:.0f}ms at {entry['at'].strftime('%H:%M:%S')})"
+                    + (f"\n↳ {entry['plan'][:150]}" if entry['plan'] else "")
+                    for entry in reversed(slow)
+                )
+            else:
+                value = f"None over {stats.slow_seconds * 1000:.0f}ms 🎉"
+            embed.add_field(name="Recent Slow Statements", value=value[:1024], inline=False)
+            
+            # Table sizes
+            sizes = await self._table_sizes()
+            value = "\n".join(
+                f"`{name}`: {rows:,} rows" + (f", {size / 1024:,.0f} KiB" if size is not None else "")
+                for name, rows, size in sizes
+            )
+            embed.add_field(name="Tables", value=value[:1024] or "No tables", inline=False)
+            
+            await interaction.followup.send(embed=embed, ephemeral=True)
+        except Exception as e:
+            logger.error(f"Error getting database stats: {e}")
+            await interaction.followup.send(
+                f"❌ Error getting database stats: {str(e)}",
+                ephemeral=True
+            )
+    
+    @app_commands.command(name="usage", description="Show paid API usage against the daily and monthly caps")
+    async def usage(self, interaction: discord.Interaction):
+        if not await self._owner_only(interaction):
+            return
+        await interaction.response.defer(ephemeral=True)
+        
+        try:
+            quota = self.bot.quota
+            embed = discord.Embed(
+                title="💳 API Usage",
+                description=f"Optional features are dropped once a cap is {quota.conserve_at:.0%} used.",
+                color=discord.Color.blue()
+            )
+            
+            level_labels = {
+                NORMAL: "🟢 Normal",
+                CONSERVE: "🟠 Conserving (optional sections dropped, older cached answers used)",
+                EXHAUSTED: "🔴 Cap reached (calls refused)",
+            }
+            names = {GOOGLE_MAPS: "Google Maps", DEEPSEEK: "DeepSeek"}
+            for upstream, level, day_usage, month_usage, caps in quota.report():
+                lines = [level_labels[level]]
+                for period, label, (calls, tokens) in (('day', "Today", day_usage), ('month', "This month", month_usage)):
+                    line = f"{label}: {calls:,} calls"
+                    if upstream == DEEPSEEK:
+                        line += f", {tokens:,} tokens"
+                    for unit, used in (('calls', calls), ('tokens', tokens)):
+                        limit = caps.get((unit, period))
+                        if limit:
+                            line += f" • {used / limit:.0%} of {limit:,} {unit}"
+                    lines.append(line)
+                if not caps:
+                    lines.append("No caps configured")
+                embed.add_field(name=names[upstream], value="\n".join(lines), inline=False)
+            
+            await interaction.followup.send(embed=embed, ephemeral=True)
+        except Exception as e:
+            logger.error(f"Error getting API usage: {e}")
+            await interaction.followup.send(
+                f"❌ Error getting API usage: {str(e)}",
+                ephemeral=True
+            )
+    
+    @app_commands.command(name="channels", description="Show or set this server's reminder and debt tracker channels")
+    @app_commands.describe(
+        reminder="Channel for habit reminders and the streak board",
+        debt_tracker="Channel for the debt tracker dashboard"
+    )
+    async def channels(
+        self,
+        interaction: discord.Interaction,
+        reminder: discord.TextChannel = None,
+        debt_tracker: discord.TextChannel = None
+    ):
+        await interaction.response.defer(ephemeral=True)
+        
+        try:
+            guild_id = interaction.guild_id
+            updates = {}
+            if reminder:
+                # The streak board moves with the channel
+                updates.update(reminder_channel_id=reminder.id, streak_message_id=None)
+            if debt_tracker:
+                updates['debt_tracker_channel_id'] = debt_tracker.id
+            
+            if updates:
+                await self.bot.guild_settings.update(guild_id, **updates)
+                
+                if reminder:
+                    await self.bot.update_streak_board(guild_id)
+                if debt_tracker:
+                    await self.bot.update_debt_dashboard(guild_id)
+            
+            settings = self.bot.guild_settings.get(guild_id)
+            embed = discord.Embed(
+                title="📺 Server Channels" if not updates else "✅ Server Channels Updated",
+                color=discord.Color.blue()
+            )
+            for label, channel_id in (
+                ("Reminders & Streak Board", settings.reminder_channel_id if settings else None),
+                ("Debt Tracker Dashboard", settings.debt_tracker_channel_id if settings else None),
+            ):
+                embed.add_field(name=label, value=f"<#{channel_id}>" if channel_id else "Not set", inline=False)
+            
+            await interaction.followup.send(embed=embed, ephemeral=True)
+        except Exception as e:
+            logger.error(f"Error updating server channels: {e}")
+            await interaction.followup.send(
+                f"❌ Error updating server channels: {str(e)}",
+                ephemeral=True
+            )
+    
+    async def _table_sizes(self):
+        """(name, rows, bytes or None) for each table, largest first."""
+        async with self.bot.db_pool.acquire() as db:
+            cursor = await db.execute('''
+                SELECT name, sql FROM sqlite_master
+                WHERE type = 'table' AND name NOT LIKE 'sqlite_%'
+            ''')
+            tables = await cursor.fetchall()
+            
+            # Skip full-text search indexes and their shadow tables
+            virtual = [name for name, sql in tables if sql and sql.upper().startswith('CREATE VIRTUAL')]
+            names = [
+                name for name, sql in tables
+                if name not in virtual and not any(name.startswith(f"{v}_") for v in virtual)
+            ]
+            
+            # Page usage per table, if SQLite was built with the dbstat table
+            sizes = {}
+            try:
+                cursor = await db.execute('SELECT name, SUM(pgsize) FROM dbstat GROUP BY name')
+                sizes = dict(await cursor.fetchall())
+            except aiosqlite.OperationalError:
+                pass
+            
+            results = []
+            for name in names:
+                cursor = await db.execute(f'SELECT COUNT(*) FROM "{name}"')
+                rows = (await cursor.fetchone())[0]
+                results.append((name, rows, sizes.get(name) if sizes else None))
+        
+        return sorted(results, key=lambda row: row[1], reverse=True)
+
+async def setup(bot):
+    bot.tree.add_command(AdminCommands(bot))
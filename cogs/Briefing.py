@@ -59,14 +59,15 @@ class BriefingCommands(app_commands.Group):
                     '''INSERT INTO morning_briefing_prefs 
                        (user_id, opted_in, greeting_time, location, created_at)
                        VALUES (?, 1, ?, ?, ?)''',
-                    (interaction.user.id, greeting_time, location, datetime.now().isoformat())
+                    (interaction.user.id, greeting_time, location, self.bot.clock.now().isoformat())
                 )
                 
             await db.commit()
+            await self.bot.reschedule_users([interaction.user.id])
             
             response = [
                 "✨ You've been subscribed to morning briefings!",
-                f"📅 Your briefing will arrive at {greeting_time} each day."
+                f"📅 Your briefing will arrive at {greeting_time} ({self.bot.user_timezone(interaction.user.id)}) each day."
             ]
             
             if location:
@@ -86,6 +87,7 @@ class BriefingCommands(app_commands.Group):
                 (interaction.user.id,)
             )
             await db.commit()
+            await self.bot.reschedule_users([interaction.user.id])
             
             await interaction.response.send_message(
                 "You've been unsubscribed from morning briefings. You can opt in again anytime with `/briefing opt-in`.",
@@ -115,7 +117,7 @@ class BriefingCommands(app_commands.Group):
                     '''INSERT INTO morning_briefing_prefs 
                        (user_id, opted_in, location, greeting_time, created_at)
                        VALUES (?, 0, ?, '07:00', ?)''',
-                    (interaction.user.id, location, datetime.now().isoformat())
+                    (interaction.user.id, location, self.bot.clock.now().isoformat())
                 )
                 
             await db.commit()
@@ -159,13 +161,14 @@ class BriefingCommands(app_commands.Group):
                     '''INSERT INTO morning_briefing_prefs 
                        (user_id, opted_in, greeting_time, created_at)
                        VALUES (?, 0, ?, ?)''',
-                    (interaction.user.id, greeting_time, datetime.now().isoformat())
+                    (interaction.user.id, greeting_time, self.bot.clock.now().isoformat())
                 )
                 
             await db.commit()
+            await self.bot.reschedule_users([interaction.user.id])
             
             await interaction.response.send_message(
-                f"⏰ Your briefing time has been updated to: {greeting_time}",
+                f"⏰ Your briefing time has been updated to: {greeting_time} ({self.bot.user_timezone(interaction.user.id)})",
                 ephemeral=True
             )
             
@@ -217,7 +220,7 @@ class BriefingCommands(app_commands.Group):
                 # Add fields for each setting
                 embed.add_field(
                     name="Greeting Time",
-                    value=greeting_time,
+                    value=f"{greeting_time} ({self.bot.user_timezone(interaction.user.id)})",
                     inline=True
                 )
                 
@@ -301,12 +304,12 @@ class BriefingCommands(app_commands.Group):
                     '''INSERT INTO event_countdowns 
                        (user_id, event_name, event_date, include_in_briefing, created_at)
                        VALUES (?, ?, ?, ?, ?)''',
-                    (interaction.user.id, event_name, event_datetime, include_in_briefing, datetime.now().isoformat())
+                    (interaction.user.id, event_name, event_datetime, include_in_briefing, self.bot.clock.now().isoformat())
                 )
                 await db.commit()
                 
                 # Calculate days until event
-                now = datetime.now().date()
+                now = self.bot.clock.now(self.bot.user_timezone(interaction.user.id)).date()
                 days_until = (parsed_date.date() - now).days
                 
                 if days_until < 0:
@@ -364,7 +367,7 @@ class BriefingCommands(app_commands.Group):
                 color=discord.Color.blue()
             )
             
-            now = datetime.now().date()
+            now = self.bot.clock.now(self.bot.user_timezone(interaction.user.id)).date()
             
             for event_name, event_date, include_in_briefing in events:
                 event_dt = datetime.fromisoformat(event_date).date()
@@ -440,7 +443,11 @@ class BriefingCommands(app_commands.Group):
         
         # Send a test briefing
         try:
-            await self.bot._send_user_briefing(interaction.user, location)
+            # The user is asking for a DM, so retry even if their DMs were closed before
+            await self.bot.dm_queue.clear_closed(interaction.user.id)
+            delivery = await self.bot._send_user_briefing(interaction.user, location)
+            if delivery is None or await delivery is None:
+                raise RuntimeError("the briefing could not be delivered")
             await interaction.followup.send(
                 "✅ Test briefing sent! Check your DMs.",
                 ephemeral=True
@@ -497,7 +504,7 @@ class BriefingCommands(app_commands.Group):
                     )
                 else:
                     # Create new record with defaults
-                    now = datetime.now().isoformat()
+                    now = self.bot.clock.now().isoformat()
                     await db.execute(
                         """INSERT INTO morning_briefing_prefs 
                            (user_id, opted_in, greeting_time, created_at, bus_origin) 
@@ -570,7 +577,7 @@ class BriefingCommands(app_commands.Group):
                     )
                 else:
                     # Create new record with defaults
-                    now = datetime.now().isoformat()
+                    now = self.bot.clock.now().isoformat()
                     await db.execute(
                         """INSERT INTO morning_briefing_prefs 
                            (user_id, opted_in, greeting_time, created_at, bus_destination) 
@@ -25,7 +25,7 @@ class DebtCommands(app_commands.Group):
         interest_rate="Annual interest rate as a percentage (optional)",
         due_date="Next payment due date (YYYY-MM-DD format, optional)",
         description="Optional notes about this debt",
-        is_public="Whether to show this debt on the public dashboard"
+        is_public="Whether to show this debt on this server's public dashboard"
     )
     async def add_debt(
         self,
@@ -65,15 +65,15 @@ class DebtCommands(app_commands.Group):
         
         try:
             # Insert into database
-            now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            now = self.bot.clock.now().strftime("%Y-%m-%d %H:%M:%S")
             async with aiosqlite.connect(self.bot.db_path) as db:
                 try:
                     await db.execute(
                         '''
                         INSERT INTO debt_accounts (
                             user_id, name, current_balance, initial_balance, 
-                            interest_rate, due_date, description, created_at, updated_at, is_public
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                            interest_rate, due_date, description, created_at, updated_at, is_public, guild_id
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                         ''',
                         (
                             interaction.user.id,
@@ -85,7 +85,8 @@ class DebtCommands(app_commands.Group):
                             description,
                             now,
                             now,
-                            is_public
+                            is_public,
+                            interaction.guild_id
                         )
                     )
                     await db.commit()
@@ -96,13 +97,15 @@ class DebtCommands(app_commands.Group):
                     )
                     return
             
+            self.bot.debt_account_names.add(interaction.user.id, name)
+            
             await interaction.response.send_message(
                 f"Debt account '{name}' added successfully with a balance of ${balance:,.2f}!",
                 ephemeral=True
             )
             
             # Update the debt dashboard
-            await self.bot.update_debt_dashboard()
+            await self.bot.update_debt_dashboard(interaction.guild_id)
             
         except Exception as e:
             logging.error(f"Error adding debt account: {e}")
@@ -117,48 +120,10 @@ class DebtCommands(app_commands.Group):
         current: str,
     ) -> list[app_commands.Choice[str]]:
         """Autocomplete for user's debt account names."""
-        try:
-            # Print debug info
-            print(f"Autocomplete called for user {interaction.user.id} with current: '{current}'")
-            
-            # Get all debt accounts for this user
-            async with aiosqlite.connect(self.bot.db_path) as db:
-                # First check if the user has any accounts
-                cursor = await db.execute(
-                    'SELECT COUNT(*) FROM debt_accounts WHERE user_id = ?',
-                    (interaction.user.id,)
-                )
-                count = await cursor.fetchone()
-                print(f"User has {count[0]} debt accounts")
-                
-                if count and count[0] == 0:
-                    # User has no accounts, return empty list
-                    return []
-                
-                # Get the accounts
-                cursor = await db.execute(
-                    'SELECT name FROM debt_accounts WHERE user_id = ? AND name LIKE ?',
-                    (interaction.user.id, f"%{current}%")
-                )
-                accounts = await cursor.fetchall()
-                print(f"Found {len(accounts)} matching accounts for user")
-            
-            # Create choices
-            choices = []
-            for account in accounts:
-                name = account[0]
-                choices.append(app_commands.Choice(name=name, value=name))
-                if len(choices) >= 25:  # Discord limit
-                    break
-            
-            print(f"Returning {len(choices)} choices for autocomplete")
-            return choices
-            
-        except Exception as e:
-            print(f"Error in debt account autocomplete: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            return []
+        return [
+            app_commands.Choice(name=name, value=name)
+            for name in self.bot.debt_account_names.search(interaction.user.id, current)
+        ]
     
     @app_commands.command(name="list", description="List all your debt accounts and balances")
     @app_commands.describe(
@@ -286,7 +251,7 @@ class DebtCommands(app_commands.Group):
             return
         
         # Validate date format if provided
-        payment_date = datetime.now().strftime("%Y-%m-%d")
+        payment_date = self.bot.clock.now().strftime("%Y-%m-%d")
         if date:
             try:
                 payment_date = datetime.strptime(date, "%Y-%m-%d").strftime("%Y-%m-%d")
@@ -330,7 +295,7 @@ class DebtCommands(app_commands.Group):
                     )
                     
                     # Update the account balance
-                    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    now = self.bot.clock.now().strftime("%Y-%m-%d %H:%M:%S")
                     await db.execute(
                         'UPDATE debt_accounts SET current_balance = ?, updated_at = ? WHERE id = ?',
                         (new_balance, now, account_id)
@@ -344,7 +309,7 @@ class DebtCommands(app_commands.Group):
                     )
                     
                     # Update the debt dashboard
-                    await self.bot.update_debt_dashboard()
+                    await self.bot.update_debt_dashboard(interaction.guild_id)
                     
                 except Exception as e:
                     await db.rollback()
@@ -365,7 +330,7 @@ class DebtCommands(app_commands.Group):
         interest_rate="New interest rate (optional)",
         due_date="New due date (YYYY-MM-DD format, optional)",
         description="New description (optional)",
-        is_public="Whether to show this debt on the public dashboard (optional)"
+        is_public="Whether to show this debt on this server's public dashboard (optional)"
     )
     @app_commands.autocomplete(account_name=account_name_autocomplete)
     async def edit_debt(
@@ -452,7 +417,7 @@ class DebtCommands(app_commands.Group):
                             sign = "+" if balance_diff > 0 else ""
                             note = f"Balance manually adjusted by {sign}${abs(balance_diff):,.2f}"
                             
-                            now = datetime.now().strftime("%Y-%m-%d")
+                            now = self.bot.clock.now().strftime("%Y-%m-%d")
                             await db.execute(
                                 'INSERT INTO debt_payments (account_id, amount, payment_date, description) VALUES (?, ?, ?, ?)',
                                 (account_id, -balance_diff, now, note)  # Negative amount because this is an adjustment
@@ -476,7 +441,7 @@ class DebtCommands(app_commands.Group):
                     
                     # Add updated_at field
                     update_fields.append("updated_at = ?")
-                    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    now = self.bot.clock.now().strftime("%Y-%m-%d %H:%M:%S")
                     update_values.append(now)
                     
                     # Build and execute the update query
@@ -487,6 +452,9 @@ class DebtCommands(app_commands.Group):
                         
                     await db.commit()
                     
+                    if new_name is not None:
+                        self.bot.debt_account_names.rename(interaction.user.id, account_name, new_name)
+                    
                     # Prepare success message
                     updated_fields = []
                     if new_name is not None:
@@ -507,7 +475,7 @@ class DebtCommands(app_commands.Group):
                     await interaction.response.send_message(message, ephemeral=True)
                     
                     # Update the debt dashboard
-                    await self.bot.update_debt_dashboard()
+                    await self.bot.update_debt_dashboard(interaction.guild_id)
                     
                 except aiosqlite.IntegrityError:
                     await db.rollback()
@@ -573,13 +541,15 @@ class DebtCommands(app_commands.Group):
                     
                     await db.commit()
                     
+                    self.bot.debt_account_names.remove(interaction.user.id, account_name)
+                    
                     await interaction.response.send_message(
                         f"Debt account '{account_name}' and all its payment history have been deleted.",
                         ephemeral=True
                     )
                     
                     # Update the debt dashboard
-                    await self.bot.update_debt_dashboard()
+                    await self.bot.update_debt_dashboard(interaction.guild_id)
                     
                 except Exception as e:
                     await db.rollback()
@@ -716,7 +686,7 @@ class DebtCommands(app_commands.Group):
                 
                 # Calculate the new balance
                 new_balance = current_balance + amount
-                now = datetime.now().isoformat()
+                now = self.bot.clock.now().isoformat()
                 
                 # Record the charge as a negative payment
                 await db.execute(
@@ -739,7 +709,7 @@ class DebtCommands(app_commands.Group):
                 )
                 
                 # Update the debt dashboard
-                await self.bot.update_debt_dashboard()
+                await self.bot.update_debt_dashboard(interaction.guild_id)
                 
         except Exception as e:
             logging.error(f"Error adding charge to debt account: {e}")
@@ -1,43 +1,205 @@
-import os
 import discord
 from discord import app_commands
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import random
 import aiosqlite
 import openai
-from dotenv import load_dotenv
-from openai import AsyncOpenAI
-import aiohttp
 import json
 import logging
+import re
+import time
+import zoneinfo
+from assets.utils.rate_limit import rate_limit
+from assets.utils.llm_gateway import LLMUnavailableError
+from assets.utils.habit_calendar import HabitCalendar
+from assets.views.views import SearchResultsView
 
-# Load environment variables
-load_dotenv()
-DEEPSEEK_API_KEY = os.getenv('DEEPSEEK_API_KEY')
-
-# Configure OpenAI client for DeepSeek
-client = AsyncOpenAI(
-    api_key=DEEPSEEK_API_KEY,
-    base_url="https://api.deepseek.com/v1"  # DeepSeek's OpenAI-compatible endpoint
-)
-
-async def check_deepseek_status():
-    """Check if DeepSeek API is experiencing a major outage."""
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get('https://status.deepseek.com/api/v2/components.json') as response:
-                if response.status == 200:
-                    data = await response.json()
-                    api_component = next(
-                        (comp for comp in data['components'] 
-                         if comp['name'] == 'API 服务 (API Service)'),
-                        None
-                    )
-                    if api_component and api_component['status'] == 'major_outage':
-                        return False, "DeepSeek API is currently experiencing a major outage. Please try again later."
-                return True, None
-    except Exception as e:
-        return False, f"Unable to check DeepSeek API status: {str(e)}"
+# Just get the logger without adding handlers
+logger = logging.getLogger('gentle_habits')
+
+# Display names for celebration categories
+CELEBRATION_CATEGORY_NAMES = {
+    "task": "Task Completion 📝",
+    "self_care": "Self Care 🌸",
+    "social": "Social Success 🤝",
+    "creative": "Creative Win 🎨",
+    "routine": "Routine Victory ⭐"
+}
+
+# Results shown per page of /habit search
+SEARCH_PAGE_SIZE = 5
+
+# IANA timezone names offered by /habit timezone
+TIMEZONE_NAMES = sorted(zoneinfo.available_timezones())
+
+# Weeks of check-ins drawn by /habit stats, and the windows its completion rates cover
+CALENDAR_WEEKS = 5
+COMPLETION_WINDOWS = (7, 30, 90)
+
+# Places shown by /habit leaderboard
+LEADERBOARD_SIZE = 10
+
+def build_calendar_grid(calendar: HabitCalendar, today, weeks: int = CALENDAR_WEEKS) -> str:
+    """Check-in days as rows of emoji, one week (Monday to Sunday) per row, ending with this week."""
+    start = today - timedelta(days=today.weekday() + 7 * (weeks - 1))
+    rows = []
+    for week in range(weeks):
+        row = ""
+        for weekday in range(7):
+            day = start + timedelta(days=7 * week + weekday)
+            row += "▫️" if day > today else ("🟩" if calendar.checked_in(day) else "⬛")
+        rows.append(row)
+    return "\n".join(rows)
+
+def build_fts_query(text: str) -> str:
+    """Turn free text into an FTS5 query that matches every word as a prefix."""
+    words = re.findall(r"\w+", text)
+    return " ".join(f'"{word}"*' for word in words)
+
+# Seconds between edits of a streaming reply, to stay well inside Discord's edit rate limits
+STREAM_EDIT_INTERVAL = 1.5
+
+# Discord embed limits
+MAX_EMBED_FIELDS = 25
+MAX_FIELD_NAME = 256
+MAX_FIELD_VALUE = 1024
+MAX_EMBED_TOTAL = 6000
+
+def add_capped_field(embed: discord.Embed, name: str, value: str) -> bool:
+    """Add a field if the embed still has room. Returns False once it is full."""
+    name = name[:MAX_FIELD_NAME]
+    value = value[:MAX_FIELD_VALUE]
+    if len(embed.fields) >= MAX_EMBED_FIELDS or len(embed) + len(name) + len(value) > MAX_EMBED_TOTAL:
+        return False
+    embed.add_field(name=name, value=value, inline=False)
+    return True
+
+def habit_scope(interaction: discord.Interaction) -> tuple:
+    """SQL condition and parameters for the habits (aliased h) a command should see.
+    
+    In a server that's the server's habits; in DMs, the habits the user has joined anywhere.
+    """
+    if interaction.guild_id is not None:
+        return "h.guild_id = ?", (interaction.guild_id,)
+    return "h.id IN (SELECT habit_id FROM habit_participants WHERE user_id = ?)", (interaction.user.id,)
+
+def visible_text(text: str, final: bool) -> str:
+    """While streaming, only show complete lines so half-written steps don't flicker."""
+    if final:
+        return text
+    return text[:text.rfind('\n') + 1]
+
+def build_breakdown_embed(task: str, context: str, text: str, final: bool) -> discord.Embed:
+    embed = discord.Embed(
+        title=f"✨ Task Breakdown: {task}",
+        description="Here's your gentle task breakdown:",
+        color=discord.Color.blue()
+    )
+
+    # Add the steps to the embed
+    steps = visible_text(text, final).strip().split('\n')
+    for step in steps:
+        if step.strip():  # Skip empty lines
+            if not add_capped_field(embed, "Step", step):
+                break
+
+    if not final:
+        embed.description = "💭 Thinking it through..." if not embed.fields else "Here's your gentle task breakdown (still writing...):"
+
+    # Add footer with context if provided
+    if context:
+        embed.set_footer(text=f"Context: {context}")
+    return embed
+
+def build_organise_embed(energy_level: str, time_available: str, text: str, final: bool) -> discord.Embed:
+    embed = discord.Embed(
+        title="✨ ADHD-Friendly Task Organization",
+        description=f"Energy Level: {energy_level}\n{f'Time Available: {time_available}' if time_available else ''}",
+        color=discord.Color.purple()
+    )
+
+    # Split the response into sections and add them to the embed
+    visible = visible_text(text, final)
+    if not final:
+        # The last section may still be growing
+        visible = visible[:visible.rfind('\n\n') + 1]
+    sections = visible.split('\n\n')
+    for section in sections:
+        if section.strip():
+            # Extract title and content
+            parts = section.split('\n', 1)
+            if len(parts) > 1:
+                title = parts[0].strip('# -')
+                content = parts[1].strip()
+                if not add_capped_field(embed, title, content):
+                    break
+
+    if final:
+        # Add footer with gentle reminder
+        embed.set_footer(text="Remember: You don't have to do everything at once. Start small and celebrate your progress! 💝")
+    else:
+        embed.set_footer(text="💭 Still organising...")
+    return embed
+
+def build_motivation_embed(task: str, context: str, text: str, final: bool) -> discord.Embed:
+    embed = discord.Embed(
+        title=f"✨ Finding Joy in: {task}",
+        description="Here's some gentle encouragement:" if final else "💭 Finding some gentle encouragement...",
+        color=discord.Color.purple()
+    )
+
+    # Add the motivation points to the embed
+    sections = visible_text(text, final).strip().split('\n')
+    current_field = ""
+    current_content = []
+    
+    for line in sections:
+        if line.strip():
+            if any(marker in line for marker in ['🎯', '💫', '🌟', '✨']):
+                # If we have a previous field ready, add it
+                if current_field and current_content:
+                    add_capped_field(embed, current_field, '\n'.join(current_content))
+                    current_content = []
+                current_field = line
+            else:
+                current_content.append(line)
+    
+    # Add the last field
+    if current_field and current_content:
+        add_capped_field(embed, current_field, '\n'.join(current_content))
+
+    # Add footer with context if provided
+    if context:
+        embed.set_footer(text=f"Context: {context}")
+    return embed
+
+class StreamingReply:
+    """An ephemeral follow-up that is sent as soon as there is something to show
+    and then edited in place, at most once every STREAM_EDIT_INTERVAL seconds."""
+
+    def __init__(self, interaction: discord.Interaction, build_embed):
+        self.interaction = interaction
+        self.build_embed = build_embed  # (text, final) -> discord.Embed
+        self.message = None
+        self.last_edit = 0.0
+        self.last_rendered = None
+
+    async def update(self, text: str, final: bool = False):
+        now = time.monotonic()
+        if not final and self.message is not None and now - self.last_edit < STREAM_EDIT_INTERVAL:
+            return
+        
+        embed = self.build_embed(text, final)
+        rendered = embed.to_dict()
+        if rendered == self.last_rendered:
+            return  # Nothing new to show, save the edit
+        
+        if self.message is None:
+            self.message = await self.interaction.followup.send(embed=embed, ephemeral=True, wait=True)
+        else:
+            await self.message.edit(embed=embed)
+        self.last_edit = now
+        self.last_rendered = rendered
 
 class HabitCommands(app_commands.Group):
     def __init__(self, bot):
@@ -61,6 +223,13 @@ class HabitCommands(app_commands.Group):
         description: str = None,
         participants: str = None
     ):
+        if interaction.guild_id is None:
+            await interaction.response.send_message(
+                "Habits belong to a server, so please create this one from a server channel!",
+                ephemeral=True
+            )
+            return
+        
         # Validate time formats
         try:
             datetime.strptime(reminder_time, "%H:%M")
@@ -72,20 +241,26 @@ class HabitCommands(app_commands.Group):
             )
             return
         
+        # Habits keep their creator's timezone (None follows the configured one)
+        habit_timezone = self.bot.user_timezones.get(interaction.user.id)
+        
         async with aiosqlite.connect(self.bot.db_path) as db:
             try:
                 # Insert the habit
-                await db.execute(
+                cursor = await db.execute(
                     '''INSERT INTO habits 
-                       (name, reminder_time, expiry_time, description, created_at)
-                       VALUES (?, ?, ?, ?, ?)''',
-                    (name, reminder_time, expiry_time, description, datetime.now().isoformat())
+                       (name, reminder_time, expiry_time, description, created_at, guild_id, timezone)
+                       VALUES (?, ?, ?, ?, ?, ?, ?)''',
+                    (
+                        name, reminder_time, expiry_time, description, self.bot.clock.now().isoformat(),
+                        interaction.guild_id, habit_timezone
+                    )
                 )
                 await db.commit()
                 
                 # Get the habit ID
-                cursor = await db.execute('SELECT id FROM habits WHERE name = ?', (name,))
-                habit_id = (await cursor.fetchone())[0]
+                habit_id = cursor.lastrowid
+                self.bot.habit_names.add(interaction.guild_id, name)
                 
                 # Add participants if specified
                 if participants:
@@ -100,13 +275,13 @@ class HabitCommands(app_commands.Group):
                         )
                     await db.commit()
                 
-                # Restart scheduler to include new habit
-                await self.bot.setup_scheduler()
+                # Schedule the new habit's reminder and expiry
+                await self.bot.reschedule_habits([habit_id])
                 
                 # Create response message
                 response = [
                     f"✨ Created new habit: {name}",
-                    f"Daily reminder at: {reminder_time}",
+                    f"Daily reminder at: {reminder_time} ({self.bot.user_timezone(interaction.user.id)})",
                     f"Expires at: {expiry_time}"
                 ]
                 
@@ -120,22 +295,24 @@ class HabitCommands(app_commands.Group):
                 )
             except aiosqlite.IntegrityError:
                 await interaction.response.send_message(
-                    f"A habit with the name '{name}' already exists!",
+                    f"A habit with the name '{name}' already exists in this server!",
                     ephemeral=True
                 )
 
     @app_commands.command(name="list", description="List all your habits and streaks")
     async def list_habits(self, interaction: discord.Interaction):
+        habit_filter, params = habit_scope(interaction)
         async with aiosqlite.connect(self.bot.db_path) as db:
-            cursor = await db.execute('''
+            cursor = await db.execute(f'''
                 SELECT h.name, h.reminder_time, h.description, 
                        COALESCE(uh.current_streak, 0) as streak
                 FROM habits h
                 LEFT JOIN user_habits uh 
                     ON h.id = uh.habit_id 
                     AND uh.user_id = ?
+                WHERE {habit_filter}
                 ORDER BY h.created_at
-            ''', (interaction.user.id,))
+            ''', (interaction.user.id, *params))
             
             habits = await cursor.fetchall()
             
@@ -170,24 +347,150 @@ class HabitCommands(app_commands.Group):
         current: str,
     ) -> list[app_commands.Choice[str]]:
         """Autocomplete handler for habit names"""
+        return [
+            app_commands.Choice(name=name, value=name)
+            for name in self.bot.habit_names.search(interaction.guild_id, current)
+        ]
+
+    @app_commands.command(name="stats", description="See your longest streaks, completion rates and check-in calendar")
+    @app_commands.describe(name="Habit to show in detail (leave empty for all of them)")
+    @app_commands.autocomplete(name=habit_name_autocomplete)
+    async def habit_stats(self, interaction: discord.Interaction, name: str = None):
+        habit_filter, params = habit_scope(interaction)
+        if name:
+            habit_filter += " AND h.name = ?"
+            params += (name,)
         async with aiosqlite.connect(self.bot.db_path) as db:
-            # Get all habits that match the current input
-            cursor = await db.execute(
-                'SELECT name FROM habits WHERE name LIKE ? LIMIT 25',
-                (f"%{current}%",)
+            cursor = await db.execute(f'''
+                SELECT h.id, h.name, h.timezone, hc.year, hc.days
+                FROM habits h
+                LEFT JOIN habit_calendars hc
+                    ON h.id = hc.habit_id
+                    AND hc.user_id = ?
+                WHERE {habit_filter}
+                ORDER BY h.created_at
+            ''', (interaction.user.id, *params))
+            rows = await cursor.fetchall()
+        
+        if not rows:
+            await interaction.response.send_message(
+                f"Could not find a habit named '{name}'" if name else "No habits have been created yet! Use `/habit create` to get started.",
+                ephemeral=True
             )
-            habits = await cursor.fetchall()
-            return [
-                app_commands.Choice(name=habit[0], value=habit[0])
-                for habit in habits
+            return
+        
+        # Each habit's yearly calendars, in habit order
+        habits = {}
+        for habit_id, habit_name, tz_name, year, days in rows:
+            habit = habits.setdefault(habit_id, (habit_name, tz_name, {}))
+            if year is not None:
+                habit[2][year] = days
+        
+        if name:
+            habit_name, tz_name, years = next(iter(habits.values()))
+            calendar = HabitCalendar(years)
+            today = self.bot.clock.now(tz_name).date()
+            embed = discord.Embed(title=f"📈 {habit_name}", color=discord.Color.blue())
+            if not calendar.total:
+                embed.description = "No check-ins yet. Your first one starts the calendar! 🌱"
+            else:
+                for label, streak in (
+                    ("🔥 Current streak", calendar.current_streak(today)),
+                    ("🏆 Longest streak", calendar.longest_streak()),
+                ):
+                    embed.add_field(name=label, value=f"{streak} day{'s' if streak != 1 else ''}", inline=True)
+                embed.add_field(name="✅ Check-ins", value=str(calendar.total), inline=True)
+                embed.add_field(
+                    name="📅 Completion",
+                    value=" · ".join(
+                        f"{days} days: {calendar.completion_rate(today, days):.0%}" for days in COMPLETION_WINDOWS
+                    ),
+                    inline=False
+                )
+                embed.add_field(
+                    name=f"🗓️ Last {CALENDAR_WEEKS} weeks (Mon–Sun)",
+                    value=build_calendar_grid(calendar, today),
+                    inline=False
+                )
+                embed.set_footer(text=f"Checking in since {calendar.first_day.isoformat()}")
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+        
+        embed = discord.Embed(
+            title="📈 Your Habit Stats",
+            description=f"Streaks and completion over the last {COMPLETION_WINDOWS[1]} days. Pick a habit for its calendar.",
+            color=discord.Color.blue()
+        )
+        for habit_name, tz_name, years in habits.values():
+            calendar = HabitCalendar(years)
+            if not calendar.total:
+                continue
+            today = self.bot.clock.now(tz_name).date()
+            value = (
+                f"🔥 {calendar.current_streak(today)} · 🏆 {calendar.longest_streak()} · "
+                f"📅 {calendar.completion_rate(today, COMPLETION_WINDOWS[1]):.0%}"
+            )
+            if not add_capped_field(embed, habit_name, value):
+                break
+        if not embed.fields:
+            embed.description = "No check-ins yet. Check in from a habit reminder to start your calendar! 🌱"
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @app_commands.command(name="leaderboard", description="See the longest current streaks in this server, or for one habit")
+    @app_commands.describe(name="Habit to rank (leave empty for the whole server)")
+    @app_commands.autocomplete(name=habit_name_autocomplete)
+    async def leaderboard(self, interaction: discord.Interaction, name: str = None):
+        if interaction.guild_id is None:
+            await interaction.response.send_message(
+                "Leaderboards belong to a server, so please ask from a server channel!",
+                ephemeral=True
+            )
+            return
+        
+        await self.bot.sync_leaderboard()
+        if name:
+            async with aiosqlite.connect(self.bot.db_path) as db:
+                cursor = await db.execute(
+                    'SELECT id FROM habits WHERE guild_id = ? AND name = ?', (interaction.guild_id, name)
+                )
+                habit = await cursor.fetchone()
+            if not habit:
+                await interaction.response.send_message(
+                    f"Could not find a habit named '{name}'",
+                    ephemeral=True
+                )
+                return
+            lines = [
+                f"**{place}.** <@{user_id}> - {streak} day{'s' if streak != 1 else ''}"
+                for place, (user_id, streak) in enumerate(
+                    self.bot.leaderboard.habit_top(habit[0], LEADERBOARD_SIZE), start=1
+                )
             ]
+            title = f"🏆 {name} Leaderboard"
+        else:
+            lines = [
+                f"**{place}.** <@{user_id}> - {habit_name}: {streak} day{'s' if streak != 1 else ''}"
+                for place, (user_id, _, habit_name, streak) in enumerate(
+                    self.bot.leaderboard.top(interaction.guild_id, LEADERBOARD_SIZE), start=1
+                )
+            ]
+            title = "🏆 Streak Leaderboard"
+        
+        embed = discord.Embed(
+            title=title,
+            description="\n".join(lines) or "No one has joined yet! Use `/habit create` to get started. ✨",
+            color=discord.Color.gold()
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
 
     @app_commands.command(name="delete", description="Delete a habit")
     @app_commands.describe(name="Name of the habit to delete")
     @app_commands.autocomplete(name=habit_name_autocomplete)
     async def delete_habit(self, interaction: discord.Interaction, name: str):
         async with aiosqlite.connect(self.bot.db_path) as db:
-            cursor = await db.execute('SELECT id FROM habits WHERE name = ?', (name,))
+            cursor = await db.execute(
+                'SELECT id FROM habits WHERE guild_id = ? AND name = ?', (interaction.guild_id, name)
+            )
             habit = await cursor.fetchone()
             
             if not habit:
@@ -201,12 +504,15 @@ class HabitCommands(app_commands.Group):
             
             # Delete the habit and all associated user data
             await db.execute('DELETE FROM user_habits WHERE habit_id = ?', (habit_id,))
+            await db.execute('DELETE FROM habit_checkins WHERE habit_id = ?', (habit_id,))
+            await db.execute('DELETE FROM habit_calendars WHERE habit_id = ?', (habit_id,))
             await db.execute('DELETE FROM habit_participants WHERE habit_id = ?', (habit_id,))
             await db.execute('DELETE FROM habits WHERE id = ?', (habit_id,))
             await db.commit()
+            self.bot.habit_names.remove(interaction.guild_id, name)
             
-            # Restart scheduler to remove deleted habit
-            await self.bot.setup_scheduler()
+            # Unschedule the deleted habit
+            await self.bot.reschedule_habits([habit_id])
             
             await interaction.response.send_message(
                 f"Deleted habit: {name}",
@@ -256,7 +562,9 @@ class HabitCommands(app_commands.Group):
 
         async with aiosqlite.connect(self.bot.db_path) as db:
             # Check if habit exists
-            cursor = await db.execute('SELECT id FROM habits WHERE name = ?', (name,))
+            cursor = await db.execute(
+                'SELECT id FROM habits WHERE guild_id = ? AND name = ?', (interaction.guild_id, name)
+            )
             habit = await cursor.fetchone()
             
             if not habit:
@@ -292,7 +600,7 @@ class HabitCommands(app_commands.Group):
                     await db.execute(query, params)
                 except aiosqlite.IntegrityError:
                     await interaction.response.send_message(
-                        f"A habit with the name '{new_name}' already exists!",
+                        f"A habit with the name '{new_name}' already exists in this server!",
                         ephemeral=True
                     )
                     return
@@ -312,8 +620,11 @@ class HabitCommands(app_commands.Group):
             
             await db.commit()
             
-            # Restart scheduler to apply changes
-            await self.bot.setup_scheduler()
+            if new_name:
+                self.bot.habit_names.rename(interaction.guild_id, name, new_name)
+            
+            # Move the habit's reminder and expiry to their new times
+            await self.bot.reschedule_habits([habit_id])
             
             # Create response message
             response = [f"✨ Updated habit: {new_name or name}"]
@@ -334,14 +645,16 @@ class HabitCommands(app_commands.Group):
 
     @app_commands.command(name="gentle-nudge", description="Get a gentle reminder of your tasks")
     async def gentle_nudge(self, interaction: discord.Interaction):
+        habit_filter, params = habit_scope(interaction)
         async with aiosqlite.connect(self.bot.db_path) as db:
-            cursor = await db.execute('''
+            cursor = await db.execute(f'''
                 SELECT h.name, uh.current_streak, uh.last_check_in
                 FROM habits h
                 LEFT JOIN user_habits uh 
                     ON h.id = uh.habit_id 
                     AND uh.user_id = ?
-            ''', (interaction.user.id,))
+                WHERE {habit_filter}
+            ''', (interaction.user.id, *params))
             
             habits = await cursor.fetchall()
             
@@ -356,7 +669,7 @@ class HabitCommands(app_commands.Group):
             
             for name, streak, last_check_in in habits:
                 if not last_check_in or (
-                    datetime.now() - datetime.fromisoformat(last_check_in)
+                    self.bot.clock.utcnow() - self.bot.clock.to_utc(datetime.fromisoformat(last_check_in))
                 ).days >= 1:
                     message.append(f"\n📝 Don't forget to check in for: {name}")
                     if streak and streak > 0:
@@ -382,7 +695,7 @@ class HabitCommands(app_commands.Group):
             )
             return
         
-        refill_date = datetime.now().date() + timedelta(days=days_until_refill)
+        refill_date = self.bot.clock.now(self.bot.user_timezone(interaction.user.id)).date() + timedelta(days=days_until_refill)
         
         async with aiosqlite.connect(self.bot.db_path) as db:
             try:
@@ -394,6 +707,7 @@ class HabitCommands(app_commands.Group):
                     (interaction.user.id, item_name, refill_date.isoformat(), days_until_refill)
                 )
                 await db.commit()
+                await self.bot.reschedule_users([interaction.user.id])
                 
                 await interaction.response.send_message(
                     f"I'll remind you to restock {item_name} in {days_until_refill} days! 📦",
@@ -423,7 +737,7 @@ class HabitCommands(app_commands.Group):
                 return
             
             days_between_refills = row[0]
-            next_refill = datetime.now().date() + timedelta(days=days_between_refills)
+            next_refill = self.bot.clock.now(self.bot.user_timezone(interaction.user.id)).date() + timedelta(days=days_between_refills)
             
             await db.execute(
                 'UPDATE restock_items SET refill_date = ? WHERE user_id = ? AND item_name = ?',
@@ -436,34 +750,95 @@ class HabitCommands(app_commands.Group):
                 ephemeral=True
             )
 
+    async def timezone_autocomplete(
+        self,
+        interaction: discord.Interaction,
+        current: str,
+    ) -> list[app_commands.Choice[str]]:
+        """Autocomplete handler for timezone names"""
+        current = current.lower().replace(' ', '_')
+        return [
+            app_commands.Choice(name=zone, value=zone)
+            for zone in TIMEZONE_NAMES if current in zone.lower()
+        ][:25]
+
+    @app_commands.command(name="timezone", description="Set the timezone your habits, briefings and restock reminders follow")
+    @app_commands.describe(zone="Your timezone, e.g. Australia/Hobart (leave empty to see your current one)")
+    @app_commands.autocomplete(zone=timezone_autocomplete)
+    async def set_timezone(self, interaction: discord.Interaction, zone: str = None):
+        if zone is None:
+            current = self.bot.user_timezone(interaction.user.id)
+            await interaction.response.send_message(
+                f"🕰️ Your timezone is {current} (it's {self.bot.clock.now(current).strftime('%H:%M')} there).\n"
+                "Set another with `/habit timezone zone:<name>`.",
+                ephemeral=True
+            )
+            return
+        
+        if zone not in TIMEZONE_NAMES:
+            await interaction.response.send_message(
+                f"I don't know a timezone called '{zone}'. Try a name like Australia/Hobart or Europe/London!",
+                ephemeral=True
+            )
+            return
+        
+        await self.bot.set_user_timezone(interaction.user.id, zone)
+        await interaction.response.send_message(
+            f"🕰️ Your timezone is now {zone} (it's {self.bot.clock.now(zone).strftime('%H:%M')} there).\n"
+            "Your briefings and restock reminders follow it, and so will habits you create from now on.",
+            ephemeral=True
+        )
+
+    async def _ask_llm(self, model: str, messages: list, fresh: bool = False, reply: StreamingReply = None, **params) -> str:
+        """Get a chat completion, reusing a cached answer for the same request unless fresh is set.
+        
+        With a reply, the completion is streamed and the reply is updated as text arrives.
+        The caller is responsible for the final update.
+        """
+        cache_key = self.bot.llm_cache.make_key(model, messages, **params)
+        if not fresh:
+            cached = await self.bot.llm_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        content, model_used = await self.bot.llm.complete(
+            messages,
+            model=model,
+            on_text=reply.update if reply else None,
+            **params
+        )
+        
+        # Only cache answers from the model that was asked for, so a fallback
+        # answer doesn't stand in for the better one next time
+        if model_used == model:
+            await self.bot.llm_cache.put(cache_key, model, content)
+        return content
+
     @app_commands.command(name="break-down", description="Break down a task into smaller, manageable steps")
     @app_commands.describe(
         task="The task you want to break down",
         complexity="Choose how detailed you want the breakdown to be",
-        context="Any additional context about the task (optional)"
+        context="Any additional context about the task (optional)",
+        fresh="Skip saved answers and get a brand new response"
     )
     @app_commands.choices(complexity=[
         app_commands.Choice(name="Simple (3-5 steps)", value="simple"),
         app_commands.Choice(name="Medium (5-8 steps)", value="medium"),
         app_commands.Choice(name="Detailed (8-12 steps)", value="detailed")
     ])
+    @rate_limit(3, 60)
     async def break_down_task(
         self,
         interaction: discord.Interaction,
         task: str,
         complexity: app_commands.Choice[str],
-        context: str = None
+        context: str = None,
+        fresh: bool = False
     ):
         # Defer the response since API call might take time
         await interaction.response.defer(ephemeral=True)
         
         try:
-            # Check DeepSeek API status first
-            api_available, error_message = await check_deepseek_status()
-            if not api_available:
-                await interaction.followup.send(error_message, ephemeral=True)
-                return
-
             # Prepare the prompt based on complexity
             num_steps = {
                 "simple": "3-5",
@@ -485,38 +860,26 @@ Make the steps:
 - Encouraging and gentle in tone
 - Each step should feel achievable in one sitting"""
 
-            # Call DeepSeek API using new OpenAI format
-            response = await client.chat.completions.create(
-                model="deepseek-reasoner",  # Using chat model for more conversational responses
-                messages=[
+            # Call DeepSeek API (or reuse a cached answer), streaming steps in as they arrive
+            reply = StreamingReply(
+                interaction,
+                lambda text, final: build_breakdown_embed(task, context, text, final)
+            )
+            content = await self._ask_llm(
+                "deepseek-reasoner",
+                [
                     {"role": "system", "content": "You are a gentle, ADHD-friendly task breakdown assistant. You help break down tasks into manageable steps, always including emojis and time estimates. Your tone is warm and encouraging, and you make sure each step feels achievable."},
                     {"role": "user", "content": prompt}
                 ],
+                fresh=fresh,
+                reply=reply,
                 temperature=0.7
             )
 
-            # Create embed response
-            embed = discord.Embed(
-                title=f"✨ Task Breakdown: {task}",
-                description="Here's your gentle task breakdown:",
-                color=discord.Color.blue()
-            )
-
-            # Add the steps to the embed
-            steps = response.choices[0].message.content.strip().split('\n')
-            for step in steps:
-                if step.strip():  # Skip empty lines
-                    embed.add_field(
-                        name="Step",
-                        value=step,
-                        inline=False
-                    )
-
-            # Add footer with context if provided
-            if context:
-                embed.set_footer(text=f"Context: {context}")
+            await reply.update(content, final=True)
 
-            await interaction.followup.send(embed=embed, ephemeral=True)
+        except LLMUnavailableError as e:
+            await interaction.followup.send(str(e), ephemeral=True)
 
         except Exception as e:
             await interaction.followup.send(
@@ -530,7 +893,8 @@ Make the steps:
         tasks="List all your tasks, separated by newlines or commas",
         energy_level="Your current energy level",
         time_available="How much time you have available (e.g. '2 hours', '30 minutes')",
-        priority_type="How you want to prioritize tasks"
+        priority_type="How you want to prioritize tasks",
+        fresh="Skip saved answers and get a brand new response"
     )
     @app_commands.choices(energy_level=[
         app_commands.Choice(name="High Energy ⚡", value="high"),
@@ -544,23 +908,19 @@ Make the steps:
         app_commands.Choice(name="Energy Based 🔋", value="energy"),
         app_commands.Choice(name="Importance First 🎯", value="importance")
     ])
+    @rate_limit(3, 60)
     async def organise_tasks(
         self,
         interaction: discord.Interaction,
         tasks: str,
         energy_level: app_commands.Choice[str],
         time_available: str = None,
-        priority_type: app_commands.Choice[str] = None
+        priority_type: app_commands.Choice[str] = None,
+        fresh: bool = False
     ):
         await interaction.response.defer(ephemeral=True)
         
         try:
-            # Check DeepSeek API status first
-            api_available, error_message = await check_deepseek_status()
-            if not api_available:
-                await interaction.followup.send(error_message, ephemeral=True)
-                return
-
             # Prepare the prompt for DeepSeek
             system_prompt = """You are a supportive ADHD coach who helps organize tasks in a manageable way.
             Your strengths are:
@@ -594,41 +954,27 @@ Please help me organize these tasks in an ADHD-friendly way that:
 5. Provides realistic time estimates
 6. Adds encouraging but realistic notes"""
 
-            # Call DeepSeek Chat
-            response = await client.chat.completions.create(
-                model="deepseek-chat",
-                messages=[
+            # Call DeepSeek Chat (or reuse a cached answer), streaming sections in as they arrive
+            reply = StreamingReply(
+                interaction,
+                lambda text, final: build_organise_embed(energy_level.name, time_available, text, final)
+            )
+            breakdown = await self._ask_llm(
+                "deepseek-chat",
+                [
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt}
                 ],
+                fresh=fresh,
+                reply=reply,
                 temperature=0.7,
                 max_tokens=1500
             )
 
-            breakdown = response.choices[0].message.content
-
-            # Create embed response
-            embed = discord.Embed(
-                title="✨ ADHD-Friendly Task Organization",
-                description=f"Energy Level: {energy_level.name}\n{f'Time Available: {time_available}' if time_available else ''}",
-                color=discord.Color.purple()
-            )
-
-            # Split the response into sections and add them to the embed
-            sections = breakdown.split('\n\n')
-            for section in sections:
-                if section.strip():
-                    # Extract title and content
-                    parts = section.split('\n', 1)
-                    if len(parts) > 1:
-                        title = parts[0].strip('# -')
-                        content = parts[1].strip()
-                        embed.add_field(name=title, value=content, inline=False)
+            await reply.update(breakdown, final=True)
 
-            # Add footer with gentle reminder
-            embed.set_footer(text="Remember: You don't have to do everything at once. Start small and celebrate your progress! 💝")
-
-            await interaction.followup.send(embed=embed, ephemeral=True)
+        except LLMUnavailableError as e:
+            await interaction.followup.send(str(e), ephemeral=True)
 
         except Exception as e:
             await interaction.followup.send(
@@ -641,7 +987,8 @@ Please help me organize these tasks in an ADHD-friendly way that:
     @app_commands.describe(
         task="The task you want motivation for",
         perspective="Choose what kind of motivation you need",
-        context="Any additional context about the task (optional)"
+        context="Any additional context about the task (optional)",
+        fresh="Skip saved answers and get a brand new response"
     )
     @app_commands.choices(perspective=[
         app_commands.Choice(name="Future Benefits (what you'll gain)", value="benefits"),
@@ -649,23 +996,19 @@ Please help me organize these tasks in an ADHD-friendly way that:
         app_commands.Choice(name="Past Success (remember similar wins)", value="past"),
         app_commands.Choice(name="Gentle Support (kind encouragement)", value="gentle")
     ])
+    @rate_limit(3, 60)
     async def motivate_task(
         self,
         interaction: discord.Interaction,
         task: str,
         perspective: app_commands.Choice[str],
-        context: str = None
+        context: str = None,
+        fresh: bool = False
     ):
         # Defer the response since API call might take time
         await interaction.response.defer(ephemeral=True)
 
         try:
-            # Check DeepSeek API status first
-            api_available, error_message = await check_deepseek_status()
-            if not api_available:
-                await interaction.followup.send(error_message, ephemeral=True)
-                return
-
             # Prepare the prompt based on perspective
             prompts = {
                 "benefits": "Focus on future benefits and positive outcomes. What will they gain? How will this improve their life?",
@@ -693,56 +1036,26 @@ Make the response:
 - Empowering without pressure
 - DO NOT use ### in your headings."""
 
-            # Call DeepSeek API
-            response = await client.chat.completions.create(
-                model="deepseek-chat",
-                messages=[
+            # Call DeepSeek API (or reuse a cached answer), streaming points in as they arrive
+            reply = StreamingReply(
+                interaction,
+                lambda text, final: build_motivation_embed(task, context, text, final)
+            )
+            content = await self._ask_llm(
+                "deepseek-chat",
+                [
                     {"role": "system", "content": "You are a compassionate motivation coach who helps people find genuine, intrinsic motivation for tasks. You understand ADHD challenges and provide gentle, specific encouragement without toxic positivity. Your responses are always kind, realistic, and focused on growth."},
                     {"role": "user", "content": base_prompt}
                 ],
+                fresh=fresh,
+                reply=reply,
                 temperature=0.7
             )
 
-            # Create embed response
-            embed = discord.Embed(
-                title=f"✨ Finding Joy in: {task}",
-                description="Here's some gentle encouragement:",
-                color=discord.Color.purple()
-            )
-
-            # Add the motivation points to the embed
-            sections = response.choices[0].message.content.strip().split('\n')
-            current_field = ""
-            current_content = []
-            
-            for line in sections:
-                if line.strip():
-                    if any(marker in line for marker in ['🎯', '💫', '🌟', '✨']):
-                        # If we have a previous field ready, add it
-                        if current_field and current_content:
-                            embed.add_field(
-                                name=current_field,
-                                value='\n'.join(current_content),
-                                inline=False
-                            )
-                            current_content = []
-                        current_field = line
-                    else:
-                        current_content.append(line)
-            
-            # Add the last field
-            if current_field and current_content:
-                embed.add_field(
-                    name=current_field,
-                    value='\n'.join(current_content),
-                    inline=False
-                )
-
-            # Add footer with context if provided
-            if context:
-                embed.set_footer(text=f"Context: {context}")
+            await reply.update(content, final=True)
 
-            await interaction.followup.send(embed=embed, ephemeral=True)
+        except LLMUnavailableError as e:
+            await interaction.followup.send(str(e), ephemeral=True)
 
         except Exception as e:
             await interaction.followup.send(
@@ -765,6 +1078,8 @@ Make the response:
             value=(
                 "`/habit create` - Create a new habit to track\n"
                 "`/habit list` - List all your habits and streaks\n"
+                "`/habit stats` - See longest streaks, completion rates and your check-in calendar\n"
+                "`/habit leaderboard` - See the longest current streaks\n"
                 "`/habit delete` - Delete a habit\n"
                 "`/habit edit` - Edit an existing habit\n"
                 "`/habit gentle-nudge` - Get a gentle reminder of tasks"
@@ -792,8 +1107,10 @@ Make the response:
                 "`/habit timer` - Set a Pomodoro-style timer\n"
                 "`/habit restock-add` - Track items for restocking\n"
                 "`/habit restock-done` - Mark an item as restocked\n"
+                "`/habit timezone` - Set the timezone your reminders follow\n"
                 "`/habit celebrate` - Record your achievements\n"
                 "`/habit celebration-history` - View past celebrations\n"
+                "`/habit search` - Search your celebrations and habits\n"
                 "`/habit event` - Create a Discord event"
             ),
             inline=False
@@ -889,16 +1206,12 @@ Make the response:
         self.bot.scheduler.add_job(
             self.timer_focus_end,
             'date',
-            run_date=datetime.now() + timedelta(minutes=duration.value),
+            run_date=datetime.now(timezone.utc) + timedelta(minutes=duration.value),
             args=[interaction.user.id, timer_message.id, activity, break_duration.value, reminder_type.value]
         )
         
     async def timer_focus_end(self, user_id: int, message_id: int, activity: str, break_duration: int, reminder_type: str):
         """Handle focus timer completion and break start."""
-        user = self.bot.get_user(user_id)
-        if not user:
-            return
-            
         # Create break start embed
         embed = discord.Embed(
             title="🌟 Focus Time Complete!",
@@ -933,27 +1246,22 @@ Make the response:
             inline=False
         )
         
-        try:
-            # Try to DM the user
-            await user.send(embed=embed)
-            
-            # Schedule break end notification
-            self.bot.scheduler.add_job(
-                self.timer_break_end,
-                'date',
-                run_date=datetime.now() + timedelta(minutes=break_duration),
-                args=[user_id, activity, reminder_type]
-            )
-        except discord.Forbidden:
-            # If DM fails, log it
-            print(f"Could not send timer notification to user {user_id}")
+        # DM the user through the delivery queue
+        message = await self.bot.dm_queue.enqueue(user_id, embed=embed)
+        if message is None:
+            logger.warning(f"Could not send timer notification to user {user_id}")
+            return
+        
+        # Schedule break end notification
+        self.bot.scheduler.add_job(
+            self.timer_break_end,
+            'date',
+            run_date=datetime.now(timezone.utc) + timedelta(minutes=break_duration),
+            args=[user_id, activity, reminder_type]
+        )
             
     async def timer_break_end(self, user_id: int, activity: str, reminder_type: str):
         """Handle break timer completion."""
-        user = self.bot.get_user(user_id)
-        if not user:
-            return
-            
         # Create break end embed
         embed = discord.Embed(
             title="🌸 Break Time Complete",
@@ -973,10 +1281,9 @@ Make the response:
             inline=False
         )
         
-        try:
-            await user.send(embed=embed)
-        except discord.Forbidden:
-            print(f"Could not send break end notification to user {user_id}")
+        message = await self.bot.dm_queue.enqueue(user_id, embed=embed)
+        if message is None:
+            logger.warning(f"Could not send break end notification to user {user_id}")
 
     @app_commands.command(name="celebrate", description="Record and celebrate your achievements, big or small!")
     @app_commands.describe(
@@ -1005,20 +1312,9 @@ Make the response:
         difficulty: app_commands.Choice[str],
         feeling: str = None
     ):
-        # Create celebrations table if it doesn't exist
+        celebrated_at = self.bot.clock.now().isoformat()
+        
         async with aiosqlite.connect(self.bot.db_path) as db:
-            await db.execute('''
-                CREATE TABLE IF NOT EXISTS celebrations (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER NOT NULL,
-                    achievement TEXT NOT NULL,
-                    category TEXT NOT NULL,
-                    difficulty TEXT NOT NULL,
-                    feeling TEXT,
-                    celebrated_at TEXT NOT NULL
-                )
-            ''')
-            
             # Record the celebration
             await db.execute('''
                 INSERT INTO celebrations 
@@ -1030,20 +1326,25 @@ Make the response:
                 category.value,
                 difficulty.value,
                 feeling,
-                datetime.now().isoformat()
+                celebrated_at
             ))
-            await db.commit()
             
-            # Get celebration count for this category
-            cursor = await db.execute(
-                'SELECT COUNT(*) FROM celebrations WHERE user_id = ? AND category = ?',
-                (interaction.user.id, category.value)
-            )
+            # Bump the running totals in the same transaction
+            cursor = await db.execute('''
+                INSERT INTO celebration_stats (user_id, category, count, last_celebrated_at)
+                VALUES (?, ?, 1, ?)
+                ON CONFLICT(user_id, category) DO UPDATE SET
+                    count = count + 1,
+                    last_celebrated_at = excluded.last_celebrated_at
+                RETURNING count
+            ''', (interaction.user.id, category.value, celebrated_at))
             category_count = (await cursor.fetchone())[0]
+            await cursor.close()
+            await db.commit()
             
-            # Get total celebration count
+            # Total across this user's categories (at most one row per category)
             cursor = await db.execute(
-                'SELECT COUNT(*) FROM celebrations WHERE user_id = ?',
+                'SELECT SUM(count) FROM celebration_stats WHERE user_id = ?',
                 (interaction.user.id,)
             )
             total_count = (await cursor.fetchone())[0]
@@ -1117,7 +1418,7 @@ Make the response:
         await interaction.response.defer(ephemeral=True)
         
         # Calculate date range
-        now = datetime.now()
+        now = self.bot.clock.now()
         if timeframe.value == "week":
             start_date = (now - timedelta(days=7)).isoformat()
         elif timeframe.value == "month":
@@ -1170,27 +1471,142 @@ Make the response:
                 })
             
             # Add fields for each category
-            category_names = {
-                "task": "Task Completion 📝",
-                "self_care": "Self Care 🌸",
-                "social": "Social Success 🤝",
-                "creative": "Creative Win 🎨",
-                "routine": "Routine Victory ⭐"
-            }
-            
             for cat, items in categories.items():
                 value = "\n".join([
                     f"• {item['achievement']} ({item['difficulty']}) - {item['date']}"
                     for item in items
                 ])
                 embed.add_field(
-                    name=category_names.get(cat, cat),
+                    name=CELEBRATION_CATEGORY_NAMES.get(cat, cat),
                     value=value,
                     inline=False
                 )
             
+            # All-time totals come from the maintained aggregates
+            cursor = await db.execute(
+                'SELECT category, count FROM celebration_stats WHERE user_id = ? ORDER BY count DESC',
+                (interaction.user.id,)
+            )
+            totals = await cursor.fetchall()
+            if totals:
+                embed.add_field(
+                    name="📊 All-Time Totals",
+                    value="\n".join(
+                        f"{CELEBRATION_CATEGORY_NAMES.get(cat, cat)}: {count}"
+                        for cat, count in totals
+                    ),
+                    inline=False
+                )
+            
             await interaction.followup.send(embed=embed, ephemeral=True)
 
+    @app_commands.command(name="search", description="Search your celebrations and habit descriptions")
+    @app_commands.describe(query="Words to look for (e.g. 'called the dentist')")
+    async def search(self, interaction: discord.Interaction, query: str):
+        if not self.bot.search_enabled:
+            await interaction.response.send_message(
+                "Search isn't available right now. Try `/habit celebration-history` instead.",
+                ephemeral=True
+            )
+            return
+        
+        fts_query = build_fts_query(query)
+        if not fts_query:
+            await interaction.response.send_message(
+                "Please include at least one word to search for.",
+                ephemeral=True
+            )
+            return
+        
+        await interaction.response.defer(ephemeral=True)
+        
+        user_id = interaction.user.id
+        habit_filter = habit_scope(interaction)
+        
+        async def fetch_page(cursor):
+            return await self._search_page(user_id, habit_filter, query, fts_query, cursor)
+        
+        embed, next_cursor = await fetch_page(None)
+        if next_cursor:
+            await interaction.followup.send(embed=embed, view=SearchResultsView(fetch_page, next_cursor), ephemeral=True)
+        else:
+            await interaction.followup.send(embed=embed, ephemeral=True)
+    
+    async def _search_page(self, user_id: int, habit_filter: tuple, query: str, fts_query: str, cursor: dict = None):
+        """Fetch one page of ranked search results, with celebrations and habits in separate sections.
+        
+        bm25 scores depend on each index's vocabulary and document lengths,
+        so a celebration's rank can't be compared with a habit's. Each kind
+        is ranked within its own index instead, and a page shows up to
+        SEARCH_PAGE_SIZE of each.
+        
+        `cursor` maps each kind with more results to its last row's
+        (rank, id) rather than an OFFSET, so later pages cost the same as the
+        first; kinds that have run out are left out of it. Habits are limited
+        by `habit_filter`, a condition and parameters from habit_scope().
+        """
+        habit_condition, habit_params = habit_filter
+        sources = {
+            'celebration': ('''
+                SELECT c.id AS ref_id, celebrations_fts.rank AS rank, c.category AS label,
+                       snippet(celebrations_fts, -1, '**', '**', '…', 12) AS snippet,
+                       c.celebrated_at AS happened_at
+                FROM celebrations_fts
+                JOIN celebrations c ON c.id = celebrations_fts.rowid
+                WHERE celebrations_fts MATCH ? AND c.user_id = ?
+            ''', [fts_query, user_id]),
+            'habit': (f'''
+                SELECT h.id AS ref_id, habits_fts.rank AS rank, h.name AS label,
+                       snippet(habits_fts, -1, '**', '**', '…', 12) AS snippet,
+                       h.created_at AS happened_at
+                FROM habits_fts
+                JOIN habits h ON h.id = habits_fts.rowid
+                WHERE habits_fts MATCH ? AND {habit_condition}
+            ''', [fts_query, *habit_params]),
+        }
+        
+        results, next_cursor = {}, {}
+        async with self.bot.db_pool.acquire() as db:
+            for kind, (source, params) in sources.items():
+                if cursor and kind not in cursor:
+                    continue  # no more results of this kind
+                sql = f'SELECT ref_id, rank, label, snippet, happened_at FROM ({source})'
+                params = list(params)
+                if cursor:
+                    last_rank, last_id = cursor[kind]
+                    sql += ' WHERE rank > ? OR (rank = ? AND ref_id > ?)'
+                    params += [last_rank, last_rank, last_id]
+                # Fetch one extra row to know whether there's another page
+                sql += ' ORDER BY rank, ref_id LIMIT ?'
+                params.append(SEARCH_PAGE_SIZE + 1)
+                rows = await (await db.execute(sql, params)).fetchall()
+        
+                if len(rows) > SEARCH_PAGE_SIZE:
+                    rows = rows[:SEARCH_PAGE_SIZE]
+                    next_cursor[kind] = (rows[-1][1], rows[-1][0])
+                results[kind] = rows
+        
+        embed = discord.Embed(
+            title=f"🔎 Search: {query}",
+            description="Here's what I found:" if any(results.values()) else "Nothing matched that search. Try different words! ✨",
+            color=discord.Color.purple()
+        )
+        
+        celebrations = results.get('celebration')
+        if celebrations:
+            embed.add_field(name="🎉 Celebrations", value="\u200b", inline=False)
+            for ref_id, rank, label, snippet, happened_at in celebrations:
+                date = datetime.fromisoformat(happened_at).strftime("%Y-%m-%d")
+                embed.add_field(name=f"{CELEBRATION_CATEGORY_NAMES.get(label, label)} - {date}", value=snippet or label, inline=False)
+        
+        habits = results.get('habit')
+        if habits:
+            embed.add_field(name="🌱 Habits", value="\u200b", inline=False)
+            for ref_id, rank, label, snippet, happened_at in habits:
+                embed.add_field(name=label, value=snippet or label, inline=False)
+        
+        return embed, next_cursor or None
+
     @app_commands.command(name="energy-check", description="Match tasks to your current energy level")
     @app_commands.describe(
         energy_level="Your current energy level",
@@ -1626,12 +2042,14 @@ Make the response:
         await interaction.response.defer(ephemeral=True)
         
         try:
-            # Parse the start time
-            start = datetime.strptime(start_time, "%Y-%m-%d %H:%M")
+            # Parse the start time, in the organiser's timezone
+            start = datetime.strptime(start_time, "%Y-%m-%d %H:%M").replace(
+                tzinfo=self.bot.clock.zone(self.bot.user_timezone(interaction.user.id))
+            )
             end = start + timedelta(minutes=duration)
             
             # Ensure the event is in the future
-            if start < datetime.now():
+            if start < self.bot.clock.now():
                 await interaction.followup.send(
                     "Event start time must be in the future!",
                     ephemeral=True
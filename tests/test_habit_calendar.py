@@ -0,0 +1,75 @@
+import random
+import unittest
+from datetime import date, timedelta
+
+from assets.utils.habit_calendar import HabitCalendar, mark
+
+
+def calendar_of(days) -> HabitCalendar:
+    years = {}
+    for day in days:
+        years[day.year] = mark(years.get(day.year), day)
+    return HabitCalendar(years)
+
+
+def brute_streak_ending(days: set, day: date) -> int:
+    streak = 0
+    while day in days:
+        streak += 1
+        day -= timedelta(days=1)
+    return streak
+
+
+def brute_longest_streak(days: set) -> int:
+    return max((brute_streak_ending(days, day) for day in days), default=0)
+
+
+class HabitCalendarTest(unittest.TestCase):
+
+    def test_empty_calendar(self):
+        calendar = HabitCalendar({})
+        self.assertEqual(calendar.longest_streak(), 0)
+        self.assertEqual(calendar.streak_ending(date(2026, 4, 1)), 0)
+        self.assertEqual(calendar.current_streak(date(2026, 4, 1)), 0)
+
+    def test_streak_across_new_year_and_a_leap_day(self):
+        start = date(2027, 12, 20)
+        days = {start + timedelta(days=i) for i in range(80)}  # to 8 March 2028, through 29 February
+        calendar = calendar_of(days)
+        self.assertEqual(calendar.longest_streak(), 80)
+        self.assertEqual(calendar.streak_ending(date(2028, 2, 29)), 72)
+        self.assertEqual(calendar.streak_ending(date(2028, 3, 9)), 0)
+        self.assertEqual(calendar.current_streak(date(2028, 3, 9)), 80)
+
+    def test_against_brute_force(self):
+        rng = random.Random(7)
+        for _ in range(150):
+            # Calendars spanning up to three years, some with a year missing in between
+            years = rng.sample(range(2024, 2029), rng.randint(1, 3))
+            density = rng.choice((0.1, 0.5, 0.9, 0.99))
+            days = set()
+            for year in years:
+                day = date(year, 1, 1)
+                while day.year == year:
+                    if rng.random() < density:
+                        days.add(day)
+                    day += timedelta(days=1)
+            calendar = calendar_of(days)
+
+            self.assertEqual(calendar.longest_streak(), brute_longest_streak(days))
+            for _ in range(40):
+                day = date(2023, 12, 1) + timedelta(days=rng.randrange(365 * 6))
+                self.assertEqual(calendar.streak_ending(day), brute_streak_ending(days, day), day)
+
+    def test_runs_of_every_length_up_to_a_year(self):
+        for length in range(1, 367):
+            start = date(2028, 1, 1)
+            days = {start + timedelta(days=i) for i in range(length)}
+            days.add(start + timedelta(days=length + 1))  # and a one-day run after a gap
+            calendar = calendar_of(days)
+            self.assertEqual(calendar.longest_streak(), length)
+            self.assertEqual(calendar.streak_ending(start + timedelta(days=length - 1)), length)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import itertools
+import unittest
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from assets.utils.schedule_index import ScheduleIndex, next_fire
+
+HOBART = 'Australia/Hobart'
+NEW_YORK = 'America/New_York'
+
+
+def utc(*args) -> datetime:
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def wall_clock(instant: datetime, tz_name: str) -> str:
+    return instant.astimezone(ZoneInfo(tz_name)).strftime('%Y-%m-%d %H:%M')
+
+
+class NextFireTest(unittest.TestCase):
+    # Hobart springs forward from 02:00 AEST to 03:00 AEDT on 4 October 2026
+    # and falls back from 03:00 AEDT to 02:00 AEST on 5 April 2026
+
+    def test_spring_forward_uses_the_new_offset_on_the_day(self):
+        self.assertEqual(next_fire('07:00', HOBART, utc(2026, 10, 2, 12, 0)), utc(2026, 10, 2, 21, 0))
+        self.assertEqual(next_fire('07:00', HOBART, utc(2026, 10, 2, 21, 0)), utc(2026, 10, 3, 20, 0))
+
+    def test_skipped_time_fires_an_hour_later_on_the_wall_clock(self):
+        fire_at = next_fire('02:30', HOBART, utc(2026, 10, 3, 12, 0))
+        self.assertEqual(fire_at, utc(2026, 10, 3, 16, 30))
+        self.assertEqual(wall_clock(fire_at, HOBART), '2026-10-04 03:30')
+
+    def test_fall_back_uses_the_new_offset_on_the_day(self):
+        self.assertEqual(next_fire('07:00', HOBART, utc(2026, 4, 3, 12, 0)), utc(2026, 4, 3, 20, 0))
+        self.assertEqual(next_fire('07:00', HOBART, utc(2026, 4, 3, 20, 0)), utc(2026, 4, 4, 21, 0))
+
+    def test_repeated_time_fires_once_on_its_first_occurrence(self):
+        first = next_fire('02:30', HOBART, utc(2026, 4, 4, 12, 0))
+        self.assertEqual(first, utc(2026, 4, 4, 15, 30))
+        # Not again an hour later, when the wall clock reads 02:30 a second time
+        self.assertEqual(next_fire('02:30', HOBART, first), utc(2026, 4, 5, 16, 30))
+
+    def test_northern_hemisphere_changes(self):
+        # New York springs forward on 8 March and falls back on 1 November 2026
+        self.assertEqual(next_fire('02:30', NEW_YORK, utc(2026, 3, 8, 0, 0)), utc(2026, 3, 8, 7, 30))
+        self.assertEqual(next_fire('01:30', NEW_YORK, utc(2026, 11, 1, 0, 0)), utc(2026, 11, 1, 5, 30))
+        self.assertEqual(next_fire('01:30', NEW_YORK, utc(2026, 11, 1, 5, 30)), utc(2026, 11, 2, 6, 30))
+
+    def test_always_after_and_at_the_wall_clock_time(self):
+        # Every day through both hemispheres' changes in 2026
+        for tz_name, start in itertools.product((HOBART, NEW_YORK), (utc(2026, 3, 1, 0, 0), utc(2026, 9, 25, 0, 0))):
+            for local_time in ('00:00', '01:30', '02:30', '07:00', '23:59'):
+                instant = start
+                for _ in range(45):
+                    fire_at = next_fire(local_time, tz_name, instant)
+                    self.assertGreater(fire_at, instant)
+                    self.assertLessEqual(fire_at - instant, timedelta(hours=25))
+                    local = fire_at.astimezone(ZoneInfo(tz_name))
+                    if local.strftime('%H:%M') != local_time:
+                        # Only a time skipped by spring-forward may move, and only by the hour skipped
+                        self.assertEqual(local.strftime('%H:%M'), f"{int(local_time[:2]) + 1:02d}{local_time[2:]}")
+                    instant = fire_at
+
+
+class ScheduleIndexDstTest(unittest.TestCase):
+
+    def drain(self, index: ScheduleIndex, start: datetime, days: int) -> list:
+        """Fire times popped by a dispatcher ticking every minute for `days` days."""
+        fired, now = [], start
+        while now < start + timedelta(days=days):
+            fired += [fire_at for _, fire_at in index.pop_due(now)]
+            now += timedelta(minutes=1)
+        return fired
+
+    def test_daily_entry_across_spring_forward(self):
+        start = utc(2026, 10, 1, 0, 0)
+        index = ScheduleIndex()
+        index.set(('briefing', 1), '07:00', HOBART, start)
+        fired = self.drain(index, start, 5)
+
+        self.assertEqual([wall_clock(fire_at, HOBART)[-5:] for fire_at in fired], ['07:00'] * 5)
+        self.assertEqual([b - a for a, b in zip(fired, fired[1:])], [timedelta(hours=24), timedelta(hours=23), timedelta(hours=24), timedelta(hours=24)])
+
+    def test_daily_entry_across_fall_back(self):
+        start = utc(2026, 4, 2, 0, 0)
+        index = ScheduleIndex()
+        index.set(('briefing', 1), '07:00', HOBART, start)
+        fired = self.drain(index, start, 5)
+
+        self.assertEqual([wall_clock(fire_at, HOBART)[-5:] for fire_at in fired], ['07:00'] * 5)
+        self.assertEqual([b - a for a, b in zip(fired, fired[1:])], [timedelta(hours=24), timedelta(hours=25), timedelta(hours=24), timedelta(hours=24)])
+
+    def test_skipped_and_repeated_times_fire_once_a_day(self):
+        for start, days in ((utc(2026, 10, 2, 0, 0), 4), (utc(2026, 4, 3, 0, 0), 4)):
+            index = ScheduleIndex()
+            index.set(('reminder', 1), '02:30', HOBART, start)
+            fired = self.drain(index, start, days)
+            local_days = [wall_clock(fire_at, HOBART)[:10] for fire_at in fired]
+            self.assertEqual(len(local_days), days)
+            self.assertEqual(len(set(local_days)), days)
+
+    def test_late_tick_fires_once_and_reschedules_after_now(self):
+        index = ScheduleIndex()
+        index.set(('reminder', 1), '02:30', HOBART, utc(2026, 4, 4, 12, 0))
+        # The dispatcher was stalled through both 02:30s of the fall-back night
+        due = index.pop_due(utc(2026, 4, 4, 17, 0))
+        self.assertEqual(due, [(('reminder', 1), utc(2026, 4, 4, 15, 30))])
+        self.assertEqual(index.next_fire(('reminder', 1)), utc(2026, 4, 5, 16, 30))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import json
+import random
+import unittest
+from datetime import datetime
+from types import SimpleNamespace
+
+from assets.utils.clock import VirtualClock
+from assets.utils.quota import CONSERVE, GOOGLE_MAPS, NORMAL, QuotaGovernor
+from assets.utils.traffic import MIN_MATRIX_DENSITY, fetch_driving_estimates, plan_matrix_batches
+from assets.utils.upstream import UpstreamResponse
+
+
+def coordinates(n: int) -> str:
+    return f"-42.{n:04d},147.{n:04d}"
+
+
+def billed(batches) -> int:
+    return sum(len(origins) * len(destinations) for origins, destinations in batches)
+
+
+def covered(batches) -> set:
+    return {(origin, destination) for origins, destinations in batches for origin in origins for destination in destinations}
+
+
+def _dumps(value) -> bytes:
+    return json.dumps(value).encode('utf-8')
+
+
+class FakeRoutes:
+    """Answers computeRouteMatrix with one element per origin x destination, as Google does."""
+
+    def __init__(self):
+        self.requests = []
+
+    async def post(self, url, json=None, **kwargs):
+        # json is the request payload, as in aiohttp
+        origins, destinations = json['origins'], json['destinations']
+        self.requests.append(len(origins) * len(destinations))
+        elements = [
+            {'originIndex': i, 'destinationIndex': j, 'duration': '600s', 'staticDuration': '500s', 'distanceMeters': 5000}
+            for i in range(len(origins)) for j in range(len(destinations))
+        ]
+        return UpstreamResponse(200, {}, _dumps(elements))
+
+
+class PlanMatrixBatchesTest(unittest.TestCase):
+
+    def test_scattered_pairs_are_sent_one_per_request(self):
+        pairs = [(coordinates(i), coordinates(1000 + i)) for i in range(100)]
+        batches = plan_matrix_batches(pairs)
+        self.assertEqual(billed(batches), 100)
+        self.assertEqual(covered(batches), set(pairs))
+
+    def test_shared_destination_is_one_request(self):
+        office = coordinates(9999)
+        pairs = [(coordinates(i), office) for i in range(40)]
+        batches = plan_matrix_batches(pairs)
+        self.assertEqual(len(batches), 1)
+        self.assertEqual(billed(batches), 40)
+
+    def test_large_star_is_split_within_the_element_limit(self):
+        office = coordinates(9999)
+        pairs = [(coordinates(i), office) for i in range(30)]
+        batches = plan_matrix_batches(pairs, max_elements=8)
+        self.assertTrue(all(len(origins) * len(destinations) <= 8 for origins, destinations in batches))
+        self.assertEqual(billed(batches), 30)
+        self.assertEqual(covered(batches), set(pairs))
+
+    def test_billed_elements_stay_close_to_pairs_needed(self):
+        rng = random.Random(42)
+        for _ in range(200):
+            origins = [coordinates(i) for i in range(rng.randint(1, 30))]
+            destinations = [coordinates(1000 + i) for i in range(rng.randint(1, 10))]
+            pairs = list({(rng.choice(origins), rng.choice(destinations)) for _ in range(rng.randint(1, 120))})
+            batches = plan_matrix_batches(pairs, max_elements=rng.choice((4, 25, 625)))
+            self.assertTrue(set(pairs) <= covered(batches))
+            self.assertLessEqual(billed(batches), len(pairs) / MIN_MATRIX_DENSITY)
+
+
+class FetchDrivingEstimatesTest(unittest.IsolatedAsyncioTestCase):
+
+    def quota(self, cap: int) -> QuotaGovernor:
+        bot = SimpleNamespace(clock=VirtualClock(datetime(2026, 4, 1, 7, 0)))
+        return QuotaGovernor(bot, {(GOOGLE_MAPS, 'calls', 'day'): cap})
+
+    async def test_quota_is_charged_for_billed_elements(self):
+        quota = self.quota(1000)
+        routes = FakeRoutes()
+        pairs = [(coordinates(i), coordinates(1000 + i)) for i in range(100)]
+        estimates = await fetch_driving_estimates(routes, pairs, 'key', 'https://routes.example', quota=quota)
+
+        self.assertTrue(all(estimates[pair] is not None for pair in pairs))
+        self.assertEqual(sum(routes.requests), 100)
+        self.assertEqual(quota._used(GOOGLE_MAPS, 'calls', 'day'), 100)
+        self.assertEqual(quota.level(GOOGLE_MAPS), NORMAL)
+
+        await fetch_driving_estimates(routes, pairs[:60], 'key', 'https://routes.example', quota=quota)
+        self.assertEqual(quota._used(GOOGLE_MAPS, 'calls', 'day'), 160)
+
+    async def test_requests_past_the_cap_are_not_sent(self):
+        quota = self.quota(250)
+        quota.record(GOOGLE_MAPS, calls=200)
+        self.assertEqual(quota.level(GOOGLE_MAPS), CONSERVE)
+        routes = FakeRoutes()
+        pairs = [(coordinates(i), coordinates(1000 + i)) for i in range(100)]
+        estimates = await fetch_driving_estimates(routes, pairs, 'key', 'https://routes.example', quota=quota)
+
+        self.assertEqual(sum(routes.requests), 50)
+        self.assertEqual(sum(estimate is not None for estimate in estimates.values()), 50)
+        self.assertEqual(quota._used(GOOGLE_MAPS, 'calls', 'day'), 250)
+
+
+if __name__ == '__main__':
+    unittest.main()
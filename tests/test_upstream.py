@@ -0,0 +1,58 @@
+import unittest
+
+from aiohttp import web
+
+from assets.utils.upstream import UpstreamClient
+
+
+class StaleResponseTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.healthy = True
+        self.requests = []
+
+        async def directions(request):
+            self.requests.append(dict(request.query))
+            if not self.healthy:
+                return web.Response(status=503)
+            return web.json_response({'departure_time': request.query['departure_time']})
+
+        app = web.Application()
+        app.router.add_get('/directions', directions)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/directions"
+        self.client = UpstreamClient(
+            'test_transit', max_retries=0, stale_ttl=300, stale_ignore_params=('departure_time', 'key')
+        )
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        await self.runner.cleanup()
+
+    def params(self, departure_time: int, origin: str = 'Home::-42.88,147.32') -> dict:
+        return {'origin': origin, 'destination': 'Work::-42.90,147.33', 'departure_time': departure_time, 'key': 'secret'}
+
+    async def test_last_answer_is_served_for_a_later_departure_time(self):
+        response = await self.client.get(self.url, params=self.params(1000))
+        self.assertEqual((response.status, response.stale), (200, False))
+        self.assertEqual(self.requests[0]['origin'], 'Home::-42.88,147.32')
+
+        self.healthy = False
+        response = await self.client.get(self.url, params=self.params(1037))
+        self.assertTrue(response.stale)
+        self.assertEqual(response.json(), {'departure_time': '1000'})
+
+    async def test_other_routes_are_not_served_from_the_cache(self):
+        await self.client.get(self.url, params=self.params(1000))
+
+        self.healthy = False
+        response = await self.client.get(self.url, params=self.params(1037, origin='Gym::-42.87,147.31'))
+        self.assertEqual((response.status, response.stale), (503, False))
+
+
+if __name__ == '__main__':
+    unittest.main()